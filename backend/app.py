@@ -73,12 +73,32 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"[WARN] Could not initialize YOLO client: {e}")
 
+    # Initialize multi-tier cache (in-process L1 + Redis L2)
+    try:
+        from src.cache import init_cache
+        init_cache()
+        print("[OK] Cache service initialized")
+    except Exception as e:
+        print(f"[WARN] Could not initialize cache service: {e}")
+
     print("[OK] Sentrix Backend ready!")
 
     yield
 
     # Shutdown
     print("[SHUTDOWN] Shutting down Sentrix Backend...")
+    try:
+        from src.cache import shutdown_cache
+        await shutdown_cache()
+    except Exception as e:
+        print(f"[WARN] Could not close cache service: {e}")
+    try:
+        from src.utils.cpu_pool import shutdown_cpu_pool
+        shutdown_cpu_pool()
+    except Exception as e:
+        print(f"[WARN] Could not stop CPU pool: {e}")
+    if limiter is not None:
+        await limiter.close()
     print("[OK] Cleanup complete")
 
 
@@ -114,6 +134,26 @@ except ImportError as e:
     limiter = None
 
 
+# ============================================
+# HTTP Response Cache
+# ============================================
+# Registered before CORS so it sits inside it: CORS headers depend on the
+# request origin and must never be replayed from a cached entry.
+from src.cache.middleware import CacheMiddleware
+from src.cache.tags import HEATMAP, MAP_STATS
+app.add_middleware(
+    CacheMiddleware,
+    default_ttl=60,
+    include_paths=["/api/v1/map-stats", "/api/v1/heatmap-data"],
+    vary_by_user_paths=["/api/v1/heatmap-data"],
+    path_tags={
+        "/api/v1/map-stats": [MAP_STATS],
+        "/api/v1/heatmap-data": [HEATMAP],
+    },
+)
+print("[OK] Response cache middleware configured")
+
+
 # ============================================
 # CORS Configuration
 # ============================================
@@ -479,6 +519,10 @@ async def readiness_check():
         checks["supabase"] = {"status": "degraded", "error": str(e)}
         # Supabase is used for storage, but not critical for core functionality
 
+    # 4. CPU pool (image work): load and per-stage timing, informational
+    from src.utils.cpu_pool import get_cpu_pool
+    checks["cpu_pool"] = {"status": "healthy", **get_cpu_pool().snapshot()}
+
     status_code = 200 if all_healthy else 503
 
     return JSONResponse(
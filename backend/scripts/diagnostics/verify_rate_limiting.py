@@ -44,9 +44,9 @@ app_checks = {
 
 # Verificaciones para rate_limit.py
 middleware_checks = {
-    "Limiter import": r"from slowapi import Limiter",
-    "Get remote address": r"from slowapi\.util import get_remote_address",
-    "Limiter instance": r"limiter = Limiter\(key_func=get_remote_address\)",
+    "Limiter import": r"from sentrix_shared\.rate_limiting import .*RateLimiter",
+    "Get remote address": r"def get_remote_address\(",
+    "Limiter instance": r"limiter = EndpointRateLimiter\(",
     "Setup function": r"def setup_rate_limiting\(app\)"
 }
 
@@ -23,7 +23,12 @@ from ...schemas.analyses import (
 from src.services.analysis_service import analysis_service
 from ...config import get_settings
 from ...utils.auth import get_current_user, get_current_active_user, get_optional_current_user
-from ...utils.file_validation import validate_uploaded_image  # SECURITY: New validation
+from ...utils.file_validation import (  # SECURITY: New validation
+    ValidatedUpload,
+    validate_upload_stream,
+    validate_uploaded_image,
+    validate_uploaded_image_stream
+)
 from ...database.models.models import UserProfile
 from ...logging_config import get_logger
 from ...exceptions import (
@@ -291,6 +296,7 @@ def _build_analysis_list_item(analysis: dict) -> dict:
         "processed_image_url": analysis.get("processed_image_url"),
         "processed_image_filename": analysis.get("processed_image_filename"),
         "image_size_bytes": analysis.get("image_size_bytes", 0),
+        "image_previews": analysis.get("image_previews"),
         "location": location_data,
         "camera_info": camera_info,
         "model_used": analysis.get("model_used", "unknown"),
@@ -339,7 +345,8 @@ async def create_analysis(
 
     try:
         # SECURITY: Comprehensive file validation (size + MIME type + sanitization)
-        image_data, safe_filename = await validate_uploaded_image(
+        # in one streaming pass that also hashes the content for deduplication
+        upload, safe_filename = await validate_uploaded_image_stream(
             file,
             max_size=settings.max_file_size
         )
@@ -347,8 +354,9 @@ async def create_analysis(
             "file_validated",
             original_name=file.filename,
             safe_name=safe_filename,
-            size_mb=len(image_data) / (1024 * 1024)
+            size_mb=upload.size / (1024 * 1024)
         )
+        image_data = upload.read()
 
         # Process image using service layer
         from src.services.analysis_service import analysis_service as service_instance
@@ -360,7 +368,8 @@ async def create_analysis(
             include_gps=include_gps,
             manual_latitude=latitude,
             manual_longitude=longitude,
-            user_id=str(current_user.id)  # Pass user_id for RLS
+            user_id=str(current_user.id),  # Pass user_id for RLS
+            content_signature=upload.content_signature()
         )
 
         # Validate result is not None
@@ -631,6 +640,7 @@ async def get_analysis(
         processed_image_url=analysis_data.get("processed_image_url"),
         processed_image_filename=analysis_data.get("processed_image_filename"),
         image_size_bytes=analysis_data.get("image_size_bytes", 0),
+        image_previews=analysis_data.get("image_previews"),
         location=location_data,
         camera_info=camera_info,
         model_used=analysis_data.get("model_used", "unknown"),
@@ -1431,7 +1441,7 @@ def _validate_async_file_upload(file: UploadFile, filename: Optional[str] = None
 async def _prepare_async_task_data(
     file: UploadFile,
     confidence_threshold: float
-) -> tuple[bytes, str]:
+) -> tuple[ValidatedUpload, str]:
     """
     Prepare image data for async processing.
 
@@ -1440,28 +1450,26 @@ async def _prepare_async_task_data(
         confidence_threshold: Confidence threshold value
 
     Returns:
-        tuple: (image_data, base64_encoded_data)
+        tuple: (validated upload, base64_encoded_data)
 
     Raises:
         HTTPException: If file is too large or invalid
     """
     import base64
 
-    # Read image data
-    image_data = await file.read()
-
-    # Validate size
-    max_size = settings.max_file_size
-    if len(image_data) > max_size:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum {max_size // (1024*1024)}MB"
-        )
+    # Validate size and type while streaming (nothing is read if too large)
+    upload = await validate_upload_stream(file, max_size=settings.max_file_size)
 
-    # Encode image data as base64 for Celery (JSON serializable)
-    image_data_b64 = base64.b64encode(image_data).decode('utf-8')
+    # Encode image data as base64 for Celery (JSON serializable), block by
+    # block from the spooled upload: 3-byte aligned blocks concatenate into
+    # the same base64 as the whole content, without a raw in-memory copy
+    block_size = 3 * 256 * 1024
+    parts = []
+    while block := upload.file.read(block_size):
+        parts.append(base64.b64encode(block).decode('ascii'))
+    image_data_b64 = ''.join(parts)
 
-    return image_data, image_data_b64
+    return upload, image_data_b64
 
 
 def _submit_celery_task(
@@ -1686,7 +1694,7 @@ async def create_analysis_async(
         validate_confidence_threshold(confidence_threshold)
 
         # Prepare task data
-        image_data, image_data_b64 = await _prepare_async_task_data(
+        upload, image_data_b64 = await _prepare_async_task_data(
             file,
             confidence_threshold
         )
@@ -1697,7 +1705,7 @@ async def create_analysis_async(
         logger.info(
             "submitting_async_analysis",
             filename=file.filename,
-            file_size=len(image_data),
+            file_size=upload.size,
             confidence_threshold=confidence_threshold,
             user_id=current_user.id if current_user else None
         )
@@ -1735,6 +1743,112 @@ async def create_analysis_async(
         raise ImageProcessingException(f"Failed to submit async analysis: {str(e)}")
 
 
+async def _save_video_upload(file: UploadFile) -> tuple[str, int]:
+    """
+    Stream an uploaded video to settings.video_upload_dir in 1MB chunks
+
+    Returns:
+        tuple: (path, size in bytes)
+
+    Raises:
+        HTTPException: 413 if the video exceeds settings.max_video_size
+    """
+    upload_dir = settings.video_upload_dir
+    os.makedirs(upload_dir, exist_ok=True)
+    file_ext = os.path.splitext(file.filename)[1].lower()
+    video_path = os.path.join(upload_dir, f"{uuid.uuid4()}{file_ext}")
+
+    size = 0
+    try:
+        with open(video_path, "wb") as out:
+            while chunk := await file.read(1024 * 1024):
+                size += len(chunk)
+                if size > settings.max_video_size:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Video too large. Maximum {settings.max_video_size // (1024*1024)}MB"
+                    )
+                await asyncio.to_thread(out.write, chunk)
+    except BaseException:
+        if os.path.exists(video_path):
+            os.unlink(video_path)
+        raise
+
+    return video_path, size
+
+
+@router.post("/analyses/video")
+async def create_video_analysis(
+    file: UploadFile = File(...),
+    confidence_threshold: float = Form(None),
+    include_gps: bool = Form(True),
+    current_user: UserProfile = Depends(get_current_active_user)
+):
+    """
+    Submit a video for async analysis (one result per detected site)
+
+    The video is streamed to disk and analyzed by a Celery worker through
+    the YOLO service's /detect/video; poll /analyses/status/{job_id}.
+
+    Args:
+        file: Video file (.mp4, .mov, .m4v, .avi, .mkv, .webm)
+        confidence_threshold: Detection confidence threshold (0.1-1.0)
+        include_gps: Read the recording location from the video metadata
+
+    Returns:
+        dict: Job ID and status URL for polling
+    """
+    from ...logging_config import get_logger, get_request_id
+    from ...validators.analysis_validators import validate_confidence_threshold
+    from ...tasks.analysis_tasks import process_video_analysis_task
+
+    logger = get_logger(__name__)
+
+    if confidence_threshold is None:
+        confidence_threshold = settings.yolo_confidence_threshold
+
+    if not file or not file.filename:
+        raise HTTPException(status_code=400, detail="Video file is required")
+    file_ext = os.path.splitext(file.filename)[1].lower()
+    if file_ext not in settings.allowed_video_extensions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format: {file_ext}. Supported: {', '.join(settings.allowed_video_extensions)}"
+        )
+    validate_confidence_threshold(confidence_threshold)
+
+    video_path = None
+    try:
+        video_path, size = await _save_video_upload(file)
+
+        task = process_video_analysis_task.apply_async(
+            kwargs={
+                "video_path": video_path,
+                "filename": file.filename,
+                "confidence_threshold": confidence_threshold,
+                "include_gps": include_gps,
+                "user_id": str(current_user.id) if current_user else None,
+                "request_id": get_request_id()
+            }
+        )
+        logger.info("video_analysis_submitted", task_id=task.id, filename=file.filename, file_size=size)
+
+        return {
+            "job_id": task.id,
+            "status": "pending",
+            "status_url": f"/api/v1/analyses/status/{task.id}",
+            "message": "Video submitted successfully. Use status_url to check progress."
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        if video_path and os.path.exists(video_path):
+            os.unlink(video_path)
+        logger.error("video_analysis_submission_failed", filename=file.filename, error=str(e), exc_info=True)
+        raise ImageProcessingException(f"Failed to submit video analysis: {str(e)}")
+
+
 @router.get("/analyses/status/{job_id}")
 async def get_analysis_status(job_id: str):
     """
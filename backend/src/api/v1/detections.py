@@ -8,18 +8,24 @@ Provides endpoints for managing temporal validity of detections:
 - Get detections expiring soon
 - Extend detection validity
 - Re-validate expired detections
+- Bulk expert review (validation and extension in one set-based update)
 - Get validity statistics
 """
 
 import uuid
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Literal
 from fastapi import APIRouter, HTTPException, Depends, Query
-from pydantic import BaseModel, Field
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, model_validator
+from sqlalchemy.orm import Session
 
 from ...utils.auth import get_current_user, get_current_active_user
+from ...database.connection import get_db
 from ...database.models.models import UserProfile
+from ...database.repositories.detection_repository import DetectionRepository
 from ...utils.supabase_client import get_supabase_client
+from ...cache.tags import invalidate_analysis_cache
 
 try:
     from ...utils.temporal_validity import (
@@ -79,6 +85,45 @@ class ValidityExtensionResponse(BaseModel):
     reason: str
 
 
+class BulkReviewDecision(BaseModel):
+    """Expert decision on one detection"""
+    detection_id: uuid.UUID
+    expected_version: int = Field(..., ge=0, description="Detection version the reviewer saw")
+    validation_status: Optional[Literal["validated_positive", "validated_negative", "requires_review"]] = None
+    validation_notes: Optional[str] = Field(None, max_length=1000)
+    extension_days: Optional[int] = Field(None, ge=1, le=365, description="Days to extend validity (1-365)")
+
+    @model_validator(mode="after")
+    def check_action(self):
+        if self.validation_status is None and self.extension_days is None:
+            raise ValueError("A decision needs validation_status and/or extension_days")
+        return self
+
+
+class BulkReviewRequest(BaseModel):
+    """Expert decisions applied together"""
+    decisions: List[BulkReviewDecision] = Field(..., min_length=1, max_length=1000)
+
+
+class BulkReviewOutcome(BaseModel):
+    """Result of one decision"""
+    detection_id: str
+    outcome: str  # updated, conflict, not_found, invalid
+    version: Optional[int] = None
+    current_version: Optional[int] = None
+    expires_at: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkReviewResponse(BaseModel):
+    """Per-detection outcomes of a bulk review"""
+    updated: int
+    conflicts: int
+    not_found: int
+    invalid: int
+    results: List[BulkReviewOutcome]
+
+
 class ValidityStatistics(BaseModel):
     """Statistics about detection validity"""
     total_detections: int
@@ -308,6 +353,8 @@ async def extend_validity(
                 detail="Failed to update detection in database"
             )
 
+        await invalidate_analysis_cache(detection.get('analysis_id'))
+
         return ValidityExtensionResponse(
             detection_id=request.detection_id,
             old_expires_at=current_expires_at,
@@ -327,6 +374,62 @@ async def extend_validity(
         )
 
 
+@router.post("/detections/bulk-review", response_model=BulkReviewResponse)
+async def bulk_review_detections(
+    request: BulkReviewRequest,
+    current_user: UserProfile = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Apply many expert decisions (validation and/or validity extension) at once
+    Aplicar muchas decisiones de expertos a la vez
+
+    Requires EXPERT or ADMIN role.
+
+    All decisions are written by one set-based UPDATE. Each one only applies
+    if the detection is still at expected_version; otherwise its outcome is
+    "conflict" with the current version, so two reviewers never silently
+    overwrite each other. Other decisions in the request still apply.
+
+    Returns:
+        Counts per outcome and one result per decision, in request order
+    """
+    if current_user.role not in ['expert', 'admin']:
+        raise HTTPException(
+            status_code=403,
+            detail="Only experts and admins can review detections"
+        )
+
+    def apply() -> list:
+        outcomes = DetectionRepository(db).bulk_review(
+            [decision.model_dump() for decision in request.decisions],
+            reviewer_id=current_user.id
+        )
+        db.commit()
+        return outcomes
+
+    try:
+        outcomes = await run_in_threadpool(apply)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error applying bulk review: {str(e)}"
+        )
+
+    counts = {outcome: 0 for outcome in ("updated", "conflict", "not_found", "invalid")}
+    for outcome in outcomes:
+        counts[outcome["outcome"]] += 1
+
+    return BulkReviewResponse(
+        updated=counts["updated"],
+        conflicts=counts["conflict"],
+        not_found=counts["not_found"],
+        invalid=counts["invalid"],
+        results=[BulkReviewOutcome(**outcome) for outcome in outcomes]
+    )
+
+
 @router.post("/detections/{detection_id}/revalidate")
 async def revalidate_detection(
     detection_id: str,
@@ -401,6 +504,8 @@ async def revalidate_detection(
                 detail="Failed to update detection"
             )
 
+        await invalidate_analysis_cache(detection.get('analysis_id'))
+
         # Get validity status
         validity_status = get_detection_validity_status(enriched_detection['expires_at'])
 
@@ -224,6 +224,7 @@ async def check_yolo_service() -> dict:
                     "response_time_ms": response_time,
                     "service_url": settings.yolo_service_url,
                     "status": yolo_data.get("status"),
+                    "saturation": yolo_data.get("saturation"),
                     "model_available": yolo_data.get("model_available", False),
                     "version": yolo_data.get("version")
                 }
@@ -2,57 +2,106 @@
 Reports and statistics endpoints for Sentrix API
 """
 
-from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any
-
-from fastapi import APIRouter, Depends, HTTPException, status
+import re
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, Any, BinaryIO, Iterator, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import text, func
 
 from ...database.connection import get_db
 from ...utils.auth import get_current_active_user
 from ...database.models.models import UserProfile
 from ...exceptions import DatabaseException, ImageProcessingException
-from ...logging_config import get_logger
+from ...logging_config import get_logger, get_request_id
+from ...services.dashboard_service import DashboardAggregates, cached_dashboard
+from ...utils.report_artifacts import REPORT_EXTENSIONS, get_report_store, report_fingerprint
 
 logger = get_logger(__name__)
 
 router = APIRouter()
 
+# PDFs up to this size stay in memory; larger ones spill to a temporary file
+REPORT_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+REPORT_STREAM_CHUNK_SIZE = 64 * 1024
+
+REPORT_MEDIA_TYPES = {
+    "pdf": "application/pdf",
+    "csv": "text/csv",
+}
+
+# Job ids are report fingerprints (sha256 hex)
+_JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _iter_file(file: BinaryIO, chunk_size: int = REPORT_STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Stream a generated report file in chunks and close it"""
+    try:
+        while chunk := file.read(chunk_size):
+            yield chunk
+    finally:
+        file.close()
+
+
+def _iter_csv_with_session(report_service, report_type: str, filters: Dict[str, Any]) -> Iterator[str]:
+    """
+    Stream CSV chunks and close the session when the body is done
+
+    The body is sent after get_db has already closed the session, so the
+    stream closes it again to return the cursor's connection to the pool.
+    """
+    try:
+        yield from report_service.iter_csv_report(report_type, filters)
+    finally:
+        report_service.db.close()
+
+
+def _report_job_response(request: Request, job_id: str, status_value: str, cached: bool, message: str) -> dict:
+    """Job id plus status and download URLs"""
+    return {
+        "job_id": job_id,
+        "status": status_value,
+        "cached": cached,
+        "status_url": request.url_for("get_report_job", job_id=job_id).path,
+        "download_url": request.url_for("download_report", job_id=job_id).path,
+        "message": message
+    }
+
+
+def _validate_job_id(job_id: str) -> None:
+    if not _JOB_ID_PATTERN.match(job_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Report job not found: {job_id}")
+
+
+DashboardScope = Literal["global", "user"]
+
+
+def _scope_user_id(scope: str, current_user: UserProfile) -> Optional[Any]:
+    """User whose data a dashboard aggregate covers (None = global)"""
+    return current_user.id if scope == "user" else None
+
 
 @router.get("/statistics")
 async def get_dashboard_statistics(
+    scope: DashboardScope = Query("global", description="global o user (solo datos del usuario actual)"),
     current_user: UserProfile = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
-    Get dashboard statistics for the current user
+    Get dashboard statistics, global or for the current user
+
+    Aggregated from the daily rollups (see services.dashboard_service).
+    monthly_change is the percent change of this month vs the previous one.
     """
     try:
-        # For now, let's return mock data that matches the dashboard structure
-        # In a real implementation, these would be calculated from actual data
-
-        # Calculate some basic stats from user data
-        total_users = db.execute(text("SELECT COUNT(*) FROM user_profiles WHERE is_active = true")).scalar()
-
-        stats = {
-            "total_analyses": 1234,  # This would come from analyses table
-            "high_risk_detections": 89,  # From detections table with high risk
-            "monitored_locations": 156,  # From unique locations in analyses
-            "active_users": total_users or 43,
-            "monthly_change": {
-                "total_analyses": 12,
-                "high_risk_detections": -8,
-                "monitored_locations": 5,
-                "active_users": 23
-            }
-        }
-
-        return stats
+        user_id = _scope_user_id(scope, current_user)
+        return await cached_dashboard(
+            "statistics", user_id, lambda: DashboardAggregates(db).statistics(user_id=user_id)
+        )
 
-    except KeyError as e:
-        logger.error("stats_missing_field", field=str(e), exc_info=True)
-        raise DatabaseException(f"Missing required field in statistics: {e}", operation="get_dashboard_stats")
     except Exception as e:
         logger.error("stats_retrieval_error", error=str(e), exc_info=True)
         raise DatabaseException(f"Error retrieving statistics: {str(e)}", operation="get_dashboard_stats")
@@ -60,22 +109,18 @@ async def get_dashboard_statistics(
 
 @router.get("/risk-distribution")
 async def get_risk_distribution(
+    scope: DashboardScope = Query("global", description="global o user"),
     current_user: UserProfile = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
-    Get risk level distribution for dashboard charts
+    Get risk level distribution of detections for dashboard charts
     """
     try:
-        # Mock data - in real implementation this would query detections table
-        distribution = [
-            {"name": "Alto", "value": 23, "color": "#dc2626"},
-            {"name": "Medio", "value": 45, "color": "#f59e0b"},
-            {"name": "Bajo", "value": 67, "color": "#059669"},
-            {"name": "Mínimo", "value": 89, "color": "#6b7280"}
-        ]
-
-        return distribution
+        user_id = _scope_user_id(scope, current_user)
+        return await cached_dashboard(
+            "risk_distribution", user_id, lambda: DashboardAggregates(db).risk_distribution(user_id=user_id)
+        )
 
     except Exception as e:
         logger.error("risk_distribution_error", error=str(e), exc_info=True)
@@ -84,24 +129,21 @@ async def get_risk_distribution(
 
 @router.get("/monthly-analyses")
 async def get_monthly_analyses(
+    months: int = Query(6, ge=1, le=24, description="Meses incluidos (el actual incluido)"),
+    scope: DashboardScope = Query("global", description="global o user"),
     current_user: UserProfile = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
-    Get monthly analyses data for charts
+    Get analyses per month for charts
     """
     try:
-        # Mock data - in real implementation this would query analyses table grouped by month
-        monthly_data = [
-            {"month": "Ene", "count": 45},
-            {"month": "Feb", "count": 52},
-            {"month": "Mar", "count": 61},
-            {"month": "Abr", "count": 73},
-            {"month": "May", "count": 69},
-            {"month": "Jun", "count": 84}
-        ]
-
-        return monthly_data
+        user_id = _scope_user_id(scope, current_user)
+        return await cached_dashboard(
+            "monthly_analyses", user_id,
+            lambda: DashboardAggregates(db).monthly_analyses(user_id=user_id, months=months),
+            months=months
+        )
 
     except Exception as e:
         logger.error("monthly_analyses_error", error=str(e), exc_info=True)
@@ -110,51 +152,21 @@ async def get_monthly_analyses(
 
 @router.get("/recent-activity")
 async def get_recent_activity(
-    limit: int = 10,
+    limit: int = Query(10, ge=1, le=50),
+    scope: DashboardScope = Query("global", description="global o user"),
     current_user: UserProfile = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
-    Get recent activity for dashboard
+    Get recent analyses and expert validations for the dashboard
     """
     try:
-        # Mock data - in real implementation this would query recent analyses and validations
-        recent_activity = [
-            {
-                "id": 1,
-                "type": "analysis",
-                "description": "Nuevo análisis procesado en Miraflores",
-                "risk": "ALTO",
-                "time": "Hace 5 minutos",
-                "timestamp": datetime.now() - timedelta(minutes=5)
-            },
-            {
-                "id": 2,
-                "type": "validation",
-                "description": "Detección validada por experto en San Isidro",
-                "risk": "MEDIO",
-                "time": "Hace 12 minutos",
-                "timestamp": datetime.now() - timedelta(minutes=12)
-            },
-            {
-                "id": 3,
-                "type": "analysis",
-                "description": "Análisis completado en La Molina",
-                "risk": "BAJO",
-                "time": "Hace 25 minutos",
-                "timestamp": datetime.now() - timedelta(minutes=25)
-            },
-            {
-                "id": 4,
-                "type": "validation",
-                "description": "Múltiples detecciones en Surco",
-                "risk": "ALTO",
-                "time": "Hace 1 hora",
-                "timestamp": datetime.now() - timedelta(hours=1)
-            }
-        ]
-
-        return recent_activity[:limit]
+        user_id = _scope_user_id(scope, current_user)
+        return await cached_dashboard(
+            "recent_activity", user_id,
+            lambda: DashboardAggregates(db).recent_activity(user_id=user_id, limit=limit),
+            limit=limit
+        )
 
     except Exception as e:
         logger.error("recent_activity_error", error=str(e), exc_info=True)
@@ -163,23 +175,18 @@ async def get_recent_activity(
 
 @router.get("/quality-metrics")
 async def get_quality_metrics(
+    scope: DashboardScope = Query("global", description="global o user"),
     current_user: UserProfile = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
-    Get quality metrics for the system
+    Get quality metrics of the detections (expert validation based)
     """
     try:
-        metrics = {
-            "accuracy": 94.5,
-            "precision": 91.2,
-            "recall": 87.8,
-            "f1_score": 89.4,
-            "processing_time_avg": 2.3,  # seconds
-            "validated_detections": 78.5  # percentage
-        }
-
-        return metrics
+        user_id = _scope_user_id(scope, current_user)
+        return await cached_dashboard(
+            "quality_metrics", user_id, lambda: DashboardAggregates(db).quality_metrics(user_id=user_id)
+        )
 
     except Exception as e:
         logger.error("quality_metrics_error", error=str(e), exc_info=True)
@@ -237,16 +244,23 @@ async def get_reports_list(
 @router.post("/generate")
 async def generate_report(
     report_config: dict,
+    request: Request,
     current_user: UserProfile = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
     Generate a new report
 
-    Creates a PDF or CSV report based on configuration and returns it as download.
+    PDF and CSV reports run as background jobs keyed by a fingerprint of
+    (type, format, filters, data watermark); the response carries the job id
+    plus status and download URLs. An identical request on an unchanged
+    dataset returns the stored report at once (status completed, cached).
+
+    With "async": false the report is generated inside the request and
+    returned as download (CSV streamed while analyses are read; PDF built in
+    a worker thread into a spooled temporary file and streamed from there).
     """
-    from ..services.report_service import ReportService
-    from datetime import datetime
+    from ...services.report_service import ReportService
     from fastapi.responses import StreamingResponse
 
     try:
@@ -260,23 +274,81 @@ async def generate_report(
             "date_to": report_config.get("date_to"),
             "risk_level": report_config.get("filters", {}).get("risk_level"),
             "has_gps": report_config.get("filters", {}).get("has_gps"),
+            "limit": report_config.get("limit"),
         }
 
         # Initialize report service
         report_service = ReportService(db)
 
+        if report_format in REPORT_EXTENSIONS:
+            store = get_report_store()
+            watermark = await run_in_threadpool(report_service.data_watermark, filters)
+            # PDFs embed the requesting user ("Generado por"); CSVs are shared
+            fingerprint = report_fingerprint(
+                report_type,
+                report_format,
+                filters,
+                watermark,
+                user_id=str(current_user.id) if report_format == "pdf" else None
+            )
+
+            artifact = store.find(fingerprint)
+            if artifact is not None:
+                logger.info("report_cache_hit", fingerprint=fingerprint, report_type=report_type)
+                if report_config.get("async", True):
+                    return _report_job_response(request, fingerprint, "completed", True, "Report ready (unchanged data)")
+                return FileResponse(
+                    artifact,
+                    media_type=REPORT_MEDIA_TYPES[report_format],
+                    filename=f"sentrix_report_{report_type}_{fingerprint[:12]}{REPORT_EXTENSIONS[report_format]}"
+                )
+
+            if report_config.get("async", True):
+                from ...tasks.report_tasks import REPORT_TASK_TIME_LIMIT, generate_report_task
+
+                if store.claim(fingerprint, REPORT_TASK_TIME_LIMIT):
+                    try:
+                        generate_report_task.apply_async(
+                            kwargs={
+                                "fingerprint": fingerprint,
+                                "report_type": report_type,
+                                "report_format": report_format,
+                                "filters": filters,
+                                "user_id": str(current_user.id),
+                                "request_id": get_request_id()
+                            },
+                            task_id=fingerprint
+                        )
+                    except Exception:
+                        store.release(fingerprint)
+                        raise
+                    logger.info("report_job_submitted", fingerprint=fingerprint, report_type=report_type)
+                else:
+                    logger.info("report_job_joined", fingerprint=fingerprint, report_type=report_type)
+                return _report_job_response(
+                    request, fingerprint, "pending", False,
+                    "Report submitted successfully. Use status_url to check progress."
+                )
+
         # Generate report based on format
         if report_format == "pdf":
-            buffer = report_service.generate_pdf_report(
-                report_type=report_type,
-                filters=filters,
-                user_id=current_user.id
-            )
+            output = tempfile.SpooledTemporaryFile(max_size=REPORT_SPOOL_MAX_SIZE)
+            try:
+                buffer = await run_in_threadpool(
+                    report_service.generate_pdf_report,
+                    report_type=report_type,
+                    filters=filters,
+                    user_id=current_user.id,
+                    output=output
+                )
+            except Exception:
+                output.close()
+                raise
 
             filename = f"sentrix_report_{report_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
 
             return StreamingResponse(
-                buffer,
+                _iter_file(buffer),
                 media_type="application/pdf",
                 headers={
                     "Content-Disposition": f"attachment; filename={filename}"
@@ -284,15 +356,11 @@ async def generate_report(
             )
 
         elif report_format == "csv":
-            buffer = report_service.generate_csv_report(
-                report_type=report_type,
-                filters=filters
-            )
-
             filename = f"sentrix_report_{report_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
 
+            # Sync generator: Starlette iterates it in a worker thread
             return StreamingResponse(
-                iter([buffer.getvalue()]),
+                _iter_csv_with_session(report_service, report_type, filters),
                 media_type="text/csv",
                 headers={
                     "Content-Disposition": f"attachment; filename={filename}"
@@ -329,6 +397,78 @@ async def generate_report(
         raise ImageProcessingException(f"Error generating report: {str(e)}")
 
 
+@router.get("/jobs/{job_id}")
+async def get_report_job(
+    job_id: str,
+    request: Request,
+    current_user: UserProfile = Depends(get_current_active_user)
+):
+    """
+    Status of a report job
+
+    States: pending, processing (with rows/total progress), completed,
+    failed, expired (generated but evicted from the store: request it again).
+    """
+    from celery.result import AsyncResult
+    from ...celery_app import celery_app
+
+    _validate_job_id(job_id)
+
+    artifact = get_report_store().find(job_id)
+    if artifact is not None:
+        response = _report_job_response(request, job_id, "completed", True, "Report ready")
+        response.update(progress=100, size_bytes=artifact.stat().st_size)
+        return response
+
+    task = AsyncResult(job_id, app=celery_app)
+    if task.state == "PROGRESS":
+        meta = task.info or {}
+        total = meta.get("total") or 0
+        response = _report_job_response(request, job_id, "processing", False, "Report in progress")
+        response.update(
+            progress=round(meta.get("rows", 0) / total * 100) if total else 0,
+            rows=meta.get("rows", 0),
+            total=total
+        )
+        return response
+    if task.state == "STARTED":
+        return {**_report_job_response(request, job_id, "processing", False, "Report in progress"), "progress": 0}
+    if task.state == "FAILURE":
+        logger.error("report_job_failed", job_id=job_id, error=str(task.info))
+        return {
+            **_report_job_response(request, job_id, "failed", False, "Report generation failed"),
+            "error": str(task.info) if task.info else "Unknown error"
+        }
+    if task.state == "SUCCESS":
+        return _report_job_response(request, job_id, "expired", False, "Report was evicted, request it again")
+    return {**_report_job_response(request, job_id, "pending", False, "Report queued, waiting for worker"), "progress": 0}
+
+
+@router.get("/jobs/{job_id}/download")
+async def download_report(
+    job_id: str,
+    current_user: UserProfile = Depends(get_current_active_user)
+):
+    """
+    Download a finished report
+    """
+    _validate_job_id(job_id)
+
+    artifact = get_report_store().find(job_id)
+    if artifact is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Report not ready or expired: {job_id}"
+        )
+
+    report_format = artifact.suffix.lstrip(".")
+    return FileResponse(
+        artifact,
+        media_type=REPORT_MEDIA_TYPES[report_format],
+        filename=f"sentrix_report_{job_id[:12]}{artifact.suffix}"
+    )
+
+
 @router.delete("/{report_id}")
 async def delete_report(
     report_id: str,
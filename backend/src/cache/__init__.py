@@ -2,7 +2,8 @@
 Redis Caching Layer
 
 Provides comprehensive caching functionality with:
-- Cache service for direct operations
+- Async multi-tier cache service (in-process L1 + Redis L2)
+- Tag-based invalidation wired into the write paths
 - Decorators for easy caching
 - Cache utilities for common patterns
 """
@@ -11,9 +12,24 @@ from .cache_service import (
     CacheService,
     CacheError,
     get_cache,
+    init_cache,
+    shutdown_cache,
     reset_cache
 )
 
+from .local_cache import LocalCache
+
+from .tags import (
+    HEATMAP,
+    MAP_STATS,
+    DASHBOARD,
+    DETECTION_QUALITY,
+    user_tag,
+    analysis_tag,
+    invalidate_analysis_cache,
+    invalidate_on_commit
+)
+
 from .decorators import (
     cached,
     cached_property,
@@ -37,7 +53,19 @@ __all__ = [
     "CacheService",
     "CacheError",
     "get_cache",
+    "init_cache",
+    "shutdown_cache",
     "reset_cache",
+    "LocalCache",
+    # Tags
+    "HEATMAP",
+    "MAP_STATS",
+    "DASHBOARD",
+    "DETECTION_QUALITY",
+    "user_tag",
+    "analysis_tag",
+    "invalidate_analysis_cache",
+    "invalidate_on_commit",
     # Decorators
     "cached",
     "cached_property",
@@ -1,91 +1,381 @@
 """
-Redis Cache Service
-
-Provides caching functionality using Redis with:
-- Multiple cache strategies (LRU, TTL-based)
-- Automatic serialization/deserialization
-- Cache key generation
-- Cache invalidation patterns
-- Performance monitoring
+Multi-tier Cache Service
+
+Single async cache API for the backend:
+- L1: bounded in-process LRU (entry count, bytes and TTL bounded)
+- L2: Redis, shared by all workers and replicas
+- Cross-worker L1 invalidation through Redis pub/sub
+- Tag-based invalidation (one set read + one pipelined delete per call)
+- Compact serialization with orjson (stdlib json fallback)
+- Statistics counted locally and flushed to Redis in batches
+- Graceful degradation to L1-only when Redis is unavailable
 """
 
+import asyncio
 import json
+import os
 import pickle
-import hashlib
-from typing import Optional, Any, Callable, Union, List
-from datetime import timedelta
-from functools import wraps
-
-import redis
-from redis.exceptions import RedisError
+import time
+import uuid
+from collections import defaultdict
+from typing import Optional, Any, Dict, Iterable, List
 
+from .local_cache import LocalCache
 from ..config import get_settings
 from ..logging_config import get_logger
 
 logger = get_logger(__name__)
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import redis.asyncio as redis
+    from redis.exceptions import RedisError
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    RedisError = Exception
+    logger.warning("redis_not_installed", message="Redis package not installed. Only the in-process cache tier is available.")
+
+# Errors that mean "L2 unavailable right now"; never fail the request for them
+_L2_ERRORS = (RedisError, OSError, asyncio.TimeoutError)
+
+# Compare-and-delete so a lock that expired and was re-acquired by another
+# worker is never released by the previous holder
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Prefix of lock tokens granted without Redis (no cross-worker coordination)
+_LOCAL_LOCK_PREFIX = "local:"
+
 
 class CacheError(Exception):
     """Base exception for cache errors"""
     pass
 
 
+def _dumps(value: Any, serializer: str) -> bytes:
+    """Serialize a value ("json", "pickle" or "raw" bytes)."""
+    if serializer == "raw":
+        if not isinstance(value, (bytes, bytearray)):
+            raise TypeError("raw serializer requires bytes")
+        return bytes(value)
+    if serializer == "pickle":
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, separators=(",", ":"), default=str).encode()
+
+
+def _loads(raw: bytes, deserializer: str) -> Any:
+    """Inverse of _dumps."""
+    if deserializer == "raw":
+        return raw
+    if deserializer == "pickle":
+        return pickle.loads(raw)
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
 class CacheService:
     """
-    Redis-based caching service with automatic serialization.
+    Async two-tier cache service.
 
     Supports:
-    - TTL-based expiration
-    - JSON and pickle serialization
+    - TTL-based expiration (L1 entries live at most l1_ttl seconds)
+    - JSON (orjson), pickle and raw bytes values
     - Namespace isolation
     - Batch operations
+    - Tag-based invalidation
+    - Distributed locks
     - Cache statistics
     """
 
     def __init__(
         self,
-        redis_client: Optional[redis.Redis] = None,
+        redis_url: Optional[str] = None,
         namespace: str = "sentrix",
-        default_ttl: int = 3600
+        default_ttl: int = 300,
+        enabled: bool = True,
+        l1_max_entries: int = 1024,
+        l1_max_bytes: int = 32 * 1024 * 1024,
+        l1_ttl: float = 30.0,
+        stats_flush_interval: float = 10.0,
+        reconnect_interval: float = 30.0,
+        redis_client=None
     ):
         """
         Initialize cache service.
 
         Args:
-            redis_client: Redis client instance (creates one if None)
+            redis_url: Redis connection URL (defaults to settings.redis_url)
             namespace: Cache key namespace/prefix
-            default_ttl: Default TTL in seconds (1 hour)
+            default_ttl: Default TTL in seconds (5 minutes)
+            enabled: Whether caching is enabled at all
+            l1_max_entries: In-process tier entry bound (0 disables L1)
+            l1_max_bytes: In-process tier size bound in bytes
+            l1_ttl: Max lifetime of an L1 entry in seconds; bounds staleness
+                if an invalidation message is missed
+            stats_flush_interval: Seconds between statistics flushes to Redis
+            reconnect_interval: Seconds to wait before retrying a failed Redis connection
+            redis_client: Pre-built async Redis client (mainly for tests)
         """
-        if redis_client is None:
-            settings = get_settings()
-            self.redis = redis.from_url(
-                settings.redis_url,
-                decode_responses=False  # Handle binary data
-            )
-        else:
-            self.redis = redis_client
-
+        self.redis_url = redis_url or get_settings().redis_url
         self.namespace = namespace
         self.default_ttl = default_ttl
+        self.enabled = enabled
+        self.l1 = LocalCache(l1_max_entries, l1_max_bytes) if l1_max_entries > 0 else None
+        self.l1_ttl = l1_ttl
+        self.stats_flush_interval = stats_flush_interval
+        self.reconnect_interval = reconnect_interval
+        self.instance_id = uuid.uuid4().hex
+
+        self._client = redis_client
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._failed_at: Optional[float] = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._channel = f"{namespace}:cache_invalidate"
         self._stats_key = f"{namespace}:cache_stats"
+        self._pending_stats: Dict[str, int] = defaultdict(int)
+        self._background_tasks: set = set()
+        self._stats_flushed_at = time.monotonic()
+
+        if not enabled:
+            logger.info("cache_disabled", reason="Disabled in configuration")
 
     # ============================================
-    # Core Operations
+    # Connection Management
     # ============================================
 
+    async def _get_client(self):
+        """Get Redis client with lazy connection and reconnect back-off."""
+        if not self.enabled:
+            return None
+
+        # Async Redis connections are bound to the loop that opened them;
+        # callers running their own loop (Celery tasks, sync write paths)
+        # get a fresh connection instead of a broken one
+        loop = asyncio.get_running_loop()
+        if self._client_loop is not None and self._client_loop is not loop:
+            self._client = None
+            self._client_loop = None
+            self._listener_task = None
+
+        if self._client is None:
+            if not REDIS_AVAILABLE:
+                return None
+            if self._failed_at is not None and time.monotonic() - self._failed_at < self.reconnect_interval:
+                return None
+
+            client = redis.from_url(
+                self.redis_url,
+                decode_responses=False,
+                socket_connect_timeout=5,
+                socket_timeout=5,
+                retry_on_timeout=True,
+                health_check_interval=30
+            )
+            try:
+                await client.ping()
+            except _L2_ERRORS as e:
+                logger.error("cache_connection_failed", error=str(e), redis_url=self.redis_url[:30] + "...")
+                self._failed_at = time.monotonic()
+                await client.aclose()
+                return None
+
+            self._client = client
+            self._client_loop = loop
+            self._failed_at = None
+            logger.info("cache_connected", redis_url=self.redis_url[:30] + "...")
+
+        self._ensure_invalidation_listener()
+        return self._client
+
     def _make_key(self, key: str) -> str:
+        """Generate namespaced cache key."""
+        return f"{self.namespace}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        """Generate the key of the set holding a tag's members."""
+        return f"{self.namespace}:tag:{tag}"
+
+    # ============================================
+    # Cross-worker L1 Invalidation
+    # ============================================
+
+    def _ensure_invalidation_listener(self) -> None:
+        """Start (or restart) the pub/sub listener that keeps L1 coherent."""
+        if self.l1 is None:
+            return
+        if self._listener_task is not None and not self._listener_task.done():
+            return
+        self._listener_task = asyncio.get_running_loop().create_task(self._listen_invalidations())
+
+    async def _listen_invalidations(self) -> None:
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(self._channel)
+            async for message in pubsub.listen():
+                self._apply_invalidation(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Messages may have been missed; drop L1 rather than serve stale data
+            logger.warning("cache_invalidation_listener_failed", error=str(e))
+            self.l1.clear()
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+    def _apply_invalidation(self, data: bytes) -> None:
+        """Apply an invalidation message published by another worker."""
+        origin, _, rest = data.partition(b"|")
+        if origin.decode() == self.instance_id:
+            return
+
+        kind, _, payload = rest.partition(b"|")
+        if kind == b"*":
+            self.l1.clear()
+        elif kind == b"p":
+            self.l1.delete_pattern(payload.decode())
+        elif kind == b"k":
+            self.l1.delete_many(k.decode() for k in payload.split(b"\n"))
+        elif kind == b"t":
+            self.l1.delete_tags(t.decode() for t in payload.split(b"\n"))
+
+    def _invalidation_message(self, kind: str, payload: str = "") -> bytes:
+        return f"{self.instance_id}|{kind}|{payload}".encode()
+
+    def _publish(self, pipe, kind: str, payload: str = "") -> None:
+        """Queue an invalidation message on a pipeline when L1 is in use."""
+        if self.l1 is not None:
+            pipe.publish(self._channel, self._invalidation_message(kind, payload))
+
+    # ============================================
+    # Statistics
+    # ============================================
+
+    def _record(self, stat_name: str, count: int = 1) -> None:
+        """Count a statistic locally; flushed to Redis in batches."""
+        if count:
+            self._pending_stats[stat_name] += count
+
+    async def _maybe_flush_stats(self) -> None:
+        if time.monotonic() - self._stats_flushed_at >= self.stats_flush_interval:
+            await self.flush_stats()
+
+    async def flush_stats(self) -> None:
+        """Push locally accumulated counters to Redis in one pipeline."""
+        self._stats_flushed_at = time.monotonic()
+        if not self._pending_stats:
+            return
+
+        client = await self._get_client()
+        if not client:
+            return
+
+        pending, self._pending_stats = self._pending_stats, defaultdict(int)
+        try:
+            pipe = client.pipeline(transaction=False)
+            for stat_name, count in pending.items():
+                pipe.hincrby(self._stats_key, stat_name, count)
+            await pipe.execute()
+        except _L2_ERRORS:
+            # Keep the counts for the next flush
+            for stat_name, count in pending.items():
+                self._pending_stats[stat_name] += count
+
+    async def get_stats(self) -> dict:
         """
-        Generate namespaced cache key.
+        Get cache statistics (all workers, plus this worker's unflushed counts).
 
-        Args:
-            key: Base key
+        Returns:
+            Dictionary with cache statistics
+        """
+        stats: Dict[str, Any] = defaultdict(int)
+
+        client = await self._get_client()
+        if client:
+            try:
+                for key, value in (await client.hgetall(self._stats_key)).items():
+                    stats[key.decode() if isinstance(key, bytes) else key] = int(value)
+            except _L2_ERRORS as e:
+                logger.error("cache_stats_error", error=str(e))
+
+        for stat_name, count in self._pending_stats.items():
+            stats[stat_name] += count
+
+        hits = stats["l1_hits"] + stats["l2_hits"]
+        total = hits + stats["misses"]
+        stats["hits"] = hits
+        stats["hit_rate"] = round(hits / total * 100, 2) if total else 0.0
+
+        result = dict(stats)
+        if self.l1 is not None:
+            result["l1"] = self.l1.stats()
+        return result
+
+    async def reset_stats(self) -> bool:
+        """
+        Reset cache statistics.
 
         Returns:
-            Namespaced key
+            True if successful, False otherwise
         """
-        return f"{self.namespace}:{key}"
+        self._pending_stats.clear()
+        client = await self._get_client()
+        if not client:
+            return False
+        try:
+            await client.delete(self._stats_key)
+            return True
+        except _L2_ERRORS as e:
+            logger.error("cache_reset_stats_error", error=str(e))
+            return False
+
+    # ============================================
+    # Core Operations
+    # ============================================
+
+    async def _get_raw(self, key: str) -> Optional[bytes]:
+        """Read serialized bytes through L1 then L2."""
+        full_key = self._make_key(key)
+
+        if self.l1 is not None:
+            raw = self.l1.get(full_key)
+            if raw is not None:
+                self._record("l1_hits")
+                return raw
+
+        client = await self._get_client()
+        raw = None
+        if client:
+            try:
+                raw = await client.get(full_key)
+            except _L2_ERRORS as e:
+                logger.error("cache_get_error", key=key, error=str(e))
+
+        if raw is None:
+            self._record("misses")
+            return None
 
-    def get(
+        self._record("l2_hits")
+        if self.l1 is not None:
+            self.l1.set(full_key, raw, self.l1_ttl)
+        return raw
+
+    async def get(
         self,
         key: str,
         default: Any = None,
@@ -97,43 +387,32 @@ class CacheService:
         Args:
             key: Cache key
             default: Default value if key not found
-            deserializer: Deserializer to use ("json" or "pickle")
+            deserializer: Deserializer to use ("json", "pickle" or "raw")
 
         Returns:
             Cached value or default
         """
-        try:
-            cache_key = self._make_key(key)
-            value = self.redis.get(cache_key)
-
-            if value is None:
-                self._increment_stat("misses")
-                return default
-
-            self._increment_stat("hits")
-
-            # Deserialize
-            if deserializer == "json":
-                return json.loads(value)
-            elif deserializer == "pickle":
-                return pickle.loads(value)
-            else:
-                return value
+        if not self.enabled:
+            return default
 
-        except RedisError as e:
-            # Log error but don't fail the application
-            logger.error("cache get error", key=key, error=str(e))
+        raw = await self._get_raw(key)
+        await self._maybe_flush_stats()
+        if raw is None:
             return default
+
+        try:
+            return _loads(raw, deserializer)
         except Exception as e:
-            logger.error("cache deserialization error", key=key, error=str(e))
+            logger.error("cache_deserialization_error", key=key, error=str(e))
             return default
 
-    def set(
+    async def set(
         self,
         key: str,
         value: Any,
         ttl: Optional[int] = None,
-        serializer: str = "json"
+        serializer: str = "json",
+        tags: Optional[Iterable[str]] = None
     ) -> bool:
         """
         Set value in cache.
@@ -142,36 +421,113 @@ class CacheService:
             key: Cache key
             value: Value to cache
             ttl: Time to live in seconds (None = use default)
-            serializer: Serializer to use ("json" or "pickle")
+            serializer: Serializer to use ("json", "pickle" or "raw")
+            tags: Tags to register the entry under (see invalidate_tags)
 
         Returns:
-            True if successful, False otherwise
+            True if stored in at least one tier, False otherwise
         """
+        if not self.enabled:
+            return False
+
         try:
-            cache_key = self._make_key(key)
-            ttl = ttl or self.default_ttl
-
-            # Serialize
-            if serializer == "json":
-                serialized = json.dumps(value)
-            elif serializer == "pickle":
-                serialized = pickle.dumps(value)
-            else:
-                serialized = value
+            raw = _dumps(value, serializer)
+        except Exception as e:
+            logger.error("cache_serialization_error", key=key, error=str(e))
+            return False
 
-            # Set with TTL
-            self.redis.setex(cache_key, ttl, serialized)
-            self._increment_stat("sets")
-            return True
+        full_key = self._make_key(key)
+        ttl = ttl or self.default_ttl
+        tags = tuple(tags or ())
+        stored = False
+
+        if self.l1 is not None:
+            stored = self.l1.set(full_key, raw, min(ttl, self.l1_ttl), tags)
+
+        client = await self._get_client()
+        if client:
+            try:
+                pipe = client.pipeline(transaction=False)
+                pipe.setex(full_key, ttl, raw)
+                self._queue_tags(pipe, [full_key], tags, ttl)
+                self._publish(pipe, "k", full_key)
+                await pipe.execute()
+                stored = True
+            except _L2_ERRORS as e:
+                logger.error("cache_set_error", key=key, error=str(e))
+
+        self._record("sets")
+        await self._maybe_flush_stats()
+        return stored
+
+    async def get_bytes(self, key: str) -> Optional[bytes]:
+        """Get raw bytes from cache without deserialization."""
+        return await self.get(key, deserializer="raw")
+
+    async def set_bytes(
+        self,
+        key: str,
+        value: bytes,
+        ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> bool:
+        """Set raw bytes in cache without serialization."""
+        return await self.set(key, value, ttl=ttl, serializer="raw", tags=tags)
+
+    def get_local(self, key: str, default: Any = None) -> Any:
+        """
+        Synchronous read of the in-process tier only.
+
+        For synchronous callers (validators, CLI) that cannot await Redis.
+        Entries written with set_local are dropped by invalidate_tags /
+        invalidate_tags_sync like any other, in every worker.
+
+        Returns:
+            Cached value or default
+        """
+        if not self.enabled or self.l1 is None:
+            return default
+
+        raw = self.l1.get(self._make_key(key))
+        if raw is None:
+            self._record("misses")
+            return default
+
+        self._record("l1_hits")
+        try:
+            return _loads(raw, "json")
+        except Exception as e:
+            logger.error("cache_deserialization_error", key=key, error=str(e))
+            return default
+
+    def set_local(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> bool:
+        """
+        Synchronous write to the in-process tier only (see get_local).
 
-        except RedisError as e:
-            logger.error("cache set error", key=key, error=str(e))
+        The lifetime is bounded by l1_ttl like every L1 entry.
+
+        Returns:
+            True if stored, False otherwise
+        """
+        if not self.enabled or self.l1 is None:
             return False
+
+        try:
+            raw = _dumps(value, "json")
         except Exception as e:
-            logger.error("cache serialization error", key=key, error=str(e))
+            logger.error("cache_serialization_error", key=key, error=str(e))
             return False
 
-    def delete(self, key: str) -> bool:
+        self._record("sets")
+        return self.l1.set(self._make_key(key), raw, min(ttl or self.default_ttl, self.l1_ttl), tuple(tags or ()))
+
+    async def delete(self, key: str) -> bool:
         """
         Delete key from cache.
 
@@ -179,19 +535,11 @@ class CacheService:
             key: Cache key
 
         Returns:
-            True if deleted, False otherwise
+            True if deleted from any tier, False otherwise
         """
-        try:
-            cache_key = self._make_key(key)
-            result = self.redis.delete(cache_key)
-            if result:
-                self._increment_stat("deletes")
-            return bool(result)
-        except RedisError as e:
-            logger.error("cache delete error", key=key, error=str(e))
-            return False
+        return await self.delete_many([key]) > 0
 
-    def exists(self, key: str) -> bool:
+    async def exists(self, key: str) -> bool:
         """
         Check if key exists in cache.
 
@@ -201,16 +549,22 @@ class CacheService:
         Returns:
             True if exists, False otherwise
         """
+        full_key = self._make_key(key)
+        if self.l1 is not None and self.l1.get(full_key) is not None:
+            return True
+
+        client = await self._get_client()
+        if not client:
+            return False
         try:
-            cache_key = self._make_key(key)
-            return bool(self.redis.exists(cache_key))
-        except RedisError as e:
-            logger.error("cache exists error", key=key, error=str(e))
+            return bool(await client.exists(full_key))
+        except _L2_ERRORS as e:
+            logger.error("cache_exists_error", key=key, error=str(e))
             return False
 
-    def get_ttl(self, key: str) -> Optional[int]:
+    async def get_ttl(self, key: str) -> Optional[int]:
         """
-        Get remaining TTL for a key.
+        Get remaining L2 TTL for a key.
 
         Args:
             key: Cache key
@@ -218,18 +572,22 @@ class CacheService:
         Returns:
             Remaining TTL in seconds, None if key doesn't exist or no TTL
         """
+        client = await self._get_client()
+        if not client:
+            return None
         try:
-            cache_key = self._make_key(key)
-            ttl = self.redis.ttl(cache_key)
+            ttl = await client.ttl(self._make_key(key))
             return ttl if ttl > 0 else None
-        except RedisError as e:
-            logger.error("cache ttl error", key=key, error=str(e))
+        except _L2_ERRORS as e:
+            logger.error("cache_ttl_error", key=key, error=str(e))
             return None
 
-    def expire(self, key: str, ttl: int) -> bool:
+    async def expire(self, key: str, ttl: int) -> bool:
         """
         Set/update TTL for a key.
 
+        L1 copies are dropped so they cannot outlive a shortened TTL.
+
         Args:
             key: Cache key
             ttl: New TTL in seconds
@@ -237,24 +595,34 @@ class CacheService:
         Returns:
             True if successful, False otherwise
         """
+        full_key = self._make_key(key)
+        if self.l1 is not None:
+            self.l1.delete(full_key)
+
+        client = await self._get_client()
+        if not client:
+            return False
         try:
-            cache_key = self._make_key(key)
-            return bool(self.redis.expire(cache_key, ttl))
-        except RedisError as e:
-            logger.error("cache expire error", key=key, error=str(e))
+            pipe = client.pipeline(transaction=False)
+            pipe.expire(full_key, ttl)
+            self._publish(pipe, "k", full_key)
+            result, *_ = await pipe.execute()
+            return bool(result)
+        except _L2_ERRORS as e:
+            logger.error("cache_expire_error", key=key, error=str(e))
             return False
 
     # ============================================
     # Batch Operations
     # ============================================
 
-    def get_many(
+    async def get_many(
         self,
         keys: List[str],
         deserializer: str = "json"
     ) -> dict:
         """
-        Get multiple values from cache.
+        Get multiple values from cache (L1 first, one MGET for the rest).
 
         Args:
             keys: List of cache keys
@@ -263,78 +631,101 @@ class CacheService:
         Returns:
             Dictionary of key-value pairs (only existing keys)
         """
-        try:
-            cache_keys = [self._make_key(k) for k in keys]
-            values = self.redis.mget(cache_keys)
-
-            result = {}
-            for key, value in zip(keys, values):
-                if value is not None:
-                    try:
-                        if deserializer == "json":
-                            result[key] = json.loads(value)
-                        elif deserializer == "pickle":
-                            result[key] = pickle.loads(value)
-                        else:
-                            result[key] = value
-                    except Exception:
-                        continue
-
-            self._increment_stat("hits", len(result))
-            self._increment_stat("misses", len(keys) - len(result))
-            return result
-
-        except RedisError as e:
-            logger.error("cache get_many error", keys_count=len(keys), error=str(e))
+        if not self.enabled or not keys:
             return {}
 
-    def set_many(
+        found: Dict[str, bytes] = {}
+        missing = []
+        for key in keys:
+            raw = self.l1.get(self._make_key(key)) if self.l1 is not None else None
+            if raw is not None:
+                found[key] = raw
+            else:
+                missing.append(key)
+        self._record("l1_hits", len(found))
+
+        client = await self._get_client() if missing else None
+        if client:
+            try:
+                values = await client.mget([self._make_key(k) for k in missing])
+                l2_hits = 0
+                for key, raw in zip(missing, values):
+                    if raw is not None:
+                        found[key] = raw
+                        l2_hits += 1
+                        if self.l1 is not None:
+                            self.l1.set(self._make_key(key), raw, self.l1_ttl)
+                self._record("l2_hits", l2_hits)
+            except _L2_ERRORS as e:
+                logger.error("cache_get_many_error", keys_count=len(keys), error=str(e))
+
+        self._record("misses", len(keys) - len(found))
+        await self._maybe_flush_stats()
+
+        result = {}
+        for key, raw in found.items():
+            try:
+                result[key] = _loads(raw, deserializer)
+            except Exception:
+                continue
+        return result
+
+    async def set_many(
         self,
         mapping: dict,
         ttl: Optional[int] = None,
-        serializer: str = "json"
+        serializer: str = "json",
+        tags: Optional[Iterable[str]] = None
     ) -> int:
         """
-        Set multiple values in cache.
+        Set multiple values in cache in one pipeline.
 
         Args:
             mapping: Dictionary of key-value pairs
             ttl: Time to live in seconds
             serializer: Serializer to use
+            tags: Tags to register every entry under
 
         Returns:
             Number of keys successfully set
         """
-        try:
-            ttl = ttl or self.default_ttl
-            pipe = self.redis.pipeline()
-
-            for key, value in mapping.items():
-                cache_key = self._make_key(key)
-                try:
-                    if serializer == "json":
-                        serialized = json.dumps(value)
-                    elif serializer == "pickle":
-                        serialized = pickle.dumps(value)
-                    else:
-                        serialized = value
-
-                    pipe.setex(cache_key, ttl, serialized)
-                except Exception:
-                    continue
-
-            results = pipe.execute()
-            success_count = sum(1 for r in results if r)
-            self._increment_stat("sets", success_count)
-            return success_count
-
-        except RedisError as e:
-            logger.error("cache set_many error", keys_count=len(mapping), error=str(e))
+        if not self.enabled or not mapping:
             return 0
 
-    def delete_many(self, keys: List[str]) -> int:
+        ttl = ttl or self.default_ttl
+        tags = tuple(tags or ())
+        serialized = {}
+        for key, value in mapping.items():
+            try:
+                serialized[self._make_key(key)] = _dumps(value, serializer)
+            except Exception:
+                continue
+
+        if self.l1 is not None:
+            for full_key, raw in serialized.items():
+                self.l1.set(full_key, raw, min(ttl, self.l1_ttl), tags)
+
+        client = await self._get_client()
+        if client and serialized:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for full_key, raw in serialized.items():
+                    pipe.setex(full_key, ttl, raw)
+                self._queue_tags(pipe, list(serialized), tags, ttl)
+                self._publish(pipe, "k", "\n".join(serialized))
+                await pipe.execute()
+            except _L2_ERRORS as e:
+                logger.error("cache_set_many_error", keys_count=len(mapping), error=str(e))
+                if self.l1 is None:
+                    return 0
+
+        self._record("sets", len(serialized))
+        await self._maybe_flush_stats()
+        return len(serialized)
+
+    async def delete_many(self, keys: List[str]) -> int:
         """
-        Delete multiple keys from cache.
+        Delete multiple keys from both tiers.
 
         Args:
             keys: List of cache keys
@@ -342,46 +733,184 @@ class CacheService:
         Returns:
             Number of keys deleted
         """
-        try:
-            cache_keys = [self._make_key(k) for k in keys]
-            count = self.redis.delete(*cache_keys)
-            self._increment_stat("deletes", count)
-            return count
-        except RedisError as e:
-            logger.error("cache delete_many error", keys_count=len(keys), error=str(e))
+        if not keys:
             return 0
 
+        full_keys = [self._make_key(k) for k in keys]
+        count = self.l1.delete_many(full_keys) if self.l1 is not None else 0
+
+        client = await self._get_client()
+        if client:
+            try:
+                pipe = client.pipeline(transaction=False)
+                pipe.delete(*full_keys)
+                self._publish(pipe, "k", "\n".join(full_keys))
+                deleted, *_ = await pipe.execute()
+                count = max(count, deleted)
+            except _L2_ERRORS as e:
+                logger.error("cache_delete_error", keys_count=len(keys), error=str(e))
+
+        self._record("deletes", count)
+        return count
+
     # ============================================
-    # Pattern Operations
+    # Tag Operations
     # ============================================
 
-    def delete_pattern(self, pattern: str) -> int:
+    def _queue_tags(self, pipe, full_keys: List[str], tags: Iterable[str], ttl: int) -> None:
         """
-        Delete all keys matching a pattern.
+        Queue tag registration for freshly written keys on a pipeline.
+
+        Tag sets expire with their longest-lived member: EXPIRE NX sets a
+        TTL on new sets, EXPIRE GT only ever extends it.
+        """
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            pipe.sadd(tag_key, *full_keys)
+            pipe.expire(tag_key, ttl, nx=True)
+            pipe.expire(tag_key, ttl, gt=True)
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        """
+        Delete every entry registered under any of the given tags.
+
+        Costs one pipelined SMEMBERS per call plus one pipelined DEL, and
+        never scans the keyspace. Only the members that were read are removed
+        from the tag sets, so entries tagged concurrently stay registered.
 
         Args:
-            pattern: Key pattern (supports * wildcard)
+            *tags: Tags to invalidate (e.g. "user:42", "heatmap")
 
         Returns:
-            Number of keys deleted
+            Number of entries deleted
         """
-        try:
-            cache_pattern = self._make_key(pattern)
-            keys = list(self.redis.scan_iter(match=cache_pattern))
+        tags = tuple(dict.fromkeys(t for t in tags if t))
+        if not self.enabled or not tags:
+            return 0
+
+        count = self.l1.delete_tags(tags) if self.l1 is not None else 0
+
+        client = await self._get_client()
+        if client:
+            tag_keys = [self._tag_key(tag) for tag in tags]
+            try:
+                pipe = client.pipeline(transaction=False)
+                for tag_key in tag_keys:
+                    pipe.smembers(tag_key)
+                members = await pipe.execute()
+
+                keys = set().union(*members)
+                decoded = [k.decode() if isinstance(k, bytes) else k for k in keys]
+                # L1 copies filled from L2 carry no tags and our own pub/sub
+                # message is ignored, so drop them here by key
+                if self.l1 is not None and decoded:
+                    self.l1.delete_many(decoded)
+                pipe = client.pipeline(transaction=False)
+                if keys:
+                    pipe.delete(*keys)
+                for tag_key, tag_members in zip(tag_keys, members):
+                    if tag_members:
+                        pipe.srem(tag_key, *tag_members)
+                if keys:
+                    self._publish(pipe, "k", "\n".join(decoded))
+                self._publish(pipe, "t", "\n".join(tags))
+                results = await pipe.execute()
+                if keys:
+                    count = max(count, results[0])
+            except _L2_ERRORS as e:
+                logger.error("cache_invalidate_tags_error", tags=list(tags), error=str(e))
+
+        self._record("deletes", count)
+        logger.debug("cache_tags_invalidated", tags=list(tags), count=count)
+        return count
+
+    def invalidate_tags_sync(self, *tags: str, timeout: float = 5.0) -> int:
+        """
+        Invalidate tags from synchronous code (repositories, validators).
 
-            if keys:
-                count = self.redis.delete(*keys)
-                self._increment_stat("deletes", count)
-                return count
+        Runs on the loop that owns the Redis connection when it is alive in
+        another thread, otherwise on a short-lived loop. When called from
+        inside the running loop it cannot block, so the invalidation is
+        scheduled and 0 is returned.
+
+        Args:
+            *tags: Tags to invalidate
+            timeout: Max seconds to wait for Redis
+
+        Returns:
+            Number of entries deleted (0 when scheduled)
+        """
+        if not self.enabled or not tags:
             return 0
 
-        except RedisError as e:
-            logger.error("cache delete_pattern error", pattern=pattern, error=str(e))
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is not None:
+            task = running.create_task(self.invalidate_tags(*tags))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
             return 0
 
-    def keys(self, pattern: str = "*") -> List[str]:
+        owner = self._client_loop
+        try:
+            if owner is not None and owner.is_running():
+                future = asyncio.run_coroutine_threadsafe(self.invalidate_tags(*tags), owner)
+                return future.result(timeout)
+            return asyncio.run(self._invalidate_tags_once(tags, timeout))
+        except Exception as e:
+            logger.error("cache_invalidate_tags_error", tags=list(tags), error=str(e))
+            return 0
+
+    async def _invalidate_tags_once(self, tags: tuple, timeout: float) -> int:
+        """Invalidate on a throwaway loop and release its connection."""
+        try:
+            return await asyncio.wait_for(self.invalidate_tags(*tags), timeout)
+        finally:
+            await self.close()
+
+    # ============================================
+    # Pattern Operations
+    # ============================================
+
+    async def delete_pattern(self, pattern: str) -> int:
+        """
+        Delete all keys matching a pattern.
+
+        Walks the keyspace with SCAN, so cost grows with the cache size; use
+        invalidate_tags on request paths and keep this for maintenance.
+
+        Args:
+            pattern: Key pattern (supports * wildcard)
+
+        Returns:
+            Number of keys deleted
+        """
+        full_pattern = self._make_key(pattern)
+        count = self.l1.delete_pattern(full_pattern) if self.l1 is not None else 0
+
+        client = await self._get_client()
+        if client:
+            try:
+                keys = [key async for key in client.scan_iter(match=full_pattern, count=500)]
+                pipe = client.pipeline(transaction=False)
+                if keys:
+                    pipe.delete(*keys)
+                self._publish(pipe, "p", full_pattern)
+                results = await pipe.execute()
+                if keys:
+                    count = max(count, results[0])
+            except _L2_ERRORS as e:
+                logger.error("cache_delete_pattern_error", pattern=pattern, error=str(e))
+
+        self._record("deletes", count)
+        return count
+
+    async def keys(self, pattern: str = "*") -> List[str]:
         """
-        Get all keys matching a pattern.
+        Get all L2 keys matching a pattern (SCAN; maintenance use only).
 
         Args:
             pattern: Key pattern (supports * wildcard)
@@ -389,132 +918,199 @@ class CacheService:
         Returns:
             List of matching keys (without namespace prefix)
         """
+        client = await self._get_client()
+        if not client:
+            return []
         try:
-            cache_pattern = self._make_key(pattern)
-            keys = list(self.redis.scan_iter(match=cache_pattern))
-
-            # Remove namespace prefix
             prefix_len = len(self.namespace) + 1
-            return [k.decode() if isinstance(k, bytes) else k[prefix_len:] for k in keys]
-
-        except RedisError as e:
-            logger.error("cache keys error", pattern=pattern, error=str(e))
+            return [
+                key.decode()[prefix_len:]
+                async for key in client.scan_iter(match=self._make_key(pattern), count=500)
+            ]
+        except _L2_ERRORS as e:
+            logger.error("cache_keys_error", pattern=pattern, error=str(e))
             return []
 
     # ============================================
     # Cache Management
     # ============================================
 
-    def clear(self) -> int:
+    async def clear(self) -> int:
         """
         Clear all keys in this namespace.
 
         Returns:
             Number of keys deleted
         """
-        return self.delete_pattern("*")
+        return await self.delete_pattern("*")
 
-    def clear_all(self) -> bool:
+    async def clear_all(self) -> bool:
         """
         Clear entire Redis database (use with caution!).
 
         Returns:
             True if successful, False otherwise
         """
+        if self.l1 is not None:
+            self.l1.clear()
+
+        client = await self._get_client()
+        if not client:
+            return False
         try:
-            self.redis.flushdb()
+            pipe = client.pipeline(transaction=False)
+            pipe.flushdb()
+            self._publish(pipe, "*")
+            await pipe.execute()
+            logger.warning("cache_cleared", message="All cache keys deleted")
             return True
-        except RedisError as e:
-            logger.error("cache clear_all error", error=str(e))
+        except _L2_ERRORS as e:
+            logger.error("cache_clear_error", error=str(e))
             return False
 
     # ============================================
-    # Statistics
+    # Distributed Locks
     # ============================================
 
-    def _increment_stat(self, stat_name: str, count: int = 1) -> None:
-        """Increment cache statistics counter."""
-        try:
-            self.redis.hincrby(self._stats_key, stat_name, count)
-        except RedisError:
-            pass  # Don't fail on stats errors
-
-    def get_stats(self) -> dict:
+    async def acquire_lock(self, key: str, ttl: float = 10.0) -> Optional[str]:
         """
-        Get cache statistics.
+        Try to acquire a short-lived distributed lock (SET NX PX).
+
+        Without Redis there is nothing to coordinate with, so a local token
+        is granted immediately.
+
+        Args:
+            key: Lock name
+            ttl: Lock expiry in seconds, so a crashed holder cannot block forever
 
         Returns:
-            Dictionary with cache statistics
+            Lock token if acquired, None if held elsewhere
         """
-        try:
-            stats = self.redis.hgetall(self._stats_key)
-
-            # Decode bytes keys/values
-            decoded_stats = {}
-            for key, value in stats.items():
-                key_str = key.decode() if isinstance(key, bytes) else key
-                val_int = int(value.decode() if isinstance(value, bytes) else value)
-                decoded_stats[key_str] = val_int
-
-            # Calculate hit rate
-            hits = decoded_stats.get("hits", 0)
-            misses = decoded_stats.get("misses", 0)
-            total = hits + misses
-
-            if total > 0:
-                decoded_stats["hit_rate"] = round(hits / total * 100, 2)
-            else:
-                decoded_stats["hit_rate"] = 0.0
-
-            return decoded_stats
+        client = await self._get_client()
+        if not client:
+            return _LOCAL_LOCK_PREFIX + uuid.uuid4().hex
 
-        except RedisError as e:
-            logger.error("cache stats error", error=str(e))
-            return {"hits": 0, "misses": 0, "sets": 0, "deletes": 0, "hit_rate": 0.0}
+        token = uuid.uuid4().hex
+        try:
+            acquired = await client.set(
+                self._make_key(f"lock:{key}"), token, nx=True, px=int(ttl * 1000)
+            )
+            return token if acquired else None
+        except _L2_ERRORS as e:
+            logger.error("cache_lock_error", key=key, error=str(e))
+            return _LOCAL_LOCK_PREFIX + token
 
-    def reset_stats(self) -> bool:
+    async def release_lock(self, key: str, token: str) -> bool:
         """
-        Reset cache statistics.
+        Release a lock only if it is still held with the given token.
+
+        Args:
+            key: Lock name
+            token: Token returned by acquire_lock
 
         Returns:
-            True if successful, False otherwise
+            True if the lock was released, False otherwise
         """
-        try:
-            self.redis.delete(self._stats_key)
+        if token.startswith(_LOCAL_LOCK_PREFIX):
             return True
-        except RedisError as e:
-            logger.error("cache reset_stats error", error=str(e))
+
+        client = await self._get_client()
+        if not client:
+            return False
+        try:
+            released = await client.eval(
+                _RELEASE_LOCK_SCRIPT, 1, self._make_key(f"lock:{key}"), token
+            )
+            return bool(released)
+        except _L2_ERRORS as e:
+            logger.error("cache_unlock_error", key=key, error=str(e))
             return False
 
     # ============================================
     # Health Check
     # ============================================
 
-    def ping(self) -> bool:
+    async def ping(self) -> bool:
         """
         Check if Redis connection is alive.
 
         Returns:
             True if connected, False otherwise
         """
+        client = await self._get_client()
+        if not client:
+            return False
         try:
-            return self.redis.ping()
-        except RedisError:
+            return bool(await client.ping())
+        except _L2_ERRORS:
             return False
 
-    def info(self) -> dict:
+    async def info(self) -> dict:
         """
         Get Redis server information.
 
         Returns:
             Dictionary with server info
         """
+        client = await self._get_client()
+        if not client:
+            return {}
         try:
-            return self.redis.info()
-        except RedisError as e:
-            logger.error("cache info error", error=str(e))
+            return await client.info()
+        except _L2_ERRORS as e:
+            logger.error("cache_info_error", error=str(e))
             return {}
 
+    async def health_check(self) -> Dict[str, Any]:
+        """
+        Check cache service health.
+
+        Returns:
+            Health status dict
+        """
+        if not self.enabled:
+            return {
+                "status": "disabled",
+                "redis_available": REDIS_AVAILABLE,
+                "message": "Caching is disabled"
+            }
+
+        l1_stats = self.l1.stats() if self.l1 is not None else None
+        if not await self.ping():
+            return {
+                "status": "degraded" if l1_stats else "unhealthy",
+                "redis_available": REDIS_AVAILABLE,
+                "message": "Cannot connect to Redis",
+                "l1": l1_stats
+            }
+
+        return {
+            "status": "healthy",
+            "redis_available": True,
+            "redis_url": self.redis_url[:30] + "...",
+            "serializer": "orjson" if ORJSON_AVAILABLE else "json",
+            "l1": l1_stats
+        }
+
+    async def close(self) -> None:
+        """Flush statistics, stop the invalidation listener and close Redis."""
+        if self._client is not None:
+            await self.flush_stats()
+
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener_task = None
+
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
+            logger.info("cache_connection_closed")
+
 
 # ============================================
 # Global Cache Instance
@@ -523,21 +1119,59 @@ class CacheService:
 _cache_service: Optional[CacheService] = None
 
 
-def get_cache() -> CacheService:
+def _is_testing() -> bool:
+    return os.getenv("TESTING_MODE", "false").lower() == "true"
+
+
+def init_cache(**overrides) -> CacheService:
     """
-    Get global cache service instance.
+    Initialize global cache service from settings.
+
+    Args:
+        **overrides: CacheService keyword arguments overriding settings
 
     Returns:
         CacheService instance
     """
     global _cache_service
 
-    if _cache_service is None:
-        _cache_service = CacheService()
+    settings = get_settings()
+    options = {
+        "redis_url": settings.redis_url,
+        "default_ttl": settings.cache_default_ttl,
+        "enabled": settings.cache_enabled and not _is_testing(),
+        "l1_max_entries": settings.cache_l1_max_entries,
+        "l1_max_bytes": settings.cache_l1_max_bytes,
+        "l1_ttl": settings.cache_l1_ttl_seconds,
+        "stats_flush_interval": settings.cache_stats_flush_seconds,
+    }
+    options.update(overrides)
+
+    _cache_service = CacheService(**options)
+    logger.info("cache_service_initialized", enabled=_cache_service.enabled, l1=_cache_service.l1 is not None)
+    return _cache_service
+
 
+def get_cache() -> CacheService:
+    """
+    Get global cache service instance.
+
+    Returns:
+        CacheService instance
+    """
+    if _cache_service is None:
+        return init_cache()
     return _cache_service
 
 
+async def shutdown_cache() -> None:
+    """Close the global cache service."""
+    global _cache_service
+    if _cache_service is not None:
+        await _cache_service.close()
+        _cache_service = None
+
+
 def reset_cache() -> None:
     """Reset global cache instance (useful for testing)."""
     global _cache_service
@@ -1,12 +1,11 @@
 """
 Cache Decorators
 
-Provides easy-to-use decorators for caching function results.
+Provides easy-to-use decorators for caching async function results.
 """
 
 import hashlib
-import inspect
-from typing import Callable, Optional, Any
+from typing import Callable, Iterable, Optional, Union
 from functools import wraps
 
 from .cache_service import get_cache
@@ -40,79 +39,97 @@ def cache_key_from_args(*args, **kwargs) -> str:
 
     # Create hash of all parts
     key_string = ":".join(key_parts)
-    return hashlib.md5(key_string.encode()).hexdigest()
+    return hashlib.blake2b(key_string.encode(), digest_size=16).hexdigest()
 
 
 def cached(
     ttl: int = 3600,
     key_prefix: Optional[str] = None,
     serializer: str = "json",
-    skip_self: bool = True
+    skip_self: bool = True,
+    key_func: Optional[Callable] = None,
+    tags: Optional[Union[Iterable[str], Callable]] = None
 ):
     """
-    Cache decorator for functions and methods.
+    Cache decorator for async functions and methods.
+
+    Every entry is also registered under the "fn:<prefix>" tag, which
+    clear_all() invalidates.
 
     Args:
         ttl: Time to live in seconds
         key_prefix: Custom key prefix (defaults to function name)
         serializer: Serializer to use ("json" or "pickle")
         skip_self: Skip 'self' parameter in key generation (for methods)
+        key_func: Custom function building the key from the call arguments
+        tags: Extra tags, or a function returning them from the call arguments
 
     Example:
         @cached(ttl=300)
-        def get_user_data(user_id: str):
+        async def get_user_data(user_id: str):
             # Expensive operation
-            return fetch_from_database(user_id)
+            return await fetch_from_database(user_id)
 
         # First call: executes function, caches result
-        data = get_user_data("123")
+        data = await get_user_data("123")
 
         # Second call: returns cached result
-        data = get_user_data("123")
+        data = await get_user_data("123")
     """
     def decorator(func: Callable) -> Callable:
-        cache = get_cache()
         prefix = key_prefix or f"{func.__module__}.{func.__name__}"
+        function_tag = f"fn:{prefix}"
 
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            # Generate cache key
+        def make_tags(*args, **kwargs) -> list:
+            extra = tags(*args, **kwargs) if callable(tags) else tags
+            return [function_tag, *(extra or ())]
+
+        def make_key(*args, **kwargs) -> str:
+            if key_func:
+                return f"{prefix}:{key_func(*args, **kwargs)}"
             cache_args = args[1:] if skip_self and args else args
-            arg_hash = cache_key_from_args(*cache_args, **kwargs)
-            cache_key = f"{prefix}:{arg_hash}"
+            return f"{prefix}:{cache_key_from_args(*cache_args, **kwargs)}"
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache = get_cache()
+            if not cache.enabled:
+                return await func(*args, **kwargs)
+
+            cache_key = make_key(*args, **kwargs)
 
             # Try to get from cache
-            cached_value = cache.get(cache_key, serializer=serializer)
+            cached_value = await cache.get(cache_key, deserializer=serializer)
             if cached_value is not None:
                 return cached_value
 
             # Execute function and cache result
-            result = func(*args, **kwargs)
-            cache.set(cache_key, result, ttl=ttl, serializer=serializer)
+            result = await func(*args, **kwargs)
+            if result is not None:
+                await cache.set(
+                    cache_key, result, ttl=ttl, serializer=serializer,
+                    tags=make_tags(*args, **kwargs)
+                )
             return result
 
         # Add cache control methods
-        wrapper.invalidate = lambda *args, **kwargs: _invalidate_cache(
-            cache, prefix, skip_self, *args, **kwargs
-        )
-        wrapper.clear_all = lambda: cache.delete_pattern(f"{prefix}:*")
+        async def invalidate(*args, **kwargs):
+            return await get_cache().delete(make_key(*args, **kwargs))
 
-        return wrapper
+        async def clear_all():
+            return await get_cache().invalidate_tags(function_tag)
 
-    return decorator
+        wrapper.invalidate = invalidate
+        wrapper.clear_all = clear_all
 
+        return wrapper
 
-def _invalidate_cache(cache, prefix, skip_self, *args, **kwargs):
-    """Invalidate cache for specific arguments."""
-    cache_args = args[1:] if skip_self and args else args
-    arg_hash = cache_key_from_args(*cache_args, **kwargs)
-    cache_key = f"{prefix}:{arg_hash}"
-    return cache.delete(cache_key)
+    return decorator
 
 
 def cached_property(ttl: int = 3600, key_attr: str = "id"):
     """
-    Cache decorator for class properties.
+    Cache decorator for async class properties.
 
     Args:
         ttl: Time to live in seconds
@@ -124,27 +141,29 @@ def cached_property(ttl: int = 3600, key_attr: str = "id"):
                 self.id = id
 
             @cached_property(ttl=600)
-            def full_profile(self):
+            async def full_profile(self):
                 # Expensive operation
-                return fetch_full_profile(self.id)
+                return await fetch_full_profile(self.id)
+
+        profile = await user.full_profile
     """
     def decorator(func: Callable) -> property:
-        cache = get_cache()
-
         @wraps(func)
-        def wrapper(self):
+        async def wrapper(self):
+            cache = get_cache()
+
             # Generate cache key from instance attribute
             instance_key = getattr(self, key_attr, id(self))
             cache_key = f"{self.__class__.__name__}.{func.__name__}:{instance_key}"
 
             # Try to get from cache
-            cached_value = cache.get(cache_key)
+            cached_value = await cache.get(cache_key)
             if cached_value is not None:
                 return cached_value
 
             # Execute method and cache result
-            result = func(self)
-            cache.set(cache_key, result, ttl=ttl)
+            result = await func(self)
+            await cache.set(cache_key, result, ttl=ttl)
             return result
 
         return property(wrapper)
@@ -154,34 +173,41 @@ def cached_property(ttl: int = 3600, key_attr: str = "id"):
 
 def cache_invalidate(
     pattern: Optional[str] = None,
-    keys: Optional[list] = None
+    keys: Optional[list] = None,
+    tags: Optional[Union[Iterable[str], Callable]] = None
 ):
     """
-    Decorator to invalidate cache after function execution.
+    Decorator to invalidate cache after async function execution.
+
+    Prefer tags: a pattern is resolved with a keyspace SCAN.
 
     Args:
         pattern: Pattern to match keys for deletion
         keys: Specific keys to delete
+        tags: Tags to invalidate, or a function returning them from the
+            call arguments
 
     Example:
-        @cache_invalidate(pattern="user:*")
-        def update_user(user_id: str, data: dict):
+        @cache_invalidate(tags=lambda user_id, data: [f"user:{user_id}"])
+        async def update_user(user_id: str, data: dict):
             # Update user in database
             pass
     """
     def decorator(func: Callable) -> Callable:
-        cache = get_cache()
-
         @wraps(func)
-        def wrapper(*args, **kwargs):
+        async def wrapper(*args, **kwargs):
             # Execute function first
-            result = func(*args, **kwargs)
+            result = await func(*args, **kwargs)
 
             # Invalidate cache
+            cache = get_cache()
+            if tags:
+                resolved = tags(*args, **kwargs) if callable(tags) else tags
+                await cache.invalidate_tags(*resolved)
             if pattern:
-                cache.delete_pattern(pattern)
+                await cache.delete_pattern(pattern)
             if keys:
-                cache.delete_many(keys)
+                await cache.delete_many(keys)
 
             return result
 
@@ -208,26 +234,26 @@ def cache_aside(
             return f"user:{user_id}:posts:{include_posts}"
 
         @cache_aside(key_func=make_key, ttl=300)
-        def get_user_with_posts(user_id: str, include_posts: bool):
+        async def get_user_with_posts(user_id: str, include_posts: bool):
             # Fetch data
             return data
     """
     def decorator(func: Callable) -> Callable:
-        cache = get_cache()
-
         @wraps(func)
-        def wrapper(*args, **kwargs):
+        async def wrapper(*args, **kwargs):
+            cache = get_cache()
+
             # Generate cache key using custom function
             cache_key = key_func(*args, **kwargs)
 
             # Try to get from cache
-            cached_value = cache.get(cache_key, serializer=serializer)
+            cached_value = await cache.get(cache_key, deserializer=serializer)
             if cached_value is not None:
                 return cached_value
 
             # Execute function and cache result
-            result = func(*args, **kwargs)
-            cache.set(cache_key, result, ttl=ttl, serializer=serializer)
+            result = await func(*args, **kwargs)
+            await cache.set(cache_key, result, ttl=ttl, serializer=serializer)
             return result
 
         return wrapper
@@ -237,10 +263,10 @@ def cache_aside(
 
 def memoize(maxsize: int = 128, ttl: int = 3600):
     """
-    Memoization decorator with Redis backend.
+    Memoization decorator with the multi-tier cache as backend.
 
-    Similar to functools.lru_cache but using Redis for persistence
-    and sharing across processes.
+    Similar to functools.lru_cache but shared across processes through
+    Redis; the in-process tier keeps hot results local.
 
     Args:
         maxsize: Maximum number of cached items (not enforced in Redis)
@@ -248,59 +274,51 @@ def memoize(maxsize: int = 128, ttl: int = 3600):
 
     Example:
         @memoize(ttl=600)
-        def fibonacci(n: int) -> int:
-            if n < 2:
-                return n
-            return fibonacci(n-1) + fibonacci(n-2)
+        async def expensive_lookup(n: int) -> int:
+            ...
     """
     return cached(ttl=ttl, serializer="pickle")
 
 
 def cache_lock(
     key_func: Callable,
-    timeout: int = 60,
-    blocking: bool = True
+    timeout: int = 60
 ):
     """
     Distributed lock decorator using Redis.
 
-    Ensures only one process can execute the function at a time.
+    Ensures only one process can execute the function at a time; callers
+    that cannot acquire the lock get a RuntimeError.
 
     Args:
         key_func: Function to generate lock key from arguments
         timeout: Lock timeout in seconds
-        blocking: If True, wait for lock; if False, raise error
 
     Example:
         def make_lock_key(user_id):
-            return f"lock:process_user:{user_id}"
+            return f"process_user:{user_id}"
 
         @cache_lock(key_func=make_lock_key, timeout=30)
-        def process_user_data(user_id: str):
+        async def process_user_data(user_id: str):
             # Critical section - only one process at a time
             pass
     """
     def decorator(func: Callable) -> Callable:
-        cache = get_cache()
-
         @wraps(func)
-        def wrapper(*args, **kwargs):
-            lock_key = f"lock:{key_func(*args, **kwargs)}"
+        async def wrapper(*args, **kwargs):
+            cache = get_cache()
+            lock_key = key_func(*args, **kwargs)
 
             # Try to acquire lock
-            lock = cache.redis.lock(lock_key, timeout=timeout, blocking=blocking)
+            token = await cache.acquire_lock(lock_key, ttl=timeout)
+            if token is None:
+                raise RuntimeError(f"Could not acquire lock: {lock_key}")
 
             try:
-                if lock.acquire():
-                    # Execute function with lock held
-                    return func(*args, **kwargs)
-                else:
-                    raise RuntimeError(f"Could not acquire lock: {lock_key}")
+                # Execute function with lock held
+                return await func(*args, **kwargs)
             finally:
-                try:
-                    lock.release()
-                except Exception:
-                    pass  # Lock may have expired
+                await cache.release_lock(lock_key, token)
 
         return wrapper
 
@@ -0,0 +1,187 @@
+"""
+In-process LRU Cache (L1 tier)
+
+Bounded by entry count, total bytes and per-entry TTL. Values are kept
+serialized so callers can never mutate a cached object in place. Entries
+can be registered under tags and dropped per tag without scanning keys.
+"""
+
+import fnmatch
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+
+class LocalCache:
+    """
+    Thread-safe LRU cache of serialized values.
+
+    Example:
+        l1 = LocalCache(max_entries=1000, max_bytes=16 * 1024 * 1024)
+        l1.set("sentrix:user:1", b'{"id": 1}', ttl=30)
+        l1.get("sentrix:user:1")  # b'{"id": 1}'
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024):
+        """
+        Initialize local cache.
+
+        Args:
+            max_entries: Maximum number of entries kept
+            max_bytes: Maximum total size of stored values in bytes
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._tags: Dict[str, Set[str]] = {}
+        self._key_tags: Dict[str, Tuple[str, ...]] = {}
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key: str) -> None:
+        """Remove an entry (caller holds the lock)."""
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+        self._untag(key)
+
+    def _untag(self, key: str) -> None:
+        """Drop a key from the tag index (caller holds the lock)."""
+        for tag in self._key_tags.pop(key, ()):
+            members = self._tags.get(tag)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._tags[tag]
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Get a value if present and not expired.
+
+        Args:
+            key: Full cache key
+
+        Returns:
+            Stored bytes or None
+        """
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()) -> bool:
+        """
+        Store a value, evicting least recently used entries past the bounds.
+
+        Args:
+            key: Full cache key
+            value: Serialized value
+            ttl: Time to live in seconds
+            tags: Tags the entry is registered under
+
+        Returns:
+            True if stored, False if the value cannot fit or ttl is not positive
+        """
+        size = len(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            if ttl <= 0 or size > self.max_bytes:
+                return False
+
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._bytes += size
+            tags = tuple(tags)
+            if tags:
+                self._key_tags[key] = tags
+                for tag in tags:
+                    self._tags.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                old_key, (old_value, _) = self._entries.popitem(last=False)
+                self._bytes -= len(old_value)
+                self._untag(old_key)
+                self.evictions += 1
+
+        return True
+
+    def delete(self, key: str) -> bool:
+        """Delete a key; returns True if it was present."""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete several keys; returns how many were present."""
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+                    removed += 1
+            return removed
+
+    def delete_pattern(self, pattern: str) -> int:
+        """Delete keys matching a glob pattern (Redis-style * and ?)."""
+        with self._lock:
+            matches = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+            for key in matches:
+                self._remove(key)
+            return len(matches)
+
+    def delete_tags(self, tags: Iterable[str]) -> int:
+        """Delete every entry registered under any of the tags."""
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._key_tags.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of stored values in bytes."""
+        return self._bytes
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get local cache statistics.
+
+        Returns:
+            Dictionary with size, bounds, evictions and expirations
+        """
+        return {
+            "entries": len(self._entries),
+            "tags": len(self._tags),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
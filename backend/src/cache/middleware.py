@@ -1,23 +1,90 @@
 """
 Cache Middleware for FastAPI
 
-Provides HTTP response caching middleware.
+Provides HTTP response caching middleware backed by the multi-tier cache.
+
+- Responses are stored as raw bytes with their status and headers, so a hit
+  is replayed without re-parsing or re-serializing the body
+- Every cached response carries a strong ETag; conditional requests
+  (If-None-Match) are answered with 304 Not Modified
+- Keys are partitioned by caller on paths whose output depends on the user
+- Entries are registered under tags so write paths can invalidate them
+- Concurrent misses for the same key are coalesced (single-flight), in-process
+  and across workers through a short Redis lock
 """
 
+import asyncio
 import hashlib
-from typing import Callable
+import json
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.responses import Response, JSONResponse
+from starlette.responses import Response
 
 from .cache_service import get_cache
+from .tags import user_tag
+from ..logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# (status_code, headers, body)
+CachedEntry = Tuple[int, Dict[str, str], bytes]
+
+# Headers that are regenerated per response and must not be replayed
+_UNCACHED_HEADERS = {
+    "content-length",
+    "transfer-encoding",
+    "connection",
+    "set-cookie",
+    "x-request-id",
+    "x-cache",
+}
+
+# Headers kept on a 304 response (RFC 7232 section 4.1)
+_NOT_MODIFIED_HEADERS = ("etag", "cache-control", "vary", "expires", "x-cache")
+
+
+def _make_etag(body: bytes) -> str:
+    """Strong ETag derived from the response body."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Weak comparison of If-None-Match against an ETag."""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _encode_entry(status_code: int, headers: Dict[str, str], body: bytes) -> bytes:
+    """Frame an entry as a one-line JSON header followed by the raw body."""
+    meta = json.dumps({"s": status_code, "h": headers}, separators=(",", ":"))
+    return meta.encode() + b"\n" + body
+
+
+def _decode_entry(raw: bytes) -> Optional[CachedEntry]:
+    """Inverse of _encode_entry; returns None for malformed entries."""
+    meta, separator, body = raw.partition(b"\n")
+    if not separator:
+        return None
+    try:
+        data = json.loads(meta)
+        return data["s"], data["h"], body
+    except (ValueError, KeyError):
+        return None
 
 
 class CacheMiddleware(BaseHTTPMiddleware):
     """
     HTTP response caching middleware.
 
-    Caches GET responses based on URL and query parameters.
+    Caches GET responses based on URL, query parameters and, where needed,
+    the caller's identity.
     """
 
     def __init__(
@@ -26,7 +93,12 @@ class CacheMiddleware(BaseHTTPMiddleware):
         default_ttl: int = 300,
         cache_methods: list = None,
         exclude_paths: list = None,
-        cache_status_codes: list = None
+        cache_status_codes: list = None,
+        include_paths: list = None,
+        vary_by_user_paths: list = None,
+        path_ttls: dict = None,
+        path_tags: dict = None,
+        lock_timeout: float = 10.0
     ):
         """
         Initialize cache middleware.
@@ -37,13 +109,28 @@ class CacheMiddleware(BaseHTTPMiddleware):
             cache_methods: HTTP methods to cache (default: ["GET"])
             exclude_paths: URL paths to exclude from caching
             cache_status_codes: Status codes to cache (default: [200])
+            include_paths: If set, only these URL path prefixes are cached
+            vary_by_user_paths: Path prefixes whose response depends on the caller
+            path_ttls: Per path prefix TTL overrides in seconds
+            path_tags: Per path prefix cache tags (see src.cache.tags)
+            lock_timeout: Max seconds a worker waits for another worker's
+                computation of the same key before computing it itself
         """
         super().__init__(app)
         self.default_ttl = default_ttl
         self.cache_methods = cache_methods or ["GET"]
         self.exclude_paths = exclude_paths or []
         self.cache_status_codes = cache_status_codes or [200]
-        self.cache = get_cache()
+        self.include_paths = include_paths
+        self.vary_by_user_paths = vary_by_user_paths or []
+        self.path_ttls = path_ttls or {}
+        self.path_tags = path_tags or {}
+        self.lock_timeout = lock_timeout
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def _matches(path: str, prefixes: List[str]) -> bool:
+        return any(path.startswith(prefix) for prefix in prefixes)
 
     def _should_cache(self, request: Request) -> bool:
         """
@@ -59,10 +146,15 @@ class CacheMiddleware(BaseHTTPMiddleware):
         if request.method not in self.cache_methods:
             return False
 
+        path = request.url.path
+
+        # Check allow-list
+        if self.include_paths is not None and not self._matches(path, self.include_paths):
+            return False
+
         # Check excluded paths
-        for excluded_path in self.exclude_paths:
-            if request.url.path.startswith(excluded_path):
-                return False
+        if self._matches(path, self.exclude_paths):
+            return False
 
         # Check for cache-control header
         cache_control = request.headers.get("Cache-Control", "")
@@ -71,6 +163,51 @@ class CacheMiddleware(BaseHTTPMiddleware):
 
         return True
 
+    def _ttl_for(self, path: str) -> int:
+        for prefix, ttl in self.path_ttls.items():
+            if path.startswith(prefix):
+                return ttl
+        return self.default_ttl
+
+    def _tags_for(self, request: Request) -> List[str]:
+        """Tags of an entry: configured path tags plus the verified user."""
+        path = request.url.path
+        tags = [
+            tag
+            for prefix, prefix_tags in self.path_tags.items()
+            if path.startswith(prefix)
+            for tag in prefix_tags
+        ]
+        user = getattr(request.state, "user", None)
+        if user is not None and self._varies_by_user(request):
+            tags.append(user_tag(user.id))
+        return tags
+
+    def _varies_by_user(self, request: Request) -> bool:
+        return self._matches(request.url.path, self.vary_by_user_paths)
+
+    def _identity(self, request: Request) -> str:
+        """
+        Cache partition of the caller.
+
+        Uses the verified user on request.state when an upstream layer set it.
+        Otherwise the full Authorization header is hashed: unverified token
+        claims must never select a partition, and only the holder of the
+        exact credential can read entries stored under it.
+        """
+        if not self._varies_by_user(request):
+            return "public"
+
+        user = getattr(request.state, "user", None)
+        if user is not None:
+            return f"user:{user.id}:{getattr(user, 'role', '')}"
+
+        authorization = request.headers.get("Authorization")
+        if not authorization:
+            return "anonymous"
+
+        return "token:" + hashlib.sha256(authorization.encode()).hexdigest()[:32]
+
     def _make_cache_key(self, request: Request) -> str:
         """
         Generate cache key from request.
@@ -81,11 +218,12 @@ class CacheMiddleware(BaseHTTPMiddleware):
         Returns:
             Cache key
         """
-        # Include method, path, and query params
+        # Include method, path, query params and caller partition
         key_parts = [
             request.method,
             request.url.path,
-            str(sorted(request.query_params.items()))
+            urlencode(sorted(request.query_params.multi_items())),
+            self._identity(request)
         ]
 
         # Include relevant headers (for API versioning, etc.)
@@ -95,11 +233,108 @@ class CacheMiddleware(BaseHTTPMiddleware):
                 key_parts.append(f"{header}:{request.headers[header]}")
 
         # Create hash
-        key_string = ":".join(key_parts)
-        key_hash = hashlib.md5(key_string.encode()).hexdigest()
+        key_string = "|".join(key_parts)
+        key_hash = hashlib.blake2b(key_string.encode(), digest_size=20).hexdigest()
 
         return f"http:response:{key_hash}"
 
+    @staticmethod
+    def _is_storable(response: Response) -> bool:
+        """Responses that set cookies or opt out of storage are never cached."""
+        cache_control = response.headers.get("cache-control", "")
+        if "no-store" in cache_control or "private" in cache_control:
+            return False
+        return "set-cookie" not in response.headers
+
+    def _build_response(
+        self,
+        entry: CachedEntry,
+        cache_state: str,
+        if_none_match: Optional[str]
+    ) -> Response:
+        """Materialize a cached entry, answering 304 when the ETag matches."""
+        status_code, stored_headers, body = entry
+        headers = {**stored_headers, "x-cache": cache_state}
+
+        if _etag_matches(if_none_match, headers.get("etag")):
+            return Response(
+                status_code=304,
+                headers={k: headers[k] for k in _NOT_MODIFIED_HEADERS if k in headers}
+            )
+
+        return Response(content=body, status_code=status_code, headers=headers)
+
+    async def _wait_for_peer(self, cache, cache_key: str) -> Optional[CachedEntry]:
+        """Poll the shared cache while another worker computes the same key."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lock_timeout
+        delay = 0.05
+
+        while loop.time() < deadline:
+            await asyncio.sleep(delay)
+            raw = await cache.get_bytes(cache_key)
+            if raw is not None:
+                return _decode_entry(raw)
+            delay = min(delay * 2, 0.5)
+
+        return None
+
+    async def _compute(
+        self,
+        request: Request,
+        call_next: Callable,
+        cache,
+        cache_key: str
+    ) -> Tuple[Optional[CachedEntry], Optional[Response]]:
+        """
+        Produce the response for a miss.
+
+        Returns:
+            (entry, None) when the response was captured for caching, or
+            (None, response) when it must be passed through untouched
+        """
+        lock_token = None
+        if cache is not None:
+            lock_token = await cache.acquire_lock(cache_key, ttl=self.lock_timeout)
+            if lock_token is None:
+                entry = await self._wait_for_peer(cache, cache_key)
+                if entry is not None:
+                    return entry, None
+
+        try:
+            response = await call_next(request)
+
+            if response.status_code not in self.cache_status_codes or not self._is_storable(response):
+                return None, response
+
+            body = b"".join([chunk async for chunk in response.body_iterator])
+
+            headers = {
+                key: value
+                for key, value in response.headers.items()
+                if key.lower() not in _UNCACHED_HEADERS
+            }
+            headers["etag"] = _make_etag(body)
+            if self._varies_by_user(request):
+                headers["vary"] = "Authorization"
+                headers.setdefault("cache-control", "private, no-cache")
+            else:
+                headers.setdefault("cache-control", "no-cache")
+
+            entry = (response.status_code, headers, body)
+
+            if cache is not None:
+                ttl = self._ttl_for(request.url.path)
+                await cache.set_bytes(
+                    cache_key, _encode_entry(*entry), ttl=ttl, tags=self._tags_for(request)
+                )
+
+            return entry, None
+
+        finally:
+            if lock_token is not None:
+                await cache.release_lock(cache_key, lock_token)
+
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         """
         Process request with caching.
@@ -115,64 +350,43 @@ class CacheMiddleware(BaseHTTPMiddleware):
         if not self._should_cache(request):
             return await call_next(request)
 
-        # Generate cache key
         cache_key = self._make_cache_key(request)
+        if_none_match = request.headers.get("If-None-Match")
+        cache = get_cache()
+        if cache is not None and not cache.enabled:
+            cache = None
 
         # Try to get cached response
-        cached_response = self.cache.get(cache_key)
-        if cached_response is not None:
-            # Add cache hit header
-            return JSONResponse(
-                content=cached_response["content"],
-                status_code=cached_response["status_code"],
-                headers={
-                    **cached_response.get("headers", {}),
-                    "X-Cache": "HIT"
-                }
-            )
+        if cache is not None:
+            raw = await cache.get_bytes(cache_key)
+            entry = _decode_entry(raw) if raw is not None else None
+            if entry is not None:
+                return self._build_response(entry, "HIT", if_none_match)
+
+        # Join an in-flight computation of the same key in this worker
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None:
+            entry = await asyncio.shield(inflight)
+            if entry is not None:
+                return self._build_response(entry, "COALESCED", if_none_match)
+            # Leader's response was not cacheable; compute our own
+            return await call_next(request)
 
-        # Execute request
-        response = await call_next(request)
-
-        # Cache successful responses
-        if response.status_code in self.cache_status_codes:
-            # Read response body
-            response_body = b""
-            async for chunk in response.body_iterator:
-                response_body += chunk
-
-            # Parse JSON if possible
-            try:
-                import json
-                content = json.loads(response_body.decode())
-
-                # Prepare cached response
-                cached_data = {
-                    "content": content,
-                    "status_code": response.status_code,
-                    "headers": dict(response.headers)
-                }
-
-                # Cache response
-                self.cache.set(cache_key, cached_data, ttl=self.default_ttl)
-
-                # Return fresh response with cache miss header
-                return JSONResponse(
-                    content=content,
-                    status_code=response.status_code,
-                    headers={
-                        **dict(response.headers),
-                        "X-Cache": "MISS"
-                    }
-                )
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = future
+        entry = None
+        try:
+            entry, passthrough = await self._compute(request, call_next, cache, cache_key)
+        finally:
+            self._inflight.pop(cache_key, None)
+            future.set_result(entry)
 
-            except Exception:
-                # If parsing fails, return original response
-                pass
+        if passthrough is not None:
+            passthrough.headers["X-Cache"] = "SKIP"
+            return passthrough
 
-        # Add cache miss header for non-cached responses
-        response.headers["X-Cache"] = "SKIP"
-        return response
+        logger.debug("http_cache_miss", path=request.url.path)
+        return self._build_response(entry, "MISS", if_none_match)
 
 
 def cache_response(
@@ -195,15 +409,17 @@ def cache_response(
     from functools import wraps
 
     def decorator(func: Callable) -> Callable:
-        cache = get_cache()
-
         @wraps(func)
         async def wrapper(*args, **kwargs):
+            cache = get_cache()
+            if not cache.enabled:
+                return await func(*args, **kwargs)
+
             # Generate cache key from function args
             cache_key = f"{key_prefix}:{func.__name__}:{args}:{kwargs}"
 
             # Try cache
-            cached = cache.get(cache_key)
+            cached = await cache.get(cache_key)
             if cached is not None:
                 return cached
 
@@ -211,7 +427,7 @@ def cache_response(
             result = await func(*args, **kwargs)
 
             # Cache result
-            cache.set(cache_key, result, ttl=ttl)
+            await cache.set(cache_key, result, ttl=ttl)
 
             return result
 
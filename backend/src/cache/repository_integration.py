@@ -2,15 +2,25 @@
 Repository Integration Examples
 
 Shows how to integrate caching with repository pattern.
+
+Repositories are synchronous; the cached variants expose async methods so
+they can be awaited from FastAPI handlers alongside the async cache.
+Entries are tagged with the user/analysis they derive from, and writes
+invalidate those tags instead of pattern-matching keys.
 """
 
 from typing import Optional, List
 from uuid import UUID
 
 from ..database.repositories import UserRepository, AnalysisRepository
+from .cache_service import get_cache
 from .decorators import cached, cache_invalidate
+from .tags import MAP_STATS, analysis_tag, invalidate_analysis_cache, user_tag
 from .utils import CacheKeyBuilder, get_or_set
 
+# Tag of lookups that cannot be tied to one user id up front (e.g. by email)
+USERS_TAG = "users"
+
 
 class CachedUserRepository(UserRepository):
     """
@@ -23,30 +33,27 @@ class CachedUserRepository(UserRepository):
         super().__init__(*args, **kwargs)
         self.key_builder = CacheKeyBuilder("user")
 
-    @cached(ttl=600, serializer="pickle")  # Cache for 10 minutes
-    def get_by_id(self, id: UUID):
+    @cached(ttl=600, serializer="pickle", tags=lambda self, id: [user_tag(id)])  # Cache for 10 minutes
+    async def get_by_id_cached(self, id: UUID):
         """Get user by ID with caching."""
-        return super().get_by_id(id)
+        return self.get_by_id(id)
 
-    @cached(ttl=300, serializer="pickle")
-    def get_by_email(self, email: str):
+    @cached(ttl=300, serializer="pickle", tags=[USERS_TAG])
+    async def get_by_email_cached(self, email: str):
         """Get user by email with caching."""
-        return super().get_by_email(email)
+        return self.get_by_email(email)
 
-    @cache_invalidate(pattern="user:*")
-    def create_user(self, *args, **kwargs):
+    @cache_invalidate(tags=[USERS_TAG])
+    async def create_user_cached(self, *args, **kwargs):
         """Create user and invalidate cache."""
-        return super().create_user(*args, **kwargs)
+        return self.create_user(*args, **kwargs)
 
-    @cache_invalidate(keys=lambda self, user_id, **kwargs: [f"user:*:{user_id}:*"])
-    def update(self, user_id: UUID, **kwargs):
+    async def update_cached(self, user_id: UUID, **kwargs):
         """Update user and invalidate cache."""
-        result = super().update(user_id, **kwargs)
+        result = self.update(user_id, **kwargs)
 
         # Invalidate specific user caches
-        from .cache_service import get_cache
-        cache = get_cache()
-        cache.delete_pattern(f"*:user_id={user_id}:*")
+        await get_cache().invalidate_tags(user_tag(user_id), USERS_TAG)
 
         return result
 
@@ -60,12 +67,12 @@ class CachedAnalysisRepository(AnalysisRepository):
         super().__init__(*args, **kwargs)
         self.key_builder = CacheKeyBuilder("analysis")
 
-    @cached(ttl=300, serializer="pickle")
-    def get_by_id(self, id: UUID):
+    @cached(ttl=300, serializer="pickle", tags=lambda self, id: [analysis_tag(id)])
+    async def get_by_id_cached(self, id: UUID):
         """Get analysis by ID with caching."""
-        return super().get_by_id(id)
+        return self.get_by_id(id)
 
-    def get_by_user(self, user_id: UUID, skip: int = 0, limit: int = 100):
+    async def get_by_user_cached(self, user_id: UUID, skip: int = 0, limit: int = 100):
         """Get user's analyses with caching."""
         cache_key = self.key_builder.build(
             method="get_by_user",
@@ -74,21 +81,27 @@ class CachedAnalysisRepository(AnalysisRepository):
             limit=limit
         )
 
-        return get_or_set(
-            key=cache_key,
-            default_factory=lambda: super().get_by_user(user_id, skip, limit),
-            ttl=300
+        async def load():
+            return self.get_by_user(user_id, skip, limit)
+
+        return await get_or_set(
+            key=cache_key, default_factory=load, ttl=300, tags=[user_tag(user_id)]
         )
 
-    @cached(ttl=600, serializer="pickle")
-    def get_statistics(self, user_id: Optional[UUID] = None):
+    @cached(
+        ttl=600,
+        serializer="pickle",
+        tags=lambda self, user_id=None: [user_tag(user_id)] if user_id else [MAP_STATS]
+    )
+    async def get_statistics_cached(self, user_id: Optional[UUID] = None):
         """Get analysis statistics with caching."""
-        return super().get_statistics(user_id)
+        return self.get_statistics(user_id)
 
-    @cache_invalidate(pattern="analysis:*")
-    def create_analysis(self, *args, **kwargs):
+    async def create_analysis_cached(self, user_id: UUID, *args, **kwargs):
         """Create analysis and invalidate cache."""
-        return super().create_analysis(*args, **kwargs)
+        analysis = self.create_analysis(user_id, *args, **kwargs)
+        await invalidate_analysis_cache(analysis.id, user_id=user_id)
+        return analysis
 
 
 # ============================================
@@ -104,8 +117,8 @@ class CachedAnalysisService:
         self.analysis_repo = analysis_repo
         self.key_builder = CacheKeyBuilder("service:analysis")
 
-    @cached(ttl=600)
-    def get_user_dashboard_data(self, user_id: UUID) -> dict:
+    @cached(ttl=600, serializer="pickle", tags=lambda self, user_id: [user_tag(user_id)])
+    async def get_user_dashboard_data(self, user_id: UUID) -> dict:
         """
         Get comprehensive dashboard data for a user.
 
@@ -127,20 +140,9 @@ class CachedAnalysisService:
             "user_id": str(user_id)
         }
 
-    def invalidate_user_dashboard(self, user_id: UUID) -> None:
+    async def invalidate_user_dashboard(self, user_id: UUID) -> None:
         """Invalidate dashboard cache after updates."""
-        from .cache_service import get_cache
-        cache = get_cache()
-
-        # Clear all dashboard-related caches
-        patterns = [
-            f"*:get_user_dashboard_data:*{user_id}*",
-            f"analysis:*:user_id={user_id}:*",
-            f"service:analysis:user_id={user_id}:*"
-        ]
-
-        for pattern in patterns:
-            cache.delete_pattern(pattern)
+        await get_cache().invalidate_tags(user_tag(user_id))
 
 
 # ============================================
@@ -158,7 +160,7 @@ def create_cached_repositories(db_session):
             db: Session = Depends(get_db)
         ):
             repos = create_cached_repositories(db)
-            user = repos["user"].get_by_id(user_id)
+            user = await repos["user"].get_by_id_cached(user_id)
             return user
     """
     return {
@@ -0,0 +1,131 @@
+"""
+Cache Tags
+
+Names of the tags cached entries are registered under, and helpers that
+invalidate them from the write paths. Invalidating a tag costs one set read
+plus one pipelined delete, whatever the size of the keyspace.
+
+Tags:
+- heatmap: public heatmap data
+- map-stats: public map statistics
+- dashboard: dashboard aggregates (global and per-user)
+- detection-quality: detection quality metrics and validation statistics
+- user:<id>: anything derived from one user's data
+- analysis:<id>: anything derived from one analysis and its detections
+"""
+
+from typing import Any, List, Optional
+
+from sqlalchemy import event
+
+from .cache_service import get_cache
+from ..logging_config import get_logger
+
+logger = get_logger(__name__)
+
+HEATMAP = "heatmap"
+MAP_STATS = "map-stats"
+DASHBOARD = "dashboard"
+DETECTION_QUALITY = "detection-quality"
+
+
+def user_tag(user_id: Any) -> str:
+    """Tag for entries derived from a user's data."""
+    return f"user:{user_id}"
+
+
+def analysis_tag(analysis_id: Any) -> str:
+    """Tag for entries derived from an analysis and its detections."""
+    return f"analysis:{analysis_id}"
+
+
+def analysis_write_tags(*analysis_ids: Any, user_id: Optional[Any] = None) -> List[str]:
+    """
+    Tags made stale by creating or changing analyses or their detections.
+
+    Map, dashboard and quality aggregates are built from every analysis, so
+    they are always included.
+
+    Args:
+        *analysis_ids: Affected analyses
+        user_id: Owner of the analyses, if known
+
+    Returns:
+        List of tags to invalidate
+    """
+    tags = [HEATMAP, MAP_STATS, DASHBOARD, DETECTION_QUALITY]
+    tags.extend(analysis_tag(a) for a in analysis_ids if a is not None)
+    if user_id is not None:
+        tags.append(user_tag(user_id))
+    return tags
+
+
+async def invalidate_analysis_cache(*analysis_ids: Any, user_id: Optional[Any] = None) -> int:
+    """
+    Invalidate cached data after an analysis/detection write.
+
+    Cache errors are logged and never fail the write.
+
+    Returns:
+        Number of entries deleted
+    """
+    try:
+        return await get_cache().invalidate_tags(*analysis_write_tags(*analysis_ids, user_id=user_id))
+    except Exception as e:
+        logger.error("cache_invalidation_failed", analysis_ids=[str(a) for a in analysis_ids], error=str(e))
+        return 0
+
+
+def invalidate_analysis_cache_sync(*analysis_ids: Any, user_id: Optional[Any] = None) -> int:
+    """
+    Synchronous variant of invalidate_analysis_cache for repositories and
+    validators running outside the event loop.
+
+    Returns:
+        Number of entries deleted (0 when the invalidation was scheduled)
+    """
+    try:
+        return get_cache().invalidate_tags_sync(*analysis_write_tags(*analysis_ids, user_id=user_id))
+    except Exception as e:
+        logger.error("cache_invalidation_failed", analysis_ids=[str(a) for a in analysis_ids], error=str(e))
+        return 0
+
+
+# Session.info key collecting tags to invalidate when the transaction commits
+_SESSION_TAGS_KEY = "cache_invalidate_tags"
+
+
+def invalidate_on_commit(session, *tags: str) -> None:
+    """
+    Invalidate tags once the session's current transaction commits.
+
+    Repositories only flush; invalidating before the commit would let a
+    concurrent reader cache the old rows again. Tags are dropped on rollback.
+
+    Args:
+        session: SQLAlchemy session performing the write
+        *tags: Tags to invalidate
+    """
+    pending = session.info.get(_SESSION_TAGS_KEY)
+    if pending is None:
+        pending = session.info[_SESSION_TAGS_KEY] = set()
+        event.listen(session, "after_commit", _flush_session_tags)
+        event.listen(session, "after_rollback", _discard_session_tags)
+    pending.update(tags)
+
+
+def _flush_session_tags(session) -> None:
+    tags = session.info.get(_SESSION_TAGS_KEY)
+    if tags:
+        pending = tuple(tags)
+        tags.clear()
+        try:
+            get_cache().invalidate_tags_sync(*pending)
+        except Exception as e:
+            logger.error("cache_invalidation_failed", tags=list(pending), error=str(e))
+
+
+def _discard_session_tags(session) -> None:
+    tags = session.info.get(_SESSION_TAGS_KEY)
+    if tags:
+        tags.clear()
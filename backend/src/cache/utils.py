@@ -1,14 +1,15 @@
 """
 Cache Utilities
 
-Provides utility functions and strategies for caching.
+Provides async utility functions and strategies for caching.
 """
 
-from typing import Callable, List, Dict, Any, Optional
+from typing import Awaitable, Callable, List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from enum import Enum
 
 from .cache_service import get_cache
+from .tags import user_tag, analysis_tag
 from ..logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -81,18 +82,18 @@ class CacheKeyBuilder:
         return ":".join(parts)
 
 
-def cache_warm_up(
+async def cache_warm_up(
     keys: List[str],
-    loader_func: Callable[[str], Any],
+    loader_func: Callable[[str], Awaitable[Any]],
     ttl: int = 3600,
     batch_size: int = 100
 ) -> int:
     """
-    Warm up cache with data from a loader function.
+    Warm up cache with data from an async loader function.
 
     Args:
         keys: List of keys to warm up
-        loader_func: Function that loads data for a key
+        loader_func: Async function that loads data for a key
         ttl: Time to live in seconds
         batch_size: Number of keys to process per batch
 
@@ -100,11 +101,11 @@ def cache_warm_up(
         Number of keys successfully cached
 
     Example:
-        def load_user(user_id: str):
-            return db.query(User).filter(User.id == user_id).first()
+        async def load_user(user_id: str):
+            return await fetch_user(user_id)
 
         user_ids = ["1", "2", "3", "4", "5"]
-        cache_warm_up(user_ids, load_user, ttl=3600)
+        await cache_warm_up(user_ids, load_user, ttl=3600)
     """
     cache = get_cache()
     success_count = 0
@@ -117,7 +118,7 @@ def cache_warm_up(
         # Load data for batch
         for key in batch_keys:
             try:
-                data = loader_func(key)
+                data = await loader_func(key)
                 if data is not None:
                     batch_data[key] = data
             except Exception as e:
@@ -125,14 +126,14 @@ def cache_warm_up(
                 continue
 
         # Cache batch
-        success_count += cache.set_many(batch_data, ttl=ttl)
+        success_count += await cache.set_many(batch_data, ttl=ttl)
 
     return success_count
 
 
-def cache_through(
+async def cache_through(
     cache_key: str,
-    loader_func: Callable[[], Any],
+    loader_func: Callable[[], Awaitable[Any]],
     ttl: int = 3600,
     force_refresh: bool = False
 ) -> Any:
@@ -141,7 +142,7 @@ def cache_through(
 
     Args:
         cache_key: Cache key
-        loader_func: Function to load data if not cached
+        loader_func: Async function to load data if not cached
         ttl: Time to live in seconds
         force_refresh: If True, bypass cache and reload
 
@@ -149,10 +150,10 @@ def cache_through(
         Data from cache or loader
 
     Example:
-        def load_user_profile(user_id: str):
-            return cache_through(
+        async def load_user_profile(user_id: str):
+            return await cache_through(
                 cache_key=f"user:profile:{user_id}",
-                loader_func=lambda: db.query(User).get(user_id),
+                loader_func=lambda: fetch_profile(user_id),
                 ttl=600
             )
     """
@@ -160,24 +161,24 @@ def cache_through(
 
     # Force refresh if requested
     if force_refresh:
-        data = loader_func()
-        cache.set(cache_key, data, ttl=ttl)
+        data = await loader_func()
+        await cache.set(cache_key, data, ttl=ttl)
         return data
 
     # Try cache first
-    cached_data = cache.get(cache_key)
+    cached_data = await cache.get(cache_key)
     if cached_data is not None:
         return cached_data
 
     # Load and cache
-    data = loader_func()
+    data = await loader_func()
     if data is not None:
-        cache.set(cache_key, data, ttl=ttl)
+        await cache.set(cache_key, data, ttl=ttl)
 
     return data
 
 
-def cache_stats_monitor() -> Dict[str, Any]:
+async def cache_stats_monitor() -> Dict[str, Any]:
     """
     Get comprehensive cache statistics.
 
@@ -185,7 +186,7 @@ def cache_stats_monitor() -> Dict[str, Any]:
         Dictionary with cache statistics and health info
 
     Example:
-        stats = cache_stats_monitor()
+        stats = await cache_stats_monitor()
         print(f"Hit rate: {stats['hit_rate']}%")
         print(f"Memory usage: {stats['memory_usage_mb']} MB")
     """
@@ -193,10 +194,10 @@ def cache_stats_monitor() -> Dict[str, Any]:
 
     try:
         # Get cache stats
-        stats = cache.get_stats()
+        stats = await cache.get_stats()
 
         # Get Redis info
-        info = cache.info()
+        info = await cache.info()
 
         # Calculate additional metrics
         memory_usage = info.get("used_memory", 0)
@@ -210,7 +211,7 @@ def cache_stats_monitor() -> Dict[str, Any]:
             "memory_usage_mb": memory_usage_mb,
             "connected_clients": connected_clients,
             "total_commands": total_commands,
-            "is_healthy": cache.ping()
+            "is_healthy": await cache.ping()
         }
 
     except Exception as e:
@@ -224,10 +225,12 @@ def cache_stats_monitor() -> Dict[str, Any]:
         }
 
 
-def cache_invalidate_user_data(user_id: str) -> int:
+async def cache_invalidate_user_data(user_id: str) -> int:
     """
     Invalidate all cached data for a specific user.
 
+    Deletes every entry tagged with user:<user_id>.
+
     Args:
         user_id: User ID
 
@@ -236,46 +239,27 @@ def cache_invalidate_user_data(user_id: str) -> int:
 
     Example:
         # After updating user profile
-        cache_invalidate_user_data(user.id)
+        await cache_invalidate_user_data(user.id)
     """
-    cache = get_cache()
-    patterns = [
-        f"user:{user_id}:*",
-        f"*:user_id={user_id}:*",
-        f"analyses:user:{user_id}:*"
-    ]
-
-    total_invalidated = 0
-    for pattern in patterns:
-        total_invalidated += cache.delete_pattern(pattern)
+    return await get_cache().invalidate_tags(user_tag(user_id))
 
-    return total_invalidated
 
-
-def cache_invalidate_analysis_data(analysis_id: str) -> int:
+async def cache_invalidate_analysis_data(analysis_id: str) -> int:
     """
     Invalidate all cached data for a specific analysis.
 
+    Deletes every entry tagged with analysis:<analysis_id>.
+
     Args:
         analysis_id: Analysis ID
 
     Returns:
         Number of keys invalidated
     """
-    cache = get_cache()
-    patterns = [
-        f"analysis:{analysis_id}:*",
-        f"detections:analysis:{analysis_id}:*"
-    ]
+    return await get_cache().invalidate_tags(analysis_tag(analysis_id))
 
-    total_invalidated = 0
-    for pattern in patterns:
-        total_invalidated += cache.delete_pattern(pattern)
 
-    return total_invalidated
-
-
-def cache_health_check() -> Dict[str, Any]:
+async def cache_health_check() -> Dict[str, Any]:
     """
     Perform comprehensive cache health check.
 
@@ -283,7 +267,7 @@ def cache_health_check() -> Dict[str, Any]:
         Dictionary with health check results
 
     Example:
-        health = cache_health_check()
+        health = await cache_health_check()
         if not health['is_healthy']:
             print(f"Cache unhealthy: {health['error']}")
     """
@@ -291,7 +275,7 @@ def cache_health_check() -> Dict[str, Any]:
 
     try:
         # Test connection
-        ping_result = cache.ping()
+        ping_result = await cache.ping()
         if not ping_result:
             return {
                 "is_healthy": False,
@@ -300,7 +284,7 @@ def cache_health_check() -> Dict[str, Any]:
 
         # Test write
         test_key = "_health_check_test"
-        write_success = cache.set(test_key, "test", ttl=10)
+        write_success = await cache.set(test_key, "test", ttl=10)
         if not write_success:
             return {
                 "is_healthy": False,
@@ -308,7 +292,7 @@ def cache_health_check() -> Dict[str, Any]:
             }
 
         # Test read
-        read_value = cache.get(test_key)
+        read_value = await cache.get(test_key)
         if read_value != "test":
             return {
                 "is_healthy": False,
@@ -316,7 +300,7 @@ def cache_health_check() -> Dict[str, Any]:
             }
 
         # Test delete
-        delete_success = cache.delete(test_key)
+        delete_success = await cache.delete(test_key)
         if not delete_success:
             return {
                 "is_healthy": False,
@@ -324,7 +308,7 @@ def cache_health_check() -> Dict[str, Any]:
             }
 
         # Get stats
-        stats = cache.get_stats()
+        stats = await cache.get_stats()
 
         return {
             "is_healthy": True,
@@ -340,24 +324,26 @@ def cache_health_check() -> Dict[str, Any]:
         }
 
 
-def get_or_set(
+async def get_or_set(
     key: str,
-    default_factory: Callable[[], Any],
-    ttl: int = 3600
+    default_factory: Callable[[], Awaitable[Any]],
+    ttl: int = 3600,
+    tags: Optional[List[str]] = None
 ) -> Any:
     """
     Get value from cache or set it using a factory function.
 
     Args:
         key: Cache key
-        default_factory: Function to generate value if not cached
+        default_factory: Async function to generate value if not cached
         ttl: Time to live in seconds
+        tags: Tags to register the value under
 
     Returns:
         Cached or newly generated value
 
     Example:
-        user = get_or_set(
+        user = await get_or_set(
             key=f"user:{user_id}",
             default_factory=lambda: fetch_user_from_db(user_id),
             ttl=600
@@ -366,19 +352,19 @@ def get_or_set(
     cache = get_cache()
 
     # Try to get from cache
-    value = cache.get(key)
+    value = await cache.get(key)
     if value is not None:
         return value
 
     # Generate and cache
-    value = default_factory()
+    value = await default_factory()
     if value is not None:
-        cache.set(key, value, ttl=ttl)
+        await cache.set(key, value, ttl=ttl, tags=tags)
 
     return value
 
 
-def cache_prefix_all_keys(prefix: str) -> List[str]:
+async def cache_prefix_all_keys(prefix: str) -> List[str]:
     """
     Get all keys with a specific prefix.
 
@@ -389,13 +375,13 @@ def cache_prefix_all_keys(prefix: str) -> List[str]:
         List of matching keys
 
     Example:
-        user_keys = cache_prefix_all_keys("user:")
+        user_keys = await cache_prefix_all_keys("user:")
     """
     cache = get_cache()
-    return cache.keys(f"{prefix}*")
+    return await cache.keys(f"{prefix}*")
 
 
-def cache_size_estimate(pattern: str = "*") -> Dict[str, Any]:
+async def cache_size_estimate(pattern: str = "*") -> Dict[str, Any]:
     """
     Estimate cache size for keys matching pattern.
 
@@ -406,13 +392,13 @@ def cache_size_estimate(pattern: str = "*") -> Dict[str, Any]:
         Dictionary with size estimates
 
     Example:
-        size_info = cache_size_estimate("user:*")
+        size_info = await cache_size_estimate("user:*")
         print(f"Total keys: {size_info['key_count']}")
     """
     cache = get_cache()
 
     try:
-        keys = cache.keys(pattern)
+        keys = await cache.keys(pattern)
         key_count = len(keys)
 
         # Sample some keys to estimate average size
@@ -420,12 +406,9 @@ def cache_size_estimate(pattern: str = "*") -> Dict[str, Any]:
         total_sample_size = 0
 
         for key in keys[:sample_size]:
-            try:
-                value = cache.redis.get(cache._make_key(key))
-                if value:
-                    total_sample_size += len(value)
-            except Exception:
-                continue
+            value = await cache.get_bytes(key)
+            if value:
+                total_sample_size += len(value)
 
         avg_size = total_sample_size / sample_size if sample_size > 0 else 0
         estimated_total_size = avg_size * key_count
@@ -5,6 +5,7 @@ Enables async task processing for long-running operations
 
 import os
 from celery import Celery
+from celery.schedules import crontab
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -17,7 +18,11 @@ celery_app = Celery(
     "sentrix",
     broker=REDIS_URL,
     backend=REDIS_URL,
-    include=["src.tasks.analysis_tasks"]  # Auto-discover tasks
+    include=[
+        "src.tasks.analysis_tasks",
+        "src.tasks.report_tasks",
+        "src.tasks.dashboard_tasks",
+    ]  # Auto-discover tasks
 )
 
 # Celery configuration
@@ -47,6 +52,21 @@ celery_app.conf.update(
     # Task routing
     task_routes={
         "src.tasks.analysis_tasks.*": {"queue": "analysis"},
+        "src.tasks.report_tasks.*": {"queue": "reports"},
+        "src.tasks.dashboard_tasks.*": {"queue": "reports"},
+    },
+
+    # Periodic tasks (celery beat)
+    beat_schedule={
+        "refresh-dashboard-rollups": {
+            "task": "src.tasks.dashboard_tasks.refresh_dashboard_rollups_task",
+            "schedule": 60.0,
+        },
+        "rebuild-dashboard-rollups": {
+            "task": "src.tasks.dashboard_tasks.refresh_dashboard_rollups_task",
+            "schedule": crontab(hour=3, minute=0),
+            "kwargs": {"full": True},
+        },
     },
 
     # Monitoring
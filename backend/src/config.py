@@ -6,7 +6,7 @@ Type-safe settings with Pydantic validation
 import os
 import sys
 from pathlib import Path
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 from pydantic import (
     Field,
     field_validator,
@@ -159,6 +159,49 @@ class Settings(BaseSettings):
         description="Redis connection URL for Celery and caching"
     )
 
+    # ============================================
+    # Caching
+    # ============================================
+
+    cache_enabled: bool = Field(
+        default=True,
+        description="Enable the multi-tier (in-process + Redis) cache"
+    )
+
+    cache_default_ttl: int = Field(
+        default=300,
+        ge=1,
+        le=86400,
+        description="Default cache TTL in seconds"
+    )
+
+    cache_l1_max_entries: int = Field(
+        default=1024,
+        ge=0,
+        le=1_000_000,
+        description="Max entries in the per-process L1 cache (0 disables L1)"
+    )
+
+    cache_l1_max_bytes: int = Field(
+        default=32 * 1024 * 1024,  # 32MB
+        ge=0,
+        description="Max total size in bytes of the per-process L1 cache"
+    )
+
+    cache_l1_ttl_seconds: float = Field(
+        default=30.0,
+        gt=0.0,
+        le=3600.0,
+        description="Max lifetime of an L1 entry; bounds staleness if an invalidation is missed"
+    )
+
+    cache_stats_flush_seconds: float = Field(
+        default=10.0,
+        gt=0.0,
+        le=3600.0,
+        description="Interval for flushing locally counted cache statistics to Redis"
+    )
+
     # ============================================
     # CORS
     # ============================================
@@ -191,6 +234,86 @@ class Settings(BaseSettings):
         description="Allowed file extensions for upload"
     )
 
+    max_video_size: int = Field(
+        default=200 * 1024 * 1024,  # 200MB
+        ge=1024 * 1024,
+        le=1024 * 1024 * 1024,
+        description="Maximum video upload size in bytes"
+    )
+
+    allowed_video_extensions: List[str] = Field(
+        default=[".mp4", ".mov", ".m4v", ".avi", ".mkv", ".webm"],
+        description="Allowed video extensions for upload"
+    )
+
+    video_upload_dir: str = Field(
+        default="uploads/videos",
+        description="Directory where uploaded videos wait for their analysis task"
+    )
+
+    report_artifact_dir: str = Field(
+        default="uploads/reports",
+        description="Directory of generated report files, shared by the API and Celery workers"
+    )
+
+    report_artifact_max_bytes: int = Field(
+        default=1024 * 1024 * 1024,  # 1GB
+        ge=1024 * 1024,
+        description="Total size of stored report files; least recently used are evicted beyond it"
+    )
+
+    report_artifact_max_files: int = Field(
+        default=500,
+        ge=1,
+        description="Maximum number of stored report files"
+    )
+
+    dashboard_cache_ttl: int = Field(
+        default=60,
+        ge=1,
+        le=3600,
+        description="Seconds dashboard aggregates stay cached (also invalidated on analysis writes)"
+    )
+
+    quality_confidence_edges: List[float] = Field(
+        default=[0.5, 0.7, 0.9, 1.0],
+        description="Bucket edges of the detection confidence histogram in quality metrics (increasing, 0-1)"
+    )
+
+    active_learning_weights: Dict[str, float] = Field(
+        default={"uncertainty": 0.35, "rarity": 0.25, "disagreement": 0.4},
+        description="Weights of the retraining sample score components (uncertainty, rarity, disagreement)"
+    )
+
+    active_learning_diversity: float = Field(
+        default=0.3,
+        ge=0.0,
+        le=1.0,
+        description="Share of the greedy selection objective given to spatial/temporal diversity"
+    )
+
+    active_learning_class_counts_path: Optional[str] = Field(
+        default=None,
+        description="analyze_dataset.py JSON report with training-set class counts (default: approved detections)"
+    )
+
+    image_preview_sizes: List[int] = Field(
+        default=[256, 768, 1600],
+        description="Longest side (px) of the preview pyramid generated at ingest (empty = disabled)"
+    )
+
+    image_preview_format: Literal["webp", "jpeg"] = Field(
+        default="webp",
+        description="Encoding of the preview pyramid"
+    )
+
+    image_preview_quality: int = Field(
+        default=80,
+        ge=30,
+        le=95,
+        description="Encoder quality of the preview pyramid"
+    )
+
     # ============================================
     # YOLO Service Configuration
     # ============================================
@@ -202,6 +325,13 @@ class Settings(BaseSettings):
         description="Timeout for YOLO service requests in seconds"
     )
 
+    yolo_video_timeout_seconds: float = Field(
+        default=600.0,
+        ge=30.0,
+        le=3600.0,
+        description="Timeout for YOLO video analysis requests in seconds"
+    )
+
     yolo_confidence_threshold: float = Field(
         default=0.5,
         ge=0.1,
@@ -241,6 +371,20 @@ class Settings(BaseSettings):
         description="API rate limit requests per minute"
     )
 
+    rate_limit_org_per_minute: int = Field(
+        default=100,
+        ge=0,
+        le=100000,
+        description="Requests per minute shared by an organization on each limited endpoint (0 disables)"
+    )
+
+    rate_limit_endpoint_per_minute: int = Field(
+        default=600,
+        ge=0,
+        le=1000000,
+        description="Requests per minute shared by all callers of each limited endpoint (0 disables)"
+    )
+
     default_pagination_limit: int = Field(
         default=20,
         ge=1,
@@ -255,6 +399,25 @@ class Settings(BaseSettings):
         description="Maximum number of images allowed in batch processing"
     )
 
+    cpu_pool_mode: Literal["process", "thread"] = Field(
+        default="process",
+        description="Executor for image-bound CPU work (HEIC decode, hashing, thumbnails, EXIF)"
+    )
+
+    cpu_pool_workers: int = Field(
+        default=0,
+        ge=0,
+        le=64,
+        description="CPU pool workers (0 = number of cores)"
+    )
+
+    cpu_pool_max_pending: int = Field(
+        default=32,
+        ge=0,
+        le=1000,
+        description="CPU pool calls allowed to wait for a worker before answering 503"
+    )
+
     batch_concurrent_limit: int = Field(
         default=10,
         ge=1,
@@ -390,6 +553,25 @@ class Settings(BaseSettings):
             return [ext if ext.startswith(".") else f".{ext}" for ext in extensions]
         return v
 
+    @field_validator("quality_confidence_edges")
+    @classmethod
+    def validate_confidence_edges(cls, v):
+        """Histogram edges must be strictly increasing within [0, 1]"""
+        if len(v) < 2 or any(not 0 <= edge <= 1 for edge in v) or any(a >= b for a, b in zip(v, v[1:])):
+            raise ValueError("quality_confidence_edges must be at least two strictly increasing values in [0, 1]")
+        return v
+
+    @field_validator("active_learning_weights")
+    @classmethod
+    def validate_active_learning_weights(cls, v):
+        """Only known score components, with non-negative weights"""
+        unknown = set(v) - {"uncertainty", "rarity", "disagreement"}
+        if unknown or any(weight < 0 for weight in v.values()) or not any(v.values()):
+            raise ValueError(
+                "active_learning_weights takes non-negative uncertainty, rarity and disagreement weights, not all zero"
+            )
+        return v
+
     @field_validator("secret_key", "jwt_secret_key")
     @classmethod
     def validate_secrets(cls, v, info):
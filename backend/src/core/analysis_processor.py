@@ -18,6 +18,7 @@ from ..utils.paths import get_logs_dir
 from ..utils.database_utils import get_db_context
 from ..database.models import Analysis, Detection
 from ..logging_config import get_logger
+from ..cache.tags import invalidate_analysis_cache
 from ..config import get_settings
 from ..exceptions import (
     YOLOServiceException,
@@ -170,7 +171,10 @@ class AnalysisProcessor:
                 db.add(db_detection)
 
             db.commit()
-            return db_analysis.id
+            analysis_id = db_analysis.id
+
+        await invalidate_analysis_cache(analysis_id, user_id=user_id)
+        return analysis_id
 
     async def _save_batch_log(
         self,
@@ -263,7 +267,10 @@ class AnalysisProcessor:
 
             db.commit()
 
-            return {
-                "cleaned_analyses": updated_count,
-                "cutoff_date": cutoff_date.isoformat()
-            }
\ No newline at end of file
+        if updated_count:
+            await invalidate_analysis_cache()
+
+        return {
+            "cleaned_analyses": updated_count,
+            "cutoff_date": cutoff_date.isoformat()
+        }
\ No newline at end of file
@@ -23,6 +23,7 @@ from ..exceptions import (
     AnalysisNotFoundException
 )
 from ..logging_config import get_logger
+from ..cache.tags import invalidate_analysis_cache
 
 logger = get_logger(__name__)
 
@@ -77,6 +78,7 @@ class SentrixAPIManager:
                     db.add(db_detection)
 
                 db.commit()
+                await invalidate_analysis_cache(db_analysis.id, user_id=db_analysis.user_id)
 
                 return AnalysisResponse(
                     id=db_analysis.id,
@@ -203,6 +205,7 @@ class SentrixAPIManager:
             detection.expert_notes = expert_notes
 
             db.commit()
+            await invalidate_analysis_cache(detection.analysis_id)
 
             return {
                 "detection_id": detection.id,
@@ -4,15 +4,66 @@ Validador de Detecciones para Sentrix Backend
 
 Handles expert validation and quality assurance of detections
 Maneja validación de expertos y aseguramiento de calidad de detecciones
+
+Quality metrics and validation statistics are computed in one pass over the
+detections with conditional aggregates (COUNT(*) FILTER (WHERE ...)) and a
+confidence histogram (width_bucket on PostgreSQL, an equivalent CASE
+elsewhere), and cached under the detection-quality tag. Every analysis or
+validation write invalidates that tag (see cache.tags.analysis_write_tags).
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Sequence
 from datetime import datetime, timedelta
-from sqlalchemy import func
+from sqlalchemy import Float, case, cast, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, array
 
 from ..utils.database_utils import get_db_context
+from ..cache.cache_service import get_cache
+from ..cache.tags import DETECTION_QUALITY, invalidate_analysis_cache_sync
+from ..config import get_settings
 from ..database.models import Detection, Analysis, User
-from ..database.models.enums import RiskLevelEnum, UserRoleEnum
+from ..database.models.enums import RiskLevelEnum, UserRoleEnum, ValidationStatusEnum
+from ..database.repositories.detection_repository import CONFLICT, NOT_FOUND, UPDATED, DetectionRepository
+from ..services.active_learning import RetrainingSampler
+
+APPROVED = ValidationStatusEnum.VALIDATED_POSITIVE.value
+REJECTED = ValidationStatusEnum.VALIDATED_NEGATIVE.value
+EXPERT_VERDICTS = (APPROVED, REJECTED)
+
+BULK_REVIEW_ERRORS = {
+    NOT_FOUND: "Detection not found",
+    CONFLICT: "Detection was changed by another reviewer",
+}
+
+
+def confidence_bucket(confidence, edges: Sequence[float], dialect_name: str):
+    """
+    Histogram bucket of a confidence, as width_bucket(confidence, edges)
+
+    0 below the first edge, i for edges[i-1] <= confidence < edges[i],
+    len(edges) at or above the last edge, NULL for NULL confidence.
+    """
+    if dialect_name == "postgresql":
+        return func.width_bucket(cast(confidence, Float), cast(array(list(edges)), ARRAY(Float)))
+    return case(
+        (confidence.is_(None), None),
+        *[(confidence < edge, index) for index, edge in enumerate(edges)],
+        else_=len(edges)
+    )
+
+
+def confidence_bucket_label(low: float, high: float) -> str:
+    return f"{low:g}-{high:g}"
+
+
+def _cached(key: str, compute):
+    """Value from the in-process cache tier, computed and stored on a miss"""
+    cache = get_cache()
+    value = cache.get_local(key)
+    if value is None:
+        value = compute()
+        cache.set_local(key, value, ttl=get_settings().dashboard_cache_ttl, tags=[DETECTION_QUALITY])
+    return value
 
 
 class DetectionValidator:
@@ -87,17 +138,18 @@ class DetectionValidator:
                 raise ValueError("Detection not found")
 
             # Update validation
-            detection.is_validated = True
-            detection.expert_validation = is_valid
-            detection.expert_notes = expert_notes
+            detection.validation_status = APPROVED if is_valid else REJECTED
+            detection.validation_notes = expert_notes
             detection.validated_by = expert_id
             detection.validated_at = datetime.now()
+            detection.version = (detection.version or 0) + 1
 
             # Adjust confidence if provided
             if confidence_adjustment is not None:
                 detection.expert_confidence = confidence_adjustment
 
             db.commit()
+            invalidate_analysis_cache_sync(detection.analysis_id)
 
             return {
                 "detection_id": detection.id,
@@ -116,8 +168,12 @@ class DetectionValidator:
         Validate multiple detections in batch
         Validar múltiples detecciones por lotes
 
+        Applied with one set-based UPDATE (DetectionRepository.bulk_review).
+
         Args:
             validations: List of dicts with keys: detection_id, is_valid, notes
+                and optionally expected_version (skip the detection if it
+                changed since the expert loaded it)
         """
         results = {
             "validated": 0,
@@ -125,40 +181,38 @@ class DetectionValidator:
             "errors": []
         }
 
+        decisions = []
+        for validation in validations:
+            if "detection_id" not in validation or "is_valid" not in validation:
+                results["errors"].append({
+                    "detection_id": validation.get("detection_id"),
+                    "error": "detection_id and is_valid are required"
+                })
+                results["failed"] += 1
+                continue
+            decisions.append({
+                "detection_id": validation["detection_id"],
+                "expected_version": validation.get("expected_version"),
+                "validation_status": APPROVED if validation["is_valid"] else REJECTED,
+                "validation_notes": validation.get("notes"),
+            })
+
+        if not decisions:
+            return results
+
+        # Cache invalidation is registered by the repository for the commit
         with get_db_context() as db:
-            for validation in validations:
-                try:
-                    detection_id = validation["detection_id"]
-                    is_valid = validation["is_valid"]
-                    notes = validation.get("notes")
-
-                    detection = db.query(Detection).filter(Detection.id == detection_id).first()
-
-                    if not detection:
-                        results["errors"].append({
-                            "detection_id": detection_id,
-                            "error": "Detection not found"
-                        })
-                        results["failed"] += 1
-                        continue
-
-                    # Update validation
-                    detection.is_validated = True
-                    detection.expert_validation = is_valid
-                    detection.expert_notes = notes
-                    detection.validated_by = expert_id
-                    detection.validated_at = datetime.now()
-
-                    results["validated"] += 1
-
-                except Exception as e:
-                    results["errors"].append({
-                        "detection_id": validation.get("detection_id"),
-                        "error": str(e)
-                    })
-                    results["failed"] += 1
-
-            db.commit()
+            outcomes = DetectionRepository(db).bulk_review(decisions, reviewer_id=expert_id)
+
+        for outcome in outcomes:
+            if outcome["outcome"] == UPDATED:
+                results["validated"] += 1
+                continue
+            results["failed"] += 1
+            results["errors"].append({
+                "detection_id": outcome["detection_id"],
+                "error": BULK_REVIEW_ERRORS.get(outcome["outcome"]) or outcome.get("error")
+            })
 
         return results
 
@@ -170,164 +224,131 @@ class DetectionValidator:
         """
         Get validation statistics
         Obtener estadísticas de validación
+
+        Totals are summed from the per-class aggregate (one grouped query);
+        expert activity adds a second one when no expert is given.
         """
+        return _cached(
+            f"validator:validation_stats:expert={expert_id}:days={days}",
+            lambda: self._compute_validation_statistics(expert_id, days)
+        )
+
+    def _compute_validation_statistics(self, expert_id: Optional[int], days: int) -> Dict[str, Any]:
         cutoff_date = datetime.now() - timedelta(days=days)
+        validated = (
+            Detection.validation_status.in_(EXPERT_VERDICTS),
+            Detection.validated_at >= cutoff_date
+        )
 
         with get_db_context() as db:
-            base_query = db.query(Detection).filter(
-                Detection.is_validated == True,
-                Detection.validated_at >= cutoff_date
-            )
-
-            if expert_id:
-                base_query = base_query.filter(Detection.validated_by == expert_id)
-
-            # Total validations
-            total_validations = base_query.count()
-
-            # Approved vs rejected
-            approved = base_query.filter(Detection.expert_validation == True).count()
-            rejected = base_query.filter(Detection.expert_validation == False).count()
-
-            # By class
-            class_stats = base_query.with_entities(
+            class_query = select(
                 Detection.class_name,
-                func.count(Detection.id).label('count'),
-                func.avg(Detection.confidence).label('avg_confidence')
-            ).group_by(Detection.class_name).all()
+                func.count().label("validations"),
+                func.count().filter(Detection.validation_status == APPROVED).label("approved"),
+                func.count().filter(Detection.validation_status == REJECTED).label("rejected"),
+                func.avg(Detection.confidence).label("avg_confidence")
+            ).where(*validated)
+            if expert_id:
+                class_query = class_query.where(Detection.validated_by == expert_id)
+            class_stats = db.execute(class_query.group_by(Detection.class_name)).all()
 
             # Expert activity (if no specific expert)
             expert_activity = []
             if not expert_id:
-                expert_stats = db.query(
-                    Detection.validated_by,
-                    func.count(Detection.id).label('validations')
-                ).filter(
-                    Detection.is_validated == True,
-                    Detection.validated_at >= cutoff_date
-                ).group_by(Detection.validated_by).all()
+                expert_stats = db.execute(
+                    select(Detection.validated_by, func.count().label("validations"))
+                    .where(*validated)
+                    .group_by(Detection.validated_by)
+                ).all()
 
                 expert_activity = [
-                    {"expert_id": exp_id, "validations": count}
+                    {"expert_id": str(exp_id) if exp_id is not None else None, "validations": count}
                     for exp_id, count in expert_stats
                 ]
 
-            return {
-                "period_days": days,
-                "total_validations": total_validations,
-                "approved": approved,
-                "rejected": rejected,
-                "approval_rate": approved / total_validations if total_validations > 0 else 0,
-                "class_statistics": [
-                    {
-                        "class_name": class_name,
-                        "validations": count,
-                        "avg_confidence": float(avg_conf) if avg_conf else 0
-                    }
-                    for class_name, count, avg_conf in class_stats
-                ],
-                "expert_activity": expert_activity
-            }
+        total_validations = sum(row.validations for row in class_stats)
+        approved = sum(row.approved for row in class_stats)
+        rejected = sum(row.rejected for row in class_stats)
+
+        return {
+            "period_days": days,
+            "total_validations": total_validations,
+            "approved": approved,
+            "rejected": rejected,
+            "approval_rate": approved / total_validations if total_validations > 0 else 0,
+            "class_statistics": [
+                {
+                    "class_name": row.class_name,
+                    "validations": row.validations,
+                    "avg_confidence": float(row.avg_confidence) if row.avg_confidence else 0
+                }
+                for row in class_stats
+            ],
+            "expert_activity": expert_activity
+        }
 
-    def get_quality_metrics(self) -> Dict[str, Any]:
+    def get_quality_metrics(self, confidence_edges: Optional[Sequence[float]] = None) -> Dict[str, Any]:
         """
         Get overall quality metrics for the detection system
         Obtener métricas de calidad generales del sistema de detección
+
+        Args:
+            confidence_edges: Histogram bucket edges (settings.quality_confidence_edges
+                by default); buckets are [edges[i], edges[i+1])
         """
-        with get_db_context() as db:
-            # Total detections
-            total_detections = db.query(Detection).count()
-
-            # Validated detections
-            validated_detections = db.query(Detection).filter(
-                Detection.is_validated == True
-            ).count()
-
-            # Accuracy metrics (from validated detections)
-            if validated_detections > 0:
-                approved_detections = db.query(Detection).filter(
-                    Detection.is_validated == True,
-                    Detection.expert_validation == True
-                ).count()
-
-                accuracy = approved_detections / validated_detections
-            else:
-                accuracy = 0
-
-            # Confidence distribution
-            confidence_ranges = [
-                (0.5, 0.7, "Medium"),
-                (0.7, 0.9, "High"),
-                (0.9, 1.0, "Very High")
-            ]
+        edges = list(confidence_edges or get_settings().quality_confidence_edges)
+        return _cached(
+            f"validator:quality_metrics:edges={','.join(f'{edge:g}' for edge in edges)}",
+            lambda: self._compute_quality_metrics(edges)
+        )
 
-            confidence_distribution = {}
-            for min_conf, max_conf, label in confidence_ranges:
-                count = db.query(Detection).filter(
-                    Detection.confidence >= min_conf,
-                    Detection.confidence < max_conf
-                ).count()
-                confidence_distribution[label] = count
+    def _compute_quality_metrics(self, edges: List[float]) -> Dict[str, Any]:
+        with get_db_context() as db:
+            bucket = confidence_bucket(Detection.confidence, edges, db.get_bind().dialect.name)
+
+            # Totals, expert verdicts and confidence histogram in one pass
+            counts = db.execute(
+                select(
+                    func.count().label("total"),
+                    func.count().filter(Detection.validation_status.in_(EXPERT_VERDICTS)).label("validated"),
+                    func.count().filter(Detection.validation_status == APPROVED).label("approved"),
+                    *[
+                        func.count().filter(bucket == index).label(f"bucket_{index}")
+                        for index in range(1, len(edges))
+                    ]
+                ).select_from(Detection)
+            ).one()
 
             # Risk level distribution
-            risk_distribution = db.query(
-                Analysis.risk_level,
-                func.count(Analysis.id)
-            ).group_by(Analysis.risk_level).all()
-
-            return {
-                "total_detections": total_detections,
-                "validated_detections": validated_detections,
-                "validation_coverage": validated_detections / total_detections if total_detections > 0 else 0,
-                "system_accuracy": accuracy,
-                "confidence_distribution": confidence_distribution,
-                "risk_distribution": {
-                    risk: count for risk, count in risk_distribution
-                }
+            risk_distribution = db.execute(
+                select(Analysis.risk_level, func.count()).group_by(Analysis.risk_level)
+            ).all()
+
+        total_detections = counts.total
+        validated_detections = counts.validated
+
+        return {
+            "total_detections": total_detections,
+            "validated_detections": validated_detections,
+            "validation_coverage": validated_detections / total_detections if total_detections > 0 else 0,
+            "system_accuracy": counts.approved / validated_detections if validated_detections > 0 else 0,
+            "confidence_distribution": {
+                confidence_bucket_label(edges[index - 1], edges[index]): counts._mapping[f"bucket_{index}"]
+                for index in range(1, len(edges))
+            },
+            "risk_distribution": {
+                getattr(risk, "value", risk): count for risk, count in risk_distribution
             }
+        }
 
-    def suggest_retraining_data(self, limit: int = 100) -> List[Dict[str, Any]]:
+    def suggest_retraining_data(self, limit: int = 100, reviewed_only: bool = False) -> List[Dict[str, Any]]:
         """
-        Suggest detections for model retraining based on expert feedback
-        Sugerir detecciones para reentrenamiento del modelo basado en feedback de expertos
+        Suggest images for model retraining by active-learning selection
+        Sugerir imágenes para reentrenamiento del modelo por aprendizaje activo
+
+        Diverse top-`limit` analyses scored on uncertainty, class rarity and
+        expert disagreement (see services.active_learning).
         """
         with get_db_context() as db:
-            # Get rejected detections with high original confidence
-            rejected_high_conf = db.query(Detection).join(Analysis).filter(
-                Detection.is_validated == True,
-                Detection.expert_validation == False,
-                Detection.confidence >= 0.7
-            ).order_by(Detection.confidence.desc()).limit(limit // 2).all()
-
-            # Get approved detections with low original confidence
-            approved_low_conf = db.query(Detection).join(Analysis).filter(
-                Detection.is_validated == True,
-                Detection.expert_validation == True,
-                Detection.confidence < 0.6
-            ).order_by(Detection.confidence.asc()).limit(limit // 2).all()
-
-            suggestions = []
-
-            for detection in rejected_high_conf:
-                suggestions.append({
-                    "detection_id": detection.id,
-                    "image_path": detection.analysis.image_path,
-                    "class_name": detection.class_name,
-                    "original_confidence": detection.confidence,
-                    "expert_validation": False,
-                    "suggestion_reason": "High confidence but expert rejected",
-                    "priority": "high"
-                })
-
-            for detection in approved_low_conf:
-                suggestions.append({
-                    "detection_id": detection.id,
-                    "image_path": detection.analysis.image_path,
-                    "class_name": detection.class_name,
-                    "original_confidence": detection.confidence,
-                    "expert_validation": True,
-                    "suggestion_reason": "Low confidence but expert approved",
-                    "priority": "medium"
-                })
-
-            return suggestions
\ No newline at end of file
+            sampler = RetrainingSampler(db)
+            return [candidate.to_dict(sampler.weights) for candidate in sampler.select(limit, reviewed_only)]
\ No newline at end of file
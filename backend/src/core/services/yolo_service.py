@@ -5,6 +5,9 @@ Cliente del servicio YOLO para integrar con el yolo-service
 Enhanced with timeout configuration and retry logic for production resilience
 """
 
+import json
+import math
+import time
 import httpx
 from typing import Dict, Any, Optional
 from fastapi import HTTPException
@@ -21,9 +24,15 @@ from pybreaker import CircuitBreaker, CircuitBreakerError
 
 from ...config import get_settings
 from ...utils.integrations.yolo_integration import parse_yolo_report, validate_yolo_response
-from ...utils.image_conversion import prepare_image_for_processing
+from ...utils.image_conversion import prepare_image_for_processing, is_heic_format
+from ...utils.cpu_pool import run_cpu
 from ...logging_config import get_logger, get_request_id
 
+try:
+    from sentrix_shared.gps_utils import extract_image_metadata
+except ImportError:
+    extract_image_metadata = None  # The YOLO service extracts the metadata itself
+
 logger = get_logger(__name__)
 settings = get_settings()
 
@@ -38,6 +47,20 @@ yolo_circuit_breaker = CircuitBreaker(
     name="yolo-service"
 )
 
+# Longest back-off honoured from a YOLO Retry-After header
+MAX_OVERLOAD_BACKOFF_SECONDS = 60.0
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Retry-After of a 429/503 (overload) response, capped"""
+    if response.status_code not in (429, 503):
+        return None
+    try:
+        seconds = float(str(response.headers.get("Retry-After")))
+    except (TypeError, ValueError):
+        return None
+    return min(max(seconds, 1.0), MAX_OVERLOAD_BACKOFF_SECONDS)
+
 
 class YOLOServiceClient:
     """
@@ -47,6 +70,7 @@ class YOLOServiceClient:
     - Configurable timeouts (connect, read, write, pool)
     - Connection pooling with limits
     - Automatic retry with exponential backoff
+    - Backs off while the YOLO service reports overload (503 + Retry-After)
     - Comprehensive error handling
     """
 
@@ -67,6 +91,10 @@ class YOLOServiceClient:
             max_keepalive_connections=20  # Max idle connections in pool
         )
 
+        # Monotonic deadline from the last overload Retry-After: until then
+        # requests fail fast instead of adding load to a saturated service
+        self._backoff_until = 0.0
+
     async def health_check(self) -> Dict[str, Any]:
         """
         Check YOLO service health status
@@ -174,7 +202,8 @@ class YOLOServiceClient:
         image_data: bytes,
         filename: str = "image.jpg",
         confidence_threshold: float = None,
-        include_gps: bool = True
+        include_gps: bool = True,
+        metadata: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Enviar imagen al servicio YOLO para detección
@@ -189,6 +218,9 @@ class YOLOServiceClient:
             filename: Nombre del archivo (para determinar tipo)
             confidence_threshold: Umbral de confianza para detección
             include_gps: Si extraer metadatos GPS
+            metadata: GPS y cámara ya extraídos de la imagen original
+                (sentrix_shared.gps_utils.extract_image_metadata); si se omite
+                se extraen aquí antes de convertir HEIC
 
         Returns:
             Dict con resultados de detección procesados para backend
@@ -201,19 +233,40 @@ class YOLOServiceClient:
         if not image_data:
             raise ValueError("image_data es requerido")
 
+        backoff = self._backoff_until - time.monotonic()
+        if backoff > 0:
+            logger.warning("yolo_overload_backoff", image_filename=filename, retry_after=round(backoff, 1))
+            raise HTTPException(
+                status_code=503,
+                detail="YOLO service overloaded. Please try again in a moment.",
+                headers={"Retry-After": str(math.ceil(backoff))}
+            )
+
         # Set default confidence threshold from settings
         if confidence_threshold is None:
             confidence_threshold = settings.yolo_confidence_threshold
 
         try:
-            # Convert HEIC to JPEG if needed
-            processed_image_data, processed_filename = prepare_image_for_processing(image_data, filename)
+            # Metadata from the original bytes (HEIC conversion drops the EXIF)
+            if include_gps and metadata is None and extract_image_metadata is not None:
+                metadata = extract_image_metadata(image_data, filename)
+
+            # Convert HEIC to JPEG if needed (off the event loop, in the CPU pool)
+            if is_heic_format(filename):
+                processed_image_data, processed_filename = await run_cpu(
+                    "heic_decode", prepare_image_for_processing, image_data, filename
+                )
+            else:
+                processed_image_data, processed_filename = prepare_image_for_processing(image_data, filename)
 
             # Preparar datos de formulario
             form_data = {
                 "confidence_threshold": confidence_threshold,
                 "include_gps": include_gps
             }
+            # The YOLO service uses it instead of parsing the image again
+            if include_gps and metadata:
+                form_data["metadata"] = json.dumps(metadata)
 
             # Determinar tipo MIME basado en extensión
             content_type = "image/jpeg"
@@ -260,6 +313,7 @@ class YOLOServiceClient:
                 "camera_info": yolo_response.get("camera_info"),
                 "processing_time_ms": yolo_response.get("processing_time_ms", 0),
                 "model_used": yolo_response.get("model_used"),
+                "model_version": yolo_response.get("model_version"),
                 "confidence_threshold": yolo_response.get("confidence_threshold"),
                 "processed_image_path": yolo_response.get("processed_image_path"),  # Ruta de imagen procesada
                 "processed_image_base64": yolo_response.get("processed_image_base64")  # Imagen procesada en base64
@@ -284,9 +338,15 @@ class YOLOServiceClient:
                 image_filename=filename,
                 exc_info=True
             )
+            headers = None
+            retry_after = _retry_after_seconds(e.response)
+            if retry_after is not None:
+                self._backoff_until = time.monotonic() + retry_after
+                headers = {"Retry-After": str(math.ceil(retry_after))}
             raise HTTPException(
                 status_code=e.response.status_code,
-                detail=f"YOLO service error: {e.response.text}"
+                detail=f"YOLO service error: {e.response.text}",
+                headers=headers
             )
 
         except httpx.ConnectError as e:
@@ -328,6 +388,132 @@ class YOLOServiceClient:
                 detail=f"Internal error processing image: {str(e)}"
             )
 
+    @yolo_circuit_breaker
+    @retry(
+        retry=retry_if_exception_type(httpx.ConnectError),
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+        before=before_log(logger, logging.INFO),
+        after=after_log(logger, logging.WARNING)
+    )
+    async def _call_yolo_detect_video(self, video_path: str, filename: str, form_data: dict) -> httpx.Response:
+        """
+        Internal method to call the YOLO video endpoint
+
+        The video is streamed from disk (never loaded in memory). Only
+        connection errors are retried: a timed-out video analysis is not
+        repeated from the start.
+        """
+        timeout = httpx.Timeout(
+            connect=5.0,
+            read=settings.yolo_video_timeout_seconds,
+            write=settings.yolo_video_timeout_seconds,
+            pool=5.0
+        )
+        async with httpx.AsyncClient(timeout=timeout, limits=self.limits) as client:
+            headers = {}
+            request_id = get_request_id()
+            if request_id:
+                headers["X-Request-ID"] = request_id
+
+            with open(video_path, "rb") as video_file:
+                response = await client.post(
+                    f"{self.base_url}/detect/video",
+                    data=form_data,
+                    files={"file": (filename, video_file, "application/octet-stream")},
+                    headers=headers
+                )
+            response.raise_for_status()
+            return response
+
+    async def detect_video(
+        self,
+        video_path: str,
+        filename: str = "video.mp4",
+        confidence_threshold: float = None,
+        include_gps: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Enviar un video al servicio YOLO (un resultado por sitio detectado)
+
+        Args:
+            video_path: Ruta local del video
+            filename: Nombre original (extensión)
+            confidence_threshold: Umbral de confianza para detección
+            include_gps: Ubicación de grabación desde los metadatos del video
+
+        Returns:
+            Dict con sitios detectados, información del video y ubicación
+
+        Raises:
+            HTTPException: If YOLO service fails (503 + Retry-After when overloaded)
+        """
+        backoff = self._backoff_until - time.monotonic()
+        if backoff > 0:
+            logger.warning("yolo_overload_backoff", video_filename=filename, retry_after=round(backoff, 1))
+            raise HTTPException(
+                status_code=503,
+                detail="YOLO service overloaded. Please try again in a moment.",
+                headers={"Retry-After": str(math.ceil(backoff))}
+            )
+
+        if confidence_threshold is None:
+            confidence_threshold = settings.yolo_confidence_threshold
+
+        try:
+            logger.info("yolo_video_detection_started", video_filename=filename, confidence_threshold=confidence_threshold)
+            response = await self._call_yolo_detect_video(
+                video_path,
+                filename,
+                {"confidence_threshold": confidence_threshold, "include_gps": include_gps}
+            )
+            yolo_response = response.json()
+            logger.info(
+                "yolo_video_detection_completed",
+                video_filename=filename,
+                processing_time_ms=yolo_response.get("processing_time_ms"),
+                total_detections=yolo_response.get("total_detections", 0),
+                frames_sampled=yolo_response.get("video", {}).get("frames_sampled")
+            )
+            return {"success": True, **yolo_response}
+
+        except CircuitBreakerError:
+            logger.error("yolo_circuit_breaker_open", video_filename=filename)
+            raise HTTPException(
+                status_code=503,
+                detail="YOLO service temporarily unavailable due to repeated failures. Please try again in a moment."
+            )
+
+        except httpx.HTTPStatusError as e:
+            logger.error(
+                "yolo_http_error",
+                status_code=e.response.status_code,
+                response_text=e.response.text[:500],
+                video_filename=filename
+            )
+            headers = None
+            retry_after = _retry_after_seconds(e.response)
+            if retry_after is not None:
+                self._backoff_until = time.monotonic() + retry_after
+                headers = {"Retry-After": str(math.ceil(retry_after))}
+            raise HTTPException(
+                status_code=e.response.status_code,
+                detail=f"YOLO service error: {e.response.text}",
+                headers=headers
+            )
+
+        except httpx.ConnectError as e:
+            logger.error("yolo_connection_error", yolo_service_url=self.base_url, video_filename=filename, error=str(e))
+            raise HTTPException(status_code=503, detail="YOLO service unavailable. Please try again later.")
+
+        except httpx.TimeoutException:
+            logger.error("yolo_timeout_error", video_filename=filename, timeout_seconds=settings.yolo_video_timeout_seconds)
+            raise HTTPException(status_code=504, detail="YOLO service timeout - video processing took too long.")
+
+        except Exception as e:
+            logger.error("yolo_unexpected_error", video_filename=filename, error_type=type(e).__name__, error=str(e), exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Internal error processing video: {str(e)}")
+
     async def download_processed_image(self, processed_image_path: str) -> bytes:
         """
         Descarga la imagen procesada desde el YOLO service
@@ -0,0 +1,11 @@
+-- Migration: 007_add_image_previews.sql
+-- Description: Store the preview pyramid generated at ingest
+-- Created: 2026-10-18
+-- Purpose: List and map views load 256/768 px previews instead of the full-size images
+
+-- Shape: {"original": {"256": url, "768": url, "1600": url}, "processed": {...}}
+-- NULL for analyses created before this migration (views fall back to image_url)
+ALTER TABLE analyses
+ADD COLUMN IF NOT EXISTS image_previews JSONB;
+
+COMMENT ON COLUMN analyses.image_previews IS 'Preview URLs per image (original, processed) and size in px (longest side)';
@@ -0,0 +1,72 @@
+-- Migration: 008_add_dashboard_rollups.sql
+-- Description: Daily rollup tables behind the dashboard endpoints (/reports/statistics, ...)
+-- Created: 2026-10-18
+-- Purpose: Dashboard aggregates read a few hundred rollup rows instead of scanning
+--          millions of analyses/detections. Refreshed incrementally by the
+--          refresh_dashboard_rollups Celery task (see services/dashboard_service.py).
+
+-- ============================================
+-- ROLLUP TABLES
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS analysis_daily_rollups (
+    id SERIAL PRIMARY KEY,
+    bucket_date DATE NOT NULL,
+    user_id UUID,
+    risk_level TEXT,
+    analyses_count BIGINT NOT NULL DEFAULT 0,
+    detections_count BIGINT NOT NULL DEFAULT 0,
+    high_risk_count BIGINT NOT NULL DEFAULT 0,
+    gps_count BIGINT NOT NULL DEFAULT 0,
+    processing_time_ms_sum BIGINT NOT NULL DEFAULT 0,
+    processing_time_count BIGINT NOT NULL DEFAULT 0,
+    UNIQUE (bucket_date, user_id, risk_level)
+);
+
+CREATE INDEX IF NOT EXISTS idx_analysis_daily_rollups_bucket_date
+ON analysis_daily_rollups(bucket_date);
+
+CREATE INDEX IF NOT EXISTS idx_analysis_daily_rollups_user_date
+ON analysis_daily_rollups(user_id, bucket_date);
+
+CREATE TABLE IF NOT EXISTS detection_daily_rollups (
+    id SERIAL PRIMARY KEY,
+    bucket_date DATE NOT NULL,
+    user_id UUID,
+    risk_level TEXT,
+    breeding_site_type TEXT,
+    validation_status TEXT,
+    detections_count BIGINT NOT NULL DEFAULT 0,
+    confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    UNIQUE (bucket_date, user_id, risk_level, breeding_site_type, validation_status)
+);
+
+CREATE INDEX IF NOT EXISTS idx_detection_daily_rollups_bucket_date
+ON detection_daily_rollups(bucket_date);
+
+CREATE INDEX IF NOT EXISTS idx_detection_daily_rollups_user_date
+ON detection_daily_rollups(user_id, bucket_date);
+
+-- Rows created before refreshed_through are in the rollup tables;
+-- later rows are aggregated live from the base tables
+CREATE TABLE IF NOT EXISTS rollup_state (
+    name TEXT PRIMARY KEY,
+    refreshed_through TIMESTAMPTZ NOT NULL,
+    refreshed_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- ============================================
+-- BASE TABLE INDEXES (incremental refresh and live tail)
+-- ============================================
+
+-- Analyses changed since the last refresh
+CREATE INDEX IF NOT EXISTS idx_analyses_updated_at
+ON analyses(updated_at);
+
+-- Detections created or validated since the last refresh
+CREATE INDEX IF NOT EXISTS idx_detections_created_at
+ON detections(created_at);
+
+CREATE INDEX IF NOT EXISTS idx_detections_validated_at
+ON detections(validated_at DESC)
+WHERE validated_at IS NOT NULL;
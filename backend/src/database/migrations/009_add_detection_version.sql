@@ -0,0 +1,10 @@
+-- Migration: 009_add_detection_version.sql
+-- Description: Row version of detections for optimistic concurrency
+-- Created: 2026-10-18
+-- Purpose: Bulk expert review only applies a decision if the detection is
+--          still at the version the reviewer saw (no silent overwrites)
+
+ALTER TABLE detections
+ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 0;
+
+COMMENT ON COLUMN detections.version IS 'Incremented on every review/validity change; clients send it back as expected_version';
@@ -1,6 +1,6 @@
 from sqlalchemy import (
-    Column, String, Integer, DateTime, Boolean, Text, DECIMAL,
-    ForeignKey, ARRAY, JSON as JSONB, func, TypeDecorator
+    Column, String, Integer, BigInteger, Date, DateTime, Boolean, Text, DECIMAL, Float,
+    ForeignKey, ARRAY, JSON as JSONB, func, TypeDecorator, UniqueConstraint
 )
 from sqlalchemy.orm import relationship
 from geoalchemy2 import Geography
@@ -205,8 +205,65 @@ class Detection(Base):
     persistence_type = Column(String(50))  # TRANSIENT, SHORT_TERM, MEDIUM_TERM, LONG_TERM, PERMANENT
     last_expiration_alert_sent = Column(DateTime(timezone=True))  # Last alert timestamp
 
+    # Optimistic concurrency: bumped on every review / validity change
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
     analysis = relationship("Analysis", back_populates="detections")
-    validator = relationship("UserProfile", back_populates="validated_detections")
\ No newline at end of file
+    validator = relationship("UserProfile", back_populates="validated_detections")
+
+
+class AnalysisDailyRollup(Base):
+    """
+    Analyses aggregated per day, user and risk level (dashboard rollup)
+    Análisis agregados por día, usuario y nivel de riesgo
+    """
+    __tablename__ = "analysis_daily_rollups"
+    __table_args__ = (UniqueConstraint("bucket_date", "user_id", "risk_level"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    bucket_date = Column(Date, nullable=False, index=True)
+    user_id = Column(GUID)
+    risk_level = Column(Text)
+
+    analyses_count = Column(BigInteger, nullable=False, default=0)
+    detections_count = Column(BigInteger, nullable=False, default=0)
+    high_risk_count = Column(BigInteger, nullable=False, default=0)
+    gps_count = Column(BigInteger, nullable=False, default=0)
+    processing_time_ms_sum = Column(BigInteger, nullable=False, default=0)
+    processing_time_count = Column(BigInteger, nullable=False, default=0)
+
+
+class DetectionDailyRollup(Base):
+    """
+    Detections aggregated per day, user, risk, site type and validation status
+    Detecciones agregadas por día, usuario, riesgo, tipo y validación
+    """
+    __tablename__ = "detection_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint("bucket_date", "user_id", "risk_level", "breeding_site_type", "validation_status"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    bucket_date = Column(Date, nullable=False, index=True)
+    user_id = Column(GUID)
+    risk_level = Column(Text)
+    breeding_site_type = Column(Text)
+    validation_status = Column(Text)
+
+    detections_count = Column(BigInteger, nullable=False, default=0)
+    confidence_sum = Column(Float, nullable=False, default=0)
+
+
+class RollupState(Base):
+    """
+    Watermark of each rollup: rows created before it are in the rollup tables
+    Marca de agua de cada rollup
+    """
+    __tablename__ = "rollup_state"
+
+    name = Column(Text, primary_key=True)
+    refreshed_through = Column(DateTime(timezone=True), nullable=False)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -4,15 +4,91 @@ Detection Repository
 Provides database operations for Detection model.
 """
 
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Sequence, Tuple
 from uuid import UUID
 from datetime import datetime, timezone, timedelta
 
-from sqlalchemy import select, func
+from sqlalchemy import (
+    DateTime, Enum, Integer, Text, case, cast, column, literal, select, func, union_all, update, values
+)
 from sqlalchemy.orm import Session
 
 from .base import BaseRepository
+from ..models.base import GUID
+from ..models.enums import ValidationStatusEnum
 from ..models.models import Detection
+from ...cache.tags import analysis_write_tags, invalidate_on_commit
+
+# Outcomes of a bulk review decision
+UPDATED = "updated"
+CONFLICT = "conflict"
+NOT_FOUND = "not_found"
+INVALID = "invalid"
+
+# Database type of detections.validation_status (migration 005)
+_VALIDATION_STATUS_TYPE = Enum(
+    *[status.value for status in ValidationStatusEnum], name="validation_status_enum", create_type=False
+)
+
+# Columns of the decision rows joined by bulk_review. VALUES parameters
+# arrive untyped on PostgreSQL and a column that is NULL in every row is
+# typed text, so each column is cast to its type there.
+_DECISION_COLUMNS = (
+    ("id", GUID),
+    ("read_version", Integer),
+    ("validation_status", _VALIDATION_STATUS_TYPE),
+    ("validation_notes", Text),
+    ("expires_at", DateTime(timezone=True)),
+    ("validity_period_days", Integer),
+)
+
+
+def _decision_rows(rows: Sequence[Tuple], dialect_name: str):
+    """
+    Decision rows as a FROM clause: typed SELECT over VALUES on PostgreSQL,
+    UNION ALL of SELECTs elsewhere (SQLite has no column list on a VALUES
+    alias).
+    """
+    if dialect_name == "postgresql":
+        raw = values(
+            *[column(name, type_) for name, type_ in _DECISION_COLUMNS], name="decision_values"
+        ).data(list(rows))
+        return select(*[cast(raw.c[name], type_).label(name) for name, type_ in _DECISION_COLUMNS]).subquery("decisions")
+    return union_all(*[
+        select(*[literal(value, type_).label(name) for value, (name, type_) in zip(row, _DECISION_COLUMNS)])
+        for row in rows
+    ]).subquery("decisions")
+
+
+def _review_update(table, source, reviewer_id: Optional[UUID], now: datetime):
+    """UPDATE applying the decision rows to detections still at the version read"""
+    reviewed = source.c.validation_status.isnot(None)
+    return (
+        update(table)
+        .where(table.c.id == source.c.id, table.c.version == source.c.read_version)
+        .values(
+            validation_status=func.coalesce(source.c.validation_status, table.c.validation_status),
+            validation_notes=case((reviewed, source.c.validation_notes), else_=table.c.validation_notes),
+            validated_by=case((reviewed, literal(reviewer_id, GUID)), else_=table.c.validated_by),
+            validated_at=case((reviewed, now), else_=table.c.validated_at),
+            expires_at=func.coalesce(source.c.expires_at, table.c.expires_at),
+            validity_period_days=func.coalesce(source.c.validity_period_days, table.c.validity_period_days),
+            version=table.c.version + 1,
+        )
+        .returning(table.c.id, table.c.version, table.c.expires_at)
+    )
+
+
+def _as_uuid(value: Any) -> Optional[UUID]:
+    """Detection id as a UUID (JSON callers send strings), None if malformed"""
+    try:
+        return value if isinstance(value, UUID) else UUID(str(value))
+    except ValueError:
+        return None
+
+
+def _outcome(detection_id: Any, outcome: str, **details) -> Dict[str, Any]:
+    return {"detection_id": str(detection_id), "outcome": outcome, **details}
 
 
 class DetectionRepository(BaseRepository[Detection]):
@@ -274,6 +350,11 @@ class DetectionRepository(BaseRepository[Detection]):
     # Detection-Specific Operations
     # ============================================
 
+    def _invalidate_cache(self, detection: Detection) -> Detection:
+        """Drop cached map data derived from a detection once the write commits."""
+        invalidate_on_commit(self.db, *analysis_write_tags(detection.analysis_id))
+        return detection
+
     def create_detection(
         self,
         analysis_id: UUID,
@@ -297,14 +378,14 @@ class DetectionRepository(BaseRepository[Detection]):
         Returns:
             Created Detection instance
         """
-        return self.create(
+        return self._invalidate_cache(self.create(
             analysis_id=analysis_id,
             class_id=class_id,
             class_name=class_name,
             confidence=confidence,
             risk_level=risk_level,
             **kwargs
-        )
+        ))
 
     def validate_detection(
         self,
@@ -325,13 +406,14 @@ class DetectionRepository(BaseRepository[Detection]):
         Returns:
             Updated Detection instance
         """
-        return self.update_or_404(
+        return self._invalidate_cache(self.update_or_404(
             detection_id,
             validated_by=validated_by,
             validation_status=validation_status,
             validation_notes=validation_notes,
-            validated_at=datetime.now(timezone.utc)
-        )
+            validated_at=datetime.now(timezone.utc),
+            version=self.model.version + 1
+        ))
 
     def set_temporal_validity(
         self,
@@ -354,13 +436,120 @@ class DetectionRepository(BaseRepository[Detection]):
         """
         expires_at = datetime.now(timezone.utc) + timedelta(days=validity_period_days)
 
-        return self.update_or_404(
+        return self._invalidate_cache(self.update_or_404(
             detection_id,
             validity_period_days=validity_period_days,
             expires_at=expires_at,
             persistence_type=persistence_type,
             is_weather_dependent=is_weather_dependent
-        )
+        ))
+
+    def bulk_review(
+        self,
+        decisions: List[Dict[str, Any]],
+        reviewer_id: Optional[UUID] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Apply expert decisions to many detections in one set-based UPDATE.
+
+        Each decision targets one detection and may set a validation status
+        (with notes) and/or extend its validity. The current rows are read
+        in one SELECT, the new expires_at computed with
+        extend_validity_batch, and every change written by a single
+        UPDATE ... FROM (VALUES ...) guarded by the row version: a decision
+        only applies if the detection is still at the version the reviewer
+        saw (expected_version), and each applied change bumps it.
+
+        Args:
+            decisions: Dicts with detection_id and optionally expected_version,
+                validation_status, validation_notes, extension_days
+            reviewer_id: Expert applying the decisions (validated_by)
+
+        Returns:
+            One outcome per decision, in order: detection_id, outcome
+            (updated, conflict, not_found, invalid) plus version/expires_at
+            when updated, current_version on conflict, error when invalid
+        """
+        from ...utils.temporal_validity import extend_validity_batch
+
+        try:
+            ids = [_as_uuid(decision["detection_id"]) for decision in decisions]
+            current = {
+                row.id: row for row in self.db.execute(
+                    select(
+                        self.model.id, self.model.version, self.model.expires_at,
+                        self.model.validity_period_days, self.model.analysis_id
+                    ).where(self.model.id.in_({i for i in ids if i is not None}))
+                )
+            }
+
+            outcomes: List[Dict[str, Any]] = []
+            pending: List[int] = []
+            seen = set()
+            for index, decision in enumerate(decisions):
+                detection_id = ids[index]
+                row = current.get(detection_id)
+                expected = decision.get("expected_version")
+                if detection_id is None:
+                    outcomes.append(_outcome(decision["detection_id"], INVALID, error="Invalid detection id"))
+                    continue
+                if detection_id in seen:
+                    outcomes.append(_outcome(detection_id, INVALID, error="Duplicate decision for this detection"))
+                elif row is None:
+                    outcomes.append(_outcome(detection_id, NOT_FOUND))
+                elif expected is not None and expected != row.version:
+                    outcomes.append(_outcome(detection_id, CONFLICT, current_version=row.version))
+                elif decision.get("extension_days") and row.expires_at is None:
+                    outcomes.append(_outcome(
+                        detection_id, INVALID, error="Detection does not have an expiration date set"
+                    ))
+                else:
+                    outcomes.append(None)
+                    pending.append(index)
+                seen.add(detection_id)
+
+            if not pending:
+                return outcomes
+
+            extensions = [decisions[i].get("extension_days") for i in pending]
+            new_expires = extend_validity_batch([current[ids[i]].expires_at for i in pending], extensions)
+            rows = [
+                (
+                    ids[i],
+                    current[ids[i]].version,
+                    decisions[i].get("validation_status"),
+                    decisions[i].get("validation_notes"),
+                    new_expires[n],
+                    (current[ids[i]].validity_period_days or 0) + extensions[n] if extensions[n] else None,
+                )
+                for n, i in enumerate(pending)
+            ]
+            source = _decision_rows(rows, self.db.get_bind().dialect.name)
+
+            stmt = _review_update(self.model.__table__, source, reviewer_id, datetime.now(timezone.utc))
+            applied = {row.id: row for row in self.db.execute(stmt)}
+
+            analysis_ids = set()
+            for n, i in enumerate(pending):
+                detection_id = ids[i]
+                row = applied.get(detection_id)
+                if row is None:
+                    # Changed between the read and the update
+                    version = self.db.scalar(select(self.model.version).where(self.model.id == detection_id))
+                    outcomes[i] = _outcome(detection_id, CONFLICT, current_version=version)
+                    continue
+                analysis_ids.add(current[detection_id].analysis_id)
+                outcomes[i] = _outcome(
+                    detection_id, UPDATED, version=row.version,
+                    expires_at=row.expires_at.isoformat() if row.expires_at else None
+                )
+
+            if analysis_ids:
+                invalidate_on_commit(self.db, *analysis_write_tags(*analysis_ids))
+            return outcomes
+
+        except Exception as e:
+            raise self.RepositoryError(f"Failed to apply bulk review: {e}")
 
     def mark_expiration_alert_sent(self, detection_id: UUID) -> Detection:
         """
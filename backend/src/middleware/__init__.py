@@ -2,7 +2,13 @@
 Middleware package for Sentrix Backend
 """
 
-from .rate_limit import limiter, get_limiter, setup_rate_limiting, get_rate_limit_key
+from .rate_limit import (
+    limiter,
+    get_limiter,
+    setup_rate_limiting,
+    get_rate_limit_key,
+    RateLimitExceeded,
+)
 from .request_id import RequestIDMiddleware, setup_request_id_middleware
 
 __all__ = [
@@ -10,6 +16,7 @@ __all__ = [
     "get_limiter",
     "setup_rate_limiting",
     "get_rate_limit_key",
+    "RateLimitExceeded",
     "RequestIDMiddleware",
     "setup_request_id_middleware",
 ]
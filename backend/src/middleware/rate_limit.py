@@ -1,43 +1,230 @@
 """
 Rate limiting middleware for Sentrix API
 Middleware de limitación de tasa para la API de Sentrix
+
+Distributed GCRA limiter (sentrix_shared.rate_limiting) backed by Redis, so
+limits hold across all uvicorn workers and replicas and survive restarts.
+Every limited endpoint checks three budgets in a single Redis round trip:
+- the caller (verified user, or client IP for anonymous requests)
+- the caller's organization
+- the endpoint as a whole
+If Redis is unavailable, limits fall back to per-process buckets.
 """
 
 import os
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from fastapi import Request, Response
-from typing import Callable
+from datetime import datetime
+from functools import wraps
+from typing import Callable, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+from sentrix_shared.rate_limiting import RateLimit, RateLimitResult, RateLimiter
+
+from ..config import get_settings
+from ..logging_config import get_logger
+
+logger = get_logger(__name__)
 
 # Check if we're in testing mode - disable rate limiting for tests
 _is_testing = os.getenv('TESTING_MODE', 'false').lower() == 'true' or os.getenv('ENVIRONMENT', '') == 'development'
 
-# Create limiter instance (disabled in testing)
-limiter = Limiter(key_func=get_remote_address, enabled=not _is_testing)
 
+class RateLimitExceeded(HTTPException):
+    """Raised when a request exceeds one of its rate limit budgets"""
 
-def get_limiter():
-    """Get the global limiter instance"""
-    return limiter
+    def __init__(self, result: RateLimitResult, rate: RateLimit):
+        super().__init__(
+            status_code=429,
+            detail=f"Rate limit exceeded: {rate.limit} per {int(rate.period)} seconds",
+            headers=result.headers()
+        )
+        self.result = result
+
+
+def get_remote_address(request: Request) -> str:
+    """Client IP address of the request"""
+    return request.client.host if request.client else "127.0.0.1"
 
 
-# Custom rate limit key function that uses user ID if authenticated
-async def get_rate_limit_key(request: Request) -> str:
+def get_rate_limit_key(request: Request, user=None) -> str:
     """
     Get rate limit key based on user authentication
 
     - If authenticated: use user_id
     - If not authenticated: use IP address
     """
-    # Try to get user from request state (set by auth middleware)
-    if hasattr(request.state, "user") and request.state.user:
-        return f"user:{request.state.user.id}"
+    user = user or getattr(request.state, "user", None)
+    if user is not None:
+        return f"user:{user.id}"
 
     # Fall back to IP address
     return f"ip:{get_remote_address(request)}"
 
 
+def _find_request(args, kwargs) -> Request:
+    request = kwargs.get("request")
+    if isinstance(request, Request):
+        return request
+    for arg in args:
+        if isinstance(arg, Request):
+            return arg
+    raise RuntimeError("Rate limited endpoints must declare a 'request: Request' parameter")
+
+
+def _route_path(request: Request) -> str:
+    """Route template (e.g. /api/v1/analyses/{id}) so ids share one budget"""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or request.url.path
+
+
+class EndpointRateLimiter:
+    """
+    Decorator factory applying per-user, per-org and per-endpoint budgets
+
+    Example:
+        @router.post("/analyses")
+        @limiter.limit("10/minute")
+        async def create_analysis(request: Request, current_user = Depends(...)):
+            ...
+    """
+
+    def __init__(self, backend: RateLimiter):
+        self.backend = backend
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend.enabled
+
+    @enabled.setter
+    def enabled(self, value: bool) -> None:
+        self.backend.enabled = value
+
+    def limit(
+        self,
+        rate: str,
+        org_rate: Optional[str] = None,
+        endpoint_rate: Optional[str] = None,
+        burst: Optional[int] = None
+    ) -> Callable:
+        """
+        Limit an endpoint
+
+        Args:
+            rate: Budget of each caller (e.g. "10/minute")
+            org_rate: Budget shared by an organization's users
+                (default: settings.rate_limit_org_per_minute, 0 disables)
+            endpoint_rate: Budget shared by every caller of the endpoint
+                (default: settings.rate_limit_endpoint_per_minute, 0 disables)
+            burst: Requests allowed back to back per caller (default: rate limit)
+        """
+        settings = get_settings()
+        caller_limit = RateLimit.parse(rate, burst=burst)
+        org_limit = _optional_rate(org_rate, settings.rate_limit_org_per_minute)
+        endpoint_limit = _optional_rate(endpoint_rate, settings.rate_limit_endpoint_per_minute)
+
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                request = _find_request(args, kwargs)
+                user = kwargs.get("current_user") or getattr(request.state, "user", None)
+                path = _route_path(request)
+
+                budgets: List[Tuple[str, RateLimit]] = [
+                    (f"{get_rate_limit_key(request, user)}:{path}", caller_limit)
+                ]
+                organization = getattr(user, "organization", None)
+                if org_limit and organization:
+                    budgets.append((f"org:{organization}:{path}", org_limit))
+                if endpoint_limit:
+                    budgets.append((f"endpoint:{path}", endpoint_limit))
+
+                result = await self.backend.hit(*budgets)
+                request.state.rate_limit = result
+
+                if not result.allowed:
+                    logger.warning(
+                        "rate_limit_exceeded",
+                        path=path,
+                        key=result.key,
+                        retry_after=round(result.retry_after, 2)
+                    )
+                    limit = dict(budgets)[result.key]
+                    raise RateLimitExceeded(result, limit)
+
+                return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+def _optional_rate(rate: Optional[str], per_minute: int) -> Optional[RateLimit]:
+    if rate is not None:
+        return RateLimit.parse(rate)
+    return RateLimit(limit=per_minute, period=60.0) if per_minute > 0 else None
+
+
+# Create limiter instance (disabled in testing)
+limiter = EndpointRateLimiter(
+    RateLimiter(
+        redis_url=get_settings().redis_url,
+        prefix="sentrix:ratelimit",
+        enabled=not _is_testing
+    )
+)
+
+
+def get_limiter():
+    """Get the global limiter instance"""
+    return limiter
+
+
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> JSONResponse:
+    """429 response carrying Retry-After and X-RateLimit-* headers"""
+    return JSONResponse(
+        status_code=429,
+        content={
+            "error": {
+                "code": 429,
+                "message": exc.detail,
+                "type": "rate_limit_error",
+                "retry_after": max(1, round(exc.result.retry_after)),
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        },
+        headers=exc.headers
+    )
+
+
+class RateLimitHeadersMiddleware:
+    """Adds X-RateLimit-* headers to responses of limited endpoints"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                result = scope.get("state", {}).get("rate_limit")
+                if result is not None and result.allowed:
+                    headers = list(message.get("headers", []))
+                    headers.extend(
+                        (name.lower().encode(), value.encode())
+                        for name, value in result.headers().items()
+                    )
+                    message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
 def setup_rate_limiting(app):
     """
     Setup rate limiting for the FastAPI application
@@ -51,6 +238,7 @@ def setup_rate_limiting(app):
     app.state.limiter = limiter
 
     # Add exception handler for rate limit exceeded
-    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+    app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+    app.add_middleware(RateLimitHeadersMiddleware)
 
     return limiter
@@ -113,6 +113,8 @@ class AnalysisResponse(BaseModel):
     processed_image_url: Optional[str] = None
     processed_image_filename: Optional[str] = None
     image_size_bytes: Optional[int] = None
+    # Previews by image and size: {"original": {"256": url, ...}, "processed": {...}}
+    image_previews: Optional[Dict[str, Dict[str, str]]] = None
 
     # GPS and camera info
     location: Optional[LocationResponse] = None
@@ -0,0 +1,419 @@
+"""
+Active-learning sample selection for retraining
+Selección de muestras por aprendizaje activo para reentrenamiento
+
+Ranks the analyses (images) of the whole detection corpus by how much
+labeling them is expected to help the model, picks a spatially and
+temporally diverse top-K and exports it as a YOLO segmentation dataset.
+
+Per detection, from its stored confidence p and the analysis threshold t:
+
+- uncertainty: mean of the binary entropy H(p) and the margin term
+  1 - (p - t) / (1 - t); detections barely above the threshold are the ones
+  a slightly different model would miss
+- rarity: 1 - log(1 + n_c) / log(1 + n_max) over the training-set class
+  counts (analyze_dataset.py report) or, without a report, over approved
+  detections; classes never seen score 1
+- disagreement: p for expert-rejected detections, 1 - p for approved ones,
+  0.5 for detections flagged for review
+
+An image scores the weighted sum of the per-detection maxima. The corpus is
+read in one streamed pass over lightweight columns (no polygons).
+
+Selection is a greedy k-center over the best `pool_factor * k` candidates:
+each step takes the candidate maximizing
+
+    (1 - λ) * score + λ * (1 - exp(-d))
+
+d being its distance (km / spatial_scale_km, days / temporal_scale_days) to
+the nearest image already selected, so near-duplicate photos of the same
+spot and day are not picked twice. Images without GPS are compared on time
+only. O(pool * k) with numpy.
+
+Only images whose detections all carry an expert verdict are exported with
+labels (approved detections become polygons, rejected ones are left out so
+the image teaches the model what is not a breeding site); the rest of the
+selection is written to a review queue, to be labeled through
+POST /detections/bulk-review and exported again.
+"""
+
+import json
+import math
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import httpx
+import numpy as np
+from PIL import Image, ImageOps
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from sentrix_shared.data_models import BREEDING_SITE_TO_CLASS_ID, YOLO_CLASS_NAMES, normalize_breeding_site_type
+
+from ..config import get_settings
+from ..database.models.enums import ValidationStatusEnum
+from ..database.models.models import Analysis, Detection
+from ..logging_config import get_logger
+
+logger = get_logger(__name__)
+
+APPROVED = ValidationStatusEnum.VALIDATED_POSITIVE.value
+REJECTED = ValidationStatusEnum.VALIDATED_NEGATIVE.value
+REQUIRES_REVIEW = ValidationStatusEnum.REQUIRES_REVIEW.value
+
+SCORE_COMPONENTS = ("uncertainty", "rarity", "disagreement")
+
+DEFAULT_THRESHOLD = 0.5
+KM_PER_DEGREE = 111.32
+SECONDS_PER_DAY = 86400.0
+
+# Formats ultralytics trains on as-is; anything else (HEIC...) is re-encoded
+YOLO_IMAGE_SUFFIXES = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp", "BMP": ".bmp"}
+# EXIF orientations that swap width and height (ultralytics exif_size)
+_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def resolve_class_id(class_id: Optional[int], class_name: Optional[str]) -> Optional[int]:
+    """YOLO class id of a detection, from its class_id or normalized class name"""
+    if class_id is not None:
+        return int(class_id)
+    try:
+        return BREEDING_SITE_TO_CLASS_ID[normalize_breeding_site_type(class_name)]
+    except (ValueError, KeyError):
+        return None
+
+
+def detection_uncertainty(confidence: float, threshold: float = DEFAULT_THRESHOLD) -> float:
+    """Mean of normalized binary entropy and distance-to-threshold margin, in [0, 1]"""
+    p = min(max(confidence, 1e-6), 1 - 1e-6)
+    entropy = -(p * math.log(p) + (1 - p) * math.log(1 - p)) / math.log(2)
+    threshold = min(max(threshold, 0.0), 0.99)
+    margin = min(max((confidence - threshold) / (1 - threshold), 0.0), 1.0)
+    return (entropy + 1 - margin) / 2
+
+
+def expert_disagreement(validation_status: Optional[str], confidence: Optional[float]) -> float:
+    """How far the expert verdict is from the model's confidence, in [0, 1]"""
+    if validation_status == REQUIRES_REVIEW:
+        return 0.5
+    if validation_status not in (APPROVED, REJECTED):
+        return 0.0
+    if confidence is None:
+        return 0.5
+    return 1 - confidence if validation_status == APPROVED else confidence
+
+
+def class_rarity(counts: Mapping[int, int]) -> Dict[int, float]:
+    """Log-scaled inverse frequency: 0 for the most common class, 1 for unseen ones"""
+    top = max(counts.values(), default=0)
+    if top <= 0:
+        return {}
+    return {class_id: 1 - math.log1p(count) / math.log1p(top) for class_id, count in counts.items()}
+
+
+def load_class_counts(report_path: str) -> Dict[int, int]:
+    """
+    Training-set instances per class from an analyze_dataset.py report
+    Instancias por clase del dataset de entrenamiento desde el reporte JSON
+    """
+    with open(report_path, encoding="utf-8") as f:
+        report = json.load(f)
+
+    counts: Dict[int, int] = {}
+    for key, count in report.get("total_instances_by_class", {}).items():
+        class_id = int(key) if str(key).isdigit() else resolve_class_id(None, key)
+        if class_id is not None:
+            counts[class_id] = counts.get(class_id, 0) + int(count)
+    return counts
+
+
+def select_diverse(
+    scores: Sequence[float],
+    points: np.ndarray,
+    k: int,
+    diversity: float
+) -> List[int]:
+    """
+    Greedy k-center selection weighted by score
+
+    `points` is (n, 3): scaled x, y (NaN without GPS) and time. Returns the
+    indices of the selected rows, in selection order.
+    """
+    scores = np.asarray(scores, dtype=float)
+    points = np.asarray(points, dtype=float).reshape(len(scores), 3)
+    nearest = np.full(len(scores), np.inf)
+    available = np.ones(len(scores), dtype=bool)
+    selected: List[int] = []
+
+    for _ in range(min(k, len(scores))):
+        gain = (1 - diversity) * scores + diversity * (1 - np.exp(-nearest))
+        gain[~available] = -np.inf
+        index = int(np.argmax(gain))
+        selected.append(index)
+        available[index] = False
+
+        spatial = np.nan_to_num(((points[:, :2] - points[index, :2]) ** 2).sum(axis=1), nan=0.0)
+        np.minimum(nearest, np.sqrt(spatial + (points[:, 2] - points[index, 2]) ** 2), out=nearest)
+
+    return selected
+
+
+def fetch_image_bytes(url: str) -> bytes:
+    """Download an analysis image"""
+    response = httpx.get(url, timeout=30.0, follow_redirects=True)
+    response.raise_for_status()
+    return response.content
+
+
+@dataclass
+class RetrainingCandidate:
+    """One analysis (image) scored for retraining"""
+    analysis_id: Any
+    image_url: Optional[str] = None
+    taken_at: Optional[datetime] = None
+    detections: int = 0
+    pending_review: int = 0
+    class_ids: set = field(default_factory=set)
+    uncertainty: float = 0.0
+    disagreement: float = 0.0
+    rarity: float = 0.0
+    score: float = 0.0
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    _gps_sum: List[float] = field(default_factory=lambda: [0.0, 0.0, 0], repr=False)
+
+    @property
+    def reviewed(self) -> bool:
+        return self.pending_review == 0
+
+    def reason(self, weights: Mapping[str, float]) -> str:
+        return max(SCORE_COMPONENTS, key=lambda name: weights.get(name, 0.0) * getattr(self, name))
+
+    def to_dict(self, weights: Mapping[str, float]) -> Dict[str, Any]:
+        return {
+            "analysis_id": str(self.analysis_id),
+            "image_url": self.image_url,
+            "score": round(self.score, 4),
+            "uncertainty": round(self.uncertainty, 4),
+            "rarity": round(self.rarity, 4),
+            "disagreement": round(self.disagreement, 4),
+            "reason": self.reason(weights),
+            "detections": self.detections,
+            "pending_review": self.pending_review,
+            "class_ids": sorted(self.class_ids),
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "taken_at": self.taken_at.isoformat() if self.taken_at else None,
+        }
+
+
+class RetrainingSampler:
+    """
+    Active-learning selection and YOLO export over the detection corpus
+    Selección por aprendizaje activo y exportación YOLO sobre el corpus de detecciones
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        class_counts: Optional[Mapping[int, int]] = None,
+        weights: Optional[Mapping[str, float]] = None,
+        diversity: Optional[float] = None,
+        spatial_scale_km: float = 1.0,
+        temporal_scale_days: float = 7.0,
+        pool_factor: int = 10
+    ):
+        settings = get_settings()
+        self.db = db
+        self.weights = dict(weights if weights is not None else settings.active_learning_weights)
+        self.diversity = settings.active_learning_diversity if diversity is None else diversity
+        self.spatial_scale_km = spatial_scale_km
+        self.temporal_scale_days = temporal_scale_days
+        self.pool_factor = pool_factor
+        if class_counts is None and settings.active_learning_class_counts_path:
+            class_counts = load_class_counts(settings.active_learning_class_counts_path)
+        self.class_counts = dict(class_counts) if class_counts is not None else None
+
+    def candidates(self, reviewed_only: bool = False) -> List[RetrainingCandidate]:
+        """Score every analysis with detections in one pass over the corpus"""
+        query = select(
+            Detection.analysis_id, Detection.class_id, Detection.class_name, Detection.confidence,
+            Detection.validation_status, Detection.detection_latitude, Detection.detection_longitude,
+            Analysis.image_url, Analysis.confidence_threshold,
+            func.coalesce(Analysis.image_taken_at, Analysis.created_at).label("taken_at")
+        ).join(Analysis, Analysis.id == Detection.analysis_id)
+
+        by_analysis: Dict[Any, RetrainingCandidate] = {}
+        approved_counts: Dict[int, int] = {}
+        for row in self.db.execute(query.execution_options(yield_per=5000)):
+            candidate = by_analysis.get(row.analysis_id)
+            if candidate is None:
+                candidate = by_analysis[row.analysis_id] = RetrainingCandidate(
+                    analysis_id=row.analysis_id, image_url=row.image_url, taken_at=row.taken_at
+                )
+
+            confidence = float(row.confidence) if row.confidence is not None else None
+            class_id = resolve_class_id(row.class_id, row.class_name)
+            candidate.detections += 1
+            if row.validation_status not in (APPROVED, REJECTED):
+                candidate.pending_review += 1
+            if class_id is not None and row.validation_status != REJECTED:
+                candidate.class_ids.add(class_id)
+                if row.validation_status == APPROVED:
+                    approved_counts[class_id] = approved_counts.get(class_id, 0) + 1
+            if confidence is not None:
+                threshold = float(row.confidence_threshold) if row.confidence_threshold is not None else DEFAULT_THRESHOLD
+                candidate.uncertainty = max(candidate.uncertainty, detection_uncertainty(confidence, threshold))
+            candidate.disagreement = max(
+                candidate.disagreement, expert_disagreement(row.validation_status, confidence)
+            )
+            if row.detection_latitude is not None and row.detection_longitude is not None:
+                candidate._gps_sum[0] += float(row.detection_latitude)
+                candidate._gps_sum[1] += float(row.detection_longitude)
+                candidate._gps_sum[2] += 1
+
+        rarity = class_rarity(self.class_counts if self.class_counts is not None else approved_counts)
+        candidates = []
+        for candidate in by_analysis.values():
+            if reviewed_only and not candidate.reviewed:
+                continue
+            latitude_sum, longitude_sum, located = candidate._gps_sum
+            if located:
+                candidate.latitude = latitude_sum / located
+                candidate.longitude = longitude_sum / located
+            candidate.rarity = max((rarity.get(class_id, 1.0) for class_id in candidate.class_ids), default=0.0)
+            candidate.score = sum(self.weights.get(name, 0.0) * getattr(candidate, name) for name in SCORE_COMPONENTS)
+            candidates.append(candidate)
+        return candidates
+
+    def select(self, k: int, reviewed_only: bool = False) -> List[RetrainingCandidate]:
+        """
+        Diverse top-K analyses for retraining, best first
+        Top-K diverso de análisis para reentrenamiento
+        """
+        if k <= 0:
+            return []
+        candidates = sorted(self.candidates(reviewed_only), key=lambda c: c.score, reverse=True)
+        pool = candidates[:max(k * self.pool_factor, k)]
+        if not pool:
+            return []
+
+        total = sum(self.weights.get(name, 0.0) for name in SCORE_COMPONENTS) or 1.0
+        selected = select_diverse([c.score / total for c in pool], self._points(pool), k, self.diversity)
+        logger.info("retraining_samples_selected", corpus=len(candidates), pool=len(pool), selected=len(selected))
+        return [pool[index] for index in selected]
+
+    def _points(self, pool: Sequence[RetrainingCandidate]) -> np.ndarray:
+        """Scaled (x km, y km, days) coordinates, x/y NaN without GPS"""
+        latitudes = [c.latitude for c in pool if c.latitude is not None]
+        reference = math.cos(math.radians(sum(latitudes) / len(latitudes))) if latitudes else 1.0
+        epoch = min((c.taken_at.timestamp() for c in pool if c.taken_at), default=0.0)
+
+        points = np.full((len(pool), 3), np.nan)
+        for index, candidate in enumerate(pool):
+            if candidate.latitude is not None:
+                points[index, 0] = candidate.longitude * KM_PER_DEGREE * reference / self.spatial_scale_km
+                points[index, 1] = candidate.latitude * KM_PER_DEGREE / self.spatial_scale_km
+            timestamp = candidate.taken_at.timestamp() if candidate.taken_at else epoch
+            points[index, 2] = (timestamp - epoch) / SECONDS_PER_DAY / self.temporal_scale_days
+        return points
+
+    def export_yolo(
+        self,
+        selection: Iterable[RetrainingCandidate],
+        output_dir: str,
+        fetch_image: Callable[[str], bytes] = fetch_image_bytes,
+        val_fraction: float = 0.2
+    ) -> Dict[str, Any]:
+        """
+        Write the reviewed part of a selection as a YOLO segmentation dataset
+        Escribir la parte revisada de una selección como dataset YOLO de segmentación
+
+        Layout: images/{train,val}, labels/{train,val}, data.yaml and
+        selection.json (scores, review queue and failed downloads). The
+        train/val split is a stable hash of the analysis id.
+        """
+        selection = list(selection)
+        ready = {c.analysis_id: c for c in selection if c.reviewed}
+        root = Path(output_dir)
+
+        polygons: Dict[Any, List[Tuple[int, list]]] = {analysis_id: [] for analysis_id in ready}
+        if ready:
+            rows = self.db.execute(
+                select(Detection.analysis_id, Detection.class_id, Detection.class_name, Detection.polygon)
+                .where(Detection.analysis_id.in_(list(ready)), Detection.validation_status == APPROVED)
+            )
+            for row in rows:
+                class_id = resolve_class_id(row.class_id, row.class_name)
+                if class_id is not None and row.polygon and len(row.polygon) >= 3:
+                    polygons[row.analysis_id].append((class_id, row.polygon))
+
+        exported, failed = [], []
+        for analysis_id, candidate in ready.items():
+            split = "val" if zlib.crc32(str(analysis_id).encode()) % 100 < val_fraction * 100 else "train"
+            try:
+                data, suffix, (width, height) = _training_image(fetch_image(candidate.image_url))
+            except (httpx.HTTPError, OSError, ValueError) as e:
+                logger.warning("retraining_image_unavailable", analysis_id=str(analysis_id), error=str(e))
+                failed.append(str(analysis_id))
+                continue
+
+            (root / "images" / split).mkdir(parents=True, exist_ok=True)
+            (root / "labels" / split).mkdir(parents=True, exist_ok=True)
+            (root / "images" / split / f"{analysis_id}{suffix}").write_bytes(data)
+            (root / "labels" / split / f"{analysis_id}.txt").write_text(
+                "".join(yolo_segment_line(class_id, polygon, width, height) + "\n"
+                        for class_id, polygon in polygons[analysis_id]),
+                encoding="utf-8"
+            )
+            exported.append(str(analysis_id))
+
+        root.mkdir(parents=True, exist_ok=True)
+        (root / "data.yaml").write_text(
+            f"path: {json.dumps(str(root.resolve()))}\n"
+            "train: images/train\n"
+            "val: images/val\n"
+            f"nc: {len(YOLO_CLASS_NAMES)}\n"
+            "names:\n" + "".join(f"  {i}: {json.dumps(name, ensure_ascii=False)}\n"
+                                 for i, name in enumerate(YOLO_CLASS_NAMES)),
+            encoding="utf-8"
+        )
+        manifest = {
+            "exported": exported,
+            "review_queue": [str(c.analysis_id) for c in selection if not c.reviewed],
+            "failed": failed,
+            "samples": [c.to_dict(self.weights) for c in selection],
+        }
+        (root / "selection.json").write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+        logger.info(
+            "retraining_dataset_exported", output_dir=str(root), exported=len(exported),
+            review_queue=len(manifest["review_queue"]), failed=len(failed)
+        )
+        return manifest
+
+
+def yolo_segment_line(class_id: int, polygon: Sequence[Sequence[float]], width: int, height: int) -> str:
+    """`class x1 y1 x2 y2 ...` with pixel coordinates normalized to [0, 1]"""
+    coordinates = " ".join(
+        f"{min(max(x / width, 0.0), 1.0):.6f} {min(max(y / height, 0.0), 1.0):.6f}" for x, y in polygon
+    )
+    return f"{class_id} {coordinates}"
+
+
+def _training_image(data: bytes):
+    """Image bytes in a YOLO-trainable format, their suffix and oriented (width, height)"""
+    with Image.open(BytesIO(data)) as image:
+        suffix = YOLO_IMAGE_SUFFIXES.get(image.format)
+        if suffix is None:
+            converted = ImageOps.exif_transpose(image).convert("RGB")
+            buffer = BytesIO()
+            converted.save(buffer, format="JPEG", quality=95)
+            return buffer.getvalue(), ".jpg", converted.size
+        width, height = image.size
+        if image.getexif().get(0x0112) in _TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+        return data, suffix, (width, height)
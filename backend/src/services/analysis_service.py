@@ -12,6 +12,7 @@ from pathlib import Path
 import httpx
 
 from ..logging_config import get_logger
+from ..cache.tags import invalidate_analysis_cache
 from ..exceptions import (
     ImageProcessingException,
     YOLOServiceException,
@@ -25,6 +26,7 @@ logger = get_logger(__name__)
 # Try to import shared functionality
 try:
     from sentrix_shared.file_utils import generate_standardized_filename, create_filename_variations
+    from sentrix_shared.gps_utils import extract_image_metadata
     from sentrix_shared.image_deduplication import (
         calculate_content_signature,
         check_image_duplicate,
@@ -61,6 +63,10 @@ except ImportError as e:
             'timestamp': datetime.now(timezone.utc).isoformat()
         }
 
+    # Sin extractor compartido el YOLO service extrae los metadatos
+    def extract_image_metadata(image_data, filename=None):
+        return None
+
     # Fallback deduplication functions
     def calculate_content_signature(image_data):
         import hashlib
@@ -88,14 +94,20 @@ except ImportError as e:
 try:
     from ..utils.supabase_client import SupabaseManager
     from ..core.services.yolo_service import YOLOServiceClient
-    from ..utils.image_conversion import prepare_image_for_processing
+    from ..utils.image_conversion import prepare_image_for_processing, is_heic_format
+    from ..utils.cpu_pool import run_cpu
+    from ..utils.image_previews import build_preview_pyramid, preview_filename, preview_content_type
+    from ..config import get_settings
     from ..schemas.analyses import AnalysisResponse, DetectionResponse, LocationResponse, CameraInfoResponse, RiskAssessmentResponse
 except ImportError:
     # Try absolute imports
     try:
         from utils.supabase_client import SupabaseManager
         from core.services.yolo_service import YOLOServiceClient
-        from utils.image_conversion import prepare_image_for_processing
+        from utils.image_conversion import prepare_image_for_processing, is_heic_format
+        from utils.cpu_pool import run_cpu
+        from utils.image_previews import build_preview_pyramid, preview_filename, preview_content_type
+        from config import get_settings
         from schemas.analyses import AnalysisResponse, DetectionResponse, LocationResponse, CameraInfoResponse, RiskAssessmentResponse
     except ImportError as e:
         # Only log warnings in non-testing mode
@@ -119,6 +131,15 @@ except ImportError:
         def prepare_image_for_processing(image_data, filename):
             return image_data, filename
 
+        def is_heic_format(filename):
+            return False
+
+        async def run_cpu(stage, fn, *args):
+            return fn(*args)
+
+        def get_settings():
+            return None
+
         # Mock schema classes
         AnalysisResponse = DetectionResponse = LocationResponse = CameraInfoResponse = RiskAssessmentResponse = dict
 
@@ -181,7 +202,8 @@ class AnalysisService:
         include_gps: bool = True,
         manual_latitude: Optional[float] = None,
         manual_longitude: Optional[float] = None,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        content_signature: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Procesar imagen completa: YOLO + almacenamiento dual en BD + nomenclatura estandarizada
@@ -194,16 +216,34 @@ class AnalysisService:
             manual_latitude: Latitud manual (opcional)
             manual_longitude: Longitud manual (opcional)
             user_id: ID del usuario que crea el análisis (requerido para RLS)
+            content_signature: Hashes ya calculados al validar la subida
+                (ValidatedUpload.content_signature); se recalculan si la
+                imagen se convierte
 
         Returns:
             Dict con ID de análisis, URLs de imágenes y estado
         """
 
+        # 0. Metadatos (GPS, cámara) en una sola pasada sobre los bytes originales:
+        # la conversión HEIC -> JPEG descarta el EXIF. Solo se leen los segmentos
+        # EXIF/XMP (sin decodificar píxeles) y se envían al YOLO service, que así
+        # no vuelve a parsear la imagen
+        image_metadata = extract_image_metadata(image_data, filename) if include_gps else None
+
         # 1. Preparar imagen para procesamiento (convertir HEIC si es necesario)
-        processed_image_data, processed_filename = prepare_image_for_processing(image_data, filename)
+        # Decodificar/recodificar HEIC y hashear es CPU puro: se ejecuta en el
+        # pool de CPU para no bloquear el event loop
+        if is_heic_format(filename):
+            processed_image_data, processed_filename = await run_cpu(
+                "heic_decode", prepare_image_for_processing, image_data, filename
+            )
+        else:
+            processed_image_data, processed_filename = prepare_image_for_processing(image_data, filename)
 
-        # 2. Calcular signature de contenido para deduplicación
-        content_signature = calculate_content_signature(processed_image_data)
+        # 2. Calcular signature de contenido para deduplicación (salvo que ya
+        # venga de la validación en streaming y la imagen no se haya convertido)
+        if content_signature is None or processed_image_data is not image_data:
+            content_signature = await run_cpu("hash", calculate_content_signature, processed_image_data)
         logger.debug("content signature calculated",
                     sha256_prefix=content_signature['sha256'][:12],
                     size_bytes=content_signature['size_bytes'])
@@ -213,11 +253,9 @@ class AnalysisService:
             # Obtener análisis recientes para comparar
             existing_analyses = await self._get_recent_analyses_for_deduplication()
 
-            duplicate_check = check_image_duplicate(
-                image_data=processed_image_data,
-                existing_analyses=existing_analyses,
-                camera_info=None,  # Se obtendrá del YOLO
-                gps_data=None      # Se obtendrá del YOLO
+            # camera_info / gps_data: se obtendrán del YOLO
+            duplicate_check = await run_cpu(
+                "dedup_check", check_image_duplicate, processed_image_data, existing_analyses
             )
 
             logger.debug("duplicate check completed", is_duplicate=duplicate_check['is_duplicate'])
@@ -239,7 +277,8 @@ class AnalysisService:
                 image_data=processed_image_data,
                 filename=processed_filename,
                 confidence_threshold=confidence_threshold,
-                include_gps=include_gps
+                include_gps=include_gps,
+                metadata=image_metadata
             )
 
             if not yolo_result.get("success"):
@@ -400,6 +439,14 @@ class AnalysisService:
                     "error": "Database insertion failed"
                 }
 
+            # Pirámide de previsualizaciones (256/768/1600 px) generada una sola vez
+            image_previews = await self._store_image_previews(
+                analysis_id,
+                original_data=processed_image_data if image_url and not image_url.startswith("temp/") else None,
+                processed_data=processed_image_data_from_yolo if processed_image_url else None,
+                filename_variations=filename_variations
+            )
+
             # Ahora intentar actualizar con GPS y metadata usando raw SQL
             if location_data:
                 lat = location_data['latitude']
@@ -532,6 +579,7 @@ class AnalysisService:
                     logger.warning("risk level update failed", analysis_id=analysis_id, error=str(e))
 
             logger.debug("analysis processing completed", analysis_id=analysis_id)
+            await invalidate_analysis_cache(analysis_id, user_id=user_id)
 
             return {
                 "analysis_id": analysis_id,
@@ -549,7 +597,8 @@ class AnalysisService:
                     "standardized": image_filename,
                     "processed": processed_image_filename
                 },
-                "filename_variations": filename_variations
+                "filename_variations": filename_variations,
+                "image_previews": image_previews
             }
 
         except httpx.TimeoutException:
@@ -571,6 +620,70 @@ class AnalysisService:
             logger.error("error processing analysis", analysis_id=analysis_id, error=str(e), exc_info=True)
             raise ImageProcessingException(f"Error procesando análisis: {str(e)}")
 
+    async def _store_image_previews(
+        self,
+        analysis_id: str,
+        original_data: Optional[bytes],
+        processed_data: Optional[bytes],
+        filename_variations: Dict[str, str]
+    ) -> Optional[Dict[str, Dict[str, str]]]:
+        """
+        Generate, upload and record the preview pyramid of both images
+        Generar, subir y registrar la pirámide de previsualizaciones
+
+        Previews are optional: any failure is logged and the analysis keeps
+        only its full-size URLs.
+
+        Returns:
+            dict: {"original": {"256": url, ...}, "processed": {...}} or None
+        """
+        settings = get_settings()
+        if settings is None or not settings.image_preview_sizes:
+            return None
+
+        fmt = settings.image_preview_format
+        sources = (
+            ("original", original_data, filename_variations.get("standardized"), settings.supabase_storage_bucket),
+            ("processed", processed_data, filename_variations.get("processed"), settings.supabase_processed_bucket),
+        )
+        image_previews = {}
+        for kind, data, base_filename, bucket in sources:
+            if not data or not base_filename:
+                continue
+            try:
+                levels = await run_cpu(
+                    "thumbnail", build_preview_pyramid,
+                    data, tuple(settings.image_preview_sizes), fmt, settings.image_preview_quality
+                )
+            except Exception as e:
+                logger.warning("preview generation failed", analysis_id=analysis_id, image=kind, error=str(e))
+                continue
+            if not levels:
+                continue
+
+            names = {size: preview_filename(base_filename, size, fmt) for size in levels}
+            upload_result = self.supabase.upload_previews(
+                {names[size]: encoded for size, encoded in levels.items()},
+                bucket_name=bucket,
+                content_type=preview_content_type(fmt)
+            )
+            if upload_result.get("status") != "success":
+                logger.warning("preview upload failed", analysis_id=analysis_id, image=kind,
+                               message=upload_result.get("message"))
+                continue
+            image_previews[kind] = {str(size): upload_result["urls"][name] for size, name in names.items()}
+
+        if not image_previews:
+            return None
+
+        try:
+            self.supabase.client.table('analyses').update({"image_previews": image_previews}).eq('id', analysis_id).execute()
+            logger.info("image previews stored for analysis", analysis_id=analysis_id,
+                        levels={kind: list(urls) for kind, urls in image_previews.items()})
+        except Exception as e:
+            logger.warning("image previews update failed", analysis_id=analysis_id, error=str(e))
+        return image_previews
+
     async def get_analysis_by_id(self, analysis_id: str) -> Optional[Dict[str, Any]]:
         """
         Obtener análisis completo por ID
@@ -710,6 +823,7 @@ class AnalysisService:
         logger.info("duplicate reference created",
                    analysis_id=analysis_id,
                    storage_saved_bytes=content_signature['size_bytes'])
+        await invalidate_analysis_cache(analysis_id)
 
         return {
             "analysis_id": analysis_id,
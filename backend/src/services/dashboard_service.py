@@ -0,0 +1,494 @@
+"""
+Dashboard aggregation layer
+Capa de agregación para los dashboards
+
+Dashboard numbers (totals, risk distribution, monthly series, quality
+metrics) come from two daily rollup tables instead of scanning analyses and
+detections on every request:
+
+- analysis_daily_rollups: per day, user and risk level
+- detection_daily_rollups: per day, user, risk, site type and validation status
+
+Each rollup has a watermark in rollup_state. Rows created before it are in
+the rollup; rows created after it (the last minute or so) are aggregated live
+from the base tables and added, so new rows show up immediately while reading
+a few hundred rows. Changes to rows already in the rollup (a detection
+validated, an analysis updated after the watermark) keep their old values
+until the next refresh, i.e. up to the refresh interval. Without a watermark
+(rollups never refreshed, e.g. a new database) everything is aggregated from
+the base tables.
+
+refresh_rollups() is incremental: it recomputes only the days touched since
+the previous watermark (analyses created/updated, detections created/
+validated). Deletes are not visible to it; rebuild_rollups (full=True, run
+nightly) recomputes every day.
+
+Queries use portable SQL (date(), CASE, INSERT ... SELECT), so the same code
+runs on PostgreSQL and SQLite. Results are cached per scope (global or
+user) under the "dashboard" tag, invalidated on every analysis write and
+after every refresh that recomputed at least one day.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, distinct, func, insert, or_, select, text, union
+from sqlalchemy.orm import Session
+
+from ..database.models.models import (
+    Analysis, AnalysisDailyRollup, Detection, DetectionDailyRollup, RollupState
+)
+from ..logging_config import get_logger
+
+logger = get_logger(__name__)
+
+ROLLUP_NAME = "dashboard"
+
+# Rows committed late (long transactions) are caught by the next refresh
+REFRESH_SAFETY_WINDOW = timedelta(minutes=5)
+
+# Serializes concurrent refreshes on PostgreSQL (pg_advisory_xact_lock key)
+_REFRESH_LOCK_KEY = 470_047
+
+SPANISH_MONTHS = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
+
+RISK_LEVELS = [
+    ("ALTO", "Alto", "#dc2626"),
+    ("MEDIO", "Medio", "#f59e0b"),
+    ("BAJO", "Bajo", "#059669"),
+    ("MINIMO", "Mínimo", "#6b7280"),
+]
+
+POSITIVE = "validated_positive"
+NEGATIVE = "validated_negative"
+
+
+# Rollup definitions: group keys and measures, as rollup columns and as
+# expressions over the base tables (the refresh inserts the latter into the
+# former, and the live tail reads the latter)
+_ANALYSIS_GROUPS = {
+    "bucket_date": func.date(Analysis.created_at),
+    "user_id": Analysis.user_id,
+    "risk_level": Analysis.risk_level,
+}
+_ANALYSIS_MEASURES = {
+    "analyses_count": func.count(Analysis.id),
+    "detections_count": func.sum(func.coalesce(Analysis.total_detections, 0)),
+    "high_risk_count": func.sum(func.coalesce(Analysis.high_risk_count, 0)),
+    "gps_count": func.sum(case((Analysis.has_gps_data == True, 1), else_=0)),  # noqa: E712
+    "processing_time_ms_sum": func.sum(func.coalesce(Analysis.processing_time_ms, 0)),
+    "processing_time_count": func.count(Analysis.processing_time_ms),
+}
+_DETECTION_GROUPS = {
+    "bucket_date": func.date(Detection.created_at),
+    "user_id": Analysis.user_id,
+    "risk_level": Detection.risk_level,
+    "breeding_site_type": Detection.breeding_site_type,
+    "validation_status": Detection.validation_status,
+}
+_DETECTION_MEASURES = {
+    "detections_count": func.count(Detection.id),
+    "confidence_sum": func.sum(func.coalesce(Detection.confidence, 0)),
+}
+
+_ROLLUPS = {
+    "analyses": (AnalysisDailyRollup, _ANALYSIS_GROUPS, _ANALYSIS_MEASURES, Analysis.created_at),
+    "detections": (DetectionDailyRollup, _DETECTION_GROUPS, _DETECTION_MEASURES, Detection.created_at),
+}
+
+
+def _as_date(value: Any) -> Optional[date]:
+    """date() returns a date on PostgreSQL and an ISO string on SQLite"""
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _day_start(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+def _add_months(day: date, months: int) -> date:
+    """First day of the month `months` away from day's month"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def percent_change(current: float, previous: float) -> int:
+    """Rounded percent change (100 when growing from zero)"""
+    if not previous:
+        return 100 if current else 0
+    return round((current - previous) / previous * 100)
+
+
+def humanize_elapsed(timestamp: datetime, now: Optional[datetime] = None) -> str:
+    """Hace N minutos / horas / días"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    seconds = max(0, ((now or datetime.now(timezone.utc)) - timestamp).total_seconds())
+    if seconds < 60:
+        return "Hace unos segundos"
+    for unit_seconds, singular, plural in ((86400, "día", "días"), (3600, "hora", "horas"), (60, "minuto", "minutos")):
+        if seconds >= unit_seconds:
+            amount = int(seconds // unit_seconds)
+            return f"Hace {amount} {singular if amount == 1 else plural}"
+
+
+class DashboardAggregates:
+    """
+    Dashboard aggregates over the daily rollups plus the live tail
+
+    Args:
+        db: SQLAlchemy session
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ============================================
+    # Rollup refresh
+    # ============================================
+
+    def _watermark(self) -> Optional[datetime]:
+        state = self.db.get(RollupState, ROLLUP_NAME)
+        if state is None:
+            return None
+        watermark = state.refreshed_through
+        return watermark.replace(tzinfo=timezone.utc) if watermark.tzinfo is None else watermark
+
+    def _touched_days(self, since: datetime) -> List[date]:
+        """Days whose rollup rows are stale: analyses/detections written since `since`"""
+        analysis_days = select(func.date(Analysis.created_at)).where(
+            or_(Analysis.created_at >= since, Analysis.updated_at >= since)
+        )
+        detection_days = select(func.date(Detection.created_at)).where(
+            or_(Detection.created_at >= since, Detection.validated_at >= since)
+        )
+        rows = self.db.execute(union(analysis_days, detection_days)).scalars()
+        return sorted({_as_date(day) for day in rows if day is not None})
+
+    def _rebuild_days(self, kind: str, days: Optional[List[date]], through: datetime) -> None:
+        """Replace the rollup rows of `days` (all days if None) from the base table"""
+        model, groups, measures, created_at = _ROLLUPS[kind]
+        table = model.__table__
+
+        source = select(*groups.values(), *measures.values()).where(created_at < through)
+        if kind == "detections":
+            source = source.select_from(Detection).join(Analysis, Detection.analysis_id == Analysis.id)
+        wipe = delete(table)
+        if days is not None:
+            # Range bounds keep the scan on the created_at index
+            source = source.where(
+                created_at >= _day_start(days[0]),
+                created_at < _day_start(days[-1] + timedelta(days=1)),
+                groups["bucket_date"].in_(days)
+            )
+            wipe = wipe.where(table.c.bucket_date.in_(days))
+        source = source.group_by(*groups.values())
+
+        self.db.execute(wipe)
+        self.db.execute(insert(table).from_select([*groups, *measures], source))
+
+    def refresh_rollups(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Bring the rollups up to date and move the watermark to now
+
+        Args:
+            full: Recompute every day (catches deleted rows)
+
+        Returns:
+            dict: Days recomputed and the new watermark
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            self.db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _REFRESH_LOCK_KEY})
+
+        through = datetime.now(timezone.utc)
+        previous = self._watermark()
+        if full or previous is None:
+            days = None
+        else:
+            days = self._touched_days(previous - REFRESH_SAFETY_WINDOW)
+
+        if days is None or days:
+            for kind in _ROLLUPS:
+                self._rebuild_days(kind, days, through)
+
+        state = self.db.get(RollupState, ROLLUP_NAME)
+        if state is None:
+            self.db.add(RollupState(name=ROLLUP_NAME, refreshed_through=through, refreshed_at=through))
+        else:
+            state.refreshed_through = through
+            state.refreshed_at = through
+        self.db.commit()
+
+        result = {"full": days is None, "days": None if days is None else len(days), "refreshed_through": through.isoformat()}
+        logger.info("dashboard_rollups_refreshed", **result)
+        return result
+
+    # ============================================
+    # Reads
+    # ============================================
+
+    def _aggregate(
+        self,
+        kind: str,
+        group_by: Tuple[str, ...] = (),
+        user_id: Optional[Any] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> Dict[Tuple, Dict[str, float]]:
+        """
+        Measures of a rollup grouped by `group_by`, rollup + live tail
+
+        Args:
+            kind: analyses or detections
+            group_by: Group keys (see _ANALYSIS_GROUPS / _DETECTION_GROUPS)
+            user_id: Only this user's data (global if None)
+            start: First day included
+            end: First day excluded
+
+        Returns:
+            dict: group key tuple -> measure name -> value
+        """
+        model, groups, measures, created_at = _ROLLUPS[kind]
+        watermark = self._watermark()
+        results: Dict[Tuple, Dict[str, float]] = {}
+
+        def merge(rows: Iterable) -> None:
+            for row in rows:
+                key = tuple(_as_date(v) if g == "bucket_date" else v for g, v in zip(group_by, row))
+                totals = results.setdefault(key, dict.fromkeys(measures, 0))
+                for name, value in zip(measures, row[len(group_by):]):
+                    # SUM over BIGINT is NUMERIC (Decimal) on PostgreSQL
+                    totals[name] += float(value or 0)
+
+        if watermark is not None:
+            columns = [getattr(model, g) for g in group_by]
+            query = select(*columns, *[func.sum(getattr(model, m)) for m in measures])
+            if user_id is not None:
+                query = query.where(model.user_id == user_id)
+            if start is not None:
+                query = query.where(model.bucket_date >= start)
+            if end is not None:
+                query = query.where(model.bucket_date < end)
+            merge(self.db.execute(query.group_by(*columns)))
+
+        columns = [groups[g] for g in group_by]
+        tail = select(*columns, *measures.values())
+        if kind == "detections":
+            tail = tail.select_from(Detection).join(Analysis, Detection.analysis_id == Analysis.id)
+        if watermark is not None:
+            tail = tail.where(created_at >= watermark)
+        if user_id is not None:
+            tail = tail.where(Analysis.user_id == user_id)
+        if start is not None:
+            tail = tail.where(created_at >= _day_start(start))
+        if end is not None:
+            tail = tail.where(created_at < _day_start(end))
+        merge(self.db.execute(tail.group_by(*columns) if columns else tail))
+
+        return results
+
+    def _total(self, kind: str, measure: str, **filters) -> float:
+        return sum(row[measure] for row in self._aggregate(kind, **filters).values())
+
+    def _by(self, kind: str, key: str, measure: str, **filters) -> Dict[Any, float]:
+        return {group[0]: row[measure] for group, row in self._aggregate(kind, (key,), **filters).items()}
+
+    def _active_users(self, start: date, end: date) -> int:
+        """Distinct users with analyses in [start, end)"""
+        watermark = self._watermark()
+        users = set()
+        if watermark is not None:
+            users.update(self.db.execute(
+                select(distinct(AnalysisDailyRollup.user_id)).where(
+                    AnalysisDailyRollup.bucket_date >= start,
+                    AnalysisDailyRollup.bucket_date < end
+                )
+            ).scalars())
+        tail = select(distinct(Analysis.user_id)).where(
+            Analysis.created_at >= _day_start(start),
+            Analysis.created_at < _day_start(end)
+        )
+        if watermark is not None:
+            tail = tail.where(Analysis.created_at >= watermark)
+        users.update(self.db.execute(tail).scalars())
+        users.discard(None)
+        return len(users)
+
+    def statistics(self, user_id: Optional[Any] = None, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Dashboard headline numbers with change vs the previous month
+
+        monitored_locations counts geotagged analyses; active_users counts
+        users with analyses this month (always global).
+        """
+        today = today or datetime.now(timezone.utc).date()
+        month_start = today.replace(day=1)
+        previous_start = _add_months(month_start, -1)
+        next_start = _add_months(month_start, 1)
+
+        totals = self._aggregate("analyses", user_id=user_id).get((), dict.fromkeys(_ANALYSIS_MEASURES, 0))
+        high_risk = self._by("detections", "risk_level", "detections_count", user_id=user_id).get("ALTO", 0)
+
+        months = {}
+        for label, start, end in (("current", month_start, next_start), ("previous", previous_start, month_start)):
+            analyses = self._aggregate("analyses", user_id=user_id, start=start, end=end).get(
+                (), dict.fromkeys(_ANALYSIS_MEASURES, 0)
+            )
+            months[label] = {
+                "total_analyses": analyses["analyses_count"],
+                "monitored_locations": analyses["gps_count"],
+                "high_risk_detections": self._by(
+                    "detections", "risk_level", "detections_count", user_id=user_id, start=start, end=end
+                ).get("ALTO", 0),
+                "active_users": self._active_users(start, end),
+            }
+
+        return {
+            "scope": "user" if user_id is not None else "global",
+            "total_analyses": int(totals["analyses_count"]),
+            "high_risk_detections": int(high_risk),
+            "monitored_locations": int(totals["gps_count"]),
+            "active_users": months["current"]["active_users"],
+            "monthly_change": {
+                key: percent_change(months["current"][key], months["previous"][key])
+                for key in months["current"]
+            }
+        }
+
+    def risk_distribution(self, user_id: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """Detections per risk level, in chart order"""
+        counts = self._by("detections", "risk_level", "detections_count", user_id=user_id)
+        return [
+            {"name": name, "value": int(counts.get(level, 0)), "color": color}
+            for level, name, color in RISK_LEVELS
+        ]
+
+    def monthly_analyses(
+        self,
+        user_id: Optional[Any] = None,
+        months: int = 6,
+        today: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """Analyses per month for the last `months` months (current included)"""
+        today = today or datetime.now(timezone.utc).date()
+        first = _add_months(today.replace(day=1), -(months - 1))
+        end = _add_months(today.replace(day=1), 1)
+
+        per_month: Dict[Tuple[int, int], float] = {}
+        for (day,), row in self._aggregate("analyses", ("bucket_date",), user_id=user_id, start=first, end=end).items():
+            per_month[(day.year, day.month)] = per_month.get((day.year, day.month), 0) + row["analyses_count"]
+
+        series = []
+        for offset in range(months):
+            month = _add_months(first, offset)
+            series.append({
+                "month": SPANISH_MONTHS[month.month - 1],
+                "period": month.strftime("%Y-%m"),
+                "count": int(per_month.get((month.year, month.month), 0))
+            })
+        return series
+
+    def quality_metrics(self, user_id: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        Expert-validation quality of the detections (percentages)
+
+        precision: share of expert-reviewed detections confirmed as real.
+        Recall and F1 need missed sites labelled by experts, which are not
+        recorded, so they are not reported.
+        """
+        by_status = self._aggregate("detections", ("validation_status",), user_id=user_id)
+        total = sum(row["detections_count"] for row in by_status.values())
+        confidence_sum = sum(row["confidence_sum"] for row in by_status.values())
+        positive = by_status.get((POSITIVE,), {}).get("detections_count", 0)
+        negative = by_status.get((NEGATIVE,), {}).get("detections_count", 0)
+        reviewed = positive + negative
+
+        analyses = self._aggregate("analyses", user_id=user_id).get((), dict.fromkeys(_ANALYSIS_MEASURES, 0))
+        processing_count = analyses["processing_time_count"]
+
+        return {
+            "total_detections": int(total),
+            "validated_detections": round(reviewed / total * 100, 1) if total else 0.0,
+            "precision": round(positive / reviewed * 100, 1) if reviewed else None,
+            "avg_confidence": round(float(confidence_sum) / total * 100, 1) if total else None,
+            "processing_time_avg": round(analyses["processing_time_ms_sum"] / processing_count / 1000, 2)
+            if processing_count else None,
+            "pending_validations": int(total - reviewed),
+        }
+
+    def recent_activity(self, user_id: Optional[Any] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Latest analyses and expert validations, newest first"""
+        analyses = select(
+            Analysis.id, Analysis.image_filename, Analysis.risk_level, Analysis.total_detections, Analysis.created_at
+        ).where(Analysis.created_at.isnot(None)).order_by(Analysis.created_at.desc()).limit(limit)
+        validations = select(
+            Detection.id, Detection.breeding_site_type, Detection.risk_level,
+            Detection.validation_status, Detection.validated_at
+        ).where(Detection.validated_at.isnot(None)).order_by(Detection.validated_at.desc()).limit(limit)
+        if user_id is not None:
+            analyses = analyses.where(Analysis.user_id == user_id)
+            validations = validations.join(Analysis, Detection.analysis_id == Analysis.id).where(
+                Analysis.user_id == user_id
+            )
+
+        now = datetime.now(timezone.utc)
+        activity = []
+        for row in self.db.execute(analyses):
+            activity.append({
+                "id": str(row.id),
+                "type": "analysis",
+                "description": f"Análisis procesado: {row.image_filename or 'imagen'} ({row.total_detections or 0} detecciones)",
+                "risk": row.risk_level,
+                "timestamp": row.created_at,
+            })
+        for row in self.db.execute(validations):
+            verdict = "confirmada" if row.validation_status == POSITIVE else "descartada" if row.validation_status == NEGATIVE else "revisada"
+            activity.append({
+                "id": str(row.id),
+                "type": "validation",
+                "description": f"Detección {verdict} por experto: {row.breeding_site_type or 'sin tipo'}",
+                "risk": row.risk_level,
+                "timestamp": row.validated_at,
+            })
+
+        activity.sort(key=lambda item: item["timestamp"].replace(tzinfo=item["timestamp"].tzinfo or timezone.utc), reverse=True)
+        for item in activity[:limit]:
+            item["time"] = humanize_elapsed(item["timestamp"], now)
+            item["timestamp"] = item["timestamp"].isoformat()
+        return activity[:limit]
+
+
+async def cached_dashboard(
+    name: str,
+    user_id: Optional[Any],
+    compute: Callable[[], Any],
+    ttl: Optional[int] = None,
+    **params
+) -> Any:
+    """
+    Dashboard value from the cache, computed in a worker thread on a miss
+
+    Args:
+        name: Aggregate name (part of the key)
+        user_id: User scope, or None for the global variant
+        compute: Synchronous function producing the value
+        ttl: Seconds (settings.dashboard_cache_ttl by default)
+        **params: Extra key components (e.g. months, limit)
+    """
+    from fastapi.concurrency import run_in_threadpool
+
+    from ..cache.tags import DASHBOARD, user_tag
+    from ..cache.utils import CacheKeyBuilder, get_or_set
+    from ..config import get_settings
+
+    key = CacheKeyBuilder("dashboard").build(
+        name=name, scope=f"user:{user_id}" if user_id is not None else "global", **params
+    )
+    tags = [DASHBOARD] + ([user_tag(user_id)] if user_id is not None else [])
+
+    async def load():
+        return await run_in_threadpool(compute)
+
+    return await get_or_set(key=key, default_factory=load, ttl=ttl or get_settings().dashboard_cache_ttl, tags=tags)
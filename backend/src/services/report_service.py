@@ -1,12 +1,17 @@
 """
 Report Generation Service
 Servicio de generación de reportes
+
+Reports are streamed: analyses are read through a server-side cursor
+(yield_per) in batches of STREAM_BATCH_SIZE rows, CSV is emitted in chunks
+and the PDF story is fed to ReportLab one page group at a time, so memory
+stays bounded by the batch size instead of the number of analyses.
 """
 
 import io
 import csv
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, BinaryIO
 from pathlib import Path
 from uuid import UUID
 
@@ -23,6 +28,59 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text, func
 
 from ..database.models.models import Analysis, Detection, UserProfile
+from ..logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Rows fetched per round trip from the server-side cursor
+STREAM_BATCH_SIZE = 500
+
+# Rows buffered before a CSV chunk is emitted
+CSV_CHUNK_ROWS = 200
+
+# Only the columns reports use (no ORM objects, no geography column)
+REPORT_COLUMNS = (
+    Analysis.id,
+    Analysis.image_filename,
+    Analysis.created_at,
+    Analysis.risk_level,
+    Analysis.total_detections,
+    Analysis.high_risk_count,
+    Analysis.medium_risk_count,
+    Analysis.confidence_threshold,
+    Analysis.has_gps_data,
+)
+
+DETAILED_CSV_HEADERS = [
+    'ID', 'Archivo', 'Fecha', 'Nivel de Riesgo',
+    'Total Detecciones', 'Alto Riesgo', 'Riesgo Medio',
+    'Umbral Confianza', 'Tiene GPS'
+]
+
+# Progress callback: (rows processed, total rows)
+ProgressCallback = Callable[[int, int], None]
+
+
+class _FlowableStream(list):
+    """
+    Flowable list fed one group at a time from an iterable
+
+    ReportLab consumes the story from the front (del flowables[0]) and asks
+    for len() before each flowable, so refilling when empty keeps a single
+    page group in memory instead of the whole story.
+    """
+
+    def __init__(self, groups: Iterable[List]):
+        super().__init__()
+        self._groups = iter(groups)
+
+    def __len__(self) -> int:
+        while not super().__len__():
+            group = next(self._groups, None)
+            if group is None:
+                return 0
+            self.extend(group)
+        return super().__len__()
 
 
 class ReportService:
@@ -62,44 +120,54 @@ class ReportService:
         self,
         report_type: str,
         filters: Dict[str, Any],
-        user_id: UUID
-    ) -> io.BytesIO:
+        user_id: UUID,
+        output: Optional[BinaryIO] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> BinaryIO:
         """
         Generate PDF report
 
         Args:
             report_type: Type of report (summary, detailed, statistics)
-            filters: Filters to apply (date_from, date_to, risk_level, etc.)
+            filters: Filters to apply (date_from, date_to, risk_level, limit, etc.)
             user_id: User requesting the report
+            output: Binary file to write to (e.g. a spooled temporary file);
+                a new BytesIO if omitted
+            progress: Called with (rows, total) after each batch of analyses
 
         Returns:
-            BytesIO buffer with PDF content
+            The output buffer with PDF content, rewound
         """
-        buffer = io.BytesIO()
+        buffer = output if output is not None else io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.75*inch)
-        story = []
 
-        # Title
-        title = self._get_report_title(report_type)
-        story.append(Paragraph(title, self.styles['CustomTitle']))
-        story.append(Spacer(1, 0.3*inch))
+        # Pages are laid out as groups arrive; finished pages are only PDF bytes
+        doc.build(_FlowableStream(self._iter_pdf_story(report_type, filters, user_id, progress)))
+        buffer.seek(0)
+        return buffer
 
-        # Metadata
-        story.extend(self._generate_metadata_section(filters, user_id))
-        story.append(Spacer(1, 0.2*inch))
+    def _iter_pdf_story(
+        self,
+        report_type: str,
+        filters: Dict[str, Any],
+        user_id: UUID,
+        progress: Optional[ProgressCallback] = None
+    ) -> Iterator[List]:
+        """Yield the PDF story in page groups"""
+        # Title and metadata
+        title = self._get_report_title(report_type)
+        header = [Paragraph(title, self.styles['CustomTitle']), Spacer(1, 0.3*inch)]
+        header.extend(self._generate_metadata_section(filters, user_id))
+        header.append(Spacer(1, 0.2*inch))
+        yield header
 
         # Content based on report type
         if report_type == 'summary':
-            story.extend(self._generate_summary_content(filters))
+            yield self._generate_summary_content(filters)
         elif report_type == 'detailed':
-            story.extend(self._generate_detailed_content(filters))
+            yield from self._iter_detailed_content(filters, progress)
         elif report_type == 'statistics':
-            story.extend(self._generate_statistics_content(filters))
-
-        # Build PDF
-        doc.build(story)
-        buffer.seek(0)
-        return buffer
+            yield self._generate_statistics_content(filters)
 
     def _get_report_title(self, report_type: str) -> str:
         """Get report title based on type"""
@@ -211,17 +279,21 @@ class ReportService:
 
         return elements
 
-    def _generate_detailed_content(self, filters: Dict[str, Any]) -> List:
-        """Generate detailed report content"""
-        elements = []
+    def _iter_detailed_content(
+        self,
+        filters: Dict[str, Any],
+        progress: Optional[ProgressCallback] = None
+    ) -> Iterator[List]:
+        """Yield detailed report content, one group per analysis"""
+        yield [Paragraph('Análisis Detallados', self.styles['CustomHeading']), Spacer(1, 0.15*inch)]
 
-        # Get detailed analyses
-        analyses = self._get_filtered_analyses(filters, limit=50)
+        for idx, analysis in enumerate(self._iter_filtered_analyses(filters, progress=progress), 1):
+            elements = []
 
-        elements.append(Paragraph('Análisis Detallados', self.styles['CustomHeading']))
-        elements.append(Spacer(1, 0.15*inch))
+            # Page break every 3 analyses
+            if idx > 1 and (idx - 1) % 3 == 0:
+                elements.append(PageBreak())
 
-        for idx, analysis in enumerate(analyses, 1):
             # Analysis header
             analysis_title = f"Análisis #{idx} - {analysis.image_filename or 'Sin nombre'}"
             elements.append(Paragraph(analysis_title, self.styles['Heading3']))
@@ -246,12 +318,7 @@ class ReportService:
 
             elements.append(details_table)
             elements.append(Spacer(1, 0.2*inch))
-
-            # Page break every 3 analyses
-            if idx % 3 == 0 and idx < len(analyses):
-                elements.append(PageBreak())
-
-        return elements
+            yield elements
 
     def _generate_statistics_content(self, filters: Dict[str, Any]) -> List:
         """Generate statistics report content"""
@@ -307,24 +374,51 @@ class ReportService:
         Returns:
             StringIO buffer with CSV content
         """
+        return io.StringIO(''.join(self.iter_csv_report(report_type, filters)))
+
+    def iter_csv_report(
+        self,
+        report_type: str,
+        filters: Dict[str, Any],
+        progress: Optional[ProgressCallback] = None
+    ) -> Iterator[str]:
+        """
+        Generate CSV report in chunks (for StreamingResponse)
+
+        Args:
+            report_type: Type of report
+            filters: Filters to apply
+            progress: Called with (rows, total) after each batch of analyses
+
+        Yields:
+            CSV text chunks of up to CSV_CHUNK_ROWS rows
+        """
         buffer = io.StringIO()
         writer = csv.writer(buffer)
 
-        # Get data based on report type
-        if report_type == 'summary':
-            data = self._get_summary_csv_data(filters)
-        elif report_type == 'detailed':
-            data = self._get_detailed_csv_data(filters)
+        def drain() -> str:
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            return chunk
+
+        if report_type == 'detailed':
+            writer.writerow(DETAILED_CSV_HEADERS)
+            for idx, analysis in enumerate(self._iter_filtered_analyses(filters, progress=progress), 1):
+                writer.writerow(self._detailed_csv_row(analysis))
+                if idx % CSV_CHUNK_ROWS == 0:
+                    yield drain()
         else:
-            data = self._get_statistics_csv_data(filters)
-
-        # Write headers and rows
-        if data:
+            if report_type == 'summary':
+                data = self._get_summary_csv_data(filters)
+            else:
+                data = self._get_statistics_csv_data(filters)
             writer.writerow(data['headers'])
             writer.writerows(data['rows'])
 
-        buffer.seek(0)
-        return buffer
+        chunk = drain()
+        if chunk:
+            yield chunk
 
     def _get_summary_csv_data(self, filters: Dict[str, Any]) -> Dict:
         """Get summary data for CSV export"""
@@ -341,32 +435,20 @@ class ReportService:
             ]
         }
 
-    def _get_detailed_csv_data(self, filters: Dict[str, Any]) -> Dict:
-        """Get detailed data for CSV export"""
-        analyses = self._get_filtered_analyses(filters, limit=1000)
-
-        headers = [
-            'ID', 'Archivo', 'Fecha', 'Nivel de Riesgo',
-            'Total Detecciones', 'Alto Riesgo', 'Riesgo Medio',
-            'Umbral Confianza', 'Tiene GPS'
+    def _detailed_csv_row(self, analysis) -> List:
+        """One detailed CSV row from a REPORT_COLUMNS row"""
+        return [
+            str(analysis.id),
+            analysis.image_filename or '',
+            analysis.created_at.strftime('%Y-%m-%d %H:%M:%S') if analysis.created_at else '',
+            analysis.risk_level or '',
+            analysis.total_detections or 0,
+            analysis.high_risk_count or 0,
+            analysis.medium_risk_count or 0,
+            float(analysis.confidence_threshold or 0),
+            'Sí' if analysis.has_gps_data else 'No'
         ]
 
-        rows = []
-        for analysis in analyses:
-            rows.append([
-                str(analysis.id),
-                analysis.image_filename or '',
-                analysis.created_at.strftime('%Y-%m-%d %H:%M:%S') if analysis.created_at else '',
-                analysis.risk_level or '',
-                analysis.total_detections or 0,
-                analysis.high_risk_count or 0,
-                analysis.medium_risk_count or 0,
-                float(analysis.confidence_threshold or 0),
-                'Sí' if analysis.has_gps_data else 'No'
-            ])
-
-        return {'headers': headers, 'rows': rows}
-
     def _get_statistics_csv_data(self, filters: Dict[str, Any]) -> Dict:
         """Get statistics data for CSV export"""
         # Similar to detailed but with aggregated data
@@ -440,15 +522,52 @@ class ReportService:
             'by_breeding_site': by_breeding_site
         }
 
-    def _get_filtered_analyses(
+    def _iter_filtered_analyses(
         self,
         filters: Dict[str, Any],
-        limit: int = 100
-    ) -> List[Analysis]:
-        """Get filtered analyses"""
-        query = self.db.query(Analysis)
-        query = self._apply_filters(query, filters)
-        return query.order_by(Analysis.created_at.desc()).limit(limit).all()
+        progress: Optional[ProgressCallback] = None
+    ) -> Iterator[Any]:
+        """
+        Stream filtered analyses (newest first) through a server-side cursor
+
+        Rows carry only REPORT_COLUMNS. filters['limit'] caps the rows (no cap
+        by default). Progress is reported after every STREAM_BATCH_SIZE rows.
+        """
+        query = self._apply_filters(self.db.query(*REPORT_COLUMNS), filters)
+        total = query.count()
+        query = query.order_by(Analysis.created_at.desc())
+        if filters.get('limit'):
+            total = min(total, int(filters['limit']))
+            query = query.limit(int(filters['limit']))
+
+        rows = 0
+        for row in query.yield_per(STREAM_BATCH_SIZE):
+            yield row
+            rows += 1
+            if rows % STREAM_BATCH_SIZE == 0:
+                self._report_progress(progress, rows, total)
+        self._report_progress(progress, rows, total)
+
+    def _report_progress(self, progress: Optional[ProgressCallback], rows: int, total: int) -> None:
+        logger.info("report_progress", rows=rows, total=total,
+                    percent=round(rows / total * 100, 1) if total else 100.0)
+        if progress:
+            progress(rows, total)
+
+    def data_watermark(self, filters: Dict[str, Any]) -> str:
+        """
+        State of the analyses a report reads
+
+        Row count plus latest created/updated time of the filtered analyses:
+        any insert, update or delete in the report's range changes it.
+        """
+        query = self.db.query(
+            func.count(Analysis.id),
+            func.max(Analysis.created_at),
+            func.max(Analysis.updated_at)
+        )
+        count, last_created, last_updated = self._apply_filters(query, filters).one()
+        return f"{count}:{last_created}:{last_updated}"
 
     def _apply_filters(self, query, filters: Dict[str, Any]):
         """Apply filters to query"""
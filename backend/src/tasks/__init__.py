@@ -3,5 +3,11 @@ Celery tasks for async processing
 """
 
 from .analysis_tasks import process_image_analysis_task
+from .report_tasks import generate_report_task
+from .dashboard_tasks import refresh_dashboard_rollups_task
 
-__all__ = ["process_image_analysis_task"]
+__all__ = [
+    "process_image_analysis_task",
+    "generate_report_task",
+    "refresh_dashboard_rollups_task",
+]
@@ -6,6 +6,7 @@ preventing backend thread exhaustion and improving scalability.
 """
 
 import base64
+import os
 from typing import Dict, Any
 from celery import Task
 
@@ -148,7 +149,7 @@ def process_image_analysis_task(
                 "risk_level": yolo_result.get("risk_assessment", {}).get("risk_level"),
                 "has_gps_data": yolo_result.get("location") is not None,
                 "processing_time_ms": yolo_result.get("processing_time_ms"),
-                "model_used": yolo_result.get("model_used"),
+                "model_used": yolo_result.get("model_version") or yolo_result.get("model_used"),
                 "confidence_threshold": confidence_threshold,
                 "task_id": task_id,
             }
@@ -184,8 +185,11 @@ def process_image_analysis_task(
 
         # Retry on certain exceptions
         if self.request.retries < self.max_retries:
-            # Exponential backoff
+            # Exponential backoff, or the YOLO service's Retry-After when overloaded
             countdown = 2 ** self.request.retries * 60  # 60s, 120s, 240s
+            retry_after = (getattr(exc, "headers", None) or {}).get("Retry-After")
+            if retry_after:
+                countdown = int(retry_after)
             logger.info(
                 "analysis_task_retrying",
                 task_id=task_id,
@@ -207,4 +211,124 @@ def process_image_analysis_task(
         clear_contextvars()
 
 
-__all__ = ["process_image_analysis_task"]
+@celery_app.task(
+    bind=True,
+    base=AnalysisTask,
+    max_retries=3,
+    default_retry_delay=60,
+    name="src.tasks.analysis_tasks.process_video_analysis_task"
+)
+def process_video_analysis_task(
+    self,
+    video_path: str,
+    filename: str,
+    confidence_threshold: float = 0.5,
+    include_gps: bool = True,
+    user_id: str = None,
+    request_id: str = None
+) -> Dict[str, Any]:
+    """
+    Async task for video analysis with YOLO (one result per detected site)
+
+    The video waits on disk (settings.video_upload_dir), not in the broker
+    message; the file is deleted once the task finishes, and kept while a
+    retry is pending.
+
+    Args:
+        video_path: Path of the uploaded video
+        filename: Original filename
+        confidence_threshold: Detection confidence threshold
+        include_gps: Whether to read the recording location
+        user_id: User ID for the analysis
+        request_id: Request ID for distributed tracing
+
+    Returns:
+        dict: Analysis results with one detection per site and video info
+    """
+    if request_id:
+        bind_contextvars(request_id=request_id)
+
+    task_id = self.request.id
+    logger.info("video_analysis_task_started", task_id=task_id, filename=filename, user_id=user_id)
+
+    retrying = False
+    try:
+        import asyncio
+        from ..core.services.yolo_service import yolo_client
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            yolo_result = loop.run_until_complete(
+                yolo_client.detect_video(
+                    video_path=video_path,
+                    filename=filename,
+                    confidence_threshold=confidence_threshold,
+                    include_gps=include_gps
+                )
+            )
+        finally:
+            loop.close()
+
+        video = yolo_result.get("video", {})
+        location = yolo_result.get("location") or {}
+        analysis_data = {
+            "user_id": user_id,
+            "filename": filename,
+            "status": "completed",
+            "total_detections": yolo_result.get("total_detections", 0),
+            "risk_level": yolo_result.get("risk_assessment", {}).get("risk_level"),
+            "has_gps_data": bool(location.get("has_location")),
+            "processing_time_ms": yolo_result.get("processing_time_ms"),
+            "model_used": yolo_result.get("model_version") or yolo_result.get("model_used"),
+            "confidence_threshold": confidence_threshold,
+            "task_id": task_id,
+            "duration_s": video.get("duration_s"),
+            "frames_sampled": video.get("frames_sampled"),
+        }
+
+        logger.info(
+            "video_analysis_task_completed",
+            task_id=task_id,
+            total_detections=analysis_data["total_detections"],
+            frames_sampled=analysis_data["frames_sampled"]
+        )
+        return {
+            "task_id": task_id,
+            "status": "completed",
+            "analysis_data": analysis_data,
+            "yolo_result": yolo_result,
+        }
+
+    except Exception as exc:
+        logger.error(
+            "video_analysis_task_error",
+            task_id=task_id,
+            exception=str(exc),
+            exception_type=type(exc).__name__,
+            retry_count=self.request.retries
+        )
+        if self.request.retries < self.max_retries:
+            countdown = 2 ** self.request.retries * 60
+            retry_after = (getattr(exc, "headers", None) or {}).get("Retry-After")
+            if retry_after:
+                countdown = int(retry_after)
+            retrying = True
+            raise self.retry(exc=exc, countdown=countdown)
+        return {
+            "task_id": task_id,
+            "status": "failed",
+            "error": str(exc),
+            "error_type": type(exc).__name__
+        }
+
+    finally:
+        if not retrying:
+            try:
+                os.unlink(video_path)
+            except OSError:
+                pass
+        clear_contextvars()
+
+
+__all__ = ["process_image_analysis_task", "process_video_analysis_task"]
@@ -0,0 +1,51 @@
+"""
+Celery tasks for dashboard rollups
+
+Celery Beat refreshes the daily rollups incrementally every minute and
+rebuilds them nightly (the nightly run also catches deleted rows). See
+services.dashboard_service.
+"""
+
+from typing import Dict, Any
+
+from ..celery_app import celery_app
+from ..logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@celery_app.task(name="src.tasks.dashboard_tasks.refresh_dashboard_rollups_task", ignore_result=True)
+def refresh_dashboard_rollups_task(full: bool = False) -> Dict[str, Any]:
+    """
+    Refresh the dashboard rollups and, when any day was recomputed, drop
+    cached dashboard aggregates
+
+    Args:
+        full: Recompute every day instead of only the days touched since the
+            previous refresh
+
+    Returns:
+        dict: Refresh summary (see DashboardAggregates.refresh_rollups)
+    """
+    from ..cache.tags import DASHBOARD
+    from ..cache.cache_service import get_cache
+    from ..database.connection import SessionLocal
+    from ..services.dashboard_service import DashboardAggregates
+
+    db = SessionLocal()
+    try:
+        result = DashboardAggregates(db).refresh_rollups(full=full)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    # Recomputed days carry updates (validations, edited analyses) and, on a
+    # full rebuild, deletions that cached values computed earlier miss
+    if result["full"] or result["days"]:
+        try:
+            get_cache().invalidate_tags_sync(DASHBOARD)
+        except Exception as e:
+            logger.error("cache_invalidation_failed", tags=[DASHBOARD], error=str(e))
+    return result
@@ -0,0 +1,104 @@
+"""
+Celery tasks for report generation
+
+Reports run as background jobs keyed by their fingerprint (see
+utils.report_artifacts): the task writes the report into the artifact
+store, where the API serves it to every identical request until the data
+changes or the file is evicted.
+"""
+
+from typing import Dict, Any, Optional
+from uuid import UUID
+
+from ..celery_app import celery_app
+from ..logging_config import get_logger, bind_contextvars, clear_contextvars
+from .analysis_tasks import AnalysisTask
+
+logger = get_logger(__name__)
+
+# Reports over a whole dataset outlast the 5 minute default of analysis tasks
+REPORT_TASK_TIME_LIMIT = 1800
+
+
+@celery_app.task(
+    bind=True,
+    base=AnalysisTask,
+    time_limit=REPORT_TASK_TIME_LIMIT,
+    soft_time_limit=REPORT_TASK_TIME_LIMIT - 30,
+    name="src.tasks.report_tasks.generate_report_task"
+)
+def generate_report_task(
+    self,
+    fingerprint: str,
+    report_type: str,
+    report_format: str,
+    filters: Dict[str, Any],
+    user_id: str,
+    request_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Generate a PDF or CSV report into the artifact store
+
+    Progress is published as the PROGRESS state with rows/total meta.
+
+    Args:
+        fingerprint: Report fingerprint (also the task id)
+        report_type: summary, detailed, statistics
+        report_format: pdf or csv
+        filters: Report filters
+        user_id: User requesting the report
+        request_id: Request ID for distributed tracing
+
+    Returns:
+        dict: Artifact info (fingerprint, format, size_bytes)
+    """
+    if request_id:
+        bind_contextvars(request_id=request_id)
+
+    task_id = self.request.id
+    logger.info("report_task_started", task_id=task_id, report_type=report_type, report_format=report_format)
+
+    from ..database.connection import SessionLocal
+    from ..services.report_service import ReportService
+    from ..utils.report_artifacts import get_report_store
+
+    store = get_report_store()
+    temp_path = store.temp_path(fingerprint)
+    db = SessionLocal()
+
+    def progress(rows: int, total: int) -> None:
+        self.update_state(state="PROGRESS", meta={"rows": rows, "total": total})
+
+    try:
+        service = ReportService(db)
+        if report_format == "pdf":
+            with open(temp_path, "wb") as output:
+                service.generate_pdf_report(
+                    report_type=report_type,
+                    filters=filters,
+                    user_id=UUID(user_id),
+                    output=output,
+                    progress=progress
+                )
+        else:
+            with open(temp_path, "w", encoding="utf-8", newline="") as output:
+                for chunk in service.iter_csv_report(report_type, filters, progress=progress):
+                    output.write(chunk)
+
+        path = store.commit(temp_path, fingerprint, report_format)
+        size_bytes = path.stat().st_size
+        logger.info("report_task_completed", task_id=task_id, size_bytes=size_bytes)
+        return {
+            "task_id": task_id,
+            "status": "completed",
+            "fingerprint": fingerprint,
+            "format": report_format,
+            "size_bytes": size_bytes
+        }
+
+    finally:
+        db.close()
+        store.release(fingerprint)
+        if temp_path.exists():
+            temp_path.unlink()
+        clear_contextvars()
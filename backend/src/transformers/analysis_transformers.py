@@ -219,6 +219,7 @@ def build_analysis_list_item(analysis: dict) -> dict:
         "processed_image_url": analysis.get("processed_image_url"),
         "processed_image_filename": analysis.get("processed_image_filename"),
         "image_size_bytes": analysis.get("image_size_bytes", 0),
+        "image_previews": analysis.get("image_previews"),
         "location": location_data,
         "camera_info": camera_info,
         "model_used": analysis.get("model_used", "unknown"),
@@ -8,7 +8,7 @@ from typing import Optional, Union
 from uuid import UUID
 
 import bcrypt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
@@ -105,9 +105,15 @@ class AuthService:
 
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> UserProfile:
-    """Dependency to get the current authenticated user using Supabase Auth"""
+    """
+    Dependency to get the current authenticated user using Supabase Auth
+
+    The verified user is also stored on request.state.user for per-user
+    rate limiting.
+    """
     from ..services.supabase_user_service import supabase_user_service
 
     credentials_exception = HTTPException(
@@ -137,6 +143,7 @@ async def get_current_user(
             last_login=profile.get('last_login')
         )
 
+        request.state.user = user
         return user
 
     except HTTPException:
@@ -0,0 +1,226 @@
+"""
+Bounded CPU worker pool for image-bound work
+Pool acotado de workers de CPU para trabajo sobre imágenes
+
+HEIC decoding, JPEG re-encoding, hashing, thumbnailing and EXIF parsing are
+pure CPU work. Run inline in an async handler they block the event loop, so
+a single 12 MP HEIC upload stalls every other request on that worker
+(/heatmap-data included) for hundreds of milliseconds.
+
+`run_cpu(stage, fn, *args)` runs `fn` in a process pool sized to the cores:
+
+- the event loop only awaits; the work runs in another process (no GIL
+  contention with request handling)
+- backpressure: at most `workers + max_pending` calls in flight; beyond
+  that the call fails fast with 503 + Retry-After instead of queueing
+  uploads in memory without bound
+- per-stage timing (queue wait and run time), logged and aggregated in
+  snapshot() for /health/ready
+- a crashed worker breaks the executor: the pool is rebuilt and the call
+  retried once
+
+`fn` and its arguments must be picklable (module-level functions, bytes).
+Inside daemonic processes (Celery prefork workers) child processes are not
+allowed, so the pool falls back to threads there.
+
+Settings: cpu_pool_mode (process, thread), cpu_pool_workers (0 = cores),
+cpu_pool_max_pending.
+"""
+
+import asyncio
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+from ..logging_config import get_logger
+
+logger = get_logger(__name__)
+
+POOL_MODES = ("process", "thread")
+
+
+class CPUPoolSaturated(HTTPException):
+    """503 with Retry-After: every worker busy and the pending queue full"""
+
+    def __init__(self, stage: str, retry_after: float):
+        super().__init__(
+            status_code=503,
+            detail=f"Server busy processing images ({stage}). Please try again in a moment.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+        self.stage = stage
+        self.retry_after = retry_after
+
+
+def _timed(fn: Callable, args: Tuple) -> Tuple[Any, float]:
+    """Worker side: run fn and return its result with the run time in seconds"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class CPUPool:
+    """
+    Bounded executor for CPU-bound stages
+
+    Args:
+        workers: Concurrent stages (0 = os.cpu_count())
+        max_pending: Calls allowed to wait for a free worker
+        mode: process or thread (thread for development and daemonic processes)
+    """
+
+    def __init__(self, workers: int = 0, max_pending: int = 32, mode: str = "process"):
+        if mode not in POOL_MODES:
+            raise ValueError(f"Unknown CPU pool mode: {mode}. Options: {', '.join(POOL_MODES)}")
+        if mode == "process" and multiprocessing.current_process().daemon:
+            mode = "thread"
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.mode = mode
+        self.restarts = 0
+        self.rejected = 0
+        self._in_flight = 0
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.mode == "thread":
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cpu_pool")
+                else:
+                    # spawn: fork is unsafe with the server's threads and open connections
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+            return self._executor
+
+    def _restart(self, broken: Executor) -> None:
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self.restarts += 1
+            logger.error("cpu_pool_worker_crashed", restarts=self.restarts)
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _retry_after(self, stage: str) -> float:
+        """Seconds until a slot frees up, from the stage's average run time"""
+        stats = self._stages.get(stage)
+        average = stats["run_ms"] / stats["count"] / 1000 if stats and stats["count"] else 1.0
+        return average * self._in_flight / self.workers
+
+    async def run(self, stage: str, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) in the pool
+
+        Args:
+            stage: Name for timing and logs (e.g. heic_decode, hash)
+            fn: Module-level function (picklable in process mode)
+
+        Raises:
+            CPUPoolSaturated: If workers + max_pending calls are already in flight
+        """
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_pending:
+                self.rejected += 1
+                retry_after = self._retry_after(stage)
+                logger.warning("cpu_pool_saturated", stage=stage, in_flight=self._in_flight, retry_after=round(retry_after, 1))
+                raise CPUPoolSaturated(stage, retry_after)
+            self._in_flight += 1
+
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            for attempt in range(2):
+                executor = self._get_executor()
+                try:
+                    result, run_seconds = await loop.run_in_executor(executor, _timed, fn, args)
+                    break
+                except BrokenProcessPool:
+                    self._restart(executor)
+                    if attempt:
+                        raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+        total_ms = (time.perf_counter() - start) * 1000
+        run_ms = run_seconds * 1000
+        self._record(stage, run_ms, max(0.0, total_ms - run_ms))
+        logger.debug("cpu_stage", stage=stage, run_ms=round(run_ms, 1), queue_ms=round(total_ms - run_ms, 1))
+        return result
+
+    def _record(self, stage: str, run_ms: float, queue_ms: float) -> None:
+        with self._lock:
+            stats = self._stages.setdefault(stage, {"count": 0, "run_ms": 0.0, "queue_ms": 0.0, "max_run_ms": 0.0})
+            stats["count"] += 1
+            stats["run_ms"] += run_ms
+            stats["queue_ms"] += queue_ms
+            stats["max_run_ms"] = max(stats["max_run_ms"], run_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Pool load and per-stage timing (averages in ms)"""
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "workers": self.workers,
+                "in_flight": self._in_flight,
+                "max_in_flight": self.workers + self.max_pending,
+                "rejected": self.rejected,
+                "restarts": self.restarts,
+                "stages": {
+                    stage: {
+                        "count": int(stats["count"]),
+                        "avg_run_ms": round(stats["run_ms"] / stats["count"], 1),
+                        "avg_queue_ms": round(stats["queue_ms"] / stats["count"], 1),
+                        "max_run_ms": round(stats["max_run_ms"], 1)
+                    }
+                    for stage, stats in self._stages.items()
+                }
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+
+_cpu_pool: Optional[CPUPool] = None
+
+
+def get_cpu_pool() -> CPUPool:
+    """Process-wide pool, created from settings on first use"""
+    global _cpu_pool
+    if _cpu_pool is None:
+        from ..config import get_settings
+
+        settings = get_settings()
+        _cpu_pool = CPUPool(
+            workers=settings.cpu_pool_workers,
+            max_pending=settings.cpu_pool_max_pending,
+            mode=settings.cpu_pool_mode
+        )
+    return _cpu_pool
+
+
+async def run_cpu(stage: str, fn: Callable, *args) -> Any:
+    """Run fn(*args) in the shared CPU pool (see CPUPool.run)"""
+    return await get_cpu_pool().run(stage, fn, *args)
+
+
+def shutdown_cpu_pool() -> None:
+    global _cpu_pool
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown()
+        _cpu_pool = None
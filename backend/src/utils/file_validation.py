@@ -5,12 +5,22 @@ SECURITY:
 - MIME type validation with magic bytes (not just extension)
 - File size limits
 - Filename sanitization
+
+PERFORMANCE:
+- Uploads are validated in one streaming pass (validate_upload_stream):
+  MIME sniffed from the first SNIFF_SIZE bytes, size enforced per chunk,
+  SHA-256/MD5 computed on the way. The result points at the upload's own
+  spooled buffer (memory up to 1MB, then disk), so validating a 50MB upload
+  holds one chunk in memory instead of the whole file.
 """
 
+import hashlib
 import re
 import os
+import tempfile
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Tuple
+from typing import BinaryIO, Dict, Optional, Tuple
 from fastapi import UploadFile, HTTPException
 
 # Try to import magic, fallback to extension-only validation in development
@@ -46,6 +56,76 @@ ALLOWED_EXTENSIONS = {
     '.heic', '.heif', '.webp', '.bmp'
 }
 
+# libmagic only needs the header to identify image formats
+SNIFF_SIZE = 8 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Non-seekable uploads are copied to a spool that moves to disk above this
+SPOOL_MEMORY_LIMIT = 1024 * 1024
+
+
+@dataclass
+class ValidatedUpload:
+    """
+    Upload validated in a single streaming pass
+
+    `file` is the spooled buffer (positioned at 0); read it once with read()
+    or hand it to a stage that streams.
+    """
+    file: BinaryIO
+    filename: Optional[str]
+    size: int
+    mime_type: Optional[str]
+    sha256: str
+    md5: str
+
+    def read(self) -> bytes:
+        """Whole content (the only full in-memory copy)"""
+        self.file.seek(0)
+        return self.file.read()
+
+    def content_signature(self) -> Dict:
+        """Same shape as sentrix_shared calculate_content_signature"""
+        return {'sha256': self.sha256, 'md5': self.md5, 'size_bytes': self.size}
+
+
+def _too_large(max_size: int) -> HTTPException:
+    max_mb = max_size / (1024 * 1024)
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size: {max_mb:.1f}MB"
+    )
+
+
+def _sniff_mime_type(head: bytes, filename: Optional[str], allowed_mime_types: set) -> Optional[str]:
+    """MIME type from the header bytes; raises 400 if not allowed"""
+    if not MAGIC_AVAILABLE:
+        # Fallback: log warning that MIME validation is disabled (development only)
+        logger.warning(f"MIME validation disabled (magic not available) for file: {filename}")
+        return None
+
+    try:
+        mime_type = magic.from_buffer(head, mime=True)
+    except Exception as e:
+        # If magic fails, reject the file (fail closed)
+        logger.error(f"MIME type detection failed: {e}")
+        raise HTTPException(
+            status_code=400,
+            detail="Could not determine file type. File may be corrupted."
+        )
+    logger.debug(f"Detected MIME type: {mime_type} for file: {filename}")
+
+    if mime_type not in allowed_mime_types:
+        logger.warning(
+            f"Invalid MIME type attempted upload: {mime_type} "
+            f"(filename: {filename})"
+        )
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type: {mime_type}. "
+                   f"Allowed types: {', '.join(sorted(allowed_mime_types))}"
+        )
+    return mime_type
+
 
 def sanitize_filename(filename: str) -> str:
     """
@@ -83,6 +163,90 @@ def sanitize_filename(filename: str) -> str:
     return safe_name
 
 
+async def validate_upload_stream(
+    file: UploadFile,
+    max_size: int = MAX_FILE_SIZE,
+    allowed_mime_types: set = ALLOWED_MIME_TYPES
+) -> ValidatedUpload:
+    """
+    Validate an upload in one streaming pass
+
+    Performs, chunk by chunk:
+    1. Early size rejection (declared part size, then running total)
+    2. MIME type validation on the first SNIFF_SIZE bytes (magic bytes)
+    3. SHA-256 and MD5 of the content (for deduplication)
+
+    Args:
+        file: Uploaded file from FastAPI
+        max_size: Maximum allowed file size in bytes
+        allowed_mime_types: Set of allowed MIME types
+
+    Returns:
+        ValidatedUpload over the upload's spooled buffer
+
+    Raises:
+        HTTPException:
+            - 400 if file type invalid
+            - 413 if file too large (without reading the rest of the file)
+    """
+    # Multipart parts report their size: reject before reading anything
+    if getattr(file, "size", None) is not None and file.size > max_size:
+        raise _too_large(max_size)
+
+    # Starlette already spools the part (memory, then disk): reuse it instead
+    # of keeping a second copy. Other file objects are copied to a spool.
+    source = file.file
+    spool = None
+    if not (hasattr(source, "seekable") and source.seekable()):
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_LIMIT)
+    start = 0
+    if spool is None:
+        # Size of the spooled part without reading it
+        start = source.tell()
+        total = source.seek(0, os.SEEK_END) - start
+        source.seek(start)
+        if total > max_size:
+            raise _too_large(max_size)
+
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    head = b""
+    mime_type = None
+    sniffed = False
+    size = 0
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_size:
+                raise _too_large(max_size)
+            if not sniffed:
+                head += chunk[:SNIFF_SIZE - len(head)]
+                if len(head) >= SNIFF_SIZE:
+                    mime_type = _sniff_mime_type(head, file.filename, allowed_mime_types)
+                    sniffed = True
+            sha256.update(chunk)
+            md5.update(chunk)
+            if spool is not None:
+                spool.write(chunk)
+        if not sniffed:
+            mime_type = _sniff_mime_type(head, file.filename, allowed_mime_types)
+    except BaseException:
+        if spool is not None:
+            spool.close()
+        raise
+
+    buffer = spool if spool is not None else source
+    buffer.seek(start if spool is None else 0)
+    return ValidatedUpload(
+        file=buffer,
+        filename=file.filename,
+        size=size,
+        mime_type=mime_type,
+        sha256=sha256.hexdigest(),
+        md5=md5.hexdigest()
+    )
+
+
 async def validate_file_content(
     file: UploadFile,
     max_size: int = MAX_FILE_SIZE,
@@ -114,45 +278,8 @@ async def validate_file_content(
         - Validates MIME type with magic bytes (prevents renamed executables)
         - Size limit prevents DoS
     """
-    # 1. Read file with size limit (read +1 byte to detect oversized)
-    content = await file.read(max_size + 1)
-
-    # 2. Check size
-    if len(content) > max_size:
-        max_mb = max_size / (1024 * 1024)
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum size: {max_mb:.1f}MB"
-        )
-
-    # 3. Validate MIME type using magic bytes (SECURITY: not just extension)
-    if MAGIC_AVAILABLE:
-        try:
-            mime_type = magic.from_buffer(content, mime=True)
-            logger.debug(f"Detected MIME type: {mime_type} for file: {file.filename}")
-
-            if mime_type not in allowed_mime_types:
-                logger.warning(
-                    f"Invalid MIME type attempted upload: {mime_type} "
-                    f"(filename: {file.filename})"
-                )
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Invalid file type: {mime_type}. "
-                           f"Allowed types: {', '.join(sorted(allowed_mime_types))}"
-                )
-        except Exception as e:
-            # If magic fails, reject the file (fail closed)
-            logger.error(f"MIME type detection failed: {e}")
-            raise HTTPException(
-                status_code=400,
-                detail="Could not determine file type. File may be corrupted."
-            )
-    else:
-        # Fallback: log warning that MIME validation is disabled (development only)
-        logger.warning(f"MIME validation disabled (magic not available) for file: {file.filename}")
-
-    return content
+    upload = await validate_upload_stream(file, max_size, allowed_mime_types)
+    return upload.read()
 
 
 def validate_file_extension(filename: str) -> str:
@@ -189,32 +316,20 @@ def validate_file_extension(filename: str) -> str:
     return file_ext
 
 
-async def validate_uploaded_image(
+async def validate_uploaded_image_stream(
     file: UploadFile,
     max_size: int = MAX_FILE_SIZE
-) -> Tuple[bytes, str]:
+) -> Tuple[ValidatedUpload, str]:
     """
-    Complete validation for uploaded image file
-
-    Combines all validation checks:
-    - Filename sanitization
-    - Extension validation
-    - Size validation
-    - MIME type validation
+    Complete validation for an uploaded image, without reading it into memory
 
-    Args:
-        file: Uploaded file from FastAPI
-        max_size: Maximum file size in bytes
+    Same checks as validate_uploaded_image (see validate_upload_stream)
 
     Returns:
-        Tuple[bytes, str]: (file_content, sanitized_filename)
+        Tuple[ValidatedUpload, str]: (validated upload, sanitized_filename)
 
     Raises:
         HTTPException: If any validation fails
-
-    Example:
-        >>> content, safe_name = await validate_uploaded_image(file)
-        >>> # Use content for processing, safe_name for storage
     """
     # 1. Check file exists and has name
     if not file or not file.filename:
@@ -230,15 +345,46 @@ async def validate_uploaded_image(
     # 3. Validate extension (quick check)
     validate_file_extension(safe_filename)
 
-    # 4. Validate content (size + MIME type)
-    content = await validate_file_content(file, max_size)
+    # 4. Validate content (size + MIME type + hashes) in one pass
+    upload = await validate_upload_stream(file, max_size)
 
     logger.info(
         f"File validated successfully: {safe_filename}, "
-        f"size: {len(content)} bytes"
+        f"size: {upload.size} bytes"
     )
 
-    return content, safe_filename
+    return upload, safe_filename
+
+
+async def validate_uploaded_image(
+    file: UploadFile,
+    max_size: int = MAX_FILE_SIZE
+) -> Tuple[bytes, str]:
+    """
+    Complete validation for uploaded image file
+
+    Combines all validation checks:
+    - Filename sanitization
+    - Extension validation
+    - Size validation
+    - MIME type validation
+
+    Args:
+        file: Uploaded file from FastAPI
+        max_size: Maximum file size in bytes
+
+    Returns:
+        Tuple[bytes, str]: (file_content, sanitized_filename)
+
+    Raises:
+        HTTPException: If any validation fails
+
+    Example:
+        >>> content, safe_name = await validate_uploaded_image(file)
+        >>> # Use content for processing, safe_name for storage
+    """
+    upload, safe_filename = await validate_uploaded_image_stream(file, max_size)
+    return upload.read(), safe_filename
 
 
 # Utility functions for specific use cases
@@ -0,0 +1,100 @@
+"""
+Preview pyramid generated once at ingest
+Pirámide de previsualizaciones generada una sola vez al ingerir
+
+List and map views only need a few hundred pixels, but every view used to
+load the full original or processed image (megabytes). At ingest each image
+is decoded once and re-encoded at a few sizes (256/768/1600 px longest side
+by default); views then pick the smallest level that fits.
+
+- JPEG is decoded with draft(): libjpeg scales by 1/2, 1/4 or 1/8 in the
+  DCT, so a 12 MP photo is never fully decoded to produce 1600 px
+- each level is resized from the previous (larger) one, not from the source
+- sizes larger than the source are skipped (no upscaling)
+
+build_preview_pyramid is a pure module-level function so it can run in the
+CPU pool (run_cpu("thumbnail", ...)).
+"""
+
+import io
+from pathlib import Path
+from typing import Dict, Iterable
+
+from PIL import Image, ImageOps
+
+PREVIEW_FORMATS = {
+    "webp": ("WEBP", ".webp", "image/webp"),
+    "jpeg": ("JPEG", ".jpg", "image/jpeg"),
+}
+
+
+def build_preview_pyramid(
+    image_data: bytes,
+    sizes: Iterable[int] = (256, 768, 1600),
+    fmt: str = "webp",
+    quality: int = 80
+) -> Dict[int, bytes]:
+    """
+    Encode an image at several sizes (longest side)
+
+    Args:
+        image_data: Encoded image (JPEG, PNG, WebP, TIFF...)
+        sizes: Longest side of each level in pixels
+        fmt: webp or jpeg
+        quality: Encoder quality
+
+    Returns:
+        dict: size -> encoded bytes (sizes above the source size are skipped)
+    """
+    pil_format = PREVIEW_FORMATS[fmt][0]
+    sizes = sorted({int(s) for s in sizes if int(s) > 0}, reverse=True)
+    if not sizes:
+        return {}
+
+    image = Image.open(io.BytesIO(image_data))
+    source_size = image.size
+    # Reduced JPEG decode (DCT scaling) to at least the largest level needed
+    largest = min(sizes[0], max(source_size))
+    scale = largest / max(source_size)
+    image.draft("RGB", (max(1, round(source_size[0] * scale)), max(1, round(source_size[1] * scale))))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    longest_source = max(source_size)
+    previews = {}
+    for size in sizes:
+        if size > longest_source:
+            continue
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        if pil_format == "WEBP":
+            image.save(buffer, format=pil_format, quality=quality, method=4)
+        else:
+            image.save(buffer, format=pil_format, quality=quality, optimize=True, progressive=True)
+        previews[size] = buffer.getvalue()
+    return previews
+
+
+def preview_filename(base_filename: str, size: int, fmt: str = "webp") -> str:
+    """
+    Standardized name of a preview level
+
+    Follows the 'thumbnail' naming of create_filename_variations
+    (<standardized stem>_thumb) with the level appended.
+
+    Args:
+        base_filename: Standardized or processed name from
+            create_filename_variations (e.g. SENTRIX_20250101_....jpg)
+        size: Level (longest side in px)
+        fmt: webp or jpeg
+
+    Returns:
+        str: e.g. SENTRIX_20250101_..._thumb_256.webp
+    """
+    return f"{Path(base_filename).stem}_thumb_{size}{PREVIEW_FORMATS[fmt][1]}"
+
+
+def preview_content_type(fmt: str) -> str:
+    return PREVIEW_FORMATS[fmt][2]
+
@@ -0,0 +1,252 @@
+"""
+Report artifact store keyed by filter fingerprint
+Almacén de reportes generados indexado por huella de filtros
+
+A report is fully determined by its type, format, filters and the state of
+the analyses it reads. `report_fingerprint` hashes a canonical form of
+those (plus a data watermark: row count and latest created/updated time of
+the filtered analyses), so an identical request on an unchanged dataset
+maps to a file that already exists and is served without regenerating.
+
+Files live in settings.report_artifact_dir (shared by the API and Celery
+workers) as <fingerprint>.<ext>:
+
+- writes go to a temporary file renamed into place (readers never see a
+  partial report)
+- reads refresh the file's mtime; beyond report_artifact_max_bytes or
+  report_artifact_max_files the least recently used files are evicted
+- claim() marks a fingerprint as being generated so concurrent identical
+  requests share one job
+"""
+
+import hashlib
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Bump when the layout of generated reports changes (invalidates old files)
+REPORT_LAYOUT_VERSION = 1
+
+REPORT_EXTENSIONS = {
+    "pdf": ".pdf",
+    "csv": ".csv",
+}
+
+_CLAIM_SUFFIX = ".claim"
+_TEMP_SUFFIX = ".tmp"
+
+
+def canonical_report_filters(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Canonical form of report filters
+
+    Unset values are dropped (they apply no filter), dates are normalized to
+    ISO format and the limit to int, so equivalent requests compare equal.
+
+    Raises:
+        ValueError: If a date is not ISO 8601
+    """
+    canonical = {}
+    for key, value in filters.items():
+        if value in (None, "", False, 0):
+            continue
+        if key in ("date_from", "date_to"):
+            value = datetime.fromisoformat(str(value)).isoformat()
+        elif key == "limit":
+            value = int(value)
+        canonical[key] = value
+    return canonical
+
+
+def report_fingerprint(
+    report_type: str,
+    report_format: str,
+    filters: Dict[str, Any],
+    watermark: str,
+    user_id: Optional[str] = None
+) -> str:
+    """
+    Fingerprint of a report request
+
+    Args:
+        report_type: summary, detailed, statistics
+        report_format: pdf or csv
+        filters: Report filters (see canonical_report_filters)
+        watermark: Data watermark of the filtered analyses
+        user_id: Only for reports that embed the requesting user
+
+    Returns:
+        str: sha256 hex digest
+    """
+    payload = {
+        "version": REPORT_LAYOUT_VERSION,
+        "type": report_type,
+        "format": report_format,
+        "filters": canonical_report_filters(filters),
+        "watermark": watermark,
+        "user_id": user_id,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ReportArtifactStore:
+    """
+    Directory of generated reports with LRU eviction
+
+    Args:
+        root: Directory of the artifacts
+        max_bytes: Total size kept
+        max_files: Number of artifacts kept
+    """
+
+    def __init__(self, root: str, max_bytes: int = 1024 * 1024 * 1024, max_files: int = 500):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _artifacts(self):
+        """(path, stat) of every finished artifact"""
+        entries = []
+        for path in self.root.iterdir():
+            if path.suffix not in REPORT_EXTENSIONS.values():
+                continue
+            try:
+                entries.append((path, path.stat()))
+            except FileNotFoundError:
+                continue  # Evicted by another process meanwhile
+        return entries
+
+    def find(self, fingerprint: str) -> Optional[Path]:
+        """
+        Path of a finished artifact, marked as recently used
+
+        Returns:
+            Path or None if not generated (or already evicted)
+        """
+        for ext in REPORT_EXTENSIONS.values():
+            path = self.root / f"{fingerprint}{ext}"
+            try:
+                os.utime(path)
+                return path
+            except FileNotFoundError:
+                continue
+        return None
+
+    def temp_path(self, fingerprint: str) -> Path:
+        """Unique temporary path to generate an artifact into"""
+        return self.root / f".{fingerprint}.{uuid.uuid4().hex}{_TEMP_SUFFIX}"
+
+    def commit(self, temp_path: Path, fingerprint: str, report_format: str) -> Path:
+        """
+        Move a generated file into place and evict beyond the limits
+
+        Returns:
+            Path of the artifact
+        """
+        path = self.root / f"{fingerprint}{REPORT_EXTENSIONS[report_format]}"
+        os.replace(temp_path, path)
+        self.evict(keep=path)
+        return path
+
+    def claim(self, fingerprint: str, ttl: float) -> bool:
+        """
+        Mark a fingerprint as being generated
+
+        Args:
+            fingerprint: Report fingerprint
+            ttl: Seconds after which an unreleased claim is considered stale
+                (crashed worker)
+
+        Returns:
+            bool: True if this caller should generate it, False if another
+            job already is
+        """
+        path = self.root / f"{fingerprint}{_CLAIM_SUFFIX}"
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - path.stat().st_mtime < ttl:
+                    return False
+            except FileNotFoundError:
+                pass
+            # Stale or just released: take it over
+            path.touch()
+            return True
+        os.close(fd)
+        return True
+
+    def release(self, fingerprint: str) -> None:
+        """Drop the generation mark of a fingerprint"""
+        try:
+            (self.root / f"{fingerprint}{_CLAIM_SUFFIX}").unlink()
+        except FileNotFoundError:
+            pass
+
+    def evict(self, keep: Optional[Path] = None) -> int:
+        """
+        Delete least recently used artifacts beyond max_bytes / max_files
+
+        Args:
+            keep: Artifact never evicted (the one just written)
+
+        Returns:
+            int: Number of artifacts deleted
+        """
+        entries = sorted(self._artifacts(), key=lambda entry: entry[1].st_mtime)
+        total_bytes = sum(stat.st_size for _, stat in entries)
+        count = len(entries)
+        evicted = 0
+        for path, stat in entries:
+            if total_bytes <= self.max_bytes and count <= self.max_files:
+                break
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total_bytes -= stat.st_size
+            count -= 1
+            evicted += 1
+        if evicted:
+            logger.info("report_artifacts_evicted", evicted=evicted, files=count, bytes=total_bytes)
+        return evicted
+
+    def snapshot(self) -> Dict[str, int]:
+        """Number and total size of stored artifacts"""
+        entries = self._artifacts()
+        return {
+            "files": len(entries),
+            "bytes": sum(stat.st_size for _, stat in entries),
+            "max_files": self.max_files,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_report_store: Optional[ReportArtifactStore] = None
+
+
+def get_report_store() -> ReportArtifactStore:
+    """Process-wide store, created from settings on first use"""
+    global _report_store
+    if _report_store is None:
+        from ..config import get_settings
+
+        settings = get_settings()
+        _report_store = ReportArtifactStore(
+            settings.report_artifact_dir,
+            max_bytes=settings.report_artifact_max_bytes,
+            max_files=settings.report_artifact_max_files
+        )
+    return _report_store
@@ -343,6 +343,47 @@ class SupabaseManager:
                 "message": f"Upload error: {str(e)}"
             }
 
+    def upload_previews(self, previews: dict, bucket_name: str, content_type: str) -> dict:
+        """
+        Upload preview levels at deterministic paths (previews/<name>)
+        Subir niveles de previsualización en rutas deterministas
+
+        Args:
+            previews: Mapping filename -> encoded bytes
+            bucket_name: Target bucket
+            content_type: MIME type shared by every level
+
+        Returns:
+            dict: status and filename -> public URL of each uploaded level
+        """
+        urls = {}
+        try:
+            storage = self.client.storage.from_(bucket_name)
+            for filename, data in previews.items():
+                path = f"previews/{filename}"
+                # Names derive from the standardized filename (timestamp + uuid), unique
+                # per upload; upsert only rewrites the same level on a retry, so the
+                # content behind a URL does not change: cache it for a year
+                storage.upload(
+                    path=path,
+                    file=data,
+                    file_options={"content-type": content_type, "cache-control": "31536000", "upsert": "true"}
+                )
+                public_url = storage.get_public_url(path)
+                urls[filename] = str(public_url).rstrip('?') if public_url else public_url
+
+            return {
+                "status": "success",
+                "urls": urls
+            }
+
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Preview upload error: {str(e)}",
+                "urls": urls
+            }
+
     def upload_dual_images(self, original_data: bytes, processed_data: bytes, base_filename: str) -> dict:
         """
         Upload both original and processed images
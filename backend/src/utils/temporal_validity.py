@@ -6,8 +6,8 @@ Integrates the shared temporal persistence model with backend detection creation
 Integra el modelo de persistencia temporal compartido con la creación de detecciones en backend.
 """
 
-from datetime import datetime
-from typing import Dict, Any, Optional
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Sequence
 
 from ..logging_config import get_logger
 
@@ -278,10 +278,8 @@ def extend_detection_validity(
         Dictionary with new validity fields
     """
     try:
-        from datetime import timedelta
-
         current_expiration = datetime.fromisoformat(current_expires_at.replace('Z', '+00:00'))
-        new_expiration = current_expiration + timedelta(days=extension_days)
+        new_expiration = extend_validity_batch([current_expiration], [extension_days])[0]
 
         return {
             "expires_at": new_expiration.isoformat(),
@@ -296,3 +294,27 @@ def extend_detection_validity(
         return {
             "error": str(e)
         }
+
+
+def extend_validity_batch(
+    expires_at: Sequence[Optional[datetime]],
+    extension_days: Sequence[Optional[int]]
+) -> List[Optional[datetime]]:
+    """
+    Extend many expiration dates at once (vectorized extend_detection_validity)
+    Extender muchas fechas de expiración a la vez
+
+    Args:
+        expires_at: Current expiration of each detection
+        extension_days: Days to extend each one (None = unchanged)
+
+    Returns:
+        New expiration per detection; None where there is no expiration to
+        extend (the caller reports it as an error)
+    """
+    if len(expires_at) != len(extension_days):
+        raise ValueError("expires_at and extension_days must have the same length")
+    return [
+        current if not days else (current + timedelta(days=days) if current is not None else None)
+        for current, days in zip(expires_at, extension_days)
+    ]
@@ -10,6 +10,8 @@ import pytest
 # Set testing mode environment variable before any imports
 os.environ['TESTING_MODE'] = 'true'
 os.environ['ENVIRONMENT'] = 'development'
+# CPU pool in threads: tests patch the functions it runs with mocks (not picklable)
+os.environ.setdefault('CPU_POOL_MODE', 'thread')
 import asyncio
 from typing import Generator, AsyncGenerator
 from httpx import AsyncClient
@@ -78,6 +80,44 @@ def db_session():
     Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture
+def sqlite_tables():
+    """
+    Factory of in-memory SQLite sessions with copies of the given models' tables
+    Fábrica de sesiones SQLite en memoria con copias de las tablas de los modelos
+
+    PostGIS columns are left out. JSONB columns are left out too, or kept
+    as plain JSON with keep_jsonb=True.
+    """
+    from geoalchemy2 import Geography
+    from sqlalchemy import JSON, Column, MetaData, Table
+    from sqlalchemy.dialects.postgresql import JSONB
+    from sqlalchemy.orm import Session
+
+    sessions = []
+
+    def make(*models, keep_jsonb: bool = False) -> Session:
+        metadata = MetaData()
+        for model in models:
+            Table(
+                model.__tablename__, metadata,
+                *[
+                    Column(c.name, JSON() if isinstance(c.type, JSONB) else c.type, primary_key=c.primary_key)
+                    for c in model.__table__.columns
+                    if not isinstance(c.type, Geography) and (keep_jsonb or not isinstance(c.type, JSONB))
+                ]
+            )
+        sqlite_engine = create_engine("sqlite://")
+        metadata.create_all(sqlite_engine)
+        session = Session(bind=sqlite_engine)
+        sessions.append(session)
+        return session
+
+    yield make
+    for session in sessions:
+        session.close()
+
+
 async def override_get_current_user():
     """Override auth dependency for testing"""
     from src.database.models.models import UserProfile
@@ -0,0 +1,195 @@
+"""
+Tests for active-learning retraining sample selection
+Tests para la selección de muestras de reentrenamiento por aprendizaje activo
+"""
+
+import json
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from io import BytesIO
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from PIL import Image
+from sqlalchemy import insert
+
+from src.core.detection_validator import DetectionValidator
+from src.database.models.models import Analysis, Detection, UserProfile
+from src.services.active_learning import (
+    RetrainingSampler, class_rarity, detection_uncertainty, expert_disagreement, load_class_counts,
+    select_diverse, yolo_segment_line
+)
+
+TAKEN = datetime(2025, 3, 1, 10, 0)
+WEIGHTS = {"uncertainty": 0.35, "rarity": 0.25, "disagreement": 0.4}
+
+
+@pytest.fixture
+def db(sqlite_tables):
+    """Detection tables, polygons kept as JSON"""
+    return sqlite_tables(UserProfile, Analysis, Detection, keep_jsonb=True)
+
+
+def _analysis(db, detections, gps=(-26.18, -58.17), days=0, threshold=0.5):
+    """Insert an analysis and its detections [(class_id, confidence, status)]"""
+    analysis_id = uuid.uuid4()
+    db.execute(insert(Analysis.__table__).values(
+        id=analysis_id, image_url=f"https://img.test/{analysis_id}.jpg", confidence_threshold=threshold,
+        image_taken_at=TAKEN + timedelta(days=days), created_at=TAKEN
+    ))
+    for class_id, confidence, status in detections:
+        db.execute(insert(Detection.__table__).values(
+            id=uuid.uuid4(), analysis_id=analysis_id, class_id=class_id, confidence=confidence,
+            validation_status=status, polygon=[[20, 10], [60, 10], [60, 40]],
+            detection_latitude=gps[0] if gps else None, detection_longitude=gps[1] if gps else None
+        ))
+    db.commit()
+    return analysis_id
+
+
+@pytest.fixture
+def corpus(db):
+    ids = {
+        "confident_miss": _analysis(db, [(0, 0.95, "validated_negative")]),
+        "common_sure": _analysis(db, [(0, 0.99, "validated_positive")], gps=(-26.30, -58.30), days=20),
+        "rare_borderline": _analysis(db, [(3, 0.52, "pending_validation")], gps=(-26.50, -58.10), days=40),
+    }
+    for _ in range(3):
+        _analysis(db, [(0, 0.97, "validated_positive")], gps=(-26.40, -58.40), days=60)
+    return db, ids
+
+
+class TestScores:
+    """Test the per-detection score components"""
+
+    def test_uncertainty_peaks_at_threshold(self):
+        assert detection_uncertainty(0.5) == pytest.approx(1.0)
+        assert detection_uncertainty(0.99) < 0.1
+        assert detection_uncertainty(0.55, threshold=0.5) > detection_uncertainty(0.55, threshold=0.25)
+
+    def test_disagreement(self):
+        assert expert_disagreement("validated_negative", 0.9) == pytest.approx(0.9)
+        assert expert_disagreement("validated_positive", 0.3) == pytest.approx(0.7)
+        assert expert_disagreement("requires_review", 0.9) == 0.5
+        assert expert_disagreement("pending_validation", 0.9) == 0.0
+
+    def test_rarity(self):
+        rarity = class_rarity({0: 999, 3: 9})
+
+        assert rarity[0] == 0.0
+        assert 0.6 < rarity[3] < 0.7
+        assert class_rarity({}) == {}
+
+    def test_counts_from_dataset_report(self, tmp_path):
+        report = tmp_path / "dataset_analysis_report.json"
+        report.write_text(json.dumps({"total_instances_by_class": {"0": 120, "3": 7, "Charcos/Cumulos de agua": 4}}))
+
+        assert load_class_counts(str(report)) == {0: 120, 3: 7, 2: 4}
+
+
+class TestSelection:
+    """Test scoring and diverse selection over the corpus"""
+
+    def test_informative_images_first(self, corpus):
+        db, ids = corpus
+        sampler = RetrainingSampler(db, weights=WEIGHTS, diversity=0.0)
+
+        selected = [c.analysis_id for c in sampler.select(2)]
+
+        assert set(selected) == {ids["confident_miss"], ids["rare_borderline"]}
+
+    def test_rarity_uses_training_counts(self, corpus):
+        db, ids = corpus
+        candidates = {
+            c.analysis_id: c for c in RetrainingSampler(db, class_counts={0: 1000, 3: 1000}, weights=WEIGHTS).candidates()
+        }
+
+        assert candidates[ids["rare_borderline"]].rarity == 0.0
+        assert candidates[ids["confident_miss"]].rarity == 0.0  # rejected detections carry no class
+
+    def test_diversity_skips_near_duplicates(self, corpus):
+        db, ids = corpus
+        weights = {"uncertainty": 0.0, "rarity": 0.0, "disagreement": 1.0}
+        duplicates = {ids["confident_miss"], _analysis(db, [(0, 0.95, "validated_negative")])}
+        far_away = _analysis(db, [(0, 0.8, "validated_negative")], gps=(-27.40, -55.90), days=90)
+
+        greedy = {c.analysis_id for c in RetrainingSampler(db, weights=weights, diversity=0.0).select(2)}
+        diverse = {c.analysis_id for c in RetrainingSampler(db, weights=weights, diversity=0.5).select(2)}
+
+        assert greedy == duplicates
+        assert far_away in diverse and len(diverse & duplicates) == 1
+
+    def test_reviewed_only(self, corpus):
+        db, ids = corpus
+
+        selected = RetrainingSampler(db, weights=WEIGHTS).select(10, reviewed_only=True)
+
+        assert len(selected) == 5
+        assert ids["rare_borderline"] not in {c.analysis_id for c in selected}
+
+    def test_select_diverse_without_gps(self):
+        points = np.array([[np.nan, np.nan, 0.0], [np.nan, np.nan, 0.0], [np.nan, np.nan, 5.0]])
+
+        assert select_diverse([1.0, 0.9, 0.5], points, 2, diversity=0.8) == [0, 2]
+        assert select_diverse([1.0], points[:1], 5, diversity=0.5) == [0]
+
+
+def _png(width=200, height=100) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (width, height)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TestYoloExport:
+    """Test the YOLO segmentation dataset export"""
+
+    def test_export(self, corpus, tmp_path):
+        db, ids = corpus
+        sampler = RetrainingSampler(db, weights=WEIGHTS)
+        selection = sampler.select(3, reviewed_only=False)
+        fetched = []
+
+        manifest = sampler.export_yolo(selection, str(tmp_path), fetch_image=lambda url: fetched.append(url) or _png())
+
+        assert manifest["review_queue"] == [str(ids["rare_borderline"])]
+        assert len(manifest["exported"]) == 2 and len(fetched) == 2
+        labels = {path.stem: path.read_text() for path in tmp_path.glob("labels/*/*.txt")}
+        assert labels[str(ids["confident_miss"])] == ""
+        positive = next(text for stem, text in labels.items() if stem != str(ids["confident_miss"]))
+        assert positive == "0 0.100000 0.100000 0.300000 0.100000 0.300000 0.400000\n"
+        assert len(list(tmp_path.glob("images/*/*.png"))) == 2
+        data_yaml = (tmp_path / "data.yaml").read_text(encoding="utf-8")
+        assert "nc: 4" in data_yaml and '3: "Huecos"' in data_yaml
+        assert json.loads((tmp_path / "selection.json").read_text())["exported"] == manifest["exported"]
+
+    def test_unreadable_image_is_reported(self, corpus, tmp_path):
+        db, ids = corpus
+        sampler = RetrainingSampler(db, weights=WEIGHTS)
+        selection = [c for c in sampler.candidates() if c.analysis_id == ids["confident_miss"]]
+
+        manifest = sampler.export_yolo(selection, str(tmp_path), fetch_image=lambda url: b"not an image")
+
+        assert manifest["failed"] == [str(ids["confident_miss"])]
+        assert manifest["exported"] == []
+
+    def test_segment_line_clips(self):
+        assert yolo_segment_line(2, [[0, 0], [250, 50], [100, 120]], 200, 100) == (
+            "2 0.000000 0.000000 1.000000 0.500000 0.500000 1.000000"
+        )
+
+
+def test_validator_suggestions(corpus):
+    db, ids = corpus
+
+    @contextmanager
+    def db_context():
+        yield db
+
+    with patch("src.core.detection_validator.get_db_context", db_context):
+        suggestions = DetectionValidator().suggest_retraining_data(limit=2)
+
+    assert len(suggestions) == 2
+    assert {s["analysis_id"] for s in suggestions} == {str(ids["confident_miss"]), str(ids["rare_borderline"])}
+    assert suggestions[0]["reason"] in ("uncertainty", "rarity", "disagreement")
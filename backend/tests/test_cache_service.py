@@ -0,0 +1,255 @@
+"""
+Tests for the multi-tier cache service
+
+Covers:
+- LocalCache LRU, size and TTL bounds
+- L1-only operation when Redis is unavailable
+- Cross-worker invalidation messages
+- Tag-based invalidation
+- Batched statistics
+"""
+
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.cache.local_cache import LocalCache
+from src.cache.cache_service import CacheService
+from src.cache.tags import analysis_write_tags, invalidate_on_commit
+
+
+@pytest.fixture
+def l1_only_cache():
+    """Cache service running without Redis (L1 tier only)"""
+    with patch("src.cache.cache_service.REDIS_AVAILABLE", False):
+        yield CacheService(redis_url="redis://unused:6379/0", l1_max_entries=10, l1_ttl=30)
+
+
+class TestLocalCache:
+    """Tests for the in-process L1 tier"""
+
+    def test_evicts_least_recently_used(self):
+        l1 = LocalCache(max_entries=2)
+        l1.set("a", b"1", ttl=60)
+        l1.set("b", b"2", ttl=60)
+        l1.get("a")
+        l1.set("c", b"3", ttl=60)
+
+        assert l1.get("a") == b"1"
+        assert l1.get("b") is None
+        assert l1.evictions == 1
+
+    def test_respects_byte_budget(self):
+        l1 = LocalCache(max_entries=100, max_bytes=10)
+        l1.set("a", b"x" * 6, ttl=60)
+        l1.set("b", b"y" * 6, ttl=60)
+
+        assert l1.get("a") is None
+        assert l1.nbytes == 6
+
+    def test_rejects_oversized_values(self):
+        l1 = LocalCache(max_bytes=4)
+        assert l1.set("a", b"too-large", ttl=60) is False
+        assert len(l1) == 0
+
+    def test_expires_entries(self):
+        l1 = LocalCache()
+        l1.set("a", b"1", ttl=0.01)
+        time.sleep(0.02)
+
+        assert l1.get("a") is None
+        assert l1.expirations == 1
+
+    def test_delete_pattern(self):
+        l1 = LocalCache()
+        l1.set("sentrix:user:1", b"1", ttl=60)
+        l1.set("sentrix:user:2", b"2", ttl=60)
+        l1.set("sentrix:analysis:1", b"3", ttl=60)
+
+        assert l1.delete_pattern("sentrix:user:*") == 2
+        assert l1.get("sentrix:analysis:1") == b"3"
+
+    def test_delete_tags(self):
+        l1 = LocalCache()
+        l1.set("a", b"1", ttl=60, tags=["heatmap", "user:1"])
+        l1.set("b", b"2", ttl=60, tags=["map-stats"])
+        l1.set("c", b"3", ttl=60)
+
+        assert l1.delete_tags(["user:1", "map-stats"]) == 2
+        assert l1.get("c") == b"3"
+        assert l1.stats()["tags"] == 0
+
+    def test_evicted_entries_leave_the_tag_index(self):
+        l1 = LocalCache(max_entries=1)
+        l1.set("a", b"1", ttl=60, tags=["heatmap"])
+        l1.set("b", b"2", ttl=60)
+
+        assert l1.stats()["tags"] == 0
+        assert l1.delete_tags(["heatmap"]) == 0
+
+
+class TestCacheServiceWithoutRedis:
+    """Tests for graceful degradation to the in-process tier"""
+
+    @pytest.mark.asyncio
+    async def test_round_trip_json(self, l1_only_cache):
+        assert await l1_only_cache.set("user:1", {"id": 1, "tags": ["a"]}) is True
+        assert await l1_only_cache.get("user:1") == {"id": 1, "tags": ["a"]}
+
+    @pytest.mark.asyncio
+    async def test_cached_values_cannot_be_mutated_by_callers(self, l1_only_cache):
+        await l1_only_cache.set("user:1", {"id": 1})
+        value = await l1_only_cache.get("user:1")
+        value["id"] = 2
+
+        assert await l1_only_cache.get("user:1") == {"id": 1}
+
+    @pytest.mark.asyncio
+    async def test_raw_bytes(self, l1_only_cache):
+        await l1_only_cache.set_bytes("blob", b"\x00\xff")
+        assert await l1_only_cache.get_bytes("blob") == b"\x00\xff"
+
+    @pytest.mark.asyncio
+    async def test_get_many_and_delete_many(self, l1_only_cache):
+        await l1_only_cache.set_many({"a": 1, "b": 2})
+
+        assert await l1_only_cache.get_many(["a", "b", "c"]) == {"a": 1, "b": 2}
+        assert await l1_only_cache.delete_many(["a", "b"]) == 2
+        assert await l1_only_cache.get("a") is None
+
+    @pytest.mark.asyncio
+    async def test_lock_is_granted_locally(self, l1_only_cache):
+        token = await l1_only_cache.acquire_lock("job")
+        assert token is not None
+        assert await l1_only_cache.release_lock("job", token) is True
+
+    @pytest.mark.asyncio
+    async def test_disabled_cache_is_pass_through(self):
+        cache = CacheService(redis_url="redis://unused:6379/0", enabled=False)
+        assert await cache.set("a", 1) is False
+        assert await cache.get("a", default="missing") == "missing"
+
+    @pytest.mark.asyncio
+    async def test_stats_are_counted_locally(self, l1_only_cache):
+        await l1_only_cache.set("a", 1)
+        await l1_only_cache.get("a")
+        await l1_only_cache.get("missing")
+
+        stats = await l1_only_cache.get_stats()
+        assert stats["l1_hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["sets"] == 1
+        assert stats["hit_rate"] == 50.0
+
+
+class TestInvalidationMessages:
+    """Tests for pub/sub L1 invalidation payloads"""
+
+    @pytest.mark.asyncio
+    async def test_peer_message_evicts_keys(self, l1_only_cache):
+        await l1_only_cache.set("a", 1)
+        await l1_only_cache.set("b", 2)
+
+        message = b"peer|k|sentrix:a\nsentrix:b"
+        l1_only_cache._apply_invalidation(message)
+
+        assert len(l1_only_cache.l1) == 0
+
+    @pytest.mark.asyncio
+    async def test_own_messages_are_ignored(self, l1_only_cache):
+        await l1_only_cache.set("a", 1)
+
+        l1_only_cache._apply_invalidation(l1_only_cache._invalidation_message("k", "sentrix:a"))
+
+        assert await l1_only_cache.get("a") == 1
+
+    @pytest.mark.asyncio
+    async def test_pattern_and_clear_messages(self, l1_only_cache):
+        await l1_only_cache.set("user:1", 1)
+        await l1_only_cache.set("analysis:1", 2)
+
+        l1_only_cache._apply_invalidation(b"peer|p|sentrix:user:*")
+        assert await l1_only_cache.get("user:1") is None
+        assert await l1_only_cache.get("analysis:1") == 2
+
+        l1_only_cache._apply_invalidation(b"peer|*|")
+        assert len(l1_only_cache.l1) == 0
+
+
+class TestTagInvalidation:
+    """Tests for tag registration and invalidation"""
+
+    @pytest.mark.asyncio
+    async def test_invalidate_tags(self, l1_only_cache):
+        await l1_only_cache.set("heatmap:all", [1], tags=["heatmap"])
+        await l1_only_cache.set_many({"u1": 1, "u2": 2}, tags=["user:1"])
+        await l1_only_cache.set("other", 3)
+
+        assert await l1_only_cache.invalidate_tags("heatmap", "user:1") == 3
+        assert await l1_only_cache.get("heatmap:all") is None
+        assert await l1_only_cache.get("other") == 3
+
+    @pytest.mark.asyncio
+    async def test_peer_tag_message(self, l1_only_cache):
+        await l1_only_cache.set("stats", 1, tags=["map-stats"])
+
+        l1_only_cache._apply_invalidation(b"peer|t|map-stats")
+
+        assert await l1_only_cache.get("stats") is None
+
+    @pytest.mark.asyncio
+    async def test_invalidating_instance_drops_l2_filled_copies(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        server = fakeredis.FakeServer()
+        writer, reader = [
+            CacheService(redis_url="redis://unused:6379/0", l1_ttl=30,
+                         redis_client=fakeredis.aioredis.FakeRedis(server=server))
+            for _ in range(2)
+        ]
+        try:
+            await writer.set("stats", {"v": 1}, tags=["map-stats"])
+            assert await reader.get("stats") == {"v": 1}  # L1 filled from L2, untagged
+
+            assert await reader.invalidate_tags("map-stats") == 1
+
+            assert await reader.get("stats") is None
+            assert await writer.get("stats") is None
+        finally:
+            for cache in (writer, reader):
+                if cache._listener_task is not None:
+                    cache._listener_task.cancel()
+
+    def test_local_round_trip_and_tags(self, l1_only_cache):
+        assert l1_only_cache.set_local("metrics", {"total": 3}, ttl=60, tags=["detection-quality"]) is True
+        assert l1_only_cache.get_local("metrics") == {"total": 3}
+
+        l1_only_cache.invalidate_tags_sync("detection-quality")
+
+        assert l1_only_cache.get_local("metrics") is None
+
+    def test_invalidate_tags_sync_outside_loop(self, l1_only_cache):
+        l1_only_cache.l1.set("sentrix:stats", b"1", ttl=60, tags=["map-stats"])
+
+        assert l1_only_cache.invalidate_tags_sync("map-stats") == 1
+
+    def test_analysis_write_tags(self):
+        assert analysis_write_tags("a1", "a2", user_id="u1") == [
+            "heatmap", "map-stats", "dashboard", "detection-quality", "analysis:a1", "analysis:a2", "user:u1"
+        ]
+
+    def test_invalidate_on_commit_waits_for_commit(self):
+        cache = MagicMock()
+        session = Session(bind=create_engine("sqlite://"))
+
+        with patch("src.cache.tags.get_cache", return_value=cache):
+            invalidate_on_commit(session, "heatmap")
+            session.rollback()
+            cache.invalidate_tags_sync.assert_not_called()
+
+            invalidate_on_commit(session, "heatmap", "analysis:1")
+            cache.invalidate_tags_sync.assert_not_called()
+            session.commit()
+
+        assert sorted(cache.invalidate_tags_sync.call_args.args) == ["analysis:1", "heatmap"]
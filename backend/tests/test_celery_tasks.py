@@ -46,6 +46,14 @@ class TestAnalysisTask:
         task_name = "src.tasks.analysis_tasks.process_image_analysis_task"
         assert task_name in celery_app.tasks
 
+    def test_video_task_is_registered(self):
+        """Test that the video analysis task is registered with Celery"""
+        from src.celery_app import celery_app
+        from src.tasks.analysis_tasks import process_video_analysis_task
+
+        assert process_video_analysis_task.name in celery_app.tasks
+        assert process_video_analysis_task.max_retries == 3
+
     def test_task_has_correct_configuration(self):
         """Test task configuration"""
         from src.tasks.analysis_tasks import process_image_analysis_task
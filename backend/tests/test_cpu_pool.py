@@ -0,0 +1,67 @@
+"""
+Tests for the bounded CPU pool
+Tests para el pool acotado de CPU
+"""
+
+import asyncio
+import hashlib
+import threading
+
+import pytest
+
+from src.utils.cpu_pool import CPUPool, CPUPoolSaturated
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_runs_and_records_stage_timing():
+    pool = CPUPool(workers=2, max_pending=0, mode="thread")
+    try:
+        result = await pool.run("hash", _sha256, b"image")
+
+        assert result == hashlib.sha256(b"image").hexdigest()
+        stages = pool.snapshot()["stages"]
+        assert stages["hash"]["count"] == 1
+        assert stages["hash"]["avg_run_ms"] >= 0
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_saturated_pool_rejects_with_retry_after():
+    pool = CPUPool(workers=1, max_pending=0, mode="thread")
+    release = threading.Event()
+    try:
+        busy = asyncio.ensure_future(pool.run("heic_decode", release.wait, 5))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(CPUPoolSaturated) as exc_info:
+            await pool.run("heic_decode", _sha256, b"image")
+
+        assert exc_info.value.status_code == 503
+        assert int(exc_info.value.headers["Retry-After"]) >= 1
+        assert pool.snapshot()["rejected"] == 1
+
+        release.set()
+        assert await busy is True
+        assert pool.snapshot()["in_flight"] == 0
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_mode():
+    pool = CPUPool(workers=1, max_pending=1, mode="process")
+    try:
+        assert await pool.run("hash", _sha256, b"image") == hashlib.sha256(b"image").hexdigest()
+    finally:
+        pool.shutdown()
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        CPUPool(mode="gpu")
@@ -0,0 +1,234 @@
+"""
+Tests for the dashboard rollups and aggregates
+Tests para los rollups y agregados del dashboard
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import insert, select, update
+
+from src.database.models.models import (
+    Analysis, AnalysisDailyRollup, Detection, DetectionDailyRollup, RollupState, UserProfile
+)
+from src.services.dashboard_service import DashboardAggregates, humanize_elapsed, percent_change
+from src.tasks.dashboard_tasks import refresh_dashboard_rollups_task
+
+USER_A = uuid.uuid4()
+USER_B = uuid.uuid4()
+TODAY = datetime.now(timezone.utc).date()
+
+
+@pytest.fixture
+def db(sqlite_tables):
+    """Analysis, detection and rollup tables with two users"""
+    session = sqlite_tables(UserProfile, Analysis, Detection, AnalysisDailyRollup, DetectionDailyRollup, RollupState)
+    session.execute(insert(UserProfile.__table__), [
+        {"id": USER_A, "email": "a@sentrix.test", "hashed_password": "x"},
+        {"id": USER_B, "email": "b@sentrix.test", "hashed_password": "x"},
+    ])
+    session.commit()
+    return session
+
+
+def _at(days_ago: int, hour: int = 12) -> datetime:
+    day = TODAY - timedelta(days=days_ago)
+    return datetime(day.year, day.month, day.day, hour, tzinfo=timezone.utc)
+
+
+def _analysis(db, user_id, created_at, risk="ALTO", gps=True, processing_ms=1000, detections=()):
+    """Insert an analysis and its detections [(risk, status, confidence, validated_at)]"""
+    analysis_id = uuid.uuid4()
+    db.execute(insert(Analysis.__table__).values(
+        id=analysis_id, user_id=user_id, image_url="u", image_filename="img.jpg",
+        has_gps_data=gps, total_detections=len(detections),
+        high_risk_count=sum(1 for d in detections if d[0] == "ALTO"),
+        risk_level=risk, processing_time_ms=processing_ms,
+        created_at=created_at, updated_at=created_at
+    ))
+    for det_risk, status, confidence, validated_at in detections:
+        db.execute(insert(Detection.__table__).values(
+            id=uuid.uuid4(), analysis_id=analysis_id, risk_level=det_risk, breeding_site_type="Charcos/Cumulo de agua",
+            validation_status=status, confidence=confidence, validated_at=validated_at, created_at=created_at
+        ))
+    db.commit()
+    return analysis_id
+
+
+@pytest.fixture
+def seeded(db):
+    _analysis(db, USER_A, _at(0), "ALTO", detections=[
+        ("ALTO", "validated_positive", 0.9, _at(0, 13)),
+        ("MEDIO", "pending_validation", 0.5, None),
+    ])
+    _analysis(db, USER_A, _at(40), "MEDIO", gps=False, processing_ms=3000, detections=[
+        ("ALTO", "validated_negative", 0.4, _at(1)),
+    ])
+    _analysis(db, USER_B, _at(70), "BAJO", processing_ms=None, detections=[
+        ("BAJO", "validated_positive", 0.8, _at(2)),
+    ])
+    return db
+
+
+def _results(aggregates):
+    return (
+        aggregates.statistics(),
+        aggregates.statistics(user_id=USER_A),
+        aggregates.risk_distribution(),
+        aggregates.monthly_analyses(months=4),
+        aggregates.quality_metrics(),
+        aggregates.quality_metrics(user_id=USER_B),
+    )
+
+
+class TestRollupRefresh:
+    """Test that rollups plus the live tail match the base tables"""
+
+    def test_full_refresh_matches_live(self, seeded):
+        aggregates = DashboardAggregates(seeded)
+        live = _results(aggregates)
+
+        result = aggregates.refresh_rollups()
+
+        assert result["full"] is True
+        assert seeded.scalar(select(AnalysisDailyRollup.analyses_count).where(
+            AnalysisDailyRollup.user_id == USER_B
+        )) == 1
+        assert _results(aggregates) == live
+
+    def test_tail_counts_rows_after_watermark(self, seeded):
+        aggregates = DashboardAggregates(seeded)
+        aggregates.refresh_rollups()
+
+        _analysis(seeded, USER_B, datetime.now(timezone.utc) + timedelta(seconds=1), "ALTO", detections=[
+            ("ALTO", "pending_validation", 0.7, None),
+        ])
+
+        assert aggregates.statistics()["total_analyses"] == 4
+        assert aggregates.risk_distribution()[0]["value"] == 3
+
+    def test_incremental_refresh_recomputes_touched_days(self, seeded):
+        aggregates = DashboardAggregates(seeded)
+        aggregates.refresh_rollups()
+        seeded.execute(update(RollupState.__table__).values(refreshed_through=_at(0, 14)))
+        seeded.execute(update(Detection.__table__).where(Detection.validation_status == "pending_validation").values(
+            validation_status="validated_positive", validated_at=_at(0, 15)
+        ))
+        seeded.commit()
+
+        result = aggregates.refresh_rollups()
+
+        assert result["full"] is False and result["days"] == 1
+        assert aggregates.quality_metrics()["pending_validations"] == 0
+        assert seeded.scalar(select(DetectionDailyRollup.detections_count).where(
+            DetectionDailyRollup.validation_status == "pending_validation"
+        )) is None
+
+    def test_full_refresh_drops_deleted_rows(self, seeded):
+        aggregates = DashboardAggregates(seeded)
+        aggregates.refresh_rollups()
+        seeded.execute(Detection.__table__.delete())
+        seeded.execute(Analysis.__table__.delete().where(Analysis.user_id == USER_B))
+        seeded.commit()
+
+        aggregates.refresh_rollups(full=True)
+
+        assert aggregates.statistics()["total_analyses"] == 2
+        assert aggregates.quality_metrics()["total_detections"] == 0
+
+
+class TestRefreshTask:
+    """Test dashboard cache invalidation by the refresh task"""
+
+    def _run(self, db):
+        cache = MagicMock()
+        with patch("src.database.connection.SessionLocal", return_value=db), \
+                patch("src.cache.cache_service.get_cache", return_value=cache):
+            refresh_dashboard_rollups_task()
+        return cache.invalidate_tags_sync
+
+    def test_invalidates_when_days_recomputed(self, seeded):
+        DashboardAggregates(seeded).refresh_rollups()
+        seeded.execute(update(RollupState.__table__).values(refreshed_through=_at(0, 14)))
+        seeded.execute(update(Detection.__table__).where(Detection.validation_status == "pending_validation").values(
+            validation_status="validated_positive", validated_at=_at(0, 15)
+        ))
+        seeded.commit()
+
+        self._run(seeded).assert_called_once_with("dashboard")
+
+    def test_no_invalidation_when_nothing_changed(self, seeded):
+        DashboardAggregates(seeded).refresh_rollups()
+        seeded.execute(update(RollupState.__table__).values(refreshed_through=_at(-1)))
+        seeded.commit()
+
+        self._run(seeded).assert_not_called()
+
+
+class TestAggregates:
+    """Test the values served to the dashboard"""
+
+    def test_statistics_scopes(self, seeded):
+        aggregates = DashboardAggregates(seeded)
+
+        stats = aggregates.statistics()
+        user_stats = aggregates.statistics(user_id=USER_B)
+
+        assert stats["total_analyses"] == 3
+        assert stats["high_risk_detections"] == 2
+        assert stats["monitored_locations"] == 2
+        assert stats["active_users"] == 1
+        assert user_stats["scope"] == "user"
+        assert user_stats["total_analyses"] == 1
+        assert user_stats["high_risk_detections"] == 0
+
+    def test_risk_distribution(self, seeded):
+        distribution = DashboardAggregates(seeded).risk_distribution()
+
+        assert [(d["name"], d["value"]) for d in distribution] == [
+            ("Alto", 2), ("Medio", 1), ("Bajo", 1), ("Mínimo", 0)
+        ]
+
+    def test_monthly_buckets(self, seeded):
+        series = DashboardAggregates(seeded).monthly_analyses(months=4)
+
+        assert len(series) == 4
+        assert series[-1]["period"] == TODAY.strftime("%Y-%m")
+        assert sum(month["count"] for month in series) == 3
+        assert series[-1]["count"] >= 1
+
+    def test_quality_metrics(self, seeded):
+        metrics = DashboardAggregates(seeded).quality_metrics()
+
+        assert metrics["total_detections"] == 4
+        assert metrics["pending_validations"] == 1
+        assert metrics["validated_detections"] == 75.0
+        assert metrics["precision"] == pytest.approx(66.7)
+        assert metrics["avg_confidence"] == pytest.approx(65.0)
+        assert metrics["processing_time_avg"] == 2.0
+
+    def test_recent_activity(self, seeded):
+        activity = DashboardAggregates(seeded).recent_activity(limit=3)
+
+        assert [item["type"] for item in activity] == ["validation", "analysis", "validation"]
+        assert "confirmada" in activity[0]["description"]
+        assert all(isinstance(item["timestamp"], str) for item in activity)
+
+    def test_empty_database(self, db):
+        aggregates = DashboardAggregates(db)
+
+        assert aggregates.statistics()["total_analyses"] == 0
+        assert aggregates.quality_metrics()["precision"] is None
+        assert aggregates.recent_activity() == []
+
+
+def test_helpers():
+    now = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+
+    assert percent_change(12, 10) == 20
+    assert percent_change(3, 0) == 100
+    assert humanize_elapsed(now - timedelta(minutes=5), now) == "Hace 5 minutos"
+    assert humanize_elapsed(now - timedelta(hours=1), now) == "Hace 1 hora"
+    assert humanize_elapsed(now - timedelta(days=3), now) == "Hace 3 días"
@@ -0,0 +1,185 @@
+"""
+Tests for bulk expert review of detections
+Tests para la revisión masiva de detecciones por expertos
+"""
+
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import event, insert, select
+from sqlalchemy.dialects import postgresql
+
+from src.api.v1.detections import BulkReviewDecision
+from src.core.detection_validator import DetectionValidator
+from src.database.models.models import Analysis, Detection, UserProfile
+from src.database.repositories.detection_repository import DetectionRepository, _decision_rows, _review_update
+from src.utils.temporal_validity import extend_validity_batch
+
+REVIEWER = uuid.uuid4()
+EXPIRES = datetime(2026, 1, 1, 12, 0)
+
+
+@pytest.fixture
+def db(sqlite_tables):
+    """Detection tables with one analysis"""
+    session = sqlite_tables(UserProfile, Analysis, Detection)
+    session.execute(insert(Analysis.__table__).values(id=uuid.uuid4(), image_url="u"))
+    session.commit()
+    return session
+
+
+def _detection(db, version=0, expires_at=EXPIRES, validity_days=10):
+    detection_id = uuid.uuid4()
+    db.execute(insert(Detection.__table__).values(
+        id=detection_id, analysis_id=db.scalar(select(Analysis.id)), validation_status="pending_validation",
+        expires_at=expires_at, validity_period_days=validity_days, version=version
+    ))
+    db.commit()
+    return detection_id
+
+
+def _row(db, detection_id):
+    return db.execute(select(
+        Detection.validation_status, Detection.validation_notes, Detection.validated_by, Detection.validated_at,
+        Detection.expires_at, Detection.validity_period_days, Detection.version
+    ).where(Detection.id == detection_id)).one()
+
+
+def _updates(db):
+    statements = []
+    event.listen(
+        db.get_bind(), "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement) if statement.startswith("UPDATE") else None
+    )
+    return statements
+
+
+class TestBulkReview:
+    """Test set-based review with optimistic concurrency"""
+
+    def test_validates_and_extends_in_one_update(self, db):
+        first, second = _detection(db), _detection(db, version=3)
+        updates = _updates(db)
+
+        outcomes = DetectionRepository(db).bulk_review([
+            {"detection_id": first, "expected_version": 0, "validation_status": "validated_positive",
+             "validation_notes": "Confirmado"},
+            {"detection_id": second, "expected_version": 3, "extension_days": 5},
+        ], reviewer_id=REVIEWER)
+        db.commit()
+
+        assert len(updates) == 1
+        assert [o["outcome"] for o in outcomes] == ["updated", "updated"]
+        assert [o["version"] for o in outcomes] == [1, 4]
+
+        validated = _row(db, first)
+        assert validated.validation_status == "validated_positive"
+        assert validated.validation_notes == "Confirmado"
+        assert validated.validated_by == REVIEWER
+        assert validated.validated_at is not None
+        assert validated.expires_at == EXPIRES
+
+        extended = _row(db, second)
+        assert extended.expires_at == EXPIRES + timedelta(days=5)
+        assert extended.validity_period_days == 15
+        assert extended.validation_status == "pending_validation"
+        assert extended.validated_by is None
+
+    def test_per_id_outcomes(self, db):
+        stale, no_expiry, ok = _detection(db, version=2), _detection(db, expires_at=None), _detection(db)
+        missing = uuid.uuid4()
+
+        outcomes = DetectionRepository(db).bulk_review([
+            {"detection_id": stale, "expected_version": 1, "validation_status": "validated_negative"},
+            {"detection_id": missing, "expected_version": 0, "validation_status": "validated_negative"},
+            {"detection_id": no_expiry, "expected_version": 0, "extension_days": 3},
+            {"detection_id": ok, "expected_version": 0, "validation_status": "validated_negative"},
+            {"detection_id": ok, "expected_version": 0, "validation_status": "validated_positive"},
+        ], reviewer_id=REVIEWER)
+        db.commit()
+
+        assert [o["outcome"] for o in outcomes] == ["conflict", "not_found", "invalid", "updated", "invalid"]
+        assert outcomes[0]["current_version"] == 2
+        assert _row(db, stale).validation_status == "pending_validation"
+        assert _row(db, ok).validation_status == "validated_negative"
+
+    def test_string_ids(self, db):
+        detection_id = _detection(db)
+
+        outcomes = DetectionRepository(db).bulk_review([
+            {"detection_id": str(detection_id), "expected_version": 0, "validation_status": "validated_positive"},
+            {"detection_id": "not-a-uuid", "validation_status": "validated_positive"},
+        ], reviewer_id=REVIEWER)
+        db.commit()
+
+        assert (outcomes[0]["outcome"], outcomes[0]["version"]) == ("updated", 1)
+        assert outcomes[1] == {"detection_id": "not-a-uuid", "outcome": "invalid", "error": "Invalid detection id"}
+        assert _row(db, detection_id).validation_status == "validated_positive"
+
+    def test_second_reviewer_gets_conflict(self, db):
+        detection_id = _detection(db)
+        repository = DetectionRepository(db)
+        decision = {"detection_id": detection_id, "expected_version": 0}
+
+        first = repository.bulk_review([{**decision, "validation_status": "validated_positive"}], REVIEWER)
+        second = repository.bulk_review([{**decision, "validation_status": "validated_negative"}], uuid.uuid4())
+        db.commit()
+
+        assert first[0]["outcome"] == "updated"
+        assert second[0] == {"detection_id": str(detection_id), "outcome": "conflict", "current_version": 1}
+        assert _row(db, detection_id).validation_status == "validated_positive"
+
+    def test_postgresql_casts_every_decision_column(self):
+        source = _decision_rows([(uuid.uuid4(), 0, "validated_positive", None, None, None)], "postgresql")
+        stmt = _review_update(Detection.__table__, source, REVIEWER, EXPIRES)
+        sql = str(stmt.compile(dialect=postgresql.psycopg2.dialect()))
+
+        assert "VALUES" in sql and "decision_values (id, read_version" in sql
+        for expected in (
+            "CAST(decision_values.id AS UUID)",
+            "CAST(decision_values.read_version AS INTEGER)",
+            "CAST(decision_values.validation_status AS validation_status_enum)",
+            "CAST(decision_values.validation_notes AS TEXT)",
+            "CAST(decision_values.expires_at AS TIMESTAMP WITH TIME ZONE)",
+            "CAST(decision_values.validity_period_days AS INTEGER)",
+        ):
+            assert expected in sql
+
+
+class TestBatchValidate:
+    """Test the validator batch path on top of bulk_review"""
+
+    def test_batch_validate(self, db):
+        detection_id = _detection(db)
+
+        @contextmanager
+        def db_context():
+            yield db
+            db.commit()
+
+        with patch("src.core.detection_validator.get_db_context", db_context):
+            results = DetectionValidator().batch_validate_detections([
+                {"detection_id": str(detection_id), "is_valid": False, "notes": "Falso positivo"},
+                {"detection_id": uuid.uuid4(), "is_valid": True},
+                {"is_valid": True},
+            ], expert_id=REVIEWER)
+
+        assert results["validated"] == 1
+        assert results["failed"] == 2
+        assert results["errors"][1]["error"] == "Detection not found"
+        assert _row(db, detection_id).validation_status == "validated_negative"
+
+
+def test_decision_requires_an_action():
+    with pytest.raises(ValidationError):
+        BulkReviewDecision(detection_id=uuid.uuid4(), expected_version=0)
+
+
+def test_extend_validity_batch():
+    assert extend_validity_batch([EXPIRES, None, EXPIRES], [2, 3, None]) == [
+        EXPIRES + timedelta(days=2), None, EXPIRES
+    ]
@@ -0,0 +1,154 @@
+"""
+Tests for the detection validator quality metrics
+Tests para las métricas de calidad del validador de detecciones
+"""
+
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, event, insert, literal, select
+from sqlalchemy.dialects import postgresql
+
+from src.cache.cache_service import CacheService
+from src.core.detection_validator import DetectionValidator, confidence_bucket
+from src.database.models.models import Analysis, Detection, UserProfile
+
+EXPERT = uuid.uuid4()
+
+
+@pytest.fixture
+def db(sqlite_tables):
+    """Detections of one analysis across classes, confidences and verdicts"""
+    session = sqlite_tables(UserProfile, Analysis, Detection)
+
+    analysis_id = uuid.uuid4()
+    session.execute(insert(Analysis.__table__).values(id=analysis_id, image_url="u", risk_level="ALTO"))
+    now = datetime.now()
+    rows = [
+        # (class, confidence, status, validated_at)
+        ("Basura", 0.45, "pending_validation", None),
+        ("Basura", 0.55, "validated_positive", now),
+        ("Basura", 0.75, "validated_negative", now),
+        ("Huecos", 0.75, "validated_positive", now - timedelta(days=1)),
+        ("Huecos", 0.95, "validated_positive", now - timedelta(days=90)),
+        ("Huecos", None, "pending_validation", None),
+    ]
+    session.execute(insert(Detection.__table__), [
+        {
+            "id": uuid.uuid4(), "analysis_id": analysis_id, "class_name": class_name, "confidence": confidence,
+            "validation_status": status, "validated_at": validated_at,
+            "validated_by": EXPERT if validated_at else None
+        }
+        for class_name, confidence, status, validated_at in rows
+    ])
+    session.commit()
+    return session
+
+
+@pytest.fixture
+def validator(db):
+    """Validator reading the SQLite session through an L1-only cache"""
+    @contextmanager
+    def db_context():
+        yield db
+
+    with patch("src.cache.cache_service.REDIS_AVAILABLE", False):
+        cache = CacheService(redis_url="redis://unused:6379/0", l1_max_entries=10, l1_ttl=30)
+    with patch("src.core.detection_validator.get_db_context", db_context), \
+            patch("src.core.detection_validator.get_cache", return_value=cache):
+        yield DetectionValidator(), cache
+
+
+def _count_selects(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+class TestQualityMetrics:
+    """Test the single-pass quality metrics"""
+
+    def test_metrics(self, db, validator):
+        detection_validator, _ = validator
+        statements = _count_selects(db)
+
+        metrics = detection_validator.get_quality_metrics()
+
+        assert len(statements) == 2  # detections pass + risk distribution
+        assert metrics["total_detections"] == 6
+        assert metrics["validated_detections"] == 4
+        assert metrics["validation_coverage"] == pytest.approx(4 / 6)
+        assert metrics["system_accuracy"] == pytest.approx(3 / 4)
+        assert metrics["confidence_distribution"] == {"0.5-0.7": 1, "0.7-0.9": 2, "0.9-1": 1}
+        assert metrics["risk_distribution"] == {"ALTO": 1}
+
+    def test_custom_edges(self, validator):
+        detection_validator, _ = validator
+
+        metrics = detection_validator.get_quality_metrics(confidence_edges=[0.0, 0.5, 1.0])
+
+        assert metrics["confidence_distribution"] == {"0-0.5": 1, "0.5-1": 4}
+
+    def test_cached_until_tag_invalidated(self, db, validator):
+        detection_validator, cache = validator
+        detection_validator.get_quality_metrics()
+        statements = _count_selects(db)
+
+        detection_validator.get_quality_metrics()
+        assert statements == []
+
+        cache.invalidate_tags_sync("detection-quality")
+        detection_validator.get_quality_metrics()
+        assert len(statements) == 2
+
+
+class TestValidationStatistics:
+    """Test validation statistics from one grouped query"""
+
+    def test_statistics(self, db, validator):
+        detection_validator, _ = validator
+        statements = _count_selects(db)
+
+        stats = detection_validator.get_validation_statistics(days=30)
+
+        assert len(statements) == 2  # per class + expert activity
+        assert stats["total_validations"] == 3
+        assert stats["approved"] == 2
+        assert stats["rejected"] == 1
+        assert stats["approval_rate"] == pytest.approx(2 / 3)
+        by_class = {row["class_name"]: row for row in stats["class_statistics"]}
+        assert by_class["Basura"]["validations"] == 2
+        assert by_class["Basura"]["avg_confidence"] == pytest.approx(0.65)
+        assert stats["expert_activity"] == [{"expert_id": str(EXPERT), "validations": 3}]
+
+    def test_expert_filter_skips_activity(self, db, validator):
+        detection_validator, _ = validator
+        statements = _count_selects(db)
+
+        stats = detection_validator.get_validation_statistics(expert_id=EXPERT, days=365)
+
+        assert len(statements) == 1
+        assert stats["total_validations"] == 4
+        assert stats["expert_activity"] == []
+
+
+class TestConfidenceBucket:
+    """Test the portable width_bucket equivalent"""
+
+    @pytest.mark.parametrize("value,expected", [(0.1, 0), (0.5, 1), (0.69, 1), (0.7, 2), (0.99, 3), (1.0, 4), (None, None)])
+    def test_case_matches_width_bucket(self, value, expected):
+        engine = create_engine("sqlite://")
+        with engine.connect() as connection:
+            bucket = connection.scalar(select(confidence_bucket(literal(value), [0.5, 0.7, 0.9, 1.0], "sqlite")))
+
+        assert bucket == expected
+
+    def test_postgresql_uses_width_bucket(self):
+        sql = str(select(confidence_bucket(Detection.confidence, [0.5, 1.0], "postgresql")).compile(
+            dialect=postgresql.dialect()
+        ))
+
+        assert "width_bucket" in sql
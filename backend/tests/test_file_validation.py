@@ -8,6 +8,7 @@ Tests security features:
 """
 
 import pytest
+import hashlib
 import io
 from fastapi import UploadFile, HTTPException
 from unittest.mock import patch, MagicMock
@@ -17,6 +18,7 @@ from src.utils.file_validation import (
     validate_file_extension,
     validate_file_content,
     validate_uploaded_image,
+    validate_upload_stream,
     is_image_file,
     get_safe_temp_filename
 )
@@ -209,6 +211,41 @@ class TestValidateFileContent:
             assert "Could not determine file type" in exc_info.value.detail
 
 
+class TestValidateUploadStream:
+    """Tests for single-pass streaming validation"""
+
+    @pytest.mark.asyncio
+    async def test_hashes_and_sniffs_header_only(self):
+        """Test that hashes cover the content and magic only sees the header"""
+        content = b"\xff\xd8\xff" + b"x" * (3 * 1024 * 1024)
+        file = UploadFile(filename="big.jpg", file=io.BytesIO(content))
+
+        with patch('src.utils.file_validation.magic.from_buffer', return_value='image/jpeg') as mock_magic:
+            upload = await validate_upload_stream(file)
+
+        assert len(mock_magic.call_args[0][0]) == 8 * 1024
+        assert upload.size == len(content) and upload.mime_type == 'image/jpeg'
+        assert upload.content_signature() == {
+            'sha256': hashlib.sha256(content).hexdigest(),
+            'md5': hashlib.md5(content).hexdigest(),
+            'size_bytes': len(content)
+        }
+        assert upload.file is file.file  # The upload's own buffer, no copy
+        assert upload.read() == content
+
+    @pytest.mark.asyncio
+    async def test_declared_size_rejected_before_reading(self):
+        """Test rejecting an oversized multipart part without reading it"""
+        source = MagicMock()
+        file = UploadFile(filename="huge.jpg", file=source, size=60 * 1024 * 1024)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await validate_upload_stream(file, max_size=50 * 1024 * 1024)
+
+        assert exc_info.value.status_code == 413
+        source.read.assert_not_called()
+
+
 class TestValidateUploadedImage:
     """Tests for complete image validation"""
 
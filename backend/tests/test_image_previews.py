@@ -0,0 +1,107 @@
+"""
+Tests for the preview pyramid generated at ingest
+Tests para la pirámide de previsualizaciones
+"""
+
+import io
+from unittest.mock import MagicMock
+
+import pytest
+from PIL import Image
+
+from src.services.analysis_service import AnalysisService
+from src.utils.image_previews import build_preview_pyramid, preview_filename
+
+
+def _jpeg(width, height, orientation=None):
+    buffer = io.BytesIO()
+    image = Image.new("RGB", (width, height), (30, 120, 200))
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    image.save(buffer, format="JPEG", quality=90, exif=exif)
+    return buffer.getvalue()
+
+
+def _size(data):
+    return Image.open(io.BytesIO(data)).size
+
+
+class TestBuildPreviewPyramid:
+    """Test sizes, formats and orientation of the levels"""
+
+    def test_levels_fit_longest_side(self):
+        previews = build_preview_pyramid(_jpeg(4000, 3000), sizes=(256, 768, 1600))
+
+        assert sorted(previews) == [256, 768, 1600]
+        assert _size(previews[1600]) == (1600, 1200)
+        assert _size(previews[768]) == (768, 576)
+        assert _size(previews[256]) == (256, 192)
+        assert Image.open(io.BytesIO(previews[256])).format == "WEBP"
+
+    def test_no_upscaling(self):
+        previews = build_preview_pyramid(_jpeg(1000, 500), sizes=(256, 768, 1600))
+
+        assert sorted(previews) == [256, 768]
+
+    def test_jpeg_format_and_exif_orientation(self):
+        # Orientation 6: stored landscape, displayed portrait
+        previews = build_preview_pyramid(_jpeg(800, 400, orientation=6), sizes=(256,), fmt="jpeg")
+
+        assert Image.open(io.BytesIO(previews[256])).format == "JPEG"
+        assert _size(previews[256]) == (128, 256)
+
+    def test_png_with_alpha(self):
+        buffer = io.BytesIO()
+        Image.new("RGBA", (600, 600), (0, 0, 0, 0)).save(buffer, format="PNG")
+
+        previews = build_preview_pyramid(buffer.getvalue(), sizes=(256,), fmt="jpeg")
+
+        assert _size(previews[256]) == (256, 256)
+
+    def test_empty_sizes(self):
+        assert build_preview_pyramid(_jpeg(100, 100), sizes=()) == {}
+
+
+def test_preview_filename():
+    assert preview_filename("SENTRIX_20250101_120000_IMG.jpg", 256) == "SENTRIX_20250101_120000_IMG_thumb_256.webp"
+    assert preview_filename("SENTRIX_PROC_IMG.jpg", 768, "jpeg") == "SENTRIX_PROC_IMG_thumb_768.jpg"
+
+
+@pytest.mark.asyncio
+async def test_store_image_previews_uploads_and_records():
+    service = AnalysisService()
+    service.supabase = MagicMock()
+    service.supabase.upload_previews.side_effect = lambda previews, bucket_name, content_type: {
+        "status": "success",
+        "urls": {name: f"https://cdn/{bucket_name}/previews/{name}" for name in previews}
+    }
+
+    previews = await service._store_image_previews(
+        "analysis-1",
+        original_data=_jpeg(2000, 1000),
+        processed_data=None,
+        filename_variations={"standardized": "SENTRIX_IMG.jpg", "processed": "SENTRIX_PROC_IMG.jpg"}
+    )
+
+    assert list(previews) == ["original"]
+    assert sorted(previews["original"], key=int) == ["256", "768", "1600"]
+    assert previews["original"]["256"].endswith("/previews/SENTRIX_IMG_thumb_256.webp")
+    service.supabase.client.table.return_value.update.assert_called_once_with({"image_previews": previews})
+
+
+@pytest.mark.asyncio
+async def test_store_image_previews_failure_is_not_fatal():
+    service = AnalysisService()
+    service.supabase = MagicMock()
+    service.supabase.upload_previews.return_value = {"status": "error", "message": "storage down", "urls": {}}
+
+    previews = await service._store_image_previews(
+        "analysis-1",
+        original_data=b"not an image",
+        processed_data=_jpeg(300, 300),
+        filename_variations={"standardized": "SENTRIX_IMG.jpg", "processed": "SENTRIX_PROC_IMG.jpg"}
+    )
+
+    assert previews is None
+    service.supabase.client.table.assert_not_called()
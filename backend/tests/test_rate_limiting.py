@@ -6,6 +6,7 @@ Tests security features:
 - Rate limiting on public endpoints (3 req/min)
 - Rate limit headers
 - Rate limit reset
+- Per-user, per-org and per-endpoint budgets
 """
 
 import pytest
@@ -14,8 +15,12 @@ from fastapi.testclient import TestClient
 from unittest.mock import Mock, patch, MagicMock
 import io
 
+from fastapi import FastAPI, Request
+from sentrix_shared.rate_limiting import RateLimiter
+
 from app import app
 from src.database.models.models import UserProfile
+from src.middleware.rate_limit import EndpointRateLimiter, setup_rate_limiting
 
 
 # Test client
@@ -398,3 +403,64 @@ class TestRateLimitingWithFileValidation:
         # validate_uploaded_image should NOT have been called (rate limit checked first)
         # Note: In some cases it might be called, depends on middleware order
         # The important thing is that we get 429 status
+
+
+# ============================================
+# Test Budgets (per user, per org, per endpoint)
+# ============================================
+
+def _limited_app(user=None, **limits) -> TestClient:
+    """Minimal app with an enabled, in-process limiter"""
+    test_app = FastAPI()
+    test_limiter = EndpointRateLimiter(RateLimiter(redis_url=None))
+    setup_rate_limiting(test_app)
+
+    @test_app.get("/items/{item_id}")
+    @test_limiter.limit("2/minute", **limits)
+    async def get_item(request: Request, item_id: int):
+        return {"item_id": item_id}
+
+    @test_app.middleware("http")
+    async def authenticate(request: Request, call_next):
+        if user is not None:
+            request.state.user = user
+        return await call_next(request)
+
+    return TestClient(test_app)
+
+
+class TestRateLimitBudgets:
+    """Tests for the distributed limiter decorator"""
+
+    def test_429_carries_retry_after(self):
+        test_client = _limited_app()
+
+        assert test_client.get("/items/1").status_code == 200
+        assert test_client.get("/items/2").status_code == 200
+        response = test_client.get("/items/3")
+
+        assert response.status_code == 429
+        assert "rate limit" in response.text.lower()
+        assert int(response.headers["Retry-After"]) >= 1
+        assert response.headers["X-RateLimit-Remaining"] == "0"
+
+    def test_success_responses_carry_headers(self):
+        response = _limited_app().get("/items/1")
+
+        assert response.headers["X-RateLimit-Limit"] == "2"
+        assert response.headers["X-RateLimit-Remaining"] == "1"
+
+    def test_org_budget_is_shared(self):
+        member = Mock(spec=UserProfile)
+        member.id = "user-1"
+        member.organization = "acme"
+        test_client = _limited_app(user=member, org_rate="1/minute")
+
+        assert test_client.get("/items/1").status_code == 200
+        assert test_client.get("/items/1").status_code == 429
+
+    def test_endpoint_budget_is_shared(self):
+        test_client = _limited_app(endpoint_rate="1/minute")
+
+        assert test_client.get("/items/1").status_code == 200
+        assert test_client.get("/items/2").status_code == 429
@@ -0,0 +1,157 @@
+"""
+Tests for report jobs and the artifact store
+Tests para los trabajos de reportes y el almacén de artefactos
+"""
+
+import os
+import time
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.utils import report_artifacts
+from src.utils.report_artifacts import ReportArtifactStore, canonical_report_filters, report_fingerprint
+
+
+class TestFingerprint:
+    """Test that equivalent requests share a fingerprint"""
+
+    def test_canonical_filters(self):
+        filters = {"date_from": "2025-01-01", "date_to": None, "risk_level": "ALTO", "has_gps": False, "limit": "10"}
+
+        assert canonical_report_filters(filters) == {
+            "date_from": "2025-01-01T00:00:00", "risk_level": "ALTO", "limit": 10
+        }
+
+    def test_equivalent_requests_match(self):
+        a = report_fingerprint("summary", "csv", {"risk_level": "ALTO", "date_from": "2025-01-01"}, "5:a:b")
+        b = report_fingerprint("summary", "csv", {"date_from": "2025-01-01T00:00:00", "has_gps": None, "risk_level": "ALTO"}, "5:a:b")
+
+        assert a == b and len(a) == 64
+
+    def test_data_and_user_change_fingerprint(self):
+        base = report_fingerprint("summary", "pdf", {}, "5:a:b", user_id="u1")
+
+        assert report_fingerprint("summary", "pdf", {}, "6:a:c", user_id="u1") != base
+        assert report_fingerprint("summary", "pdf", {}, "5:a:b", user_id="u2") != base
+        assert report_fingerprint("summary", "csv", {}, "5:a:b") != base
+
+    def test_invalid_date(self):
+        with pytest.raises(ValueError):
+            canonical_report_filters({"date_from": "yesterday"})
+
+
+def _put(store, fingerprint, size, fmt="csv"):
+    temp_path = store.temp_path(fingerprint)
+    temp_path.write_bytes(b"x" * size)
+    return store.commit(temp_path, fingerprint, fmt)
+
+
+class TestArtifactStore:
+    """Test lookup, LRU eviction and generation claims"""
+
+    def test_commit_and_find(self, tmp_path):
+        store = ReportArtifactStore(str(tmp_path))
+
+        path = _put(store, "a" * 64, 10, "pdf")
+
+        assert store.find("a" * 64) == path and path.suffix == ".pdf"
+        assert store.find("b" * 64) is None
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_least_recently_used_evicted(self, tmp_path):
+        store = ReportArtifactStore(str(tmp_path), max_bytes=35)
+        for idx, name in enumerate("abc"):
+            path = _put(store, name * 64, 10)
+            os.utime(path, (time.time() - 100 + idx, time.time() - 100 + idx))
+
+        # Reading "a" makes "b" the least recently used
+        store.find("a" * 64)
+        _put(store, "d" * 64, 10)
+
+        assert store.find("b" * 64) is None
+        assert store.find("a" * 64) and store.find("c" * 64) and store.find("d" * 64)
+        assert store.snapshot()["bytes"] == 30
+
+    def test_max_files(self, tmp_path):
+        store = ReportArtifactStore(str(tmp_path), max_files=2)
+        for idx, name in enumerate("abc"):
+            path = _put(store, name * 64, 1)
+            os.utime(path, (time.time() - 100 + idx,) * 2)
+
+        assert store.snapshot()["files"] == 2
+        assert store.find("a" * 64) is None
+
+    def test_claim(self, tmp_path):
+        store = ReportArtifactStore(str(tmp_path))
+
+        assert store.claim("a" * 64, ttl=60)
+        assert not store.claim("a" * 64, ttl=60)
+        # Stale claim (crashed worker) is taken over
+        assert store.claim("a" * 64, ttl=0)
+        store.release("a" * 64)
+        assert store.claim("a" * 64, ttl=60)
+
+
+@pytest.fixture
+def report_client(tmp_path, monkeypatch):
+    """Reports router with a temporary store and a fake Celery task"""
+    from src.api.v1 import reports
+    from src.database.connection import get_db
+    from src.services.report_service import ReportService
+    from src.tasks import report_tasks
+    from src.utils.auth import get_current_active_user
+
+    store = ReportArtifactStore(str(tmp_path))
+    monkeypatch.setattr(report_artifacts, "_report_store", store)
+    monkeypatch.setattr(ReportService, "data_watermark", lambda self, filters: "5:2025-01-01:2025-01-02")
+    apply_async = MagicMock()
+    monkeypatch.setattr(report_tasks.generate_report_task, "apply_async", apply_async)
+
+    app = FastAPI()
+    app.include_router(reports.router, prefix="/api/v1/reports")
+    app.dependency_overrides[get_current_active_user] = lambda: SimpleNamespace(id=uuid.uuid4())
+    app.dependency_overrides[get_db] = lambda: MagicMock()
+
+    return TestClient(app), store, apply_async
+
+
+def test_identical_requests_share_one_job_and_cached_result(report_client):
+    client, store, apply_async = report_client
+    config = {"type": "detailed", "format": "csv", "filters": {"risk_level": "ALTO"}}
+
+    first = client.post("/api/v1/reports/generate", json=config).json()
+    second = client.post("/api/v1/reports/generate", json=config).json()
+
+    assert first["status"] == second["status"] == "pending"
+    assert first["job_id"] == second["job_id"]
+    assert apply_async.call_count == 1
+    assert apply_async.call_args.kwargs["task_id"] == first["job_id"]
+    assert first["download_url"] == f"/api/v1/reports/jobs/{first['job_id']}/download"
+
+    # The worker stores the report
+    _put(store, first["job_id"], 3)
+    store.release(first["job_id"])
+
+    repeat = client.post("/api/v1/reports/generate", json=config).json()
+    assert repeat["status"] == "completed" and repeat["cached"]
+    assert apply_async.call_count == 1
+
+    status = client.get(repeat["status_url"]).json()
+    assert status["status"] == "completed" and status["size_bytes"] == 3
+
+    download = client.get(repeat["download_url"])
+    assert download.status_code == 200
+    assert download.content == b"xxx"
+    assert download.headers["content-type"].startswith("text/csv")
+
+
+def test_invalid_job_id(report_client):
+    client, _, _ = report_client
+
+    assert client.get("/api/v1/reports/jobs/..%2F..%2Fetc/download").status_code == 404
+    assert client.get(f"/api/v1/reports/jobs/{'a' * 64}/download").status_code == 404
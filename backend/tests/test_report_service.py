@@ -6,8 +6,9 @@ import pytest
 
 pytestmark = pytest.mark.database
 import io
+import uuid
 from datetime import datetime, timedelta
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, insert
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -86,6 +87,32 @@ def test_analyses(test_db, test_user):
     db.close()
 
 
+@pytest.fixture
+def report_db(sqlite_tables):
+    """SQLite copies of the report tables with a user and five analyses"""
+    db = sqlite_tables(UserProfile, Analysis)
+    user_id = uuid.uuid4()
+    db.execute(insert(UserProfile.__table__).values(
+        id=user_id, email="test@example.com", hashed_password="x", display_name="Test User"
+    ))
+    for i in range(5):
+        db.execute(insert(Analysis.__table__).values(
+            id=uuid.uuid4(),
+            user_id=user_id,
+            image_url=f"https://example.com/image{i}.jpg",
+            image_filename=f"test_image_{i}.jpg",
+            total_detections=3 + i,
+            high_risk_count=i,
+            medium_risk_count=1,
+            risk_level="ALTO" if i >= 3 else "MEDIO",
+            confidence_threshold=0.7,
+            has_gps_data=i % 2 == 0,
+            created_at=datetime.now() - timedelta(days=i)
+        ))
+    db.commit()
+    return db, user_id
+
+
 class TestReportService:
     """Test report generation service"""
 
@@ -266,5 +293,60 @@ class TestReportService:
         db.close()
 
 
+class TestReportStreaming:
+    """Test streamed exports (server-side cursor, chunked output)"""
+
+    def test_csv_streamed_in_chunks(self, report_db, monkeypatch):
+        """Test detailed CSV is emitted in chunks with progress"""
+        import src.services.report_service as report_module
+        monkeypatch.setattr(report_module, "CSV_CHUNK_ROWS", 2)
+        monkeypatch.setattr(report_module, "STREAM_BATCH_SIZE", 2)
+        db, _ = report_db
+        service = ReportService(db)
+        progress = []
+
+        chunks = list(service.iter_csv_report(
+            report_type="detailed",
+            filters={},
+            progress=lambda rows, total: progress.append((rows, total))
+        ))
+
+        # Header + 5 rows in chunks of 2 rows
+        assert len(chunks) == 3
+        lines = ''.join(chunks).strip().split('\n')
+        assert len(lines) == 6
+        assert 'test_image_0.jpg' in lines[1]  # Newest first
+        assert progress == [(2, 5), (4, 5), (5, 5)]
+
+    def test_limit_filter(self, report_db):
+        """Test the optional row cap of detailed exports"""
+        db, _ = report_db
+        service = ReportService(db)
+
+        buffer = service.generate_csv_report(
+            report_type="detailed",
+            filters={'limit': 2}
+        )
+
+        assert len(buffer.getvalue().strip().split('\n')) == 3
+
+    def test_pdf_written_to_output(self, report_db):
+        """Test PDF generation into a caller-provided file"""
+        import tempfile
+        db, user_id = report_db
+        service = ReportService(db)
+
+        with tempfile.SpooledTemporaryFile() as output:
+            result = service.generate_pdf_report(
+                report_type="detailed",
+                filters={},
+                user_id=user_id,
+                output=output
+            )
+
+            assert result is output
+            assert output.read(4) == b'%PDF'
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
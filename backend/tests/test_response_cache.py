@@ -0,0 +1,186 @@
+"""
+Tests for the HTTP response cache middleware
+
+Covers:
+- Raw-bytes storage and replay (HIT/MISS)
+- ETag / If-None-Match handling (304)
+- Per-user key partitioning
+- Single-flight coalescing of concurrent misses
+"""
+
+import asyncio
+import pytest
+import httpx
+from unittest.mock import patch
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from src.cache.middleware import CacheMiddleware, _encode_entry, _decode_entry, _etag_matches
+
+
+class FakeAsyncCache:
+    """In-memory stand-in for the multi-tier CacheService"""
+
+    def __init__(self):
+        self.enabled = True
+        self.store = {}
+        self.tags = {}
+        self.locks = {}
+
+    async def get_bytes(self, key):
+        return self.store.get(key)
+
+    async def set_bytes(self, key, value, ttl=None, tags=None):
+        self.store[key] = value
+        self.tags[key] = list(tags or [])
+        return True
+
+    async def acquire_lock(self, key, ttl=10.0):
+        if key in self.locks:
+            return None
+        self.locks[key] = "token"
+        return "token"
+
+    async def release_lock(self, key, token):
+        return self.locks.pop(key, None) == token
+
+
+def _build_app(calls: list, delay: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        CacheMiddleware,
+        include_paths=["/stats", "/mine"],
+        vary_by_user_paths=["/mine"],
+        path_tags={"/stats": ["map-stats"]},
+    )
+
+    @app.get("/stats")
+    async def stats():
+        calls.append("stats")
+        await asyncio.sleep(delay)
+        return {"total": len(calls)}
+
+    @app.get("/mine")
+    async def mine(request: Request):
+        calls.append("mine")
+        return {"auth": request.headers.get("Authorization")}
+
+    @app.get("/uncached")
+    async def uncached():
+        calls.append("uncached")
+        return JSONResponse({"ok": True})
+
+    return app
+
+
+@pytest.fixture
+def fake_cache():
+    cache = FakeAsyncCache()
+    with patch("src.cache.middleware.get_cache", return_value=cache):
+        yield cache
+
+
+def _client(app: FastAPI) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+class TestEntryEncoding:
+    """Tests for the raw cache entry framing"""
+
+    def test_round_trip_preserves_bytes(self):
+        body = b'{"a":1}\n\x00\xff'
+        raw = _encode_entry(200, {"content-type": "application/json"}, body)
+        assert _decode_entry(raw) == (200, {"content-type": "application/json"}, body)
+
+    def test_malformed_entry_is_ignored(self):
+        assert _decode_entry(b"not-an-entry") is None
+
+    def test_etag_matching(self):
+        assert _etag_matches('"abc"', '"abc"')
+        assert _etag_matches('W/"abc", "def"', '"abc"')
+        assert _etag_matches("*", '"abc"')
+        assert not _etag_matches('"xyz"', '"abc"')
+        assert not _etag_matches(None, '"abc"')
+
+
+class TestCacheMiddleware:
+    """Tests for CacheMiddleware request handling"""
+
+    @pytest.mark.asyncio
+    async def test_miss_then_hit(self, fake_cache):
+        calls = []
+        async with _client(_build_app(calls)) as client:
+            first = await client.get("/stats")
+            second = await client.get("/stats")
+
+        assert first.headers["x-cache"] == "MISS"
+        assert second.headers["x-cache"] == "HIT"
+        assert first.content == second.content
+        assert calls == ["stats"]
+
+    @pytest.mark.asyncio
+    async def test_entries_are_tagged_by_path(self, fake_cache):
+        calls = []
+        async with _client(_build_app(calls)) as client:
+            await client.get("/stats")
+            await client.get("/mine", headers={"Authorization": "Bearer alice"})
+
+        assert sorted(fake_cache.tags.values()) == [[], ["map-stats"]]
+
+    @pytest.mark.asyncio
+    async def test_if_none_match_returns_304(self, fake_cache):
+        calls = []
+        async with _client(_build_app(calls)) as client:
+            first = await client.get("/stats")
+            etag = first.headers["etag"]
+            second = await client.get("/stats", headers={"If-None-Match": etag})
+
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == etag
+
+    @pytest.mark.asyncio
+    async def test_user_scoped_paths_do_not_leak(self, fake_cache):
+        calls = []
+        async with _client(_build_app(calls)) as client:
+            alice = await client.get("/mine", headers={"Authorization": "Bearer alice"})
+            bob = await client.get("/mine", headers={"Authorization": "Bearer bob"})
+            alice_again = await client.get("/mine", headers={"Authorization": "Bearer alice"})
+
+        assert alice.json()["auth"] == "Bearer alice"
+        assert bob.json()["auth"] == "Bearer bob"
+        assert alice_again.headers["x-cache"] == "HIT"
+        assert alice.headers["vary"] == "Authorization"
+        assert calls == ["mine", "mine"]
+
+    @pytest.mark.asyncio
+    async def test_paths_outside_allow_list_are_not_cached(self, fake_cache):
+        calls = []
+        async with _client(_build_app(calls)) as client:
+            await client.get("/uncached")
+            await client.get("/uncached")
+
+        assert calls == ["uncached", "uncached"]
+        assert fake_cache.store == {}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_are_coalesced(self, fake_cache):
+        calls = []
+        async with _client(_build_app(calls, delay=0.05)) as client:
+            responses = await asyncio.gather(*[client.get("/stats") for _ in range(20)])
+
+        assert calls == ["stats"]
+        assert all(r.status_code == 200 for r in responses)
+        assert len({r.content for r in responses}) == 1
+
+    @pytest.mark.asyncio
+    async def test_works_without_redis(self):
+        calls = []
+        with patch("src.cache.middleware.get_cache", return_value=None):
+            async with _client(_build_app(calls)) as client:
+                first = await client.get("/stats")
+                second = await client.get("/stats")
+
+        assert first.status_code == 200
+        assert second.headers["x-cache"] == "MISS"
+        assert calls == ["stats", "stats"]
@@ -4,7 +4,7 @@ Pruebas exhaustivas para la integración YOLO-Backend con nuevo procesamiento de
 """
 
 import unittest
-from unittest.mock import Mock, patch, AsyncMock
+from unittest.mock import ANY, Mock, patch, AsyncMock
 import tempfile
 import os
 from io import BytesIO
@@ -385,7 +385,8 @@ class TestCompleteImageProcessingWorkflow(unittest.TestCase):
                 image_data=self.test_image_data,
                 filename=self.test_filename,
                 confidence_threshold=0.5,
-                include_gps=True
+                include_gps=True,
+                metadata=ANY
             )
             mock_supabase.upload_dual_images.assert_called_once()
             mock_supabase.insert_analysis.assert_called_once()
@@ -303,6 +303,79 @@ class TestYOLOServiceClientConvenienceMethods:
             )
 
 
+class TestYOLOServiceClientMetadata:
+    """Test that image metadata is parsed once and sent as a form field"""
+
+    @pytest.mark.asyncio
+    async def test_detect_image_sends_metadata(self):
+        import io
+        import json
+        from PIL import Image
+
+        exif = Image.Exif()
+        exif[0x0110] = "iPhone 13"
+        exif[0x8825] = {1: "S", 2: (26.0, 48.0, 29.88), 3: "W", 4: (65.0, 13.0, 3.36)}
+        buffer = io.BytesIO()
+        Image.new("RGB", (32, 32)).save(buffer, "JPEG", exif=exif.tobytes())
+
+        with patch('httpx.AsyncClient') as mock_client:
+            mock_response = Mock()
+            mock_response.json.return_value = {"detections": [], "total_detections": 0}
+            mock_response.raise_for_status = Mock()
+            post = AsyncMock(return_value=mock_response)
+            mock_client.return_value.__aenter__.return_value.post = post
+
+            client = YOLOServiceClient("http://localhost:8001")
+            await client.detect_image(image_data=buffer.getvalue(), filename="photo.jpg")
+
+        metadata = json.loads(post.call_args[1]["data"]["metadata"])
+        assert metadata["gps"]["has_gps"] is True
+        assert metadata["gps"]["latitude"] == pytest.approx(-26.8083)
+        assert metadata["camera"]["camera_model"] == "iPhone 13"
+
+
+class TestYOLOServiceClientVideo:
+    """Test video detection (streamed from disk)"""
+
+    @pytest.mark.asyncio
+    async def test_detect_video_streams_file(self, tmp_path):
+        video = tmp_path / "walk.mp4"
+        video.write_bytes(b"\0" * 1024)
+
+        with patch('httpx.AsyncClient') as mock_client:
+            mock_response = Mock()
+            mock_response.json.return_value = {"total_detections": 1, "video": {"frames_sampled": 12}}
+            mock_response.raise_for_status = Mock()
+            post = AsyncMock(return_value=mock_response)
+            mock_client.return_value.__aenter__.return_value.post = post
+
+            client = YOLOServiceClient("http://localhost:8001")
+            result = await client.detect_video(str(video), "walk.mp4", confidence_threshold=0.6)
+
+        assert result["success"] is True and result["video"]["frames_sampled"] == 12
+        assert post.call_args[0][0] == "http://localhost:8001/detect/video"
+        name, file_obj, _ = post.call_args[1]["files"]["file"]
+        assert name == "walk.mp4" and hasattr(file_obj, "read")  # File object, not bytes
+
+    @pytest.mark.asyncio
+    async def test_detect_video_overload_sets_backoff(self, tmp_path):
+        video = tmp_path / "walk.mp4"
+        video.write_bytes(b"\0")
+        response = httpx.Response(503, headers={"Retry-After": "7"}, request=httpx.Request("POST", "http://x"))
+
+        with patch('httpx.AsyncClient') as mock_client:
+            mock_client.return_value.__aenter__.return_value.post = AsyncMock(return_value=response)
+            client = YOLOServiceClient("http://localhost:8001")
+
+            with pytest.raises(HTTPException) as exc_info:
+                await client.detect_video(str(video), "walk.mp4")
+
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers["Retry-After"] == "7"
+        with pytest.raises(HTTPException):
+            await client.detect_video(str(video), "walk.mp4")  # Fails fast during the back-off
+
+
 class TestYOLOServiceClientConfiguration:
     """Test client configuration"""
 
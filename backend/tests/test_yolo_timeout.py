@@ -198,3 +198,30 @@ async def test_detect_logs_context_on_error():
             extra = call_args.kwargs['extra']
             assert 'filename' in extra
             assert extra['filename'] == "test_image.jpg"
+
+
+@pytest.mark.asyncio
+async def test_detect_backs_off_after_overload():
+    """Test that a 503 + Retry-After from YOLO makes later calls fail fast"""
+    client = YOLOServiceClient()
+
+    with patch.object(client, '_call_yolo_detect') as mock_call:
+        overloaded = httpx.Response(
+            503,
+            headers={"Retry-After": "7"},
+            text="Service overloaded",
+            request=httpx.Request("POST", "http://yolo/detect")
+        )
+        mock_call.side_effect = httpx.HTTPStatusError(
+            "Service Unavailable", request=overloaded.request, response=overloaded
+        )
+
+        with pytest.raises(HTTPException) as first:
+            await client.detect_image(b"fake_data", "test.jpg")
+        with pytest.raises(HTTPException) as second:
+            await client.detect_image(b"fake_data", "test.jpg")
+
+        assert first.value.headers == {"Retry-After": "7"}
+        assert second.value.status_code == 503
+        assert 0 < int(second.value.headers["Retry-After"]) <= 7
+        assert mock_call.call_count == 1  # Second call never reached YOLO
@@ -23,6 +23,8 @@ export ENVIRONMENT=${ENVIRONMENT:-development}
 export LOG_LEVEL=${LOG_LEVEL:-INFO}
 export REDIS_URL=${REDIS_URL:-redis://localhost:6379/0}
 export YOLO_SERVICE_URL=${YOLO_SERVICE_URL:-http://localhost:8001}
+# Embedded beat scheduler (dashboard rollups); disable when running several workers
+export CELERY_BEAT=${CELERY_BEAT:-true}
 
 echo ""
 echo "================================"
@@ -32,7 +34,8 @@ echo "  Log Level: $LOG_LEVEL"
 echo "  Redis: $REDIS_URL"
 echo "  YOLO Service: $YOLO_SERVICE_URL"
 echo "  Concurrency: 4 workers"
-echo "  Queue: analysis"
+echo "  Queue: analysis,reports"
+echo "  Beat: $CELERY_BEAT"
 echo "================================"
 echo ""
 
@@ -53,10 +56,15 @@ echo "Starting Celery worker..."
 echo "Press Ctrl+C to stop"
 echo ""
 
+BEAT_ARGS=""
+if [ "$CELERY_BEAT" = "true" ]; then
+    BEAT_ARGS="--beat"
+fi
+
 # Start worker
-celery -A src.celery_app worker \
+celery -A src.celery_app worker $BEAT_ARGS \
     --loglevel=$LOG_LEVEL \
     --concurrency=4 \
-    --queue=analysis \
+    --queue=analysis,reports \
     --max-tasks-per-child=50 \
     --prefetch-multiplier=1
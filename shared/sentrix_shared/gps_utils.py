@@ -6,10 +6,13 @@ Common GPS metadata extraction, validation, and processing functions
 Funciones comunes de extracción, validación y procesamiento de metadatos GPS
 """
 
-import os
-from pathlib import Path
-from typing import Dict, Optional, Tuple, Union, Any
+import numbers
+import re
+import struct
+import zlib
 from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
 
 
 def extract_gps_from_exif(image_path: Union[str, Path]) -> Dict[str, Any]:
@@ -21,7 +24,6 @@ def extract_gps_from_exif(image_path: Union[str, Path]) -> Dict[str, Any]:
     """
     try:
         from PIL import Image
-        from PIL.ExifTags import TAGS, GPSTAGS
     except ImportError:
         return {'has_gps': False, 'error': 'PIL library not available'}
 
@@ -66,7 +68,6 @@ def extract_gps_from_exif(image_path: Union[str, Path]) -> Dict[str, Any]:
                     exif_data = {}
                     for metadata in heif_file.metadata or []:
                         if metadata['type'] == 'Exif':
-                            from PIL import ExifTags
                             exif_bytes = metadata['data']
                             # Parse EXIF from bytes
                             exif_data = Image.Exif()
@@ -85,87 +86,101 @@ def extract_gps_from_exif(image_path: Union[str, Path]) -> Dict[str, Any]:
             image = Image.open(image_path)
             exif_data = image.getexif()  # Use getexif() instead of _getexif()
 
-        if not exif_data:
-            result['error'] = 'No EXIF data found'
-            return result
+        _gps_from_exif(exif_data, result)
 
-        # Find GPS info
-        gps_info = None
-        for tag, value in exif_data.items():
-            tag_name = TAGS.get(tag, tag)
-            if tag_name == 'GPSInfo':
-                gps_info = value
-                break
+    except Exception as e:
+        result['error'] = f'Error extracting GPS: {str(e)}'
 
-        if not gps_info:
-            result['error'] = 'No GPS data in EXIF'
-            return result
+    return result
 
-        # Validate GPS info is iterable (sometimes it's an int/IFD pointer)
-        if not hasattr(gps_info, 'items'):
-            # Try to get GPS IFD from EXIF
-            try:
-                gps_ifd = exif_data.get_ifd(0x8825)  # GPS IFD tag
-                if gps_ifd:
-                    gps_info = gps_ifd
-                else:
-                    result['error'] = 'GPS data format not supported'
-                    return result
-            except (AttributeError, KeyError):
-                result['error'] = 'GPS data format not supported'
-                return result
 
-        # Extract GPS coordinates
-        gps_data = {}
+def _gps_from_exif(exif_data, result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fill result with the GPS fields of a loaded EXIF block (PIL Image.Exif)
+    Completar result con los campos GPS de un bloque EXIF ya cargado
+    """
+    from PIL.ExifTags import GPSTAGS, TAGS
+
+    if not exif_data:
+        result['error'] = 'No EXIF data found'
+        return result
+
+    # Find GPS info
+    gps_info = None
+    for tag, value in exif_data.items():
+        tag_name = TAGS.get(tag, tag)
+        if tag_name == 'GPSInfo':
+            gps_info = value
+            break
+
+    if not gps_info:
+        result['error'] = 'No GPS data in EXIF'
+        return result
+
+    # Validate GPS info is iterable (sometimes it's an int/IFD pointer)
+    if not hasattr(gps_info, 'items'):
+        # Try to get GPS IFD from EXIF
         try:
-            for key, value in gps_info.items():
-                tag_name = GPSTAGS.get(key, key)
-                gps_data[tag_name] = value
-        except (AttributeError, TypeError) as e:
-            result['error'] = f'Error parsing GPS data: {e}'
+            gps_ifd = exif_data.get_ifd(0x8825)  # GPS IFD tag
+            if gps_ifd:
+                gps_info = gps_ifd
+            else:
+                result['error'] = 'GPS data format not supported'
+                return result
+        except (AttributeError, KeyError):
+            result['error'] = 'GPS data format not supported'
             return result
 
-        # Convert coordinates
-        lat = _convert_gps_coordinate(
-            gps_data.get('GPSLatitude'),
-            gps_data.get('GPSLatitudeRef')
-        )
-        lon = _convert_gps_coordinate(
-            gps_data.get('GPSLongitude'),
-            gps_data.get('GPSLongitudeRef')
-        )
+    # Extract GPS coordinates
+    gps_data = {}
+    try:
+        for key, value in gps_info.items():
+            tag_name = GPSTAGS.get(key, key)
+            gps_data[tag_name] = value
+    except (AttributeError, TypeError) as e:
+        result['error'] = f'Error parsing GPS data: {e}'
+        return result
 
-        if lat is not None and lon is not None:
-            result['has_gps'] = True
-            result['latitude'] = lat
-            result['longitude'] = lon
-
-            # Extract altitude if available
-            if 'GPSAltitude' in gps_data:
-                altitude = gps_data['GPSAltitude']
-                if isinstance(altitude, tuple) and len(altitude) == 2:
-                    result['altitude'] = float(altitude[0]) / float(altitude[1])
-
-            # Extract GPS timestamp
-            if 'GPSDateStamp' in gps_data and 'GPSTimeStamp' in gps_data:
-                try:
-                    date_stamp = gps_data['GPSDateStamp']
-                    time_stamp = gps_data['GPSTimeStamp']
-
-                    result['gps_date'] = date_stamp
-                    if isinstance(time_stamp, tuple) and len(time_stamp) >= 3:
-                        hours = float(time_stamp[0])
-                        minutes = float(time_stamp[1])
-                        seconds = float(time_stamp[2]) if len(time_stamp) > 2 else 0
-                        result['gps_timestamp'] = f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d}"
-                except Exception:
-                    pass
+    # Convert coordinates
+    lat = _convert_gps_coordinate(
+        gps_data.get('GPSLatitude'),
+        gps_data.get('GPSLatitudeRef')
+    )
+    lon = _convert_gps_coordinate(
+        gps_data.get('GPSLongitude'),
+        gps_data.get('GPSLongitudeRef')
+    )
+
+    if lat is not None and lon is not None:
+        result['has_gps'] = True
+        result['latitude'] = lat
+        result['longitude'] = lon
+
+        # Extract altitude if available
+        if 'GPSAltitude' in gps_data:
+            altitude = gps_data['GPSAltitude']
+            if isinstance(altitude, tuple) and len(altitude) == 2:
+                result['altitude'] = float(altitude[0]) / float(altitude[1])
+            elif isinstance(altitude, (int, float, numbers.Rational)):
+                result['altitude'] = float(altitude)  # PIL IFDRational
+
+        # Extract GPS timestamp
+        if 'GPSDateStamp' in gps_data and 'GPSTimeStamp' in gps_data:
+            try:
+                date_stamp = gps_data['GPSDateStamp']
+                time_stamp = gps_data['GPSTimeStamp']
 
-        else:
-            result['error'] = 'Invalid GPS coordinates'
+                result['gps_date'] = date_stamp
+                if isinstance(time_stamp, tuple) and len(time_stamp) >= 3:
+                    hours = float(time_stamp[0])
+                    minutes = float(time_stamp[1])
+                    seconds = float(time_stamp[2]) if len(time_stamp) > 2 else 0
+                    result['gps_timestamp'] = f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d}"
+            except Exception:
+                pass
 
-    except Exception as e:
-        result['error'] = f'Error extracting GPS: {str(e)}'
+    else:
+        result['error'] = 'Invalid GPS coordinates'
 
     return result
 
@@ -207,7 +222,6 @@ def extract_camera_info_from_exif(image_path: Union[str, Path]) -> Dict[str, Any
     """
     try:
         from PIL import Image
-        from PIL.ExifTags import TAGS
     except ImportError:
         return {'error': 'PIL library not available'}
 
@@ -248,22 +262,7 @@ def extract_camera_info_from_exif(image_path: Union[str, Path]) -> Dict[str, Any
             image = Image.open(image_path)
             exif_data = image.getexif()  # Use getexif() instead of _getexif()
 
-        if not exif_data:
-            result['error'] = 'No EXIF data found'
-            return result
-
-        # Extract camera info
-        for tag, value in exif_data.items():
-            tag_name = TAGS.get(tag, tag)
-
-            if tag_name == 'Make':
-                result['camera_make'] = str(value).strip()
-            elif tag_name == 'Model':
-                result['camera_model'] = str(value).strip()
-            elif tag_name == 'DateTime':
-                result['datetime_original'] = str(value).strip()
-            elif tag_name == 'Software':
-                result['software'] = str(value).strip()
+        _camera_from_exif(exif_data, result)
 
     except Exception as e:
         result['error'] = f'Error extracting camera info: {str(e)}'
@@ -271,6 +270,33 @@ def extract_camera_info_from_exif(image_path: Union[str, Path]) -> Dict[str, Any
     return result
 
 
+def _camera_from_exif(exif_data, result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fill result with the camera fields of a loaded EXIF block
+    Completar result con los campos de cámara de un bloque EXIF ya cargado
+    """
+    from PIL.ExifTags import TAGS
+
+    if not exif_data:
+        result['error'] = 'No EXIF data found'
+        return result
+
+    # Extract camera info
+    for tag, value in exif_data.items():
+        tag_name = TAGS.get(tag, tag)
+
+        if tag_name == 'Make':
+            result['camera_make'] = str(value).strip()
+        elif tag_name == 'Model':
+            result['camera_model'] = str(value).strip()
+        elif tag_name == 'DateTime':
+            result['datetime_original'] = str(value).strip()
+        elif tag_name == 'Software':
+            result['software'] = str(value).strip()
+
+    return result
+
+
 def validate_gps_coordinates(latitude: Optional[float], longitude: Optional[float]) -> Dict[str, Any]:
     """
     Validate GPS coordinates are within valid ranges
@@ -407,6 +433,317 @@ def extract_complete_image_metadata(image_path: Union[str, Path]) -> Dict[str, A
     return result
 
 
+# ---------------------------------------------------------------------------
+# Single-pass metadata extraction from bytes
+# Extracción de metadatos en una sola pasada desde bytes
+#
+# Only the container structure is walked to locate the Exif/XMP segments
+# (JPEG APP1, PNG eXIf/iTXt, WebP EXIF/XMP chunks, HEIF Exif/mime items);
+# pixel data is never decoded and no HEIF decoder is needed.
+# ---------------------------------------------------------------------------
+
+XMP_JPEG_HEADER = b'http://ns.adobe.com/xap/1.0/\x00'
+XMP_PNG_KEYWORD = b'XML:com.adobe.xmp'
+
+_XMP_FIELD = (r'(?:{name}\s*=\s*"([^"]*)"|<{name}>([^<]*)</{name}>)')
+
+
+def _jpeg_segments(data: bytes) -> Tuple[Optional[bytes], Optional[bytes]]:
+    """(exif, xmp) from the APP1 segments, stopping at start of scan"""
+    exif = xmp = None
+    offset = 2
+    while offset + 4 <= len(data) and data[offset] == 0xFF:
+        marker = data[offset + 1]
+        if marker == 0xFF:  # Fill byte
+            offset += 1
+            continue
+        if marker in (0xD9, 0xDA):  # EOI / SOS: no metadata after this point
+            break
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:  # No length
+            offset += 2
+            continue
+        length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+        payload = data[offset + 4:offset + 2 + length]
+        if marker == 0xE1:
+            if exif is None and payload.startswith(b'Exif\x00\x00'):
+                exif = payload[6:]
+            elif xmp is None and payload.startswith(XMP_JPEG_HEADER):
+                xmp = payload[len(XMP_JPEG_HEADER):]
+        offset += 2 + length
+    return exif, xmp
+
+
+def _png_chunks(data: bytes) -> Tuple[Optional[bytes], Optional[bytes]]:
+    """(exif, xmp) from eXIf / iTXt chunks, stopping at image data"""
+    exif = xmp = None
+    offset = 8
+    while offset + 8 <= len(data):
+        length, kind = struct.unpack('>I4s', data[offset:offset + 8])
+        payload = data[offset + 8:offset + 8 + length]
+        if kind == b'IDAT' and exif is not None:
+            break
+        if kind == b'eXIf':
+            exif = payload
+        elif kind == b'iTXt' and payload.startswith(XMP_PNG_KEYWORD + b'\x00'):
+            # keyword \0 compression_flag method language \0 translated \0 text
+            rest = payload[len(XMP_PNG_KEYWORD) + 1:]
+            compressed = rest[:1] == b'\x01'
+            text = rest[2:].split(b'\x00', 2)[-1]
+            try:
+                xmp = zlib.decompress(text) if compressed else text
+            except zlib.error:
+                xmp = None  # corrupt compressed XMP: treat as absent
+        elif kind == b'IEND':
+            break
+        offset += 12 + length
+    return exif, xmp
+
+
+def _webp_chunks(data: bytes) -> Tuple[Optional[bytes], Optional[bytes]]:
+    """(exif, xmp) from the RIFF EXIF / XMP chunks"""
+    exif = xmp = None
+    offset = 12
+    while offset + 8 <= len(data):
+        kind, length = struct.unpack('<4sI', data[offset:offset + 8])
+        payload = data[offset + 8:offset + 8 + length]
+        if kind == b'EXIF':
+            exif = payload[6:] if payload.startswith(b'Exif\x00\x00') else payload
+        elif kind == b'XMP ':
+            xmp = payload
+        offset += 8 + length + (length & 1)
+    return exif, xmp
+
+
+def _bmff_boxes(data: bytes, start: int, end: int):
+    """(type, payload start, payload end) of the ISO-BMFF boxes in [start, end)"""
+    offset = start
+    while offset + 8 <= end:
+        size, kind = struct.unpack('>I4s', data[offset:offset + 8])
+        payload = offset + 8
+        if size == 1:
+            size = struct.unpack('>Q', data[offset + 8:offset + 16])[0]
+            payload += 8
+        elif size == 0:
+            size = end - offset
+        if size < payload - offset:
+            return
+        yield kind, payload, min(offset + size, end)
+        offset += size
+
+
+def _read_uint(data: bytes, offset: int, size: int) -> int:
+    return int.from_bytes(data[offset:offset + size], 'big') if size else 0
+
+
+def _heif_items(data: bytes) -> Tuple[Optional[bytes], Optional[bytes]]:
+    """(exif, xmp) from the items of the HEIF meta box (iinf + iloc)"""
+    meta = next(((s, e) for k, s, e in _bmff_boxes(data, 0, len(data)) if k == b'meta'), None)
+    if meta is None:
+        return None, None
+    boxes = {k: (s, e) for k, s, e in _bmff_boxes(data, meta[0] + 4, meta[1])}  # meta is a full box
+    if b'iinf' not in boxes or b'iloc' not in boxes:
+        return None, None
+
+    # iinf: item id -> type (and content type for 'mime' items)
+    start, end = boxes[b'iinf']
+    entry_count_size = 2 if data[start] == 0 else 4
+    item_types = {}
+    for kind, s, e in _bmff_boxes(data, start + 4 + entry_count_size, end):
+        version = data[s]
+        if kind != b'infe' or version < 2:
+            continue
+        id_size = 2 if version == 2 else 4
+        item_id = _read_uint(data, s + 4, id_size)
+        type_offset = s + 4 + id_size + 2
+        item_type = data[type_offset:type_offset + 4]
+        content_type = b''
+        if item_type == b'mime':
+            content_type = data[type_offset + 4:e].split(b'\x00')[1:2] or [b'']
+            content_type = content_type[0]
+        item_types[item_id] = (item_type, content_type)
+
+    # iloc: item id -> bytes (construction method 0, file offsets)
+    start, end = boxes[b'iloc']
+    version = data[start]
+    offset_size, length_size = data[start + 4] >> 4, data[start + 4] & 0x0F
+    base_offset_size = data[start + 5] >> 4
+    index_size = data[start + 5] & 0x0F if version in (1, 2) else 0
+    pos = start + 6
+    count_size = 2 if version < 2 else 4
+    item_count = _read_uint(data, pos, count_size)
+    pos += count_size
+
+    exif = xmp = None
+    for _ in range(item_count):
+        item_id = _read_uint(data, pos, count_size)
+        pos += count_size
+        construction_method = 0
+        if version in (1, 2):
+            construction_method = _read_uint(data, pos, 2) & 0x0F
+            pos += 2
+        pos += 2  # data_reference_index
+        base_offset = _read_uint(data, pos, base_offset_size)
+        pos += base_offset_size
+        extent_count = _read_uint(data, pos, 2)
+        pos += 2
+        chunks = []
+        for _ in range(extent_count):
+            pos += index_size
+            extent_offset = _read_uint(data, pos, offset_size)
+            pos += offset_size
+            extent_length = _read_uint(data, pos, length_size)
+            pos += length_size
+            chunks.append(data[base_offset + extent_offset:base_offset + extent_offset + extent_length])
+
+        item_type, content_type = item_types.get(item_id, (None, b''))
+        if construction_method != 0 or item_type is None:
+            continue
+        payload = b''.join(chunks)
+        if item_type == b'Exif' and exif is None and len(payload) > 4:
+            # 4-byte offset to the TIFF header (skips an optional "Exif\0\0")
+            exif = payload[4 + struct.unpack('>I', payload[:4])[0]:]
+        elif item_type == b'mime' and content_type == b'application/rdf+xml' and xmp is None:
+            xmp = payload
+    return exif, xmp
+
+
+def read_metadata_segments(data: bytes) -> Tuple[Optional[str], Optional[bytes], Optional[bytes]]:
+    """
+    Locate the raw Exif (TIFF) and XMP blocks of an encoded image
+    Localizar los bloques Exif (TIFF) y XMP de una imagen codificada
+
+    Returns:
+        (container, exif, xmp); container is jpeg, png, webp, tiff, heif or None
+    """
+    if data[:3] == b'\xff\xd8\xff':
+        return ('jpeg',) + _jpeg_segments(data)
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return ('png',) + _png_chunks(data)
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return ('webp',) + _webp_chunks(data)
+    if data[:4] in (b'II*\x00', b'MM\x00*'):
+        return 'tiff', data, None
+    if data[4:8] == b'ftyp':
+        return ('heif',) + _heif_items(data)
+    return None, None, None
+
+
+def _xmp_value(xmp: str, *names: str) -> Optional[str]:
+    for name in names:
+        match = re.search(_XMP_FIELD.format(name=re.escape(name)), xmp)
+        if match:
+            return (match.group(1) or match.group(2) or '').strip() or None
+    return None
+
+
+def _xmp_coordinate(value: Optional[str]) -> Optional[float]:
+    """XMP coordinate: "26,48.498S" / "26,48,29.88S" (EXIF style) or decimal"""
+    if not value:
+        return None
+    try:
+        if value[-1] in 'NSEW':
+            parts = [float(p) for p in value[:-1].split(',')]
+            degrees = sum(p / 60 ** i for i, p in enumerate(parts))
+            return -degrees if value[-1] in 'SW' else degrees
+        return float(value)
+    except (ValueError, IndexError):
+        return None
+
+
+def _xmp_number(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        if '/' in value:
+            numerator, denominator = value.split('/', 1)
+            return float(numerator) / float(denominator)
+        return float(value)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def _gps_from_xmp(xmp: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """GPS from XMP (exif: namespace, DJI drone tags) when EXIF has none"""
+    lat = _xmp_coordinate(_xmp_value(xmp, 'exif:GPSLatitude', 'drone-dji:GpsLatitude'))
+    lon = _xmp_coordinate(_xmp_value(xmp, 'exif:GPSLongitude', 'drone-dji:GpsLongitude', 'drone-dji:GpsLongtitude'))
+    if lat is None or lon is None or not validate_gps_coordinates(lat, lon)['is_valid']:
+        return result
+    result.update({'has_gps': True, 'latitude': lat, 'longitude': lon})
+    result['altitude'] = _xmp_number(_xmp_value(xmp, 'exif:GPSAltitude', 'drone-dji:AbsoluteAltitude'))
+    result.pop('error', None)
+    return result
+
+
+def extract_image_metadata(data: bytes, filename: Optional[str] = None) -> Dict[str, Any]:
+    """
+    GPS and camera info from image bytes in one pass, without decoding pixels
+    GPS e info de cámara desde los bytes de la imagen en una sola pasada
+
+    Same result shapes as extract_gps_from_exif / extract_camera_info_from_exif,
+    so it can be serialized (JSON) and handed to another service instead of
+    parsing the image again. The container is detected from the magic bytes
+    (filename is only used in error messages).
+
+    Supports: JPG, PNG, TIFF, HEIC, HEIF, WebP
+
+    Returns:
+        dict: {'gps': {...}, 'camera': {...}, 'container': str or None}
+    """
+    gps = {
+        'has_gps': False,
+        'latitude': None,
+        'longitude': None,
+        'altitude': None,
+        'gps_date': None,
+        'gps_timestamp': None,
+        'location_source': 'EXIF_GPS'
+    }
+    camera = {
+        'camera_make': None,
+        'camera_model': None,
+        'datetime_original': None,
+        'software': None
+    }
+    result = {'gps': gps, 'camera': camera, 'container': None}
+
+    try:
+        from PIL import Image
+    except ImportError:
+        gps['error'] = camera['error'] = 'PIL library not available'
+        return result
+
+    try:
+        container, exif_bytes, xmp_bytes = read_metadata_segments(data)
+    except (struct.error, IndexError, ValueError) as e:
+        gps['error'] = camera['error'] = f'Corrupt image metadata{f" in {filename}" if filename else ""}: {e}'
+        return result
+    result['container'] = container
+
+    if exif_bytes:
+        try:
+            exif_data = Image.Exif()
+            exif_data.load(exif_bytes)
+            _gps_from_exif(exif_data, gps)
+            _camera_from_exif(exif_data, camera)
+        except Exception as e:
+            gps['error'] = f'Error extracting GPS: {str(e)}'
+            camera['error'] = f'Error extracting camera info: {str(e)}'
+    else:
+        gps['error'] = camera['error'] = 'No EXIF data found'
+
+    if xmp_bytes:
+        xmp = xmp_bytes.decode('utf-8', errors='ignore')
+        if not gps['has_gps']:
+            _gps_from_xmp(xmp, gps)
+        if camera['camera_make'] is None and camera['camera_model'] is None:
+            camera['camera_make'] = _xmp_value(xmp, 'tiff:Make')
+            camera['camera_model'] = _xmp_value(xmp, 'tiff:Model')
+            if camera['camera_make'] or camera['camera_model']:
+                camera.pop('error', None)
+
+    return result
+
+
 def format_gps_for_frontend(gps_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Format GPS data for frontend consumption
@@ -431,4 +768,4 @@ def format_gps_for_frontend(gps_data: Dict[str, Any]) -> Dict[str, Any]:
         'timestamp': gps_data.get('gps_timestamp'),
         'date': gps_data.get('gps_date'),
         'mapsUrls': gps_data.get('maps_urls', {})
-    }
\ No newline at end of file
+    }
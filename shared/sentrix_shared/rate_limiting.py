@@ -0,0 +1,326 @@
+"""
+Distributed rate limiting for Sentrix services
+Limitación de tasa distribuida para los servicios de Sentrix
+
+GCRA (generic cell rate algorithm, a token bucket that stores a single
+timestamp per key) kept in Redis and updated by one Lua script, so every
+uvicorn worker and replica shares the same budgets. All budgets of a request
+(e.g. per user, per organization, per endpoint) are checked in a single round
+trip and only consumed when every one of them allows the request.
+
+If Redis is not installed or unreachable, the limiter falls back to
+in-process buckets with the same semantics and retries Redis later.
+"""
+
+import asyncio
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .logging_utils import get_module_logger
+
+logger = get_module_logger(__name__, 'shared')
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    RedisError = Exception
+    REDIS_AVAILABLE = False
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_RATE_RE = re.compile(
+    r"^\s*(\d+)\s*(?:/|per)\s*(\d+)?\s*(second|minute|hour|day)s?\s*$",
+    re.IGNORECASE
+)
+
+# KEYS: bucket keys. ARGV: (emission interval ms, burst) per key.
+# Returns one {allowed, remaining, retry_after_ms, reset_after_ms} per key.
+# The Redis clock is used so workers with skewed clocks agree.
+_GCRA_SCRIPT = """
+local t = redis.call("TIME")
+local now = tonumber(t[1]) * 1000 + tonumber(t[2]) / 1000
+local results = {}
+local new_tats = {}
+local allowed = 1
+
+for i = 1, #KEYS do
+    local interval = tonumber(ARGV[2 * i - 1])
+    local tolerance = interval * tonumber(ARGV[2 * i])
+    local tat = tonumber(redis.call("GET", KEYS[i])) or now
+    if tat < now then
+        tat = now
+    end
+    local new_tat = tat + interval
+    local diff = now - (new_tat - tolerance)
+    if diff < 0 then
+        allowed = 0
+        results[i] = {0, 0, math.ceil(-diff), math.ceil(tat - now)}
+    else
+        new_tats[i] = new_tat
+        results[i] = {1, math.floor(diff / interval), 0, math.ceil(new_tat - now)}
+    end
+end
+
+if allowed == 1 then
+    for i = 1, #KEYS do
+        redis.call("SET", KEYS[i], string.format("%.3f", new_tats[i]),
+                   "PX", math.ceil(new_tats[i] - now))
+    end
+end
+
+return results
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    A budget of `limit` requests per `period` seconds
+    Un presupuesto de `limit` peticiones cada `period` segundos
+
+    `burst` is how many requests may arrive back to back (defaults to limit).
+    """
+    limit: int
+    period: float
+    burst: Optional[int] = None
+
+    @property
+    def interval_ms(self) -> float:
+        """Milliseconds between two requests at the sustained rate"""
+        return self.period * 1000.0 / self.limit
+
+    @property
+    def capacity(self) -> int:
+        return self.burst or self.limit
+
+    @classmethod
+    def parse(cls, value: str, burst: Optional[int] = None) -> "RateLimit":
+        """
+        Parse "10/minute", "100 per hour" or "20/5 minutes"
+
+        Raises:
+            ValueError: If the string is not a valid rate
+        """
+        match = _RATE_RE.match(value)
+        if not match or int(match.group(1)) <= 0:
+            raise ValueError(f"Invalid rate limit: {value!r}")
+        count, multiplier, unit = match.groups()
+        period = _PERIODS[unit.lower()] * int(multiplier or 1)
+        return cls(limit=int(count), period=float(period), burst=burst)
+
+    def __str__(self) -> str:
+        return f"{self.limit}/{int(self.period)}s"
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """Outcome of a rate limit check (the most restrictive budget)"""
+    allowed: bool
+    key: str
+    limit: int
+    remaining: int
+    retry_after: float
+    reset_after: float
+
+    def headers(self) -> Dict[str, str]:
+        """Standard X-RateLimit-* headers (and Retry-After when denied)"""
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+def _pick(results: List[RateLimitResult]) -> RateLimitResult:
+    """Most restrictive result: the longest denial, else the fewest remaining"""
+    denied = [r for r in results if not r.allowed]
+    if denied:
+        return max(denied, key=lambda r: r.retry_after)
+    return min(results, key=lambda r: r.remaining)
+
+
+class LocalRateLimiter:
+    """
+    In-process GCRA buckets (fallback when Redis is unavailable)
+    Buckets GCRA en proceso (alternativa cuando Redis no está disponible)
+
+    Limits are per process, so N workers allow up to N times the budget.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._tats: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, budgets: Sequence[Tuple[str, RateLimit]]) -> RateLimitResult:
+        now = time.monotonic() * 1000.0
+        results = []
+        new_tats = {}
+
+        with self._lock:
+            for key, rate in budgets:
+                interval = rate.interval_ms
+                tat = max(self._tats.get(key, now), now)
+                new_tat = tat + interval
+                diff = now - (new_tat - interval * rate.capacity)
+                if diff < 0:
+                    results.append(RateLimitResult(
+                        False, key, rate.limit, 0, -diff / 1000.0, (tat - now) / 1000.0
+                    ))
+                else:
+                    new_tats[key] = new_tat
+                    results.append(RateLimitResult(
+                        True, key, rate.limit, int(diff // interval), 0.0, (new_tat - now) / 1000.0
+                    ))
+
+            if all(r.allowed for r in results):
+                if len(self._tats) + len(new_tats) > self.max_keys:
+                    self._prune(now)
+                self._tats.update(new_tats)
+
+        return _pick(results)
+
+    def _prune(self, now: float) -> None:
+        """Drop buckets that are full again (caller holds the lock)"""
+        self._tats = {k: tat for k, tat in self._tats.items() if tat > now}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tats.clear()
+
+
+class RateLimiter:
+    """
+    Redis-backed GCRA rate limiter shared by all workers and replicas
+    Limitador GCRA respaldado por Redis compartido entre workers y réplicas
+
+    Example:
+        limiter = RateLimiter(redis_url="redis://localhost:6379/0")
+        result = await limiter.hit(
+            ("user:42:/analyses", RateLimit.parse("10/minute")),
+            ("endpoint:/analyses", RateLimit.parse("600/minute")),
+        )
+        if not result.allowed:
+            ...  # respond 429 with result.headers()
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        prefix: str = "ratelimit",
+        enabled: bool = True,
+        redis_client=None,
+        reconnect_interval: float = 30.0,
+        local_max_keys: int = 100_000
+    ):
+        """
+        Args:
+            redis_url: Redis connection URL (None = local buckets only)
+            prefix: Key prefix for bucket keys
+            enabled: When False every request is allowed
+            redis_client: Pre-built async Redis client (mainly for tests)
+            reconnect_interval: Seconds before retrying a failed Redis
+            local_max_keys: Bound on in-process fallback buckets
+        """
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self.enabled = enabled
+        self.reconnect_interval = reconnect_interval
+        self.local = LocalRateLimiter(local_max_keys)
+        self._client = redis_client
+        self._script = None
+        self._failed_at: Optional[float] = None
+
+    async def _get_client(self):
+        """Lazy Redis connection with back-off after failures"""
+        if self._client is not None:
+            return self._client
+        if not (REDIS_AVAILABLE and self.redis_url):
+            return None
+        if self._failed_at is not None and time.monotonic() - self._failed_at < self.reconnect_interval:
+            return None
+
+        self._client = aioredis.from_url(
+            self.redis_url,
+            socket_connect_timeout=2,
+            socket_timeout=2,
+            health_check_interval=30
+        )
+        return self._client
+
+    async def _disconnect(self) -> None:
+        client, self._client, self._script = self._client, None, None
+        self._failed_at = time.monotonic()
+        if client is not None:
+            try:
+                await client.aclose()
+            except Exception:
+                pass
+
+    async def hit(self, *budgets: Tuple[str, RateLimit]) -> RateLimitResult:
+        """
+        Consume one request from every budget, atomically
+
+        The request is allowed only if all budgets allow it; nothing is
+        consumed otherwise.
+
+        Args:
+            *budgets: (key, RateLimit) pairs
+
+        Returns:
+            Result for the most restrictive budget
+        """
+        if not self.enabled or not budgets:
+            return RateLimitResult(True, "", 0, 0, 0.0, 0.0)
+
+        client = await self._get_client()
+        if client is not None:
+            try:
+                return await self._hit_redis(client, budgets)
+            except (RedisError, OSError, asyncio.TimeoutError) as e:
+                logger.warning(f"Rate limiter falling back to local buckets: {e}")
+                await self._disconnect()
+
+        return self.local.hit(budgets)
+
+    async def _hit_redis(self, client, budgets: Sequence[Tuple[str, RateLimit]]) -> RateLimitResult:
+        if self._script is None:
+            # register_script uses EVALSHA and reloads the script on NOSCRIPT
+            self._script = client.register_script(_GCRA_SCRIPT)
+
+        keys = [f"{self.prefix}:{key}" for key, _ in budgets]
+        args = []
+        for _, rate in budgets:
+            args.extend((rate.interval_ms, rate.capacity))
+
+        rows = await self._script(keys=keys, args=args)
+        return _pick([
+            RateLimitResult(
+                allowed=bool(allowed),
+                key=key,
+                limit=rate.limit,
+                remaining=int(remaining),
+                retry_after=int(retry_ms) / 1000.0,
+                reset_after=int(reset_ms) / 1000.0
+            )
+            for (key, rate), (allowed, remaining, retry_ms, reset_ms) in zip(budgets, rows)
+        ])
+
+    def reset(self) -> None:
+        """Forget local buckets (Redis buckets expire on their own)"""
+        self.local.reset()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._script = None
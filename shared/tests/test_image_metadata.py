@@ -0,0 +1,131 @@
+"""
+Tests for single-pass image metadata extraction
+Tests para la extracción de metadatos de imagen en una sola pasada
+"""
+
+import io
+import struct
+import zlib
+
+import pytest
+from PIL import Image
+
+from sentrix_shared.gps_utils import (
+    XMP_PNG_KEYWORD,
+    extract_camera_info_from_exif,
+    extract_gps_from_exif,
+    extract_image_metadata,
+    read_metadata_segments,
+)
+
+# -26.8083, -65.2176 (San Miguel de Tucumán)
+GPS_IFD = {1: 'S', 2: (26.0, 48.0, 29.88), 3: 'W', 4: (65.0, 13.0, 3.36), 6: 450.0}
+
+
+def _exif():
+    exif = Image.Exif()
+    exif[0x010F] = 'Apple'
+    exif[0x0110] = 'iPhone 13'
+    exif[0x8825] = GPS_IFD
+    return exif
+
+
+def _encode(fmt, **kwargs):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), 'gray').save(buffer, fmt, **kwargs)
+    return buffer.getvalue()
+
+
+def _box(kind, payload):
+    return struct.pack('>I4s', 8 + len(payload), kind) + payload
+
+
+def _heif_with_exif(exif_tiff):
+    """Minimal HEIF: ftyp + meta (iinf with one Exif item, iloc pointing at mdat)"""
+    exif_item = struct.pack('>I', 6) + b'Exif\x00\x00' + exif_tiff
+    infe = _box(b'infe', struct.pack('>B3xHH4s', 2, 1, 0, b'Exif') + b'\x00')
+    iinf = _box(b'iinf', b'\x00\x00\x00\x00' + struct.pack('>H', 1) + infe)
+
+    def iloc(offset):
+        # version 0, offset/length size 4, base offset size 0, one item, one extent
+        return _box(b'iloc', b'\x00\x00\x00\x00' + bytes([0x44, 0x00]) + struct.pack('>HHHHII', 1, 1, 0, 1, offset, len(exif_item)))
+
+    ftyp = _box(b'ftyp', b'heic\x00\x00\x00\x00mif1heic')
+    meta_size = len(_box(b'meta', b'\x00' * 4 + iinf + iloc(0)))
+    offset = len(ftyp) + meta_size + 8  # mdat payload
+    meta = _box(b'meta', b'\x00' * 4 + iinf + iloc(offset))
+    return ftyp + meta + _box(b'mdat', exif_item)
+
+
+@pytest.mark.parametrize('fmt', ['JPEG', 'PNG', 'WEBP', 'TIFF'])
+def test_formats(fmt):
+    metadata = extract_image_metadata(_encode(fmt, exif=_exif().tobytes()))
+
+    gps = metadata['gps']
+    assert gps['has_gps'] and gps['location_source'] == 'EXIF_GPS'
+    assert gps['latitude'] == pytest.approx(-26.8083)
+    assert gps['longitude'] == pytest.approx(-65.2176)
+    assert gps['altitude'] == pytest.approx(450.0)
+    assert metadata['camera']['camera_make'] == 'Apple'
+    assert metadata['camera']['camera_model'] == 'iPhone 13'
+
+
+def test_matches_path_based_extraction(tmp_path):
+    path = tmp_path / 'photo.jpg'
+    path.write_bytes(_encode('JPEG', exif=_exif().tobytes()))
+
+    metadata = extract_image_metadata(path.read_bytes())
+
+    reference = extract_gps_from_exif(path)
+    assert {k: metadata['gps'][k] for k in ('has_gps', 'latitude', 'longitude')} == \
+        {k: reference[k] for k in ('has_gps', 'latitude', 'longitude')}
+    assert metadata['camera'] == extract_camera_info_from_exif(path)
+
+
+def test_heif_exif_item():
+    data = _heif_with_exif(_exif().tobytes()[6:])  # tobytes() starts with Exif\0\0
+
+    container, exif, _ = read_metadata_segments(data)
+    metadata = extract_image_metadata(data, 'IMG_0001.HEIC')
+
+    assert container == 'heif' and exif[:2] in (b'II', b'MM')
+    assert metadata['gps']['latitude'] == pytest.approx(-26.8083)
+    assert metadata['camera']['camera_model'] == 'iPhone 13'
+
+
+def test_xmp_gps_fallback():
+    xmp = (
+        b'<x:xmpmeta xmlns:x="adobe:ns:meta/"><rdf:RDF><rdf:Description '
+        b'drone-dji:GpsLatitude="-26.808300" drone-dji:GpsLongitude="-65.217600" '
+        b'drone-dji:AbsoluteAltitude="+512.30" tiff:Make="DJI" tiff:Model="FC3582"/>'
+        b'</rdf:RDF></x:xmpmeta>'
+    )
+    jpeg = _encode('JPEG')
+    segment = b'http://ns.adobe.com/xap/1.0/\x00' + xmp
+    data = jpeg[:2] + b'\xff\xe1' + struct.pack('>H', len(segment) + 2) + segment + jpeg[2:]
+
+    metadata = extract_image_metadata(data)
+
+    assert metadata['gps']['has_gps'] and 'error' not in metadata['gps']
+    assert (metadata['gps']['latitude'], metadata['gps']['altitude']) == (-26.8083, 512.3)
+    assert metadata['camera']['camera_make'] == 'DJI'
+
+
+def test_corrupt_png_xmp_is_ignored():
+    png = _encode('PNG', exif=_exif().tobytes())
+    payload = XMP_PNG_KEYWORD + b'\x00\x01\x00\x00\x00' + b'not zlib data'
+    chunk = struct.pack('>I4s', len(payload), b'iTXt') + payload + struct.pack('>I', zlib.crc32(b'iTXt' + payload))
+    data = png[:33] + chunk + png[33:]  # after the signature and IHDR
+
+    container, _, xmp = read_metadata_segments(data)
+    metadata = extract_image_metadata(data)
+
+    assert container == 'png' and xmp is None
+    assert metadata['gps']['latitude'] == pytest.approx(-26.8083)
+
+
+def test_no_metadata():
+    metadata = extract_image_metadata(_encode('JPEG'))
+
+    assert not metadata['gps']['has_gps'] and metadata['gps']['error'] == 'No EXIF data found'
+    assert extract_image_metadata(b'not an image')['container'] is None
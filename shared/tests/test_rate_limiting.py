@@ -0,0 +1,131 @@
+"""
+Tests for distributed rate limiting
+Tests para la limitación de tasa distribuida
+"""
+
+import asyncio
+
+import pytest
+
+from sentrix_shared.rate_limiting import (
+    LocalRateLimiter,
+    RateLimit,
+    RateLimiter,
+    RedisError,
+)
+
+
+class TestRateLimitParsing:
+    """Test rate limit string parsing"""
+
+    def test_parse_common_formats(self):
+        assert RateLimit.parse("10/minute") == RateLimit(10, 60.0)
+        assert RateLimit.parse("100 per hour") == RateLimit(100, 3600.0)
+        assert RateLimit.parse("20/5 minutes") == RateLimit(20, 300.0)
+        assert RateLimit.parse("3/second", burst=6).capacity == 6
+
+    @pytest.mark.parametrize("value", ["", "ten/minute", "0/minute", "10/fortnight"])
+    def test_rejects_invalid_rates(self, value):
+        with pytest.raises(ValueError):
+            RateLimit.parse(value)
+
+
+class TestLocalRateLimiter:
+    """Test in-process GCRA buckets"""
+
+    def test_allows_burst_then_denies(self):
+        limiter = LocalRateLimiter()
+        rate = RateLimit.parse("3/minute")
+
+        results = [limiter.hit([("user:1", rate)]) for _ in range(4)]
+
+        assert [r.allowed for r in results] == [True, True, True, False]
+        assert [r.remaining for r in results[:3]] == [2, 1, 0]
+        assert 19 < results[3].retry_after <= 20
+
+    def test_keys_are_independent(self):
+        limiter = LocalRateLimiter()
+        rate = RateLimit.parse("1/minute")
+
+        assert limiter.hit([("user:1", rate)]).allowed
+        assert limiter.hit([("user:2", rate)]).allowed
+        assert not limiter.hit([("user:1", rate)]).allowed
+
+    def test_denied_request_consumes_no_budget(self):
+        limiter = LocalRateLimiter()
+        user = RateLimit.parse("5/minute")
+        endpoint = RateLimit.parse("1/minute")
+
+        assert limiter.hit([("user:1", user), ("endpoint", endpoint)]).allowed
+        denied = limiter.hit([("user:1", user), ("endpoint", endpoint)])
+
+        assert not denied.allowed
+        assert denied.key == "endpoint"
+        assert limiter.hit([("user:1", user)]).remaining == 3
+
+    def test_denied_result_headers(self):
+        limiter = LocalRateLimiter()
+        rate = RateLimit.parse("1/minute")
+        limiter.hit([("k", rate)])
+
+        headers = limiter.hit([("k", rate)]).headers()
+
+        assert headers["X-RateLimit-Limit"] == "1"
+        assert headers["X-RateLimit-Remaining"] == "0"
+        assert int(headers["Retry-After"]) >= 59
+
+
+class _FailingRedis:
+    """Client whose script calls always fail, like an unreachable Redis"""
+
+    def register_script(self, script):
+        async def call(keys, args):
+            raise RedisError("connection refused")
+        return call
+
+    async def aclose(self):
+        pass
+
+
+class TestRateLimiter:
+    """Test the Redis-backed limiter"""
+
+    def test_disabled_limiter_allows_everything(self):
+        limiter = RateLimiter(enabled=False)
+        rate = RateLimit.parse("1/minute")
+
+        results = asyncio.run(self._hit_many(limiter, ("k", rate), 3))
+
+        assert all(r.allowed for r in results)
+
+    def test_falls_back_to_local_buckets(self):
+        limiter = RateLimiter(redis_client=_FailingRedis())
+        rate = RateLimit.parse("1/minute")
+
+        results = asyncio.run(self._hit_many(limiter, ("k", rate), 2))
+
+        assert [r.allowed for r in results] == [True, False]
+
+    def test_redis_script(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        limiter = RateLimiter(redis_client=fakeredis.FakeAsyncRedis())
+        user = RateLimit.parse("2/minute")
+        endpoint = RateLimit.parse("3/minute")
+
+        async def scenario():
+            first = [await limiter.hit(("user:1", user), ("endpoint", endpoint)) for _ in range(3)]
+            other = await limiter.hit(("user:2", user), ("endpoint", endpoint))
+            blocked = await limiter.hit(("user:2", user), ("endpoint", endpoint))
+            return first, other, blocked
+
+        first, other, blocked = asyncio.run(scenario())
+
+        assert [r.allowed for r in first] == [True, True, False]
+        assert first[2].key == "user:1"
+        assert other.allowed
+        assert not blocked.allowed and blocked.key == "endpoint"
+
+    @staticmethod
+    async def _hit_many(limiter, budget, count):
+        return [await limiter.hit(budget) for _ in range(count)]
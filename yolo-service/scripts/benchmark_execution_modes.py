@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark de modos de ejecución (hilos vs procesos)
+Thread vs process inference pool benchmark
+
+For each core count and execution mode, runs the full detect path
+(decode, inference, contours, processed image) through InferencePool with
+as many concurrent requests as workers, and reports throughput and
+latency. Each configuration runs in a fresh interpreter pinned to the
+first N cores, so thread pools and caches do not leak between runs.
+
+Usage:
+    python scripts/benchmark_execution_modes.py --model models/best.pt
+    python scripts/benchmark_execution_modes.py --cores 2 4 8 --workers 2 --requests 40
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.detector import _list_images
+from src.core.worker_pool import EXECUTION_MODES, InferencePool
+from src.utils import get_project_root
+
+
+async def _run(pool, images, requests, concurrency, output_dir):
+    contents = [Path(path).read_bytes() for path in images]
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await pool.detect(
+                images[i % len(images)],
+                content=contents[i % len(images)],
+                conf_threshold=0.5,
+                include_gps=True,
+                output_dir=output_dir
+            )
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(concurrency)))  # Warm-up
+    latencies.clear()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - start, latencies
+
+
+def run_single(args):
+    """One configuration, in this (pinned) process"""
+    cores = args.cores[0]
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, range(cores))
+
+    workers = args.workers or cores
+    threads = max(1, cores // workers)
+    os.environ["YOLO_INTRA_OP_THREADS"] = str(threads)  # Thread mode: shared by all workers
+
+    images = _list_images(args.images)
+    pool = InferencePool(max_workers=workers, mode=args.modes[0], worker_threads=threads)
+
+    start = time.perf_counter()
+    pool.start(args.model)
+    startup = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        elapsed, latencies = asyncio.run(_run(pool, images, args.requests, workers, output_dir))
+    pool.shutdown()
+
+    print(json.dumps({
+        "mode": args.modes[0],
+        "cores": cores,
+        "workers": workers,
+        "threads_per_worker": threads,
+        "startup_seconds": round(startup, 2),
+        "throughput_img_s": round(args.requests / elapsed, 2),
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 1),
+        "latency_p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 1)
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hilos vs procesos para inferencia YOLO")
+    parser.add_argument("--model", default="models/best.pt", help="Checkpoint .pt")
+    parser.add_argument("--images", default=None, help="Directorio de imágenes (default: test_images)")
+    parser.add_argument("--modes", nargs="+", default=list(EXECUTION_MODES), choices=EXECUTION_MODES)
+    parser.add_argument("--cores", nargs="+", type=int, default=None,
+                        help="Núcleos a usar (default: 1, 2, 4... hasta os.cpu_count())")
+    parser.add_argument("--workers", type=int, default=0, help="Workers por configuración (0 = núcleos)")
+    parser.add_argument("--requests", type=int, default=40, help="Requests medidos por configuración")
+    parser.add_argument("--output", default=None, help="Guardar resultados en JSON")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    args.images = args.images or str(get_project_root() / "test_images")
+    if not _list_images(args.images):
+        print(f"ERROR: No se encontraron imágenes en {args.images}")
+        sys.exit(1)
+
+    if args.single:
+        run_single(args)
+        return
+
+    cpu_count = os.cpu_count() or 1
+    cores_list = args.cores or sorted({min(2 ** i, cpu_count) for i in range(cpu_count.bit_length())})
+
+    results = []
+    for cores in cores_list:
+        for mode in args.modes:
+            print(f"\n=== {mode} | {cores} núcleos ===")
+            command = [
+                sys.executable, __file__, "--single",
+                "--model", args.model, "--images", args.images,
+                "--modes", mode, "--cores", str(cores),
+                "--workers", str(args.workers), "--requests", str(args.requests)
+            ]
+            completed = subprocess.run(command, capture_output=True, text=True)
+            if completed.returncode != 0:
+                print(f"  Falló: {completed.stderr.strip().splitlines()[-1:]}")
+                continue
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            results.append(result)
+            for key, value in result.items():
+                print(f"  {key}: {value}")
+
+    if results:
+        print("\n=== RESUMEN ===")
+        print(f"{'cores':>5} {'mode':<8} {'workers':>7} {'img/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+        for result in results:
+            print(
+                f"{result['cores']:>5} {result['mode']:<8} {result['workers']:>7} "
+                f"{result['throughput_img_s']:>8} {result['latency_p50_ms']:>8} {result['latency_p95_ms']:>8}"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResultados guardados en: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
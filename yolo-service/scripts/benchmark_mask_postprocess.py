@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark del post-procesamiento de máscaras
+Per-detection vs. vectorized mask post-processing benchmark
+
+Builds synthetic mask stacks like the ones the segmentation head returns
+(N detections at model input resolution, letterboxed from a 12 MP photo)
+and times, per image:
+
+- per-detection: what the detector did before (ultralytics Masks.xy: one
+  findContours per full-size mask and one rescale per contour, area sum
+  over the stack, polygons turned into Python lists);
+- vectorized: src.core.masks.masks_to_polygons (one findContours over an
+  atlas of cropped masks, one rescale for all points), polygons kept as
+  NumPy arrays until the response is serialized.
+
+Usage:
+    python scripts/benchmark_mask_postprocess.py
+    python scripts/benchmark_mask_postprocess.py --detections 10 50 100 --repeat 50
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.masks import masks_to_polygons
+
+IMAGE_SHAPE = (3000, 4000, 3)
+
+
+def synthetic_masks(detections, imgsz, seed=0):
+    """(N, imgsz, imgsz) float masks with one blob each, inside the letterboxed area"""
+    rng = np.random.default_rng(seed)
+    masks = np.zeros((detections, imgsz, imgsz), dtype=np.uint8)
+    pad = (imgsz - IMAGE_SHAPE[0] * imgsz / IMAGE_SHAPE[1]) / 2
+    for mask in masks:
+        center = (int(rng.integers(60, imgsz - 60)), int(rng.integers(pad + 60, imgsz - pad - 60)))
+        axes = (int(rng.integers(5, 60)), int(rng.integers(5, 60)))
+        cv2.ellipse(mask, center, axes, float(rng.integers(0, 180)), 0, 360, 1, -1)
+    return torch.from_numpy(masks).float()
+
+
+def per_detection(masks):
+    from ultralytics.utils import ops
+
+    areas = masks.sum(dim=(1, 2)).tolist()
+    polygons = [
+        ops.scale_coords(masks.shape[1:], segment, IMAGE_SHAPE, normalize=False)
+        for segment in ops.masks2segments(masks)
+    ]
+    return [polygon.tolist() for polygon in polygons], areas
+
+
+def vectorized(masks):
+    return masks_to_polygons(masks.bool().numpy(), IMAGE_SHAPE)
+
+
+def _time(fn, masks, repeat):
+    fn(masks)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(masks)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--detections", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    torch.set_num_threads(1)
+    rows = []
+    for detections in args.detections:
+        masks = synthetic_masks(detections, args.imgsz)
+        baseline = _time(per_detection, masks, args.repeat)
+        fast = _time(vectorized, masks, args.repeat)
+        rows.append({
+            "detections": detections,
+            "per_detection_ms": round(baseline, 2),
+            "vectorized_ms": round(fast, 2),
+            "per_detection_us_each": round(baseline * 1000 / detections, 1),
+            "vectorized_us_each": round(fast * 1000 / detections, 1),
+            "speedup": round(baseline / fast, 2)
+        })
+        print(
+            f"{detections:4d} detections: per-detection {baseline:7.2f} ms, "
+            f"vectorized {fast:7.2f} ms ({baseline / fast:.1f}x)"
+        )
+
+    print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark de runtimes de inferencia (torch, onnx, openvino)
+Latency/throughput benchmark of the inference runtimes
+
+For each runtime:
+- load time (including a one-off export of the .pt checkpoint)
+- single-request latency (mean, p50, p95) over the test images
+- throughput with N concurrent workers, one backend per worker as in the
+  service's ThreadPoolExecutor
+
+Usage:
+    python scripts/benchmark_runtimes.py --model models/best.pt
+    python scripts/benchmark_runtimes.py --runtimes torch onnx --workers 4 --runs 20
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.detector import _list_images
+from src.core.runtime import RUNTIMES, create_backend, load_runtime_config, read_image
+from src.utils import get_project_root
+
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) * 1000 if values else 0.0
+
+
+def benchmark_runtime(model_path, runtime, images, runs, workers, conf, threads):
+    """Mide carga, latencia y throughput de un runtime"""
+    config = replace(load_runtime_config(), runtime=runtime)
+    if threads:
+        config = replace(config, intra_op_threads=threads)
+
+    start = time.perf_counter()
+    backend = create_backend(model_path, config)
+    load_seconds = time.perf_counter() - start
+
+    # Warm-up (primera inferencia incluye asignación de memoria)
+    backend.predict(images[0], conf)
+
+    latencies = []
+    detections = 0
+    for i in range(runs):
+        image = images[i % len(images)]
+        start = time.perf_counter()
+        detections += len(backend.predict(image, conf))
+        latencies.append(time.perf_counter() - start)
+
+    # Throughput: un backend por worker, con hilos repartidos entre workers
+    parallel_config = replace(config, intra_op_threads=threads or max(1, config.threads // workers))
+    local = threading.local()
+
+    def infer(i):
+        if not hasattr(local, "backend"):
+            local.backend = create_backend(model_path, parallel_config)
+            local.backend.predict(images[0], conf)
+        return local.backend.predict(images[i % len(images)], conf)
+
+    total = runs * workers
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(infer, range(workers)))  # Carga y warm-up fuera de la medición
+        start = time.perf_counter()
+        list(pool.map(infer, range(total)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "runtime": runtime,
+        "threads": config.threads,
+        "load_seconds": round(load_seconds, 2),
+        "latency_mean_ms": round(float(np.mean(latencies)) * 1000, 1),
+        "latency_p50_ms": round(_percentile(latencies, 50), 1),
+        "latency_p95_ms": round(_percentile(latencies, 95), 1),
+        "throughput_img_s": round(total / elapsed, 2),
+        "workers": workers,
+        "detections_per_image": round(detections / runs, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de runtimes de inferencia YOLO")
+    parser.add_argument("--model", default="models/best.pt", help="Checkpoint .pt")
+    parser.add_argument("--images", default=None, help="Directorio de imágenes (default: test_images)")
+    parser.add_argument("--runtimes", nargs="+", default=list(RUNTIMES), choices=RUNTIMES)
+    parser.add_argument("--runs", type=int, default=20, help="Inferencias medidas por runtime")
+    parser.add_argument("--workers", type=int, default=4, help="Workers concurrentes para throughput")
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads (0 = auto)")
+    parser.add_argument("--conf", type=float, default=0.5)
+    parser.add_argument("--output", default=None, help="Guardar resultados en JSON")
+    args = parser.parse_args()
+
+    images_dir = args.images or str(get_project_root() / "test_images")
+    images = [read_image(path) for path in _list_images(images_dir)]
+    if not images:
+        print(f"ERROR: No se encontraron imágenes en {images_dir}")
+        sys.exit(1)
+
+    print(f"Modelo: {args.model} | Imágenes: {len(images)} | Runs: {args.runs} | Workers: {args.workers}")
+
+    results = []
+    for runtime in args.runtimes:
+        print(f"\n=== {runtime.upper()} ===")
+        try:
+            result = benchmark_runtime(
+                args.model, runtime, images, args.runs, args.workers, args.conf, args.threads
+            )
+        except Exception as e:
+            print(f"  Omitido: {e}")
+            continue
+        results.append(result)
+        for key, value in result.items():
+            print(f"  {key}: {value}")
+
+    if results:
+        baseline = results[0]
+        print("\n=== RESUMEN ===")
+        print(f"{'runtime':<10} {'p50 ms':>8} {'p95 ms':>8} {'img/s':>8} {'speedup':>8}")
+        for result in results:
+            speedup = baseline["latency_p50_ms"] / result["latency_p50_ms"] if result["latency_p50_ms"] else 0
+            print(
+                f"{result['runtime']:<10} {result['latency_p50_ms']:>8} {result['latency_p95_ms']:>8} "
+                f"{result['throughput_img_s']:>8} {speedup:>7.2f}x"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResultados guardados en: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -199,6 +199,18 @@ class AdvancedModelEvaluator:
                             metrics['per_class'][class_name] = {}
                         metrics['per_class'][class_name]['mask_mAP50-95'] = float(map_val)
 
+            # Per-class mAP50, precision and recall (masks)
+            if hasattr(seg, 'class_result'):
+                for i, idx in enumerate(getattr(results, 'ap_class_index', [])):
+                    class_name = self.class_names.get(int(idx))
+                    if class_name is None:
+                        continue
+                    precision, recall, ap50, _ = seg.class_result(i)
+                    class_metrics = metrics['per_class'].setdefault(class_name, {})
+                    class_metrics['mask_mAP50'] = float(ap50)
+                    class_metrics['mask_precision'] = float(precision)
+                    class_metrics['mask_recall'] = float(recall)
+
         # Overall box detection metrics
         if hasattr(results, 'box'):
             box = results.box
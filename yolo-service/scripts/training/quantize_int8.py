@@ -0,0 +1,387 @@
+"""
+INT8 Post-Training Quantization with Accuracy Gate
+Cuantización INT8 post-entrenamiento con control de precisión
+
+Author: ML Engineering Team
+Python: 3.10+
+
+Pipeline:
+1. Static INT8 quantization of the deployed checkpoint, calibrated on the
+   val split of configs/dataset.yaml
+   - openvino: NNCF through the ultralytics exporter
+   - onnx: ONNX Runtime quantize_static (QDQ, per-channel weights)
+2. Evaluation of the FP32 checkpoint and the INT8 model on the same split
+   with AdvancedModelEvaluator (evaluate_final.py)
+3. Latency of FP32 vs INT8 on the calibration images
+4. Publication to models/ only if the accuracy drop stays within budget
+
+The report (JSON) lists speedup vs. accuracy delta overall and per class,
+so latency can be traded for recall knowingly.
+
+Usage:
+    python scripts/training/quantize_int8.py --model models/best.pt
+    python scripts/training/quantize_int8.py --model models/best.pt --format onnx \\
+        --max-drop 0.01 --max-class-drop 0.03
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import time
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import yaml
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from evaluate_final import AdvancedModelEvaluator
+from src.core.detector import _list_images
+from src.core.runtime import (
+    OnnxBackend,
+    OpenVinoBackend,
+    export_model,
+    load_runtime_config,
+    quantized_model_path,
+    read_image
+)
+from src.utils import get_project_root, get_results_dir
+
+
+class Int8Quantizer:
+    """
+    Quantize, evaluate and (conditionally) publish an INT8 model
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        data_config: str,
+        runtime: str = "openvino",
+        imgsz: int = 640,
+        calibration_images: int = 300
+    ):
+        self.model_path = Path(model_path)
+        self.data_config = data_config
+        self.runtime = runtime
+        self.imgsz = imgsz
+        self.calibration_images = calibration_images
+
+        if not self.model_path.exists():
+            print(f"ERROR: Modelo no encontrado: {model_path}")
+            sys.exit(1)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.work_dir = get_results_dir() / "quantization" / f"{self.model_path.stem}_{runtime}_{timestamp}"
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+
+        # Work on a copy: exports land next to the checkpoint and must not
+        # reach models/ before passing the gate
+        self.work_model = self.work_dir / self.model_path.name
+        shutil.copy2(self.model_path, self.work_model)
+
+    def val_images(self, limit: bool = True) -> List[str]:
+        """Images of the val split (calibration and latency set)"""
+        with open(self.data_config, encoding="utf-8") as f:
+            data = yaml.safe_load(f)
+
+        root = Path(data.get("path", "."))
+        if not root.is_absolute():
+            root = get_project_root() / root
+        images = _list_images(str(root / data["val"]))
+        return images[:self.calibration_images] if limit else images
+
+    # ---------------------------------------------
+    # Quantization
+    # ---------------------------------------------
+
+    def quantize(self) -> Path:
+        """Static INT8 quantization calibrated on the val split"""
+        print(f"\nCuantizando a INT8 ({self.runtime})...")
+        if self.runtime == "openvino":
+            return self._quantize_openvino()
+        return self._quantize_onnx()
+
+    def _quantize_openvino(self) -> Path:
+        from ultralytics import YOLO
+
+        total = len(self.val_images(limit=False))
+        fraction = min(1.0, self.calibration_images / total) if total else 1.0
+        exported = YOLO(str(self.work_model)).export(
+            format="openvino",
+            int8=True,
+            data=self.data_config,
+            imgsz=self.imgsz,
+            fraction=fraction
+        )
+        return Path(exported)
+
+    def _quantize_onnx(self) -> Path:
+        from onnxruntime.quantization import (
+            CalibrationDataReader,
+            CalibrationMethod,
+            QuantFormat,
+            QuantType,
+            quantize_static
+        )
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+
+        fp32_path = Path(export_model(str(self.work_model), "onnx", self.imgsz))
+        prepared_path = self.work_dir / f"{self.model_path.stem}_prep.onnx"
+        quant_pre_process(str(fp32_path), str(prepared_path))
+
+        # Same letterbox/normalization as inference
+        config = replace(load_runtime_config(), runtime="onnx", imgsz=self.imgsz)
+        backend = OnnxBackend(str(fp32_path), config)
+        images = self.val_images()
+
+        class ValSplitReader(CalibrationDataReader):
+            def __init__(self):
+                self._paths = iter(images)
+
+            def get_next(self):
+                path = next(self._paths, None)
+                if path is None:
+                    return None
+                return {backend.input_name: backend.preprocess(read_image(path))}
+
+        output_path = quantized_model_path(str(self.work_model), "onnx")
+        quantize_static(
+            str(prepared_path),
+            str(output_path),
+            ValSplitReader(),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            calibrate_method=CalibrationMethod.MinMax
+        )
+        print(f"   Calibrado con {len(images)} imagenes")
+        return output_path
+
+    # ---------------------------------------------
+    # Evaluation
+    # ---------------------------------------------
+
+    def evaluate(self, model_path: Path, conf_threshold: float) -> Dict:
+        """Same mAP50 / mask-mAP metrics as evaluate_final.py, on the val split"""
+        evaluator = AdvancedModelEvaluator(str(model_path), self.data_config)
+        return evaluator.evaluate(split="val", conf_threshold=conf_threshold)
+
+    def measure_latency(self, model_path: Path, runs: int = 30) -> Dict:
+        """p50/p95 latency (ms) of a single inference on the val images"""
+        config = replace(load_runtime_config(), runtime=self.runtime, imgsz=self.imgsz)
+        backend_class = OpenVinoBackend if self.runtime == "openvino" else OnnxBackend
+        backend = backend_class(str(model_path), config)
+
+        images = [read_image(path) for path in self.val_images()[:10]]
+        backend.predict(images[0], 0.25)  # Warm-up
+
+        latencies = []
+        for i in range(runs):
+            start = time.perf_counter()
+            backend.predict(images[i % len(images)], 0.25)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        return {
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+            "threads": config.threads
+        }
+
+    # ---------------------------------------------
+    # Report and gate
+    # ---------------------------------------------
+
+    @staticmethod
+    def compare(fp32: Dict, int8: Dict) -> Dict:
+        """Accuracy delta (int8 - fp32) overall and per class"""
+        overall = {}
+        for kind in ("mask", "box"):
+            if kind in fp32["overall"] and kind in int8["overall"]:
+                overall[kind] = {
+                    metric: round(int8["overall"][kind][metric] - value, 4)
+                    for metric, value in fp32["overall"][kind].items()
+                }
+
+        per_class = {}
+        for class_name, reference in fp32["per_class"].items():
+            quantized = int8["per_class"].get(class_name, {})
+            per_class[class_name] = {
+                metric: {
+                    "fp32": round(value, 4),
+                    "int8": round(quantized.get(metric, 0.0), 4),
+                    "delta": round(quantized.get(metric, 0.0) - value, 4)
+                }
+                for metric, value in reference.items()
+            }
+
+        return {"overall": overall, "per_class": per_class}
+
+    @staticmethod
+    def check_gate(comparison: Dict, max_drop: float, max_class_drop: Optional[float]) -> List[str]:
+        """Violations of the accuracy budget (empty list = gate passed)"""
+        violations = []
+        mask = comparison["overall"].get("mask", {})
+        if not mask:
+            violations.append("sin metricas de segmentacion")
+        for metric in ("mAP50", "mAP50-95"):
+            drop = -mask.get(metric, 0.0)
+            if drop > max_drop:
+                violations.append(f"mask {metric} cae {drop:.4f} > {max_drop:.4f}")
+
+        if max_class_drop is not None:
+            for class_name, metrics in comparison["per_class"].items():
+                drop = -metrics.get("mask_mAP50", {}).get("delta", 0.0)
+                if drop > max_class_drop:
+                    violations.append(f"{class_name}: mask mAP50 cae {drop:.4f} > {max_class_drop:.4f}")
+
+        return violations
+
+    def publish(self, int8_path: Path) -> Path:
+        """Copy the INT8 model next to the deployed checkpoint"""
+        target = quantized_model_path(str(self.model_path), self.runtime)
+        if target.exists():
+            shutil.rmtree(target) if target.is_dir() else target.unlink()
+        if int8_path.is_dir():
+            shutil.copytree(int8_path, target)
+        else:
+            shutil.copy2(int8_path, target)
+        return target
+
+    def run(
+        self,
+        max_drop: float,
+        max_class_drop: Optional[float],
+        conf_threshold: float,
+        dry_run: bool = False
+    ) -> Dict:
+        int8_path = self.quantize()
+        fp32_path = Path(export_model(str(self.work_model), self.runtime, self.imgsz))
+
+        print("\n--- FP32 (checkpoint) ---")
+        fp32_metrics = self.evaluate(self.model_path, conf_threshold)
+        print("\n--- INT8 ---")
+        int8_metrics = self.evaluate(int8_path, conf_threshold)
+
+        print("\nMidiendo latencia...")
+        fp32_latency = self.measure_latency(fp32_path)
+        int8_latency = self.measure_latency(int8_path)
+        speedup = fp32_latency["p50_ms"] / int8_latency["p50_ms"] if int8_latency["p50_ms"] else 0.0
+
+        comparison = self.compare(fp32_metrics, int8_metrics)
+        violations = self.check_gate(comparison, max_drop, max_class_drop)
+        passed = not violations
+
+        published_path = None
+        if passed and not dry_run:
+            published_path = self.publish(int8_path)
+
+        report = {
+            "evaluation_date": datetime.now().isoformat(),
+            "model_path": str(self.model_path),
+            "runtime": self.runtime,
+            "data_config": self.data_config,
+            "calibration_images": len(self.val_images()),
+            "latency": {
+                "fp32": fp32_latency,
+                "int8": int8_latency,
+                "speedup_p50": round(speedup, 2)
+            },
+            "accuracy_delta": comparison,
+            "gate": {
+                "max_drop": max_drop,
+                "max_class_drop": max_class_drop,
+                "passed": passed,
+                "violations": violations
+            },
+            "published_path": str(published_path) if published_path else None,
+            "work_dir": str(self.work_dir)
+        }
+
+        report_path = self.work_dir / "int8_report.json"
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        if published_path:
+            shutil.copy2(report_path, published_path.parent / f"{self.model_path.stem}_int8_report.json")
+
+        self._print_report(report)
+        print(f"\nReporte guardado: {report_path}")
+        return report
+
+    @staticmethod
+    def _print_report(report: Dict):
+        print("\n" + "="*70)
+        print("REPORTE INT8")
+        print("="*70)
+
+        latency = report["latency"]
+        print(f"\nLatencia p50: FP32 {latency['fp32']['p50_ms']}ms -> INT8 {latency['int8']['p50_ms']}ms "
+              f"(speedup {latency['speedup_p50']}x)")
+
+        mask = report["accuracy_delta"]["overall"].get("mask", {})
+        if mask:
+            print(f"Delta mask mAP50: {mask.get('mAP50', 0):+.4f} | mAP50-95: {mask.get('mAP50-95', 0):+.4f} "
+                  f"| recall: {mask.get('recall', 0):+.4f}")
+
+        print(f"\n{'Clase':<26} {'mAP50 fp32':>10} {'int8':>8} {'delta':>8} {'recall d':>9}")
+        for class_name, metrics in sorted(report["accuracy_delta"]["per_class"].items()):
+            ap50 = metrics.get("mask_mAP50", {"fp32": 0, "int8": 0, "delta": 0})
+            recall = metrics.get("mask_recall", {"delta": 0})
+            print(f"{class_name:<26} {ap50['fp32']:>10.4f} {ap50['int8']:>8.4f} "
+                  f"{ap50['delta']:>+8.4f} {recall['delta']:>+9.4f}")
+
+        gate = report["gate"]
+        if gate["passed"]:
+            destination = report["published_path"] or "no publicado (--dry-run)"
+            print(f"\n[OK] Dentro del presupuesto de precision: {destination}")
+        else:
+            print("\n[RECHAZADO] Fuera del presupuesto de precision:")
+            for violation in gate["violations"]:
+                print(f"   - {violation}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Cuantizacion INT8 con control de precision'
+    )
+
+    parser.add_argument('--model', type=str, default='models/best.pt',
+                       help='Checkpoint desplegado (.pt)')
+    parser.add_argument('--data', type=str, default='configs/dataset.yaml',
+                       help='Configuracion del dataset (calibracion sobre split val)')
+    parser.add_argument('--format', type=str, default='openvino', choices=['openvino', 'onnx'],
+                       help='Runtime destino del modelo INT8')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--calibration-images', type=int, default=300,
+                       help='Maximo de imagenes de calibracion')
+    parser.add_argument('--conf', type=float, default=0.25,
+                       help='Confidence threshold para la evaluacion')
+    parser.add_argument('--max-drop', type=float, default=0.01,
+                       help='Caida maxima absoluta de mask mAP50 y mAP50-95')
+    parser.add_argument('--max-class-drop', type=float, default=None,
+                       help='Caida maxima de mask mAP50 por clase (opcional)')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='Evaluar sin publicar en models/')
+
+    args = parser.parse_args()
+
+    quantizer = Int8Quantizer(
+        args.model,
+        args.data,
+        runtime=args.format,
+        imgsz=args.imgsz,
+        calibration_images=args.calibration_images
+    )
+    report = quantizer.run(args.max_drop, args.max_class_drop, args.conf, dry_run=args.dry_run)
+
+    sys.exit(0 if report["gate"]["passed"] else 2)
+
+
+if __name__ == '__main__':
+    main()
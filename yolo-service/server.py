@@ -3,11 +3,14 @@ FastAPI Server for YOLO Dengue Detection Service
 Servidor FastAPI para el Servicio de Detección de Criaderos de Dengue
 
 SEGURIDAD MEJORADA:
-- Rate limiting por IP
+- Rate limiting distribuido (Redis) por IP y por endpoint
 - Validación de MIME type real
 - Límite de tamaño de archivo
 - Sanitización de nombres de archivo
-- ThreadPoolExecutor para inferencia asíncrona
+- Pool de inferencia asíncrona (hilos o procesos)
+- Control de admisión: 503 + Retry-After cuando el servicio está saturado
+- Videos guardados a disco por bloques y decodificados en streaming
+- Arranque con presupuesto de tiempo: listo (/health 200) solo tras el calentamiento
 - Limpieza automática de archivos temporales
 """
 
@@ -20,10 +23,11 @@ import base64
 import re
 import atexit
 from datetime import datetime
+from functools import wraps
 from typing import Optional, List, Dict, Any
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
+from dataclasses import asdict
 
 # Load environment variables from project root
 from dotenv import load_dotenv, find_dotenv
@@ -53,13 +57,15 @@ else:
     else:
         logger.warning("No .env file found, using environment variables only")
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
+# El arranque no usa la red: sin chequeos de conectividad ni descargas de
+# ultralytics (YOLO_OFFLINE=false para permitirlos)
+os.environ.setdefault("YOLO_OFFLINE", "true")
+
+import numpy as np
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+from pydantic import BaseModel, field_validator
 
 # Try to import magic, fallback to extension-only validation in development
 try:
@@ -70,10 +76,19 @@ except (ImportError, OSError):
     import warnings
     warnings.warn("python-magic not available, using extension-only validation (development mode)")
 
-from src.core.detector import detect_breeding_sites
+from src.core.registry import ModelManager, ModelRegistry
+from src.core.shadow import ShadowEvaluator
+from src.core.startup import StartupTracker, load_startup_config
+from src.core.tiling import TILING_MODES, load_tiling_config
+from src.core.preprocess import load_preprocess_config
+from src.core.runtime import load_runtime_config
+from src.core.video import VIDEO_EXTENSIONS, estimate_megapixels, load_video_config, probe_video
 from src.core.evaluator import process_image_for_detection
 from src.utils.file_ops import validate_file_exists
+from src.utils.gps_metadata import extract_image_metadata, parse_metadata_field
+from src.utils.admission import AdmissionController, Overloaded, image_megapixels
 from sentrix_shared.risk_assessment import assess_dengue_risk
+from sentrix_shared.rate_limiting import RateLimit, RateLimiter
 
 # ============================================
 # CONFIGURACIÓN DE SEGURIDAD
@@ -98,15 +113,77 @@ ALLOWED_MIME_TYPES = {
     'image/bmp'
 }
 
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Videos: se guardan a disco por bloques (nunca completos en memoria)
+MAX_VIDEO_SIZE = load_video_config().max_size_mb * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# libmagic solo necesita la cabecera para identificar el formato
+SNIFF_SIZE = 8 * 1024
+
+# Rate limiter: GCRA buckets en Redis compartidos por todos los workers
+# (buckets en proceso si REDIS_URL no está configurado o Redis no responde)
+CLIENT_RATE_LIMIT = RateLimit.parse(os.getenv("YOLO_RATE_LIMIT", "10/minute"))
+ENDPOINT_RATE_LIMIT = RateLimit.parse(os.getenv("YOLO_ENDPOINT_RATE_LIMIT", "120/minute"))
+rate_limiter = RateLimiter(
+    redis_url=os.getenv("REDIS_URL"),
+    prefix="yolo:ratelimit",
+    enabled=os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+)
+
 
-# ThreadPool para inferencia asíncrona (evita bloquear event loop)
-executor = ThreadPoolExecutor(
-    max_workers=int(os.getenv("YOLO_MAX_WORKERS", 4)),
-    thread_name_prefix="yolo_worker"
+def rate_limited(func):
+    """
+    Aplica el presupuesto por IP y el presupuesto global del endpoint
+    en un solo round trip a Redis. Responde 429 con Retry-After.
+    """
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        request: Request = kwargs["request"]
+        client_ip = request.client.host if request.client else "unknown"
+        path = request.url.path
+
+        result = await rate_limiter.hit(
+            (f"ip:{client_ip}:{path}", CLIENT_RATE_LIMIT),
+            (f"endpoint:{path}", ENDPOINT_RATE_LIMIT)
+        )
+        if not result.allowed:
+            logger.warning(f"Rate limit exceeded for {result.key} (retry in {result.retry_after:.1f}s)")
+            raise HTTPException(
+                status_code=429,
+                detail="Rate limit exceeded",
+                headers=result.headers()
+            )
+        return await func(*args, **kwargs)
+
+    return wrapper
+
+# Registro versionado de modelos; el gestor sirve la versión activa con su
+# pool de inferencia (hilos o procesos, YOLO_EXECUTION_MODE) y permite
+# cambiarla en caliente. Se inicia en lifespan.
+model_registry = ModelRegistry()
+model_manager = ModelManager(model_registry)
+shadow = ShadowEvaluator.from_env(model_registry)
+startup = StartupTracker(load_startup_config().budget_seconds)
+MAX_WORKERS = int(os.getenv("YOLO_MAX_WORKERS", 4))
+
+# Control de admisión: limita la cola de inferencia (cantidad, bytes retenidos
+# y espera estimada) en lugar de dejar crecer la cola del executor sin límite
+admission = AdmissionController(
+    max_concurrency=MAX_WORKERS,
+    max_queued=int(os.getenv("YOLO_MAX_QUEUED", 16)),
+    max_queued_bytes=int(os.getenv("YOLO_MAX_QUEUED_MB", 256)) * 1024 * 1024,
+    max_wait_seconds=float(os.getenv("YOLO_MAX_QUEUE_WAIT_SECONDS", 20)),
+    seconds_per_megapixel=float(os.getenv("YOLO_SECONDS_PER_MEGAPIXEL", 0.25))
 )
 
+
+def overloaded_response(exc: Overloaded) -> HTTPException:
+    """503 con Retry-After para que el cliente reintente más tarde"""
+    return HTTPException(
+        status_code=503,
+        detail=f"Service overloaded ({exc.reason}), retry later",
+        headers={"Retry-After": exc.retry_after_header}
+    )
+
 # Tracking de archivos temporales para cleanup
 # Using set instead of WeakSet because str objects don't support weak references
 temp_files = set()
@@ -131,20 +208,56 @@ atexit.register(cleanup_temp_files)
 # LIFESPAN CONTEXT MANAGER
 # ============================================
 
+def run_startup():
+    """
+    Fases de arranque (bloqueante, fuera del event loop): resolve -> load+warmup
+
+    Cada fase se mide y se registra; /health responde 503 hasta terminar.
+    """
+    try:
+        with startup.phase("resolve"):
+            serving_model = resolve_serving_model()
+            logger.info(f"Model: {serving_model.version} ({serving_model.source_path}, {serving_model.size_mb} MB)")
+        with startup.phase("load_and_warmup"):
+            warmup = model_manager.start(serving_model, deadline=startup.deadline)
+        startup.phases["load"] = warmup.get("load_ms", 0.0)
+        startup.phases["warmup"] = round(sum(warmup.get("sizes_ms", {}).values()), 1)
+        startup.details["warmup_sizes_ms"] = warmup.get("sizes_ms", {})
+        startup.details["warmup_skipped"] = warmup.get("skipped", [])
+        if warmup.get("skipped"):
+            logger.warning(f"Warm-up budget exhausted, sizes not warmed: {warmup['skipped']}")
+        startup.finish()
+    except Exception as e:
+        startup.fail(e)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle"""
+    import asyncio
+
     # Startup
     logger.info("Starting YOLO Dengue Detection Service...")
     logger.info(f"Max file size: {MAX_FILE_SIZE / (1024*1024):.1f}MB")
-    logger.info(f"Max workers: {executor._max_workers}")
-    logger.info(f"Model path: {MODEL_PATH}")
+    logger.info(f"Max workers: {MAX_WORKERS} ({os.getenv('YOLO_EXECUTION_MODE', 'thread')} mode)")
+    logger.info(
+        f"Admission: queue={admission.max_queued}, "
+        f"held={admission.max_queued_bytes / (1024*1024):.0f}MB, "
+        f"max wait={admission.max_wait_seconds:.0f}s"
+    )
+    logger.info(f"Inference runtime: {load_runtime_config().runtime} (threads={load_runtime_config().threads})")
+    logger.info(f"Startup budget: {startup.budget_seconds:.0f}s")
+    # En segundo plano: /health/live responde mientras el modelo carga
+    startup_task = asyncio.get_running_loop().run_in_executor(None, run_startup)
 
     yield
 
     # Shutdown
     logger.info("Shutting down YOLO service...")
-    executor.shutdown(wait=True, cancel_futures=True)
+    await startup_task
+    shadow.shutdown()
+    await model_manager.shutdown()
+    await rate_limiter.close()
     cleanup_temp_files()
 
 
@@ -159,10 +272,6 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Add rate limiter to app state
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 # CORS middleware - Configuración segura
 allowed_origins = [
     "http://localhost:8000",  # Backend service
@@ -199,35 +308,45 @@ app.add_middleware(
 # MODELO YOLO
 # ============================================
 
+def allowed_model_path(path: str) -> Optional[Path]:
+    """
+    Resuelve un checkpoint .pt dentro del directorio del servicio
+
+    SEGURIDAD: rechaza rutas fuera del directorio (p. ej. con ..)
+    """
+    model_path = Path(path).resolve()
+    base_dir = Path(__file__).parent.resolve()
+    try:
+        model_path.relative_to(base_dir)
+    except ValueError:
+        logger.error(f"SECURITY: Model path outside allowed directory: {path}")
+        return None
+    if not model_path.exists() or model_path.suffix != '.pt':
+        logger.warning(f"Model not found or invalid: {path}")
+        return None
+    return model_path
+
+
 def find_latest_trained_model():
     """
-    Busca el modelo entrenado más reciente y lo copia a models/best.pt
+    Busca el modelo entrenado más reciente (sin copiarlo ni modificar models/)
 
     Prioridad:
     1. Variable de entorno YOLO_MODEL_PATH (validada)
     2. Último modelo en carpetas de entrenamiento (dengue_seg_*/weights/best.pt)
     3. models/best.pt (modelo entrenado manual)
-    4. Modelos base (yolo11*-seg.pt)
-    """
-    import shutil
+    4. Modelos base locales (models/yolo11*-seg.pt)
 
+    Raises:
+        FileNotFoundError: Si no hay ningún modelo local (no descarga nada)
+    """
     # 1. Variable de entorno (máxima prioridad)
     env_model = os.getenv("YOLO_MODEL_PATH")
     if env_model:
-        # SEGURIDAD: Validar que el path es seguro (no contiene ..)
-        env_model_path = Path(env_model).resolve()
-        base_dir = Path(__file__).parent.resolve()
-
-        try:
-            # Verificar que el modelo esté dentro del directorio permitido
-            env_model_path.relative_to(base_dir)
-            if env_model_path.exists() and env_model_path.suffix == '.pt':
-                logger.info(f"Using model from environment: {env_model_path}")
-                return str(env_model_path)
-            else:
-                logger.warning(f"Model from environment not found or invalid: {env_model}")
-        except ValueError:
-            logger.error(f"SECURITY: Model path outside allowed directory: {env_model}")
+        env_model_path = allowed_model_path(env_model)
+        if env_model_path:
+            logger.info(f"Using model from environment: {env_model_path}")
+            return str(env_model_path)
 
     # 2. Buscar en carpetas de entrenamiento (dengue_seg_*)
     models_dir = Path("models")
@@ -237,14 +356,7 @@ def find_latest_trained_model():
     for folder in training_folders:
         trained_model = folder / "weights" / "best.pt"
         if trained_model.exists():
-            # Copiar el modelo entrenado más reciente a models/best.pt
-            try:
-                shutil.copy2(trained_model, best_pt_path)
-                logger.info(f"Modelo actualizado: {trained_model} -> {best_pt_path}")
-                return str(best_pt_path)
-            except Exception as e:
-                logger.warning(f"No se pudo copiar modelo: {e}")
-                return str(trained_model)
+            return str(trained_model)
 
     # 3. Modelo entrenado en raíz de models/
     if best_pt_path.exists():
@@ -261,34 +373,29 @@ def find_latest_trained_model():
             logger.warning(f"Usando modelo base (no entrenado): {model}")
             return model
 
-    # 5. Descargar modelo base automáticamente si no existe
-    logger.warning("No se encontró ningún modelo local. Descargando yolo11n-seg.pt...")
-    try:
-        from ultralytics import YOLO
-        # YOLO descargará automáticamente el modelo si no existe
-        default_model_name = "yolo11n-seg.pt"
-        model = YOLO(default_model_name)
-
-        # El modelo se descarga al cache de ultralytics, copiarlo a models/
-        models_dir.mkdir(exist_ok=True)
-        target_path = models_dir / default_model_name
-
-        # Obtener la ruta del modelo descargado
-        if hasattr(model, 'model_name'):
-            downloaded_path = model.model_name
-        else:
-            # El modelo ya está cargado, solo necesitamos guardar la referencia
-            logger.info(f"Modelo descargado exitosamente: {default_model_name}")
-            return default_model_name
+    # Sin descargas al arrancar: el modelo debe estar en models/ o en el registro
+    raise FileNotFoundError(
+        "No se encontró ningún modelo YOLO local (models/*.pt). "
+        "Copiar un checkpoint a models/ o definir YOLO_MODEL_PATH"
+    )
 
-        return str(target_path) if target_path.exists() else default_model_name
-    except Exception as e:
-        logger.error(f"Error descargando modelo: {e}")
-        raise FileNotFoundError("No se encontró ningún modelo YOLO disponible y la descarga falló")
 
+def resolve_serving_model():
+    """
+    Versión a servir al iniciar
 
-MODEL_PATH = find_latest_trained_model()
-logger.info(f"Usando modelo: {MODEL_PATH}")
+    La versión activa del registro tiene prioridad (sobrevive reinicios y
+    refleja el último hot swap); YOLO_MODEL_PATH la reemplaza. Sin versión
+    activa, se registra el modelo de find_latest_trained_model().
+    """
+    if not os.getenv("YOLO_MODEL_PATH"):
+        try:
+            active = model_registry.active()
+            if active and os.path.exists(active.path):
+                return active
+        except (KeyError, ValueError) as e:
+            logger.warning(f"Model registry unreadable, ignoring active version: {e}")
+    return model_registry.register(find_latest_trained_model())
 
 
 # ============================================
@@ -316,6 +423,10 @@ async def validate_file_content(file: UploadFile, max_size: int) -> bytes:
     """
     Valida contenido de archivo subido
 
+    El tamaño se comprueba antes de leer (tamaño declarado de la parte o del
+    buffer spooled de Starlette) y el MIME type solo sobre la cabecera
+    (SNIFF_SIZE bytes); el contenido se lee una sola vez al final.
+
     Args:
         file: Archivo subido
         max_size: Tamaño máximo permitido en bytes
@@ -326,36 +437,47 @@ async def validate_file_content(file: UploadFile, max_size: int) -> bytes:
     Raises:
         HTTPException: Si el archivo es inválido
     """
-    # 1. VALIDAR TAMAÑO
-    content = await file.read(max_size + 1)  # Leer 1 byte extra para detectar si es muy grande
+    max_mb = max_size / (1024 * 1024)
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size: {max_mb:.1f}MB"
+    )
 
-    if len(content) > max_size:
-        max_mb = max_size / (1024 * 1024)
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum size: {max_mb:.1f}MB"
-        )
+    # 1. VALIDAR TAMAÑO (sin leer el archivo)
+    size = getattr(file, "size", None)
+    if size is None and file.file.seekable():
+        size = file.file.seek(0, os.SEEK_END)
+        file.file.seek(0)
+    if size is not None and size > max_size:
+        raise too_large
 
-    # 2. VALIDAR MIME TYPE REAL (magic bytes)
+    # 2. VALIDAR MIME TYPE REAL (magic bytes de la cabecera)
     if MAGIC_AVAILABLE:
+        head = await file.read(SNIFF_SIZE)
         try:
-            mime_type = magic.from_buffer(content, mime=True)
-            logger.debug(f"Detected MIME type: {mime_type}")
-
-            if mime_type not in ALLOWED_MIME_TYPES:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Invalid file type: {mime_type}. Allowed types: {', '.join(ALLOWED_MIME_TYPES)}"
-                )
+            mime_type = magic.from_buffer(head, mime=True)
         except Exception as e:
             logger.error(f"MIME type detection failed: {e}")
             raise HTTPException(
                 status_code=400,
                 detail="Could not determine file type"
             )
+        logger.debug(f"Detected MIME type: {mime_type}")
+
+        if mime_type not in ALLOWED_MIME_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid file type: {mime_type}. Allowed types: {', '.join(ALLOWED_MIME_TYPES)}"
+            )
+        await file.seek(0)
     else:
         logger.debug("MIME validation disabled (magic not available)")
 
+    # 3. LEER UNA SOLA VEZ (1 byte extra por si el tamaño no se conocía)
+    content = await file.read(max_size + 1)
+    if len(content) > max_size:
+        raise too_large
+
     return content
 
 
@@ -381,6 +503,47 @@ def create_safe_temp_file(content: bytes, file_ext: str) -> str:
     return temp_file_path
 
 
+async def save_upload_to_temp(file: UploadFile, max_size: int, file_ext: str) -> str:
+    """
+    Guarda un archivo subido en un temporal por bloques
+
+    Args:
+        file: Archivo subido
+        max_size: Tamaño máximo permitido en bytes
+        file_ext: Extensión del archivo
+
+    Returns:
+        Path del archivo temporal creado
+
+    Raises:
+        HTTPException: 413 si supera max_size, 400 si no es un video
+    """
+    with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext, mode='wb') as temp_file:
+        temp_file_path = temp_file.name
+        temp_files.add(temp_file_path)
+        try:
+            written = 0
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                if written == 0 and MAGIC_AVAILABLE:
+                    mime_type = magic.from_buffer(chunk[:SNIFF_SIZE], mime=True)
+                    if not mime_type.startswith("video/"):
+                        raise HTTPException(status_code=400, detail=f"Invalid file type: {mime_type}. Expected a video")
+                written += len(chunk)
+                if written > max_size:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large. Maximum size: {max_size / (1024 * 1024):.1f}MB"
+                    )
+                temp_file.write(chunk)
+        except BaseException:
+            temp_file.close()
+            os.unlink(temp_file_path)
+            temp_files.discard(temp_file_path)
+            raise
+
+    return temp_file_path
+
+
 # ============================================
 # ESQUEMAS DE RESPUESTA
 # ============================================
@@ -395,6 +558,12 @@ class DetectionResult(BaseModel):
     polygon: List[List[float]]
     mask_area: float
 
+    @field_validator("polygon", mode="before")
+    @classmethod
+    def polygon_from_array(cls, value):
+        """El detector entrega polígonos como arrays NumPy (N, 2)"""
+        return value.tolist() if isinstance(value, np.ndarray) else value
+
 
 class LocationInfo(BaseModel):
     """Información de ubicación GPS"""
@@ -423,25 +592,83 @@ class AnalysisResponse(BaseModel):
     location: Optional[LocationInfo] = None
     camera_info: Optional[CameraInfo] = None
     processing_time_ms: int
+    decode_time_ms: Optional[int] = None
+    inference_time_ms: Optional[int] = None
+    tiled: bool = False
+    tiles: int = 0
     model_used: str
+    model_version: Optional[str] = None
     confidence_threshold: float
     processed_image_base64: Optional[str] = None
 
 
+class TrackedDetectionResult(DetectionResult):
+    """Un sitio detectado en un video (seguido entre fotogramas)"""
+    track_id: int
+    first_seen_s: float
+    last_seen_s: float
+    best_frame_s: float
+    frames: int
+
+
+class VideoInfo(BaseModel):
+    """Información del video y del muestreo"""
+    width: int
+    height: int
+    fps: float
+    duration_s: float
+    frames_decoded: int
+    frames_sampled: int
+    truncated: bool = False
+
+
+class VideoAnalysisResponse(BaseModel):
+    """Respuesta del análisis de un video"""
+    analysis_id: str
+    status: str
+    detections: List[TrackedDetectionResult]
+    total_detections: int
+    risk_assessment: Dict[str, Any]
+    location: Optional[LocationInfo] = None
+    video: VideoInfo
+    processing_time_ms: int
+    decode_time_ms: Optional[int] = None
+    inference_time_ms: Optional[int] = None
+    model_used: str
+    model_version: Optional[str] = None
+    confidence_threshold: float
+
+
 # ============================================
 # ENDPOINTS
 # ============================================
 
+@app.get("/health/live")
+async def liveness_check():
+    """
+    Liveness: el proceso responde (también durante el arranque)
+    """
+    return {
+        "status": "alive",
+        "service": "yolo-dengue-detection",
+        "startup": startup.status
+    }
+
+
 @app.get("/health")
 async def health_check():
     """
     Health check mejorado - verifica componentes críticos
+
+    Readiness: 503 mientras el modelo carga y se calienta (o si el arranque
+    falló); 200 solo con el modelo listo para servir.
     """
     import torch
     import psutil
 
     # Verificar modelo existe
-    model_exists = os.path.exists(MODEL_PATH)
+    current_model = model_manager.current
+    model_exists = current_model is not None and os.path.exists(current_model.path)
 
     # Verificar memoria disponible
     memory = psutil.virtual_memory()
@@ -457,48 +684,79 @@ async def health_check():
             "memory_reserved_mb": torch.cuda.memory_reserved(0) / (1024 * 1024)
         }
 
+    # Carga de inferencia (saturation >= 1.0: se rechazan peticiones nuevas)
+    load = admission.snapshot()
+
     # Estado general
     healthy = model_exists and memory_available_mb > 100
+    if current_model is None:
+        status = "starting" if startup.status == "starting" else "failed"
+    elif not healthy:
+        status = "degraded"
+    elif load["saturation"] >= 1.0:
+        status = "saturated"
+    else:
+        status = "healthy"
 
-    return {
-        "status": "healthy" if healthy else "degraded",
+    body = {
+        "status": status,
         "service": "yolo-dengue-detection",
         "version": "2.0.0",
         "timestamp": datetime.now().isoformat(),
+        "saturation": load["saturation"],
+        "load": load,
         "checks": {
             "model_available": model_exists,
-            "model_path": MODEL_PATH if model_exists else None,
+            "model_path": current_model.source_path if model_exists else None,
+            "model_version": current_model.version if current_model else None,
+            "runtime": load_runtime_config().runtime,
+            "tiling": load_tiling_config().mode,
             "memory_available_mb": round(memory_available_mb, 2),
             "gpu_available": gpu_available,
             "gpu_info": gpu_info,
-            "workers_active": executor._threads is not None
+            "workers_active": model_manager.pool is not None and model_manager.pool.snapshot()["running"],
+            "inference_pool": model_manager.pool.snapshot() if model_manager.pool else None,
+            "model_swap": model_manager.swap_state,
+            "shadow": shadow.snapshot(),
+            "startup": startup.snapshot()
         }
     }
+    if current_model is None:
+        return JSONResponse(status_code=503, content=body, headers={"Retry-After": "10"})
+    return body
 
 
 @app.post("/detect", response_model=AnalysisResponse)
-@limiter.limit("10/minute")  # Rate limiting: 10 requests por minuto por IP
+@rate_limited  # Rate limiting: 10 requests por minuto por IP (YOLO_RATE_LIMIT)
 async def detect_dengue_breeding_sites(
-    request: Request,  # Requerido por slowapi
+    request: Request,  # Requerido por rate_limited
     file: UploadFile = File(...),
     confidence_threshold: float = Form(0.5),
-    include_gps: bool = Form(True)
+    include_gps: bool = Form(True),
+    tiling: Optional[str] = Form(None),
+    metadata: Optional[str] = Form(None)
 ):
     """
     Detectar criaderos de dengue en imagen subida
 
     SEGURIDAD:
-    - Rate limiting: 10 req/min por IP
+    - Rate limiting: 10 req/min por IP, 120 req/min por endpoint
     - Max file size: 50MB
     - MIME type validation
     - Sanitized filenames
-    - Async inference con ThreadPoolExecutor
+    - Async inference en pool de hilos o procesos
+    - Admission control: 503 + Retry-After si la cola está llena
 
     Args:
         request: FastAPI request (para rate limiting)
         file: Imagen a procesar
         confidence_threshold: Umbral de confianza (0.1-1.0)
         include_gps: Extraer información GPS de EXIF
+        tiling: Inferencia por teselas (auto, always, never); por defecto
+            la de configs/yolo-service.yaml
+        metadata: GPS y cámara ya extraídos por el backend (JSON con gps y
+            camera, ver sentrix_shared.gps_utils.extract_image_metadata);
+            si falta o es inválido se extraen aquí, una sola vez
 
     Returns:
         AnalysisResponse con detecciones y evaluación de riesgo
@@ -529,15 +787,52 @@ async def detect_dengue_breeding_sites(
             detail="confidence_threshold must be between 0.1 and 1.0"
         )
 
+    if tiling is not None and tiling not in TILING_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"tiling must be one of: {', '.join(TILING_MODES)}"
+        )
+
+    # Modelo aún cargando/calentando (o arranque fallido)
+    if model_manager.current is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model not ready (startup {startup.status})",
+            headers={"Retry-After": "10"}
+        )
+
+    # Rechazar antes de leer el archivo si ya no hay capacidad
+    try:
+        admission.check(int(request.headers.get("content-length") or 0))
+    except Overloaded as e:
+        raise overloaded_response(e)
+
     analysis_id = str(uuid.uuid4())
     start_time = datetime.now()
     temp_file_path = None
     processed_image_path = None
+    ticket = None
 
     try:
         # VALIDAR CONTENIDO DEL ARCHIVO (tamaño y MIME type)
         content = await validate_file_content(file, MAX_FILE_SIZE)
 
+        # ADMISIÓN: costo estimado según la resolución (solo lee la cabecera)
+        try:
+            ticket = admission.admit(len(content), image_megapixels(content))
+        except Overloaded as e:
+            raise overloaded_response(e)
+
+        # METADATOS: una sola extracción por request (o los del backend), sobre
+        # los bytes originales (la conversión HEIC -> JPEG descarta el EXIF)
+        image_metadata = None
+        if include_gps:
+            image_metadata = parse_metadata_field(metadata) if metadata else None
+            if metadata and image_metadata is None:
+                logger.warning("Invalid metadata form field, extracting from the image")
+            if image_metadata is None:
+                image_metadata = extract_image_metadata(content, safe_filename)
+
         # Crear archivo temporal de forma segura
         temp_file_path = create_safe_temp_file(content, file_ext)
         logger.debug(f"Created temp file: {temp_file_path}")
@@ -557,20 +852,35 @@ async def detect_dengue_breeding_sites(
         # Use the processed image path for detection
         processed_image_path = image_processing_result['processed_path']
 
-        # EJECUTAR DETECCIÓN EN THREADPOOL (evita bloquear event loop)
-        import asyncio
-        loop = asyncio.get_event_loop()
-
-        detection_result = await loop.run_in_executor(
-            executor,
-            detect_breeding_sites,
-            MODEL_PATH,
-            processed_image_path,
-            confidence_threshold,
-            include_gps,
-            True,  # save_processed_image
-            None   # output_dir (usar default)
-        )
+        # EJECUTAR DETECCIÓN EN EL POOL (evita bloquear event loop); en modo
+        # proceso los bytes ya leídos viajan por memoria compartida
+        # La versión del modelo queda fijada durante todo el request (hot swap)
+        async with admission.slot(ticket) as run, model_manager.lease() as served:
+            served_model = served.model
+            detection_result = await run(
+                served.pool.detect,
+                processed_image_path,
+                content=content if processed_image_path == temp_file_path else None,
+                conf_threshold=confidence_threshold,
+                include_gps=include_gps,
+                save_processed_image=True,
+                tiling=tiling,
+                metadata=image_metadata
+            )
+
+        # Evaluación en sombra: una fracción del tráfico se replica al modelo
+        # candidato en su propio executor, fuera del camino crítico
+        try:
+            shadow.maybe_mirror(
+                served_model.version,
+                detection_result,
+                content if processed_image_path == temp_file_path else None,
+                processed_image_path,
+                confidence_threshold,
+                tiling
+            )
+        except Exception as e:
+            logger.warning(f"Shadow mirror skipped: {e}")
 
         # Extraer detecciones del resultado
         detections_raw = detection_result.get('detections', [])
@@ -600,17 +910,13 @@ async def detect_dengue_breeding_sites(
         camera_info = None
 
         if include_gps:
-            from src.utils.gps_metadata import extract_image_gps, get_image_camera_info
-
-            logger.info(f"[GPS DEBUG] Extracting GPS from: {temp_file_path}")
-            gps_data = extract_image_gps(temp_file_path)
-            logger.info(f"[GPS DEBUG] GPS data extracted: {gps_data}")
+            gps_data = image_metadata['gps']
 
-            camera_data = get_image_camera_info(temp_file_path)
+            camera_data = image_metadata['camera']
 
             # Procesar datos GPS
             if gps_data and gps_data.get('has_gps'):
-                logger.info(f"[GPS DEBUG] GPS FOUND - Lat: {gps_data.get('latitude')}, Lng: {gps_data.get('longitude')}")
+                logger.debug(f"GPS found in image ({gps_data.get('location_source', 'EXIF_GPS')})")
                 location_info = LocationInfo(
                     has_location=True,
                     latitude=gps_data.get('latitude'),
@@ -619,7 +925,7 @@ async def detect_dengue_breeding_sites(
                     location_source=gps_data.get('location_source', 'EXIF_GPS')
                 )
             else:
-                logger.info(f"[GPS DEBUG] No GPS found in image")
+                logger.debug("No GPS found in image")
                 location_info = LocationInfo(
                     has_location=False,
                     latitude=None,
@@ -639,6 +945,11 @@ async def detect_dengue_breeding_sites(
 
         # Calcular tiempo de procesamiento
         processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
+        if detection_result.get('tiles'):
+            logger.info(
+                f"Tiled inference: {detection_result['tiles']} tiles, "
+                f"inference {detection_result.get('inference_time_ms')}ms of {processing_time}ms"
+            )
 
         # Leer imagen procesada como base64 si existe y no es muy grande
         processed_image_base64 = None
@@ -701,7 +1012,12 @@ async def detect_dengue_breeding_sites(
             location=location_info,
             camera_info=camera_info,
             processing_time_ms=processing_time,
-            model_used=MODEL_PATH,
+            decode_time_ms=detection_result.get('decode_time_ms'),
+            inference_time_ms=detection_result.get('inference_time_ms'),
+            tiled=detection_result.get('tiled_images', 0) > 0,
+            tiles=detection_result.get('tiles', 0),
+            model_used=served_model.source_path,
+            model_version=served_model.version,
             confidence_threshold=confidence_threshold,
             processed_image_base64=processed_image_base64
         )
@@ -726,6 +1042,9 @@ async def detect_dengue_breeding_sites(
             )
 
     finally:
+        if ticket is not None:
+            admission.release(ticket)
+
         # Cleanup de archivos temporales
         if temp_file_path and os.path.exists(temp_file_path):
             try:
@@ -741,11 +1060,175 @@ async def detect_dengue_breeding_sites(
                 logger.warning(f"Failed to cleanup processed file {processed_image_path}: {e}")
 
 
+@app.post("/detect/video", response_model=VideoAnalysisResponse)
+@rate_limited
+async def detect_breeding_sites_in_video(
+    request: Request,  # Requerido por rate_limited
+    file: UploadFile = File(...),
+    confidence_threshold: float = Form(0.5),
+    include_gps: bool = Form(True)
+):
+    """
+    Detectar criaderos de dengue en un video (cada sitio se reporta una vez)
+
+    El video se guarda a disco por bloques y se decodifica en streaming:
+    solo se infieren los fotogramas que cambiaron (muestreo adaptativo), por
+    lotes, y las detecciones se agrupan entre fotogramas (ver src/core/video.py).
+
+    Args:
+        request: FastAPI request (para rate limiting)
+        file: Video (.mp4, .mov, .m4v, .avi, .mkv, .webm)
+        confidence_threshold: Umbral de confianza (0.1-1.0)
+        include_gps: Ubicación de grabación desde los metadatos del contenedor
+
+    Returns:
+        VideoAnalysisResponse con un resultado por sitio
+    """
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No filename provided")
+
+    safe_filename = sanitize_filename(file.filename)
+    file_ext = Path(safe_filename).suffix.lower()
+    if file_ext not in VIDEO_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format: {file_ext}. Supported: {', '.join(VIDEO_EXTENSIONS)}"
+        )
+
+    if not 0.1 <= confidence_threshold <= 1.0:
+        raise HTTPException(
+            status_code=400,
+            detail="confidence_threshold must be between 0.1 and 1.0"
+        )
+
+    if model_manager.current is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model not ready (startup {startup.status})",
+            headers={"Retry-After": "10"}
+        )
+
+    try:
+        admission.check()
+    except Overloaded as e:
+        raise overloaded_response(e)
+
+    analysis_id = str(uuid.uuid4())
+    start_time = datetime.now()
+    temp_file_path = None
+    ticket = None
+
+    try:
+        temp_file_path = await save_upload_to_temp(file, MAX_VIDEO_SIZE, file_ext)
+
+        info = probe_video(temp_file_path)
+        if info is None or not info["width"]:
+            raise HTTPException(status_code=400, detail="Could not decode video")
+
+        # ADMISIÓN: costo según los megapíxeles que llegan al modelo (cada
+        # fotograma reducido al tamaño de entrada); el video queda en disco,
+        # no retiene memoria mientras espera, y no ajusta el costo por MP de fotos
+        input_size = max(
+            load_runtime_config().imgsz,
+            load_preprocess_config().choose_input_size(max(info["width"], info["height"]))
+        )
+        try:
+            ticket = admission.admit(
+                0, estimate_megapixels(info, load_video_config(), input_size), observe=False
+            )
+        except Overloaded as e:
+            raise overloaded_response(e)
+
+        async with admission.slot(ticket) as run, model_manager.lease() as served:
+            served_model = served.model
+            video_result = await run(
+                served.pool.detect_video,
+                temp_file_path,
+                conf_threshold=confidence_threshold,
+                include_gps=include_gps
+            )
+
+        detections_raw = video_result['detections']
+        detections = [
+            TrackedDetectionResult(
+                class_name=det['class'],
+                class_id=det['class_id'],
+                confidence=det['confidence'],
+                risk_level=det['risk_level'],
+                breeding_site_type=det['class'],
+                polygon=det['polygon'],
+                mask_area=det['mask_area'],
+                track_id=det['track_id'],
+                first_seen_s=det['first_seen_s'],
+                last_seen_s=det['last_seen_s'],
+                best_frame_s=det['best_frame_s'],
+                frames=det['frames']
+            )
+            for det in detections_raw
+        ]
+
+        location_info = None
+        gps_data = video_result.get('location')
+        if include_gps:
+            has_gps = bool(gps_data and gps_data.get('has_gps'))
+            location_info = LocationInfo(
+                has_location=has_gps,
+                latitude=gps_data.get('latitude') if has_gps else None,
+                longitude=gps_data.get('longitude') if has_gps else None,
+                altitude_meters=gps_data.get('altitude') if has_gps else None,
+                location_source=gps_data.get('location_source') if has_gps else None
+            )
+
+        processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
+        video = video_result['video']
+        logger.info(
+            f"Video {safe_filename}: {video['frames_sampled']}/{video['frames_decoded']} frames sampled, "
+            f"{len(detections)} sites, inference {video_result.get('inference_time_ms')}ms of {processing_time}ms"
+        )
+
+        return VideoAnalysisResponse(
+            analysis_id=analysis_id,
+            status="completed",
+            detections=detections,
+            total_detections=len(detections),
+            risk_assessment=assess_dengue_risk(detections_raw),
+            location=location_info,
+            video=VideoInfo(**video),
+            processing_time_ms=processing_time,
+            decode_time_ms=video_result.get('decode_time_ms'),
+            inference_time_ms=video_result.get('inference_time_ms'),
+            model_used=served_model.source_path,
+            model_version=served_model.version,
+            confidence_threshold=confidence_threshold
+        )
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        logger.exception(f"Unexpected error processing video: {e}")
+        if os.getenv("ENVIRONMENT") == "production":
+            raise HTTPException(status_code=500, detail="Internal server error processing video")
+        raise HTTPException(status_code=500, detail=f"Error processing video: {str(e)}")
+
+    finally:
+        if ticket is not None:
+            admission.release(ticket)
+
+        if temp_file_path and os.path.exists(temp_file_path):
+            try:
+                os.unlink(temp_file_path)
+                temp_files.discard(temp_file_path)
+            except Exception as e:
+                logger.warning(f"Failed to cleanup temp file {temp_file_path}: {e}")
+
+
 @app.get("/models")
 async def list_available_models():
     """
     Listar modelos disponibles
     """
+    current = model_manager.current
     models_dir = Path("models")
     available_models = []
 
@@ -755,12 +1238,131 @@ async def list_available_models():
                 "name": model_file.name,
                 "path": str(model_file),
                 "size_mb": round(model_file.stat().st_size / 1024 / 1024, 2),
-                "is_current": str(model_file) == MODEL_PATH
+                "is_current": current is not None and Path(current.source_path).resolve() == model_file.resolve()
             })
 
     return {
         "available_models": available_models,
-        "current_model": MODEL_PATH
+        "current_model": current.source_path if current else None,
+        "current_version": current.version if current else None
+    }
+
+
+# ============================================
+# ADMIN: REGISTRO Y HOT SWAP DE MODELOS
+# ============================================
+
+class RegisterModelRequest(BaseModel):
+    """Registrar un checkpoint como nueva versión"""
+    path: str
+    metrics: Dict[str, Any] = {}
+    activate: bool = True
+
+
+# Referencias a los swaps en segundo plano (evita que el GC los cancele)
+_swap_tasks = set()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Endpoints de administración: header X-Admin-Token == YOLO_ADMIN_TOKEN"""
+    import secrets
+
+    expected = os.getenv("YOLO_ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin API disabled (YOLO_ADMIN_TOKEN not set)")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+def schedule_swap(version: str):
+    """Carga, calienta y activa la versión en segundo plano"""
+    import asyncio
+
+    task = asyncio.create_task(model_manager.swap(version))
+    _swap_tasks.add(task)
+    task.add_done_callback(_swap_tasks.discard)
+
+
+@app.get("/admin/models", dependencies=[Depends(require_admin)])
+async def list_model_versions():
+    """Versiones registradas, versión activa y estado del swap"""
+    current = model_manager.current
+    return {
+        "active_version": current.version if current else None,
+        "swap": model_manager.swap_state,
+        "versions": [asdict(version) for version in model_registry.list()]
+    }
+
+
+@app.post("/admin/models", status_code=202, dependencies=[Depends(require_admin)])
+async def register_model_version(body: RegisterModelRequest):
+    """Registra un checkpoint (hash de contenido) y opcionalmente lo activa"""
+    model_path = allowed_model_path(body.path)
+    if model_path is None:
+        raise HTTPException(status_code=400, detail="Model path not found, invalid or outside service directory")
+
+    import asyncio
+    version = await asyncio.get_running_loop().run_in_executor(
+        None, model_registry.register, str(model_path), body.metrics
+    )
+    if body.activate:
+        schedule_swap(version.version)
+    return {"version": asdict(version), "activating": body.activate}
+
+
+@app.post("/admin/models/{version}/activate", status_code=202, dependencies=[Depends(require_admin)])
+async def activate_model_version(version: str):
+    """Cambia el tráfico a una versión registrada (rollback incluido) sin downtime"""
+    try:
+        model_registry.get(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model version not registered: {version}")
+    schedule_swap(version)
+    return {"version": version, "status": "loading"}
+
+
+class ShadowConfigRequest(BaseModel):
+    """Modelo candidato y fracción del tráfico a replicar"""
+    version: str
+    fraction: float = 0.05
+
+
+@app.put("/admin/shadow", dependencies=[Depends(require_admin)])
+async def configure_shadow(body: ShadowConfigRequest):
+    """Replica una fracción de /detect a una versión candidata"""
+    try:
+        shadow.configure(body.version, body.fraction)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model version not registered: {body.version}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return shadow.snapshot()
+
+
+@app.delete("/admin/shadow", dependencies=[Depends(require_admin)])
+async def disable_shadow():
+    """Detiene la evaluación en sombra (los resultados se conservan)"""
+    shadow.configure(None)
+    return shadow.snapshot()
+
+
+@app.get("/admin/shadow/summary", dependencies=[Depends(require_admin)])
+async def shadow_summary(version: Optional[str] = None):
+    """
+    Candidato vs. producción: acuerdo de recall/precisión, IoU, confusión de
+    clases, deltas de confianza y latencia
+    """
+    version = version or (shadow.candidate.version if shadow.candidate else None)
+    if not version:
+        raise HTTPException(status_code=400, detail="No candidate configured; pass ?version=")
+
+    import asyncio
+    summary = await asyncio.get_running_loop().run_in_executor(None, shadow.store.summary, version)
+    current = model_manager.current
+    return {
+        "production_version": current.version if current else None,
+        "shadow": shadow.snapshot(),
+        "summary": summary
     }
 
 
@@ -772,20 +1374,13 @@ if __name__ == "__main__":
     import uvicorn
 
     # Setup logging
-    from sentrix_shared.logging_utils import setup_yolo_logging, log_system_info, log_model_info
+    from sentrix_shared.logging_utils import setup_yolo_logging, log_system_info
 
     logger = setup_yolo_logging('INFO')
 
     # Log system info
     log_system_info(logger, "YOLO Dengue Detection Service", "2.0.0")
 
-    # Log model info
-    if os.path.exists(MODEL_PATH):
-        model_size_mb = os.path.getsize(MODEL_PATH) / (1024 * 1024)
-        log_model_info(logger, MODEL_PATH, model_size_mb)
-    else:
-        logger.warning(f"Model not found at: {MODEL_PATH}")
-
     # Get port from environment variable
     port = int(os.getenv("YOLO_SERVICE_PORT", "8001"))
 
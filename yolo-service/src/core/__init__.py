@@ -5,10 +5,12 @@ Funcionalidades principales para detección de criaderos de dengue
 
 from .trainer import train_dengue_model
 from .detector import detect_breeding_sites
+from .video import detect_video
 from .evaluator import assess_dengue_risk
 
 __all__ = [
     'train_dengue_model',
     'detect_breeding_sites',
+    'detect_video',
     'assess_dengue_risk'
 ]
\ No newline at end of file
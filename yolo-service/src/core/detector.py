@@ -4,14 +4,21 @@ Módulo de detección para criaderos de dengue
 """
 
 import os
+import glob
 import logging
+import time
 import cv2
 import numpy as np
 from pathlib import Path
-from ultralytics import YOLO
 
 from configs.classes import DENGUE_CLASSES, RISK_LEVEL_BY_ID
-from ..utils import validate_model_file, validate_file_exists, cleanup_unwanted_downloads, extract_image_gps, get_image_camera_info
+from ..utils import (
+    validate_model_file, validate_file_exists, cleanup_unwanted_downloads,
+    extract_image_metadata, get_image_extensions
+)
+from .runtime import get_backend, read_image
+from .preprocess import prepare_image, scale_segments
+from .tiling import predict_image, resolve_tiling
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +35,16 @@ BREEDING_SITE_COLORS = {
 DEFAULT_COLOR = (200, 200, 200)  # Gris
 
 
-def detect_breeding_sites(model_path, source, conf_threshold=0.5, include_gps=True, save_processed_image=True, output_dir=None):
+def _list_images(directory):
+    """Imágenes de un directorio (extensiones soportadas)"""
+    image_files = set()
+    for ext in get_image_extensions():
+        image_files.update(glob.glob(os.path.join(directory, ext)))
+        image_files.update(glob.glob(os.path.join(directory, ext.upper())))
+    return sorted(image_files)
+
+
+def detect_breeding_sites(model_path, source, conf_threshold=0.5, include_gps=True, save_processed_image=True, output_dir=None, runtime=None, tiling=None, image_bytes=None, metadata=None):
     """
     Detecta sitios de cría en imágenes usando modelo entrenado
 
@@ -39,73 +55,118 @@ def detect_breeding_sites(model_path, source, conf_threshold=0.5, include_gps=Tr
         include_gps (bool): Incluir información GPS en cada detección
         save_processed_image (bool): Guardar imagen procesada con detecciones marcadas
         output_dir (str): Directorio donde guardar imagen procesada
+        runtime (str): Runtime de inferencia (torch, onnx, openvino);
+            por defecto el de configs/yolo-service.yaml
+        tiling (str): Modo de teselado (auto, always, never);
+            por defecto el de configs/yolo-service.yaml
+        image_bytes (bytes): Contenido codificado de `source` (opcional,
+            evita releer el archivo; solo para imágenes individuales)
+        metadata (dict): GPS y cámara ya extraídos ({'gps', 'camera'}, ver
+            extract_image_metadata); si se omite se extraen aquí
 
     Returns:
-        dict: Detecciones y ruta de imagen procesada (si se guarda)
+        dict: Detecciones (polígonos en coordenadas de la imagen original),
+            ruta de imagen procesada (si se guarda) y tiempos de
+            decodificación/inferencia/teselado
     """
     validate_model_file(model_path)
     validate_file_exists(source, "Imagen/directorio")
 
     try:
-        os.environ['YOLO_VERBOSE'] = 'False'
-        model = YOLO(model_path)
-        results = model(source, conf=conf_threshold, task='segment')
-
-        # Extraer información GPS una sola vez por imagen
+        # Backend cacheado por hilo: el modelo se carga una sola vez
+        backend = get_backend(model_path, runtime)
+        tiling_config = resolve_tiling(tiling)
+        image_paths = [source] if os.path.isfile(source) else _list_images(source)
+        results = []
+        first_image = None
+        first_scale = 1.0
+        decode_seconds = 0.0
+        inference_seconds = 0.0
+        input_sizes = []
+        tiled_images = 0
+        tiles = 0
+        for image_path in image_paths:
+            data = image_bytes if image_bytes is not None and image_path == source else image_path
+
+            # Decodificación reducida (DCT) al tamaño de entrada elegido
+            start = time.perf_counter()
+            image, scale, imgsz = prepare_image(data, backend, tiling_config)
+            decode_seconds += time.perf_counter() - start
+            if first_image is None:
+                first_image, first_scale = image, scale
+
+            start = time.perf_counter()
+            segments, tile_count = predict_image(backend, image, conf_threshold, tiling_config, imgsz)
+            inference_seconds += time.perf_counter() - start
+            tiled_images += 1 if tile_count else 0
+            tiles += tile_count
+            input_sizes.append(imgsz or backend.config.imgsz)
+            results.append(scale_segments(segments, scale))
+
+        # Extraer información GPS una sola vez por imagen (una sola lectura de
+        # los segmentos EXIF/XMP, o los metadatos que ya envió el backend)
         gps_data = None
         camera_info = None
         if include_gps and os.path.isfile(source):  # Solo para imágenes individuales
-            gps_data = extract_image_gps(source)
-            camera_info = get_image_camera_info(source)
+            if metadata is None:
+                data = bytes(image_bytes) if image_bytes is not None else Path(source).read_bytes()
+                metadata = extract_image_metadata(data, os.path.basename(source))
+            gps_data = metadata['gps']
+            camera_info = metadata['camera']
 
         detections = []
         processed_image_path = None
 
         # Process each result
-        for result in results:
-            if result.masks is not None:
-                for i, mask in enumerate(result.masks):
-                    class_id = int(result.boxes.cls[i])
-                    polygon_coords = mask.xy[0].tolist()
-
-                    # Crear detección básica
-                    detection = {
-                        'class': DENGUE_CLASSES.get(class_id, f"Clase_{class_id}"),
-                        'class_id': class_id,
-                        'confidence': float(result.boxes.conf[i]),
-                        'polygon': polygon_coords,
-                        'mask_area': float(mask.data.sum()),
-                        'risk_level': RISK_LEVEL_BY_ID.get(class_id, 'BAJO')
+        for segments in results:
+            for segment in segments:
+                class_id = segment.class_id
+
+                # Crear detección básica
+                detection = {
+                    'class': DENGUE_CLASSES.get(class_id, f"Clase_{class_id}"),
+                    'class_id': class_id,
+                    'confidence': segment.confidence,
+                    'polygon': segment.polygon,  # float32 (N, 2); se serializa en la respuesta
+                    'mask_area': segment.mask_area,
+                    'risk_level': RISK_LEVEL_BY_ID.get(class_id, 'BAJO')
+                }
+
+                # Agregar información GPS si está disponible
+                if include_gps and gps_data:
+                    detection['location'] = _create_detection_location(gps_data, camera_info, detection)
+                elif include_gps:
+                    detection['location'] = {
+                        'has_location': False,
+                        'reason': 'No GPS data available in image'
+                    }
+
+                # Agregar metadata de imagen
+                if include_gps:
+                    detection['image_metadata'] = {
+                        'source_file': os.path.basename(source) if os.path.isfile(source) else 'multiple_files',
+                        'detection_timestamp': None,  # Se puede agregar en el futuro
+                        'camera_info': camera_info
                     }
 
-                    # Agregar información GPS si está disponible
-                    if include_gps and gps_data:
-                        detection['location'] = _create_detection_location(gps_data, camera_info, detection)
-                    elif include_gps:
-                        detection['location'] = {
-                            'has_location': False,
-                            'reason': 'No GPS data available in image'
-                        }
-
-                    # Agregar metadata de imagen
-                    if include_gps:
-                        detection['image_metadata'] = {
-                            'source_file': os.path.basename(source) if os.path.isfile(source) else 'multiple_files',
-                            'detection_timestamp': None,  # Se puede agregar en el futuro
-                            'camera_info': camera_info
-                        }
-
-                    detections.append(detection)
+                detections.append(detection)
 
         # Crear imagen procesada con detecciones marcadas
         if save_processed_image and os.path.isfile(source) and results:
-            processed_image_path = _create_processed_image(source, results[0], output_dir)
+            processed_image_path = _create_processed_image(
+                source, results[0], output_dir, image=first_image, scale=first_scale
+            )
 
         return {
             'detections': detections,
             'processed_image_path': processed_image_path,
             'source_path': source,
-            'total_detections': len(detections)
+            'total_detections': len(detections),
+            'decode_time_ms': int(decode_seconds * 1000),
+            'inference_time_ms': int(inference_seconds * 1000),
+            'input_size': input_sizes[0] if len(input_sizes) == 1 else input_sizes,
+            'tiled_images': tiled_images,
+            'tiles': tiles
         }
 
     except Exception as e:
@@ -166,7 +227,7 @@ def _create_detection_location(gps_data, camera_info, detection):
     return location
 
 
-def _create_processed_image(source_path, result, output_dir=None):
+def _create_processed_image(source_path, segments, output_dir=None, image=None, scale=1.0):
     """
     Crear imagen procesada con detecciones marcadas en colores distintivos
 
@@ -178,17 +239,18 @@ def _create_processed_image(source_path, result, output_dir=None):
 
     Args:
         source_path (str): Ruta de la imagen original
-        result: Resultado de YOLO con detecciones
+        segments (list): Detecciones segmentadas (runtime.Segment)
         output_dir (str): Directorio de salida (opcional)
+        image (np.ndarray): Imagen original ya decodificada (opcional)
+        scale (float): Escala de `image` respecto a la original (decodificación
+            reducida); se dibuja sobre la imagen reducida
 
     Returns:
         str: Ruta de la imagen procesada generada
     """
     try:
-        # Leer imagen original
-        image = cv2.imread(source_path)
-        if image is None:
-            raise ValueError(f"No se pudo cargar la imagen: {source_path}")
+        # Leer imagen original (copia: se dibuja sobre ella)
+        image = read_image(source_path) if image is None else image.copy()
 
         # Configurar directorio de salida
         if output_dir is None:
@@ -203,14 +265,12 @@ def _create_processed_image(source_path, result, output_dir=None):
         output_path = output_dir / f"{base_name}_processed.jpg"
 
         # Dibujar detecciones si existen
-        if result.masks is not None and result.boxes is not None:
-            for i, mask in enumerate(result.masks):
-                class_id = int(result.boxes.cls[i])
-                confidence = float(result.boxes.conf[i])
-                class_name = DENGUE_CLASSES.get(class_id, f"Clase_{class_id}")
+        if segments:
+            for segment in segments:
+                class_name = DENGUE_CLASSES.get(segment.class_id, f"Clase_{segment.class_id}")
 
                 # Obtener polígono de la máscara
-                polygon = mask.xy[0].astype(np.int32)
+                polygon = (segment.polygon / scale).astype(np.int32)
 
                 # Obtener color específico para este tipo de criadero
                 color = BREEDING_SITE_COLORS.get(class_name, DEFAULT_COLOR)
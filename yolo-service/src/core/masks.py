@@ -0,0 +1,151 @@
+"""
+Vectorized mask post-processing
+Post-procesamiento vectorizado de máscaras
+
+The per-detection path (ultralytics `Masks.xy`) converts every mask to its
+own uint8 array, runs findContours on the full input-sized mask, rescales
+each contour separately and the detector then turns each polygon into
+Python float lists. With many detections that overhead dominates.
+
+Here the whole mask stack is handled at once:
+
+- bounding boxes: row/column projections of the whole stack;
+- contours: every mask is cropped to its bounding box, the crops are
+  stacked in one atlas (separated by empty rows/columns) and a single
+  findContours call runs over it; contours are assigned back by row;
+- areas: one reduction over the atlas (only pixels inside the boxes);
+- scaling from the letterboxed input to the original image: one
+  vectorized transform over all points;
+- optional simplification (approxPolyDP) in original image pixels.
+
+Contours match ultralytics' masks2segments(strategy="all") point for
+point, so every runtime keeps returning the same polygons.
+"""
+
+from typing import List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+def _bounds(masks: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Bounding rows/columns of every mask ([y0, y1), [x0, x1)) and which masks are non-empty"""
+    rows = masks.any(axis=2)
+    cols = masks.any(axis=1)
+    height, width = masks.shape[1:]
+    y0 = rows.argmax(axis=1)
+    y1 = height - rows[:, ::-1].argmax(axis=1)
+    x0 = cols.argmax(axis=1)
+    x1 = width - cols[:, ::-1].argmax(axis=1)
+    return y0, y1, x0, x1, rows.any(axis=1)
+
+
+def masks_to_contours(masks: np.ndarray) -> Tuple[List[np.ndarray], np.ndarray]:
+    """
+    External contours and areas of N binary masks with one findContours call
+
+    Args:
+        masks: (N, H, W) binary masks (bool preferred, or uint8 0/1)
+
+    Returns:
+        (contours, areas): one float32 (K, 2) contour per mask in mask
+        pixels (empty masks give (0, 2)), masks with several blobs merged
+        as in ultralytics' masks2segments(strategy="all"); pixels per mask
+    """
+    contours: List[np.ndarray] = [np.zeros((0, 2), dtype=np.float32) for _ in range(len(masks))]
+    areas = np.zeros(len(masks), dtype=np.float64)
+    if not len(masks):
+        return contours, areas
+
+    y0, y1, x0, x1, present = _bounds(masks)
+    index = np.flatnonzero(present)
+    if not len(index):
+        return contours, areas
+
+    # Crops stacked vertically: one empty row between crops, one empty
+    # column on the left, so contours of different masks never touch
+    heights = y1[index] - y0[index]
+    tops = np.concatenate([[1], 1 + np.cumsum(heights + 1)[:-1]])
+    atlas = np.zeros((int(tops[-1] + heights[-1] + 1), int((x1[index] - x0[index]).max() + 2)), dtype=np.uint8)
+    for i, top in zip(index, tops):
+        crop = masks[i, y0[i]:y1[i], x0[i]:x1[i]]
+        atlas[top:top + crop.shape[0], 1:1 + crop.shape[1]] = crop
+
+    # Areas: one reduction over the (small) atlas instead of the full stack
+    areas[index] = np.add.reduceat(np.count_nonzero(atlas, axis=1), tops)
+
+    found = cv2.findContours(atlas, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]
+
+    # Owner crop of each contour, from the row of its first point
+    first_rows = np.array([c[0, 0, 1] for c in found])
+    owners = index[np.searchsorted(tops, first_rows, side="right") - 1]
+
+    groups = {}
+    for owner, contour in zip(owners, found):
+        groups.setdefault(owner, []).append(contour.reshape(-1, 2))
+    for owner, parts in groups.items():
+        top = tops[np.searchsorted(index, owner)]
+        points = parts[0] if len(parts) == 1 else _merge_parts(parts)
+        contours[owner] = (points + (x0[owner] - 1, y0[owner] - top)).astype(np.float32)
+    return contours, areas
+
+
+def _merge_parts(parts: List[np.ndarray]) -> np.ndarray:
+    """Join the blobs of one mask into a single polygon (ultralytics merge_multi_segment)"""
+    from ultralytics.data.converter import merge_multi_segment
+
+    return np.concatenate(merge_multi_segment(parts))
+
+
+def scale_polygons(
+    polygons: Sequence[np.ndarray],
+    mask_shape: Tuple[int, int],
+    image_shape: Tuple[int, ...]
+) -> List[np.ndarray]:
+    """
+    Map polygons from the letterboxed mask to original image pixels
+
+    Same transform as ultralytics' scale_coords (centered padding, clipped
+    to the image), applied once to all points.
+    """
+    if not len(polygons):
+        return []
+    height, width = image_shape[:2]
+    gain = min(mask_shape[0] / height, mask_shape[1] / width)
+    pad = np.array([(mask_shape[1] - width * gain) / 2, (mask_shape[0] - height * gain) / 2], dtype=np.float32)
+
+    points = (np.concatenate(polygons) - pad) / np.float32(gain)
+    np.clip(points[:, 0], 0, width, out=points[:, 0])
+    np.clip(points[:, 1], 0, height, out=points[:, 1])
+    return np.split(points, np.cumsum([len(p) for p in polygons])[:-1])
+
+
+def simplify_polygons(polygons: Sequence[np.ndarray], epsilon: float) -> List[np.ndarray]:
+    """Douglas-Peucker simplification with tolerance `epsilon` pixels (0 = unchanged)"""
+    if epsilon <= 0:
+        return list(polygons)
+    return [
+        cv2.approxPolyDP(p.reshape(-1, 1, 2), epsilon, True).reshape(-1, 2) if len(p) > 3 else p
+        for p in polygons
+    ]
+
+
+def masks_to_polygons(
+    masks: np.ndarray,
+    image_shape: Tuple[int, ...],
+    epsilon: float = 0.0
+) -> Tuple[List[np.ndarray], np.ndarray]:
+    """
+    Polygons (original image pixels) and areas (mask pixels) for a mask stack
+
+    Args:
+        masks: (N, H, W) binary masks at model input resolution
+        image_shape: Shape of the original image
+        epsilon: Simplification tolerance in original pixels (0 = off)
+
+    Returns:
+        (polygons, areas)
+    """
+    contours, areas = masks_to_contours(masks)
+    polygons = scale_polygons(contours, masks.shape[1:], image_shape)
+    return simplify_polygons(polygons, epsilon), areas
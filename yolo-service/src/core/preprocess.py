@@ -0,0 +1,192 @@
+"""
+Image preprocessing: draft decode and resolution-adaptive input size
+Preprocesamiento: decodificación reducida y tamaño de entrada adaptativo
+
+Most uploads are ~12 MP phone photos, while the model runs at 640 px. Fully
+decoding 4000x3000 pixels to throw most of them away is the dominant cost
+before inference, so:
+
+1. The input size is chosen per image: the smallest of `input_sizes` at
+   which the smallest object of interest (per class, as a fraction of the
+   image's longest side) still spans `min_detectable_px` model pixels, and
+   never larger than the image itself.
+2. JPEGs are decoded already downscaled in the DCT domain (libjpeg scaling
+   by 1/2, 1/4 or 1/8 through OpenCV's IMREAD_REDUCED_* flags), keeping
+   at least the chosen input size on the longest side.
+3. The backend letterboxes the decoded image to the chosen size; polygons
+   are mapped back to original image coordinates with `scale`.
+
+Exported models (ONNX/OpenVINO) have a static input size, so for them only
+the decode step adapts.
+
+Configuration: `preprocessing` section of configs/yolo-service.yaml.
+"""
+
+import io
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+import yaml
+from PIL import Image
+
+from ..utils.paths import get_configs_dir
+from .runtime import InferenceBackend, Segment
+from .tiling import TilingConfig
+
+# DCT-domain reduction factors supported by libjpeg through OpenCV
+_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+@dataclass(frozen=True)
+class PreprocessConfig:
+    """Preprocessing settings (preprocessing section of yolo-service.yaml)"""
+    draft_decode: bool = True
+    input_sizes: Tuple[int, ...] = (320, 480, 640, 960, 1280)
+    min_detectable_px: int = 12
+    # Smallest object of interest per class, as a fraction of the longest side
+    min_object_fraction: Dict[str, float] = field(default_factory=dict, hash=False)
+    default_object_fraction: float = 0.02
+
+    def required_size(self) -> int:
+        """Input size at which every class's smallest object stays detectable"""
+        fractions = list(self.min_object_fraction.values()) or [self.default_object_fraction]
+        return int(np.ceil(self.min_detectable_px / min(fractions)))
+
+    def choose_input_size(self, image_long_side: int) -> int:
+        """
+        Smallest configured size meeting the object-size requirement
+
+        The requirement is capped at the image's own long side: upsampling
+        beyond native resolution adds no detail.
+        """
+        sizes = sorted(self.input_sizes)
+        needed = min(self.required_size(), image_long_side)
+        return next((size for size in sizes if size >= needed), sizes[-1])
+
+
+@lru_cache(maxsize=8)
+def load_preprocess_config(config_path: Optional[str] = None) -> PreprocessConfig:
+    """
+    Carga la configuración de preprocesamiento (cacheada)
+
+    Environment override: YOLO_DRAFT_DECODE (true/false).
+    """
+    path = Path(config_path) if config_path else get_configs_dir() / "yolo-service.yaml"
+    config: Dict = {}
+    if path.exists():
+        with open(path, encoding="utf-8") as f:
+            config = (yaml.safe_load(f) or {}).get("preprocessing", {}) or {}
+
+    draft = os.getenv("YOLO_DRAFT_DECODE")
+    draft_decode = (draft.lower() in ("1", "true", "yes")) if draft else bool(config.get("draft_decode", True))
+    sizes = tuple(sorted(int(s) for s in config.get("input_sizes", PreprocessConfig.input_sizes)))
+    if not sizes or any(s % 32 for s in sizes):
+        raise ValueError(f"input_sizes deben ser múltiplos de 32: {sizes}")
+
+    return PreprocessConfig(
+        draft_decode=draft_decode,
+        input_sizes=sizes,
+        min_detectable_px=int(config.get("min_detectable_px", 12)),
+        min_object_fraction={k: float(v) for k, v in (config.get("min_object_fraction") or {}).items()},
+        default_object_fraction=float(config.get("default_object_fraction", 0.02))
+    )
+
+
+def image_size(source: Union[str, bytes, np.ndarray]) -> Optional[Tuple[int, int]]:
+    """(width, height) from the file header, without decoding the pixels"""
+    try:
+        if isinstance(source, str):
+            with Image.open(source) as img:
+                return img.size
+        with Image.open(io.BytesIO(memoryview(source))) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+def reduction_factor(long_side: int, target: int) -> int:
+    """Largest DCT reduction that keeps at least `target` pixels on the long side"""
+    factor = 1
+    for candidate in (2, 4, 8):
+        if long_side // candidate >= target:
+            factor = candidate
+    return factor
+
+
+def decode_image(
+    source: Union[str, bytes, np.ndarray],
+    target_long_side: Optional[int] = None,
+    size: Optional[Tuple[int, int]] = None
+) -> Tuple[np.ndarray, float]:
+    """
+    Decode a BGR image, downscaled in the DCT domain when possible
+
+    Args:
+        source: Path or encoded bytes
+        target_long_side: Minimum long side needed (None = full resolution)
+        size: (width, height) from the header, if already known
+
+    Returns:
+        (image, scale): multiply coordinates in `image` by scale to get
+        original image coordinates
+
+    Raises:
+        ValueError: If the image cannot be decoded
+    """
+    if target_long_side and size is None:
+        size = image_size(source)
+    factor = reduction_factor(max(size), target_long_side) if size and target_long_side else 1
+
+    buffer = np.fromfile(source, np.uint8) if isinstance(source, str) else np.frombuffer(source, np.uint8)
+    image = cv2.imdecode(buffer, _REDUCED_FLAGS[factor])
+    if image is None:
+        raise ValueError(f"No se pudo cargar la imagen: {source if isinstance(source, str) else 'bytes'}")
+
+    # Orientation-independent: EXIF rotation may swap width and height
+    scale = max(size) / max(image.shape[:2]) if size else 1.0
+    return image, scale
+
+
+def prepare_image(
+    source: Union[str, bytes, np.ndarray],
+    backend: InferenceBackend,
+    tiling_config: TilingConfig,
+    config: Optional[PreprocessConfig] = None
+) -> Tuple[np.ndarray, float, Optional[int]]:
+    """
+    Decode an image for inference
+
+    Full resolution when it will be tiled; otherwise reduced to the input
+    size chosen by the policy (or the backend's static size).
+
+    Returns:
+        (image, scale to original coordinates, input size for predict)
+    """
+    config = config or load_preprocess_config()
+    size = image_size(source)
+    if size is None or tiling_config.should_tile((size[1], size[0])):
+        image, scale = decode_image(source)
+        return image, scale, None
+
+    imgsz = config.choose_input_size(max(size)) if backend.dynamic_input else None
+    target = (imgsz or backend.config.imgsz) if config.draft_decode else None
+    image, scale = decode_image(source, target, size)
+    return image, scale, imgsz
+
+
+def scale_segments(segments: List[Segment], scale: float) -> List[Segment]:
+    """Map polygons from the decoded image back to original coordinates"""
+    if scale != 1.0:
+        for segment in segments:
+            segment.polygon = segment.polygon * scale
+    return segments
@@ -0,0 +1,277 @@
+"""
+Versioned model registry and zero-downtime hot swap
+Registro versionado de modelos y cambio en caliente sin downtime
+
+Registry (models/registry/):
+    <version>/model.pt    immutable copy of the checkpoint
+    registry.json         versions (content hash, metrics, created_at) and
+                          the active version
+
+The version is derived from the checkpoint content (sha256), so registering
+the same weights twice returns the existing version.
+
+ModelManager serves one active version at a time. A swap loads and warms a
+new inference pool in the background, switches traffic atomically (requests
+lease the active version for their whole duration) and shuts down the old
+pool once its in-flight requests have drained.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import threading
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from sentrix_shared.logging_utils import get_module_logger
+
+from ..utils.paths import get_models_dir
+from .worker_pool import InferencePool
+
+logger = get_module_logger(__name__, 'yolo-service')
+
+DRAIN_TIMEOUT_SECONDS = float(os.getenv("YOLO_MODEL_DRAIN_TIMEOUT_SECONDS", 300))
+
+
+@dataclass
+class ModelVersion:
+    """Una versión registrada del modelo"""
+    version: str
+    sha256: str
+    path: str
+    source_path: str
+    created_at: str
+    size_mb: float
+    metrics: Dict[str, Any] = field(default_factory=dict)
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hash del contenido, leído por bloques"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    File-based registry of model versions
+
+    Args:
+        root: Registry directory (default: models/registry)
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else get_models_dir() / "registry"
+        self.index_path = self.root / "registry.json"
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, Any]:
+        if not self.index_path.exists():
+            return {"active": None, "versions": {}}
+        with open(self.index_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write(self, index: Dict[str, Any]):
+        """Atomic replace: readers never see a partial index"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def register(self, source_path: str, metrics: Optional[Dict[str, Any]] = None) -> ModelVersion:
+        """
+        Registra un checkpoint (idempotente por contenido)
+
+        Raises:
+            FileNotFoundError: If the checkpoint does not exist
+            ValueError: If it is not a .pt file
+        """
+        source = Path(source_path)
+        if not source.is_file():
+            raise FileNotFoundError(f"Modelo no encontrado: {source_path}")
+        if source.suffix != ".pt":
+            raise ValueError(f"Se esperaba un checkpoint .pt: {source_path}")
+
+        sha256 = file_sha256(str(source))
+        version = sha256[:12]
+
+        with self._lock:
+            index = self._read()
+            existing = index["versions"].get(version)
+            if existing:
+                if metrics:
+                    existing["metrics"] = {**existing.get("metrics", {}), **metrics}
+                    self._write(index)
+                return ModelVersion(**existing)
+
+            target = self.root / version / "model.pt"
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_target = target.with_suffix(".pt.tmp")
+            shutil.copy2(source, tmp_target)
+            os.replace(tmp_target, target)
+
+            entry = ModelVersion(
+                version=version,
+                sha256=sha256,
+                path=str(target),
+                source_path=str(source),
+                created_at=datetime.now(timezone.utc).isoformat(),
+                size_mb=round(target.stat().st_size / (1024 * 1024), 2),
+                metrics=metrics or {}
+            )
+            index["versions"][version] = asdict(entry)
+            self._write(index)
+
+        logger.info(f"Registered model version {version} from {source}")
+        return entry
+
+    def get(self, version: str) -> ModelVersion:
+        """
+        Raises:
+            KeyError: If the version is not registered
+        """
+        entry = self._read()["versions"].get(version)
+        if entry is None:
+            raise KeyError(f"Versión de modelo no registrada: {version}")
+        return ModelVersion(**entry)
+
+    def list(self) -> List[ModelVersion]:
+        """Versiones registradas, la más reciente primero"""
+        versions = [ModelVersion(**entry) for entry in self._read()["versions"].values()]
+        return sorted(versions, key=lambda v: v.created_at, reverse=True)
+
+    def active(self) -> Optional[ModelVersion]:
+        version = self._read().get("active")
+        return self.get(version) if version else None
+
+    def set_active(self, version: str):
+        with self._lock:
+            index = self._read()
+            if version not in index["versions"]:
+                raise KeyError(f"Versión de modelo no registrada: {version}")
+            index["active"] = version
+            self._write(index)
+
+
+class _ActiveModel:
+    """Versión servida + su pool, con conteo de requests en curso"""
+
+    def __init__(self, model: ModelVersion, pool: InferencePool):
+        self.model = model
+        self.pool = pool
+        self.in_flight = 0
+        self.retired = False
+        self.drained = asyncio.Event()
+
+
+class ModelManager:
+    """
+    Serves the active model version and swaps versions without downtime
+
+    Args:
+        registry: Model registry
+        pool_factory: Creates an (unstarted) InferencePool
+    """
+
+    def __init__(self, registry: ModelRegistry, pool_factory: Callable[[], InferencePool] = InferencePool.from_env):
+        self.registry = registry
+        self.pool_factory = pool_factory
+        self._active: Optional[_ActiveModel] = None
+        self._swap_lock = asyncio.Lock()
+        self.swap_state: Dict[str, Any] = {"status": "idle"}
+
+    def start(self, model: ModelVersion, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Load and warm the initial version (blocking, at startup)
+
+        Returns:
+            Warm-up report of the pool
+        """
+        pool = self.pool_factory()
+        warmup = pool.start(model.path, deadline=deadline)
+        self._active = _ActiveModel(model, pool)
+        self.registry.set_active(model.version)
+        logger.info(f"Serving model version {model.version}")
+        return warmup
+
+    @property
+    def current(self) -> Optional[ModelVersion]:
+        return self._active.model if self._active else None
+
+    @property
+    def pool(self) -> Optional[InferencePool]:
+        return self._active.pool if self._active else None
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[_ActiveModel]:
+        """Pin the active version for the duration of one request"""
+        if self._active is None:
+            raise RuntimeError("ModelManager no iniciado")
+        slot = self._active
+        slot.in_flight += 1
+        try:
+            yield slot
+        finally:
+            slot.in_flight -= 1
+            if slot.retired and slot.in_flight == 0:
+                slot.drained.set()
+
+    async def swap(self, version: str):
+        """
+        Load and warm `version`, switch traffic, then drain and stop the old pool
+
+        Raises:
+            KeyError: If the version is not registered
+        """
+        async with self._swap_lock:
+            model = self.registry.get(version)
+            if self._active and self._active.model.version == version:
+                self.swap_state = {"status": "idle", "version": version}
+                return
+
+            self.swap_state = {"status": "loading", "version": version}
+            loop = asyncio.get_running_loop()
+            pool = self.pool_factory()
+            try:
+                # Export + load + warm-up off the event loop
+                await loop.run_in_executor(None, pool.start, model.path)
+            except Exception as e:
+                await loop.run_in_executor(None, pool.shutdown)
+                self.swap_state = {"status": "failed", "version": version, "error": str(e)}
+                logger.error(f"Model version {version} failed to load: {e}")
+                raise
+
+            old = self._active
+            self._active = _ActiveModel(model, pool)  # Atomic for new requests
+            self.registry.set_active(version)
+            logger.info(f"Switched traffic to model version {version}")
+
+            if old is not None:
+                self.swap_state = {"status": "draining", "version": version, "previous": old.model.version}
+                old.retired = True
+                if old.in_flight == 0:
+                    old.drained.set()
+                try:
+                    await asyncio.wait_for(old.drained.wait(), DRAIN_TIMEOUT_SECONDS)
+                except asyncio.TimeoutError:
+                    logger.warning(
+                        f"Model version {old.model.version}: {old.in_flight} requests still running "
+                        f"after {DRAIN_TIMEOUT_SECONDS:.0f}s, stopping pool"
+                    )
+                await loop.run_in_executor(None, old.pool.shutdown)
+                logger.info(f"Model version {old.model.version} drained and unloaded")
+
+            self.swap_state = {"status": "idle", "version": version}
+
+    async def shutdown(self):
+        if self._active is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._active.pool.shutdown)
+            self._active = None
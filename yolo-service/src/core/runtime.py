@@ -0,0 +1,469 @@
+"""
+Inference runtimes for YOLO Dengue Detection
+Runtimes de inferencia para detección de criaderos de dengue
+
+The service nodes are CPU-only. Besides the PyTorch checkpoint run through
+ultralytics ("torch"), the segmentation model can be exported once to ONNX
+("onnx", run with ONNX Runtime) or OpenVINO IR ("openvino") and run with
+explicit intra/inter-op thread counts.
+
+Exported runtimes reuse the ultralytics letterbox, NMS and mask operations,
+so every runtime returns the same Segment list (classes, confidences,
+polygons and mask_area) and only the network execution differs.
+
+Selection: `model.runtime` (or `model.device: onnx|openvino`) in
+configs/yolo-service.yaml, overridden by the YOLO_RUNTIME environment variable.
+`model.precision: int8` uses the INT8 model published next to the checkpoint
+by scripts/training/quantize_int8.py (falls back to FP32 when it is missing
+or older than the checkpoint).
+"""
+
+import os
+import threading
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import yaml
+
+from ..utils.paths import get_configs_dir
+from .masks import masks_to_polygons
+from sentrix_shared.logging_utils import get_module_logger
+
+logger = get_module_logger(__name__, 'yolo-service')
+
+os.environ.setdefault('YOLO_VERBOSE', 'False')
+
+RUNTIMES = ("torch", "onnx", "openvino")
+PRECISIONS = ("fp32", "int8")
+
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    """Runtime selection and tuning (model section of yolo-service.yaml)"""
+    runtime: str = "torch"
+    precision: str = "fp32"
+    imgsz: int = 640
+    iou_threshold: float = 0.7
+    max_det: int = 300
+    intra_op_threads: int = 0  # 0 = CPU cores / inference workers
+    inter_op_threads: int = 1
+    polygon_epsilon: float = 0.0  # Polygon simplification tolerance in pixels (0 = off)
+
+    @property
+    def threads(self) -> int:
+        """Intra-op threads, resolved so concurrent workers do not oversubscribe the CPU"""
+        if self.intra_op_threads > 0:
+            return self.intra_op_threads
+        workers = int(os.getenv("YOLO_MAX_WORKERS", 4))
+        return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+@dataclass
+class Segment:
+    """
+    Una detección segmentada, independiente del runtime
+
+    polygon: contour in original image pixels, shape (N, 2)
+    mask_area: mask pixels at model input resolution (original image
+        pixels for tiled inference, see tiling.py)
+    """
+    class_id: int
+    confidence: float
+    polygon: np.ndarray
+    mask_area: float
+
+
+@lru_cache(maxsize=8)
+def load_runtime_config(config_path: Optional[str] = None) -> RuntimeConfig:
+    """
+    Carga la configuración del runtime desde yolo-service.yaml (cacheada)
+
+    Environment overrides: YOLO_RUNTIME, YOLO_PRECISION,
+    YOLO_INTRA_OP_THREADS, YOLO_INTER_OP_THREADS, YOLO_IMGSZ,
+    YOLO_POLYGON_EPSILON.
+
+    Raises:
+        ValueError: If the runtime or precision is unknown
+    """
+    path = Path(config_path) if config_path else get_configs_dir() / "yolo-service.yaml"
+    model_config: Dict = {}
+    if path.exists():
+        with open(path, encoding="utf-8") as f:
+            model_config = (yaml.safe_load(f) or {}).get("model", {}) or {}
+
+    device = str(model_config.get("device", "auto")).lower()
+    runtime = os.getenv("YOLO_RUNTIME") or model_config.get("runtime")
+    if not runtime:
+        runtime = device if device in RUNTIMES else "torch"
+    runtime = runtime.lower()
+    if runtime not in RUNTIMES:
+        raise ValueError(f"Runtime desconocido: {runtime}. Opciones: {', '.join(RUNTIMES)}")
+
+    precision = str(os.getenv("YOLO_PRECISION") or model_config.get("precision", "fp32")).lower()
+    if precision not in PRECISIONS:
+        raise ValueError(f"Precisión desconocida: {precision}. Opciones: {', '.join(PRECISIONS)}")
+
+    return RuntimeConfig(
+        runtime=runtime,
+        precision=precision,
+        imgsz=int(os.getenv("YOLO_IMGSZ", model_config.get("imgsz", 640))),
+        iou_threshold=float(model_config.get("iou_threshold", 0.7)),
+        max_det=int(model_config.get("max_detections", 300)),
+        intra_op_threads=int(os.getenv("YOLO_INTRA_OP_THREADS", model_config.get("intra_op_threads", 0))),
+        inter_op_threads=int(os.getenv("YOLO_INTER_OP_THREADS", model_config.get("inter_op_threads", 1))),
+        polygon_epsilon=float(os.getenv("YOLO_POLYGON_EPSILON", model_config.get("polygon_epsilon", 0.0)))
+    )
+
+
+def read_image(path: str) -> np.ndarray:
+    """
+    Lee una imagen BGR como lo hace ultralytics (rutas unicode incluidas)
+
+    Raises:
+        ValueError: If the image cannot be decoded
+    """
+    image = cv2.imdecode(np.fromfile(path, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"No se pudo cargar la imagen: {path}")
+    return image
+
+
+# ============================================
+# EXPORTACIÓN
+# ============================================
+
+_export_lock = threading.Lock()
+
+
+def exported_model_path(model_path: str, runtime: str) -> Path:
+    """Path of the exported artifact next to the .pt checkpoint"""
+    source = Path(model_path)
+    if runtime == "onnx":
+        return source.with_suffix(".onnx")
+    if runtime == "openvino":
+        return source.parent / f"{source.stem}_openvino_model"
+    return source
+
+
+def quantized_model_path(model_path: str, runtime: str) -> Path:
+    """Path where the INT8 variant of the checkpoint is published"""
+    source = Path(model_path)
+    if runtime == "onnx":
+        return source.with_name(f"{source.stem}_int8.onnx")
+    if runtime == "openvino":
+        return source.parent / f"{source.stem}_int8_openvino_model"
+    raise ValueError("INT8 requiere runtime onnx u openvino")
+
+
+def export_model(model_path: str, runtime: str, imgsz: int = 640) -> str:
+    """
+    Exporta el checkpoint .pt al formato del runtime (una sola vez)
+
+    The export is reused while it is newer than the checkpoint.
+
+    Returns:
+        Path to the model file/directory for the runtime
+    """
+    if runtime == "torch":
+        return model_path
+
+    target = exported_model_path(model_path, runtime)
+    with _export_lock:
+        if target.exists() and target.stat().st_mtime >= Path(model_path).stat().st_mtime:
+            return str(target)
+
+        from ultralytics import YOLO
+
+        logger.info(f"Exporting {model_path} to {runtime} (imgsz={imgsz})...")
+        exported = YOLO(model_path).export(
+            format=runtime,
+            imgsz=imgsz,
+            dynamic=False,
+            half=False,
+            simplify=runtime == "onnx"
+        )
+        logger.info(f"Exported model: {exported}")
+        return str(exported)
+
+
+# ============================================
+# BACKENDS
+# ============================================
+
+class InferenceBackend:
+    """Runs the segmentation model on one BGR image"""
+
+    runtime = "base"
+    dynamic_input = False  # Whether predict() honours a per-call imgsz
+
+    def __init__(self, model_path: str, config: RuntimeConfig):
+        self.model_path = model_path
+        self.config = config
+
+    def predict(self, image: np.ndarray, conf_threshold: float, imgsz: Optional[int] = None) -> List[Segment]:
+        raise NotImplementedError
+
+    def predict_batch(
+        self,
+        images: List[np.ndarray],
+        conf_threshold: float,
+        imgsz: Optional[int] = None
+    ) -> List[List[Segment]]:
+        """One Segment list per image (exported models have a static batch of 1)"""
+        return [self.predict(image, conf_threshold, imgsz) for image in images]
+
+
+class TorchBackend(InferenceBackend):
+    """PyTorch checkpoint through ultralytics"""
+
+    runtime = "torch"
+    dynamic_input = True
+    _threads_configured = False
+
+    def __init__(self, model_path: str, config: RuntimeConfig):
+        super().__init__(model_path, config)
+        import torch
+        from ultralytics import YOLO
+
+        # Thread pools are process-wide: configure them once
+        if not TorchBackend._threads_configured:
+            torch.set_num_threads(config.threads)
+            try:
+                torch.set_num_interop_threads(max(1, config.inter_op_threads))
+            except RuntimeError:
+                pass  # Already fixed once inter-op work has started
+            TorchBackend._threads_configured = True
+
+        self.model = YOLO(model_path, task='segment')
+
+    def predict(self, image: np.ndarray, conf_threshold: float, imgsz: Optional[int] = None) -> List[Segment]:
+        return self.predict_batch([image], conf_threshold, imgsz)[0]
+
+    def predict_batch(
+        self,
+        images: List[np.ndarray],
+        conf_threshold: float,
+        imgsz: Optional[int] = None
+    ) -> List[List[Segment]]:
+        results = self.model(
+            images,
+            conf=conf_threshold,
+            iou=self.config.iou_threshold,
+            max_det=self.config.max_det,
+            imgsz=imgsz or self.config.imgsz,
+            verbose=False
+        )
+        return [self._to_segments(result) for result in results]
+
+    def _to_segments(self, result) -> List[Segment]:
+        if result.masks is None:
+            return []
+
+        # One conversion for the whole mask stack (not Masks.xy per mask)
+        masks = result.masks.data.bool().cpu().numpy()
+        polygons, areas = masks_to_polygons(masks, result.orig_shape, self.config.polygon_epsilon)
+        class_ids = result.boxes.cls.int().tolist()
+        confidences = result.boxes.conf.tolist()
+        return [
+            Segment(class_id, float(confidence), polygon, float(area))
+            for class_id, confidence, polygon, area in zip(class_ids, confidences, polygons, areas)
+        ]
+
+
+class _ExportedBackend(InferenceBackend):
+    """
+    Shared pre/post-processing for exported (static shape) models
+
+    Mirrors ultralytics' SegmentationPredictor: letterbox to a square input,
+    class-aware NMS, prototype masks cropped to boxes and upsampled to the
+    input size, contours scaled back to the original image.
+    """
+
+    def __init__(self, model_path: str, config: RuntimeConfig):
+        super().__init__(model_path, config)
+        from ultralytics.data.augment import LetterBox
+
+        self.letterbox = LetterBox((config.imgsz, config.imgsz), auto=False)
+
+    def _run(self, blob: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (predictions, prototypes) for a (1, 3, H, W) float32 blob"""
+        raise NotImplementedError
+
+    def preprocess(self, image: np.ndarray) -> np.ndarray:
+        padded = self.letterbox(image=image)
+        blob = padded[..., ::-1].transpose(2, 0, 1)[None]  # BGR HWC -> RGB NCHW
+        return np.ascontiguousarray(blob, dtype=np.float32) / 255.0
+
+    def predict(self, image: np.ndarray, conf_threshold: float, imgsz: Optional[int] = None) -> List[Segment]:
+        # Static input shape: imgsz is fixed at export time
+        blob = self.preprocess(image)
+        predictions, protos = self._run(blob)
+        return self.postprocess(predictions, protos, blob.shape[2:], image.shape, conf_threshold)
+
+    def postprocess(
+        self,
+        predictions: np.ndarray,
+        protos: np.ndarray,
+        input_shape: Tuple[int, int],
+        image_shape: Tuple[int, ...],
+        conf_threshold: float
+    ) -> List[Segment]:
+        import torch
+        from ultralytics.utils import nms, ops
+
+        protos = torch.from_numpy(protos)
+        nc = predictions.shape[1] - 4 - protos.shape[1]
+        det = nms.non_max_suppression(
+            torch.from_numpy(predictions),
+            conf_threshold,
+            self.config.iou_threshold,
+            max_det=self.config.max_det,
+            nc=nc
+        )[0]
+        if det.shape[0] == 0:
+            return []
+
+        masks = ops.process_mask(protos[0], det[:, 6:], det[:, :4], input_shape, upsample=True)
+        polygons, areas = masks_to_polygons(masks.bool().numpy(), image_shape, self.config.polygon_epsilon)
+        return [
+            Segment(int(row[5]), float(row[4]), polygon, float(area))
+            for row, polygon, area in zip(det.tolist(), polygons, areas)
+            if area > 0
+        ]
+
+
+class OnnxBackend(_ExportedBackend):
+    """ONNX Runtime on CPU with explicit thread pools"""
+
+    runtime = "onnx"
+
+    def __init__(self, model_path: str, config: RuntimeConfig):
+        super().__init__(model_path, config)
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise RuntimeError("onnxruntime no está instalado: pip install onnxruntime")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = config.threads
+        options.inter_op_num_threads = max(1, config.inter_op_threads)
+        options.execution_mode = (
+            ort.ExecutionMode.ORT_PARALLEL if config.inter_op_threads > 1
+            else ort.ExecutionMode.ORT_SEQUENTIAL
+        )
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def _run(self, blob: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        outputs = self.session.run(None, {self.input_name: blob})
+        return _split_outputs(outputs)
+
+
+class OpenVinoBackend(_ExportedBackend):
+    """OpenVINO IR on CPU, latency mode with an explicit thread count"""
+
+    runtime = "openvino"
+
+    def __init__(self, model_path: str, config: RuntimeConfig):
+        super().__init__(model_path, config)
+        try:
+            import openvino as ov
+        except ImportError:
+            raise RuntimeError("openvino no está instalado: pip install openvino")
+
+        path = Path(model_path)
+        xml = path if path.is_file() else next(path.glob("*.xml"))
+        compiled = ov.Core().compile_model(
+            str(xml),
+            "CPU",
+            {
+                "PERFORMANCE_HINT": "LATENCY",
+                "INFERENCE_NUM_THREADS": config.threads,
+                "NUM_STREAMS": 1
+            }
+        )
+        self.request = compiled.create_infer_request()
+
+    def _run(self, blob: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        outputs = self.request.infer({0: blob})
+        return _split_outputs(list(outputs.values()))
+
+
+def _split_outputs(outputs) -> Tuple[np.ndarray, np.ndarray]:
+    """(predictions, prototypes): prototypes are the 4-D output"""
+    predictions = next(o for o in outputs if o.ndim == 3)
+    protos = next(o for o in outputs if o.ndim == 4)
+    return np.asarray(predictions), np.asarray(protos)
+
+
+_BACKENDS = {
+    "torch": TorchBackend,
+    "onnx": OnnxBackend,
+    "openvino": OpenVinoBackend,
+}
+
+# One backend per executor thread: sessions and ultralytics predictors keep
+# per-call state and are not safe to share between concurrent inferences
+_local = threading.local()
+
+
+def _published_int8(model_path: str, runtime: str) -> Optional[str]:
+    """INT8 model for the checkpoint, if published and up to date"""
+    if runtime == "torch":
+        logger.warning("INT8 no disponible para runtime torch, usando FP32")
+        return None
+    target = quantized_model_path(model_path, runtime)
+    if not target.exists():
+        logger.warning(f"Modelo INT8 no publicado ({target}), usando FP32")
+        return None
+    if target.stat().st_mtime < Path(model_path).stat().st_mtime:
+        logger.warning(f"Modelo INT8 anterior al checkpoint ({target}), usando FP32")
+        return None
+    return str(target)
+
+
+def create_backend(model_path: str, config: Optional[RuntimeConfig] = None) -> InferenceBackend:
+    """Crea un backend nuevo (exportando el modelo si hace falta)"""
+    config = config or load_runtime_config()
+    path = None
+    if config.precision == "int8":
+        path = _published_int8(model_path, config.runtime)
+    if path is None:
+        path = export_model(model_path, config.runtime, config.imgsz)
+    backend = _BACKENDS[config.runtime](path, config)
+    logger.info(f"Loaded {config.runtime} backend: {path} (threads={config.threads})")
+    return backend
+
+
+def get_backend(model_path: str, runtime: Optional[str] = None) -> InferenceBackend:
+    """
+    Backend cacheado del hilo actual para model_path
+
+    Args:
+        model_path: Checkpoint .pt
+        runtime: Override of the configured runtime
+    """
+    config = load_runtime_config()
+    if runtime and runtime != config.runtime:
+        if runtime not in RUNTIMES:
+            raise ValueError(f"Runtime desconocido: {runtime}. Opciones: {', '.join(RUNTIMES)}")
+        config = replace(config, runtime=runtime)
+
+    cache = getattr(_local, "backends", None)
+    if cache is None:
+        cache = _local.backends = {}
+
+    key = (model_path, os.path.getmtime(model_path), config)
+    backend = cache.get(key)
+    if backend is None:
+        # Drop backends of a replaced checkpoint before loading the new one
+        for stale in [k for k in cache if k[0] == model_path and k[1] != key[1]]:
+            del cache[stale]
+        backend = cache[key] = create_backend(model_path, config)
+    return backend
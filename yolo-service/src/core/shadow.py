@@ -0,0 +1,436 @@
+"""
+Shadow evaluation of candidate models on live traffic
+Evaluación en sombra de modelos candidatos con tráfico real
+
+A configurable fraction of /detect requests is mirrored, after the response
+is computed, to a candidate model version from the registry. The candidate
+runs in its own capped executor (and a bounded backlog: mirrors are dropped,
+never queued without limit), so production latency is not affected beyond
+the CPU it shares.
+
+Per image, candidate detections are matched to production detections by
+polygon IoU and recorded in a local SQLite store (results/shadow/shadow.db):
+matched / missed / extra detections, mean IoU, class confusion, confidence
+deltas and inference latency of both models. summary() aggregates them per
+candidate to decide a promotion (POST /admin/models/{version}/activate).
+
+Configuration: YOLO_SHADOW_VERSION, YOLO_SHADOW_FRACTION (0-1),
+YOLO_SHADOW_WORKERS (default 1), YOLO_SHADOW_MAX_PENDING (default 4),
+YOLO_SHADOW_IOU (match threshold, default 0.5).
+"""
+
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from configs.classes import DENGUE_CLASSES
+from sentrix_shared.logging_utils import get_module_logger
+
+from ..utils.paths import get_results_dir
+from .preprocess import prepare_image, scale_segments
+from .registry import ModelRegistry, ModelVersion
+from .runtime import get_backend
+from .tiling import predict_image, resolve_tiling
+
+logger = get_module_logger(__name__, 'yolo-service')
+
+
+def _pixels(polygon) -> np.ndarray:
+    """Polygon vertices rounded to the pixel grid it is rasterized on"""
+    return np.round(np.asarray(polygon, dtype=np.float64)).astype(np.int32)
+
+
+def _bounds(polygon) -> Optional[np.ndarray]:
+    """[min_x, min_y, max_x, max_y] in pixels, or None for a degenerate polygon"""
+    if len(polygon) < 3:
+        return None
+    pixels = _pixels(polygon)
+    return np.concatenate([pixels.min(axis=0), pixels.max(axis=0)])
+
+
+def _boxes_intersect(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> bool:
+    if a is None or b is None:
+        return False
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def polygon_iou(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    IoU of two polygons, rasterized over their joint bounding box
+
+    Polygons whose bounding boxes do not intersect are 0 without rasterizing.
+    """
+    if not _boxes_intersect(_bounds(a), _bounds(b)):
+        return 0.0
+    a = _pixels(a)
+    b = _pixels(b)
+    origin = np.minimum(a.min(axis=0), b.min(axis=0))
+    size = np.maximum(a.max(axis=0), b.max(axis=0)) - origin + 1
+
+    mask_a = np.zeros((size[1], size[0]), dtype=np.uint8)
+    mask_b = np.zeros_like(mask_a)
+    cv2.fillPoly(mask_a, [a - origin], 1)
+    cv2.fillPoly(mask_b, [b - origin], 1)
+
+    union = np.count_nonzero(mask_a | mask_b)
+    return float(np.count_nonzero(mask_a & mask_b)) / union if union else 0.0
+
+
+def compare_detections(
+    production: List[Dict[str, Any]],
+    candidate: List[Dict[str, Any]],
+    iou_threshold: float = 0.5
+) -> Dict[str, Any]:
+    """
+    Match candidate detections to production detections (greedy by IoU)
+
+    Matching ignores the class, so class changes show up in the confusion
+    counts instead of as a miss plus an extra. Only pairs whose bounding boxes
+    intersect are scored (the rest have IoU 0).
+
+    Args:
+        production/candidate: Detections with class, confidence and polygon
+    """
+    production_bounds = [_bounds(det["polygon"]) for det in production]
+    candidate_bounds = [_bounds(det["polygon"]) for det in candidate]
+    pairs = sorted(
+        (
+            (polygon_iou(np.asarray(p["polygon"]), np.asarray(c["polygon"])), i, j)
+            for i, p in enumerate(production)
+            for j, c in enumerate(candidate)
+            if _boxes_intersect(production_bounds[i], candidate_bounds[j])
+        ),
+        reverse=True
+    )
+
+    matched_production, matched_candidate = set(), set()
+    ious, confidence_deltas = [], []
+    confusion: Dict[str, int] = {}
+    per_class: Dict[str, Dict[str, int]] = {}
+    for det in production:
+        per_class.setdefault(det["class"], {"production": 0, "matched": 0})["production"] += 1
+
+    for iou, i, j in pairs:
+        if iou < iou_threshold:
+            break
+        if i in matched_production or j in matched_candidate:
+            continue
+        matched_production.add(i)
+        matched_candidate.add(j)
+        ious.append(iou)
+        confidence_deltas.append(candidate[j]["confidence"] - production[i]["confidence"])
+        key = f"{production[i]['class']}->{candidate[j]['class']}"
+        confusion[key] = confusion.get(key, 0) + 1
+        if production[i]["class"] == candidate[j]["class"]:
+            per_class[production[i]["class"]]["matched"] += 1
+
+    return {
+        "production_count": len(production),
+        "candidate_count": len(candidate),
+        "matched": len(ious),
+        "missed": len(production) - len(matched_production),
+        "extra": len(candidate) - len(matched_candidate),
+        "mean_iou": float(np.mean(ious)) if ious else None,
+        "mean_confidence_delta": float(np.mean(confidence_deltas)) if confidence_deltas else None,
+        "confusion": confusion,
+        "per_class": per_class
+    }
+
+
+class ShadowStore:
+    """Local SQLite store of per-image agreement records"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else get_results_dir() / "shadow" / "shadow.db"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS shadow_results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created_at TEXT NOT NULL,
+                    production_version TEXT NOT NULL,
+                    candidate_version TEXT NOT NULL,
+                    production_count INTEGER NOT NULL,
+                    candidate_count INTEGER NOT NULL,
+                    matched INTEGER NOT NULL,
+                    missed INTEGER NOT NULL,
+                    extra INTEGER NOT NULL,
+                    mean_iou REAL,
+                    mean_confidence_delta REAL,
+                    production_latency_ms REAL,
+                    candidate_latency_ms REAL,
+                    confusion TEXT NOT NULL,
+                    per_class TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_shadow_candidate ON shadow_results (candidate_version)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    def record(self, production_version: str, candidate_version: str, comparison: Dict[str, Any],
+               production_latency_ms: Optional[float], candidate_latency_ms: float):
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                INSERT INTO shadow_results (
+                    created_at, production_version, candidate_version, production_count,
+                    candidate_count, matched, missed, extra, mean_iou, mean_confidence_delta,
+                    production_latency_ms, candidate_latency_ms, confusion, per_class
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    datetime.now(timezone.utc).isoformat(),
+                    production_version,
+                    candidate_version,
+                    comparison["production_count"],
+                    comparison["candidate_count"],
+                    comparison["matched"],
+                    comparison["missed"],
+                    comparison["extra"],
+                    comparison["mean_iou"],
+                    comparison["mean_confidence_delta"],
+                    production_latency_ms,
+                    candidate_latency_ms,
+                    json.dumps(comparison["confusion"]),
+                    json.dumps(comparison["per_class"])
+                )
+            )
+
+    def summary(self, candidate_version: str) -> Dict[str, Any]:
+        """Candidate vs. production aggregated over all mirrored images"""
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT * FROM shadow_results WHERE candidate_version = ? ORDER BY id",
+                (candidate_version,)
+            ).fetchall()
+
+        if not rows:
+            return {"candidate_version": candidate_version, "images": 0}
+
+        production_total = sum(r["production_count"] for r in rows)
+        candidate_total = sum(r["candidate_count"] for r in rows)
+        matched = sum(r["matched"] for r in rows)
+        ious = [r["mean_iou"] for r in rows if r["mean_iou"] is not None]
+        deltas = [r["mean_confidence_delta"] for r in rows if r["mean_confidence_delta"] is not None]
+        production_latency = [r["production_latency_ms"] for r in rows if r["production_latency_ms"] is not None]
+        candidate_latency = [r["candidate_latency_ms"] for r in rows]
+
+        confusion: Dict[str, int] = {}
+        per_class: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            for key, count in json.loads(row["confusion"]).items():
+                confusion[key] = confusion.get(key, 0) + count
+            for class_name, counts in json.loads(row["per_class"]).items():
+                totals = per_class.setdefault(class_name, {"production": 0, "matched": 0})
+                totals["production"] += counts["production"]
+                totals["matched"] += counts["matched"]
+
+        def p50(values):
+            return round(float(np.percentile(values, 50)), 1) if values else None
+
+        production_p50, candidate_p50 = p50(production_latency), p50(candidate_latency)
+        return {
+            "candidate_version": candidate_version,
+            "production_versions": sorted({r["production_version"] for r in rows}),
+            "images": len(rows),
+            "first_seen": rows[0]["created_at"],
+            "last_seen": rows[-1]["created_at"],
+            # Fraction of production detections the candidate reproduces
+            "recall_agreement": round(matched / production_total, 4) if production_total else None,
+            "precision_agreement": round(matched / candidate_total, 4) if candidate_total else None,
+            "missed": sum(r["missed"] for r in rows),
+            "extra": sum(r["extra"] for r in rows),
+            "mean_iou": round(float(np.mean(ious)), 4) if ious else None,
+            "mean_confidence_delta": round(float(np.mean(deltas)), 4) if deltas else None,
+            "class_confusion": dict(sorted(confusion.items())),
+            "per_class_recall_agreement": {
+                name: round(c["matched"] / c["production"], 4) if c["production"] else None
+                for name, c in sorted(per_class.items())
+            },
+            "latency_p50_ms": {"production": production_p50, "candidate": candidate_p50},
+            "speedup": round(production_p50 / candidate_p50, 2) if production_p50 and candidate_p50 else None
+        }
+
+
+class ShadowEvaluator:
+    """
+    Mirrors sampled requests to a candidate model off the critical path
+
+    Args:
+        registry: Model registry (resolves the candidate version)
+        store: Agreement store
+        max_workers: Candidate inference threads
+        max_pending: Mirrors waiting or running; beyond it, mirrors are dropped
+        iou_threshold: IoU to match a candidate detection to production
+    """
+
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        store: Optional[ShadowStore] = None,
+        max_workers: int = 1,
+        max_pending: int = 4,
+        iou_threshold: float = 0.5
+    ):
+        self.registry = registry
+        self.store = store or ShadowStore()
+        self.max_pending = max_pending
+        self.iou_threshold = iou_threshold
+        self.candidate: Optional[ModelVersion] = None
+        self.fraction = 0.0
+        self.pending = 0
+        self.mirrored = 0
+        self.dropped = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="yolo_shadow")
+
+    @classmethod
+    def from_env(cls, registry: ModelRegistry) -> "ShadowEvaluator":
+        evaluator = cls(
+            registry,
+            max_workers=int(os.getenv("YOLO_SHADOW_WORKERS", 1)),
+            max_pending=int(os.getenv("YOLO_SHADOW_MAX_PENDING", 4)),
+            iou_threshold=float(os.getenv("YOLO_SHADOW_IOU", 0.5))
+        )
+        version = os.getenv("YOLO_SHADOW_VERSION")
+        if version:
+            try:
+                evaluator.configure(version, float(os.getenv("YOLO_SHADOW_FRACTION", 0.05)))
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Shadow evaluation disabled: {e}")
+        return evaluator
+
+    def configure(self, version: Optional[str], fraction: float = 0.05):
+        """
+        Set (or clear, with version=None) the candidate and mirrored fraction
+
+        Raises:
+            KeyError: If the version is not registered
+            ValueError: If the fraction is outside [0, 1]
+        """
+        if not 0 <= fraction <= 1:
+            raise ValueError(f"Fracción de tráfico fuera de rango [0, 1]: {fraction}")
+        self.candidate = self.registry.get(version) if version else None
+        self.fraction = fraction if version else 0.0
+        if self.candidate:
+            logger.info(f"Shadow evaluation: {self.fraction:.0%} of traffic -> {self.candidate.version}")
+
+    def maybe_mirror(
+        self,
+        production_version: str,
+        production_result: Dict[str, Any],
+        image_bytes: Optional[bytes],
+        image_path: Optional[str],
+        conf_threshold: float,
+        tiling: Optional[str] = None
+    ) -> bool:
+        """
+        Sample this request and queue the candidate run (non-blocking)
+
+        Returns:
+            Whether the request was mirrored
+        """
+        candidate = self.candidate
+        if candidate is None or candidate.version == production_version:
+            return False
+        if random.random() >= self.fraction:
+            return False
+
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.dropped += 1
+                return False
+            self.pending += 1
+
+        try:
+            if image_bytes is None:
+                # Temp files are deleted when the request ends
+                with open(image_path, "rb") as f:
+                    image_bytes = f.read()
+            self._executor.submit(
+                self._run, candidate, production_version, production_result, image_bytes, conf_threshold, tiling
+            )
+        except Exception:
+            with self._lock:
+                self.pending -= 1
+            raise
+        return True
+
+    def _run(
+        self,
+        candidate: ModelVersion,
+        production_version: str,
+        production_result: Dict[str, Any],
+        image_bytes: bytes,
+        conf_threshold: float,
+        tiling: Optional[str]
+    ):
+        try:
+            backend = get_backend(candidate.path)  # Cached per shadow thread
+            tiling_config = resolve_tiling(tiling)
+            image, scale, imgsz = prepare_image(image_bytes, backend, tiling_config)
+
+            start = time.perf_counter()
+            segments, _ = predict_image(backend, image, conf_threshold, tiling_config, imgsz)
+            candidate_latency_ms = (time.perf_counter() - start) * 1000
+            scale_segments(segments, scale)
+
+            candidate_detections = [
+                {
+                    "class": DENGUE_CLASSES.get(s.class_id, f"Clase_{s.class_id}"),
+                    "confidence": s.confidence,
+                    "polygon": s.polygon
+                }
+                for s in segments
+            ]
+            comparison = compare_detections(
+                production_result.get("detections", []), candidate_detections, self.iou_threshold
+            )
+            self.store.record(
+                production_version,
+                candidate.version,
+                comparison,
+                production_result.get("inference_time_ms"),
+                candidate_latency_ms
+            )
+            with self._lock:
+                self.mirrored += 1
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            logger.warning(f"Shadow run failed for {candidate.version}: {e}")
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "candidate_version": self.candidate.version if self.candidate else None,
+            "fraction": self.fraction,
+            "pending": self.pending,
+            "mirrored": self.mirrored,
+            "dropped": self.dropped,
+            "failed": self.failed
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,180 @@
+"""
+Service startup: time budget, warm-up passes and readiness
+Arranque del servicio: presupuesto de tiempo, calentamiento y disponibilidad
+
+Startup runs in phases, each timed and logged so cold-start regressions
+show up in the logs and in /health:
+
+1. resolve: pick the model from the local registry / models/ (never the
+   network).
+2. load: create the inference pool; every worker loads (and, for exported
+   runtimes, compiles) the model and runs a first pass, which also lets
+   ultralytics fuse Conv+BN layers.
+3. warmup: extra passes at each input size the preprocessing policy can
+   choose, so the first request at any size does not pay for kernel
+   selection and buffer allocation.
+
+Warm-up passes beyond the first are best effort: sizes not reached before
+the budget runs out are skipped (and reported). Resolve and load are
+mandatory; exceeding the budget with them is logged as a regression.
+
+Configuration: `startup` section of configs/yolo-service.yaml.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import yaml
+
+from sentrix_shared.logging_utils import get_module_logger
+
+from ..utils.paths import get_configs_dir
+from .preprocess import load_preprocess_config
+from .runtime import InferenceBackend
+
+logger = get_module_logger(__name__, 'yolo-service')
+
+
+@dataclass(frozen=True)
+class StartupConfig:
+    """Startup settings (startup section of yolo-service.yaml)"""
+    budget_seconds: float = 120.0
+    warmup_passes: int = 2  # Per input size; the first one includes lazy setup
+
+
+@lru_cache(maxsize=8)
+def load_startup_config(config_path: Optional[str] = None) -> StartupConfig:
+    """
+    Carga la configuración de arranque (cacheada)
+
+    Environment overrides: YOLO_STARTUP_BUDGET_SECONDS, YOLO_WARMUP_PASSES.
+    """
+    path = Path(config_path) if config_path else get_configs_dir() / "yolo-service.yaml"
+    config: Dict = {}
+    if path.exists():
+        with open(path, encoding="utf-8") as f:
+            config = (yaml.safe_load(f) or {}).get("startup", {}) or {}
+
+    return StartupConfig(
+        budget_seconds=float(os.getenv("YOLO_STARTUP_BUDGET_SECONDS", config.get("budget_seconds", 120))),
+        warmup_passes=max(1, int(os.getenv("YOLO_WARMUP_PASSES", config.get("warmup_passes", 2))))
+    )
+
+
+def warmup_sizes(backend: InferenceBackend) -> List[int]:
+    """
+    Input sizes to warm, most likely first
+
+    Exported models have one static size. For the PyTorch backend: the
+    configured imgsz (tiles, full-image pass), the size the policy picks for
+    full-resolution photos, then the remaining configured sizes.
+    """
+    if not backend.dynamic_input:
+        return [backend.config.imgsz]
+
+    config = load_preprocess_config()
+    first = [backend.config.imgsz, config.choose_input_size(config.required_size())]
+    rest = sorted(size for size in config.input_sizes if size not in first)
+    return list(dict.fromkeys(first + rest))
+
+
+def warm_up(backend: InferenceBackend, deadline: Optional[float] = None, passes: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Run warm-up passes on a black image at each input size
+
+    Args:
+        backend: Loaded backend
+        deadline: time.time() after which remaining sizes are skipped (the
+            first size always runs)
+        passes: Passes per size (default: configured warmup_passes)
+
+    Returns:
+        {"sizes_ms": {size: ms}, "skipped": [sizes]}
+    """
+    passes = passes or load_startup_config().warmup_passes
+    sizes_ms: Dict[int, float] = {}
+    skipped: List[int] = []
+
+    for index, size in enumerate(warmup_sizes(backend)):
+        if index and deadline is not None and time.time() >= deadline:
+            skipped.append(size)
+            continue
+        image = np.zeros((size, size, 3), dtype=np.uint8)
+        start = time.perf_counter()
+        for _ in range(passes):
+            backend.predict(image, 0.5, imgsz=size)
+        sizes_ms[size] = round((time.perf_counter() - start) * 1000, 1)
+
+    return {"sizes_ms": sizes_ms, "skipped": skipped}
+
+
+class StartupTracker:
+    """
+    Startup phases, their timings and the readiness state for /health
+
+    status: starting -> ready | failed
+    """
+
+    def __init__(self, budget_seconds: float):
+        self.budget_seconds = budget_seconds
+        self.started_at = time.time()
+        self.status = "starting"
+        self.phases: Dict[str, float] = {}
+        self.details: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+
+    @property
+    def deadline(self) -> float:
+        return self.started_at + self.budget_seconds
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return time.time() - self.started_at
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time one startup phase (logged, kept for /health)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - start) * 1000, 1)
+            logger.info(f"Startup phase {name}: {self.phases[name]:.0f} ms")
+
+    def finish(self):
+        self.status = "ready"
+        total = self.elapsed_seconds
+        if total > self.budget_seconds:
+            logger.warning(
+                f"Startup over budget: {total:.1f}s > {self.budget_seconds:.0f}s "
+                f"(phases ms: {self.phases})"
+            )
+        else:
+            logger.info(f"Service ready in {total:.1f}s (budget {self.budget_seconds:.0f}s, phases ms: {self.phases})")
+
+    def fail(self, error: Exception):
+        self.status = "failed"
+        self.error = str(error)
+        logger.error(f"Startup failed after {self.elapsed_seconds:.1f}s: {error}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Startup state for /health"""
+        return {
+            "status": self.status,
+            "budget_seconds": self.budget_seconds,
+            "elapsed_seconds": round(self.elapsed_seconds, 1) if self.status == "starting" else None,
+            "phases_ms": self.phases,
+            "over_budget": sum(self.phases.values()) / 1000 > self.budget_seconds,
+            "error": self.error,
+            **self.details
+        }
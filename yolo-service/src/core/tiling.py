@@ -0,0 +1,271 @@
+"""
+Tiled (sliced) inference for high-resolution images
+Inferencia por teselas para imágenes de alta resolución
+
+Phone and drone photos (4000x3000 and larger) are downsampled to the model
+input size, so small puddles and trash disappear. In tiled mode the image is
+cut into overlapping tiles at native resolution, all tiles (plus the whole
+image, for objects larger than a tile) run batched, and the per-tile
+detections are merged back into full-image polygons:
+
+- same-class detections whose boxes overlap (intersection over the smaller
+  box) are grouped, transitively, so an object cut by a tile border is
+  joined through the whole-image detection or the overlapping tile
+- each group becomes one detection: union of the masks, max confidence
+
+Selection: `tiling.mode` in configs/yolo-service.yaml (auto, always, never);
+auto tiles only images whose longest side reaches `tiling.min_side`.
+Environment overrides: YOLO_TILING, YOLO_TILE_SIZE, YOLO_TILE_OVERLAP,
+YOLO_TILE_MIN_SIDE.
+"""
+
+import os
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import yaml
+
+from ..utils.paths import get_configs_dir
+from .runtime import InferenceBackend, Segment
+
+TILING_MODES = ("auto", "always", "never")
+
+
+@dataclass(frozen=True)
+class TilingConfig:
+    """Tiled inference settings (tiling section of yolo-service.yaml)"""
+    mode: str = "auto"
+    tile_size: int = 640
+    overlap: float = 0.2
+    min_side: int = 2000
+    include_full_image: bool = True
+    match_threshold: float = 0.5  # Intersection over the smaller box to merge
+    batch_size: int = 16  # Tiles per forward pass (bounds peak memory)
+    max_det: int = 300
+
+    def should_tile(self, image_shape: Tuple[int, ...]) -> bool:
+        """Whether an image of this shape is run tiled"""
+        if self.mode == "never":
+            return False
+        longest = max(image_shape[:2])
+        if longest <= self.tile_size:
+            return False
+        return self.mode == "always" or longest >= self.min_side
+
+
+@lru_cache(maxsize=8)
+def load_tiling_config(config_path: Optional[str] = None) -> TilingConfig:
+    """
+    Carga la configuración de teselado desde yolo-service.yaml (cacheada)
+
+    Raises:
+        ValueError: If the mode is unknown or the overlap is out of [0, 0.9]
+    """
+    path = Path(config_path) if config_path else get_configs_dir() / "yolo-service.yaml"
+    config: Dict = {}
+    if path.exists():
+        with open(path, encoding="utf-8") as f:
+            config = (yaml.safe_load(f) or {}).get("tiling", {}) or {}
+
+    mode = str(os.getenv("YOLO_TILING") or config.get("mode", "auto")).lower()
+    if mode not in TILING_MODES:
+        raise ValueError(f"Modo de teselado desconocido: {mode}. Opciones: {', '.join(TILING_MODES)}")
+
+    overlap = float(os.getenv("YOLO_TILE_OVERLAP", config.get("overlap", 0.2)))
+    if not 0 <= overlap <= 0.9:
+        raise ValueError(f"Solapamiento de teselas fuera de rango [0, 0.9]: {overlap}")
+
+    return TilingConfig(
+        mode=mode,
+        tile_size=int(os.getenv("YOLO_TILE_SIZE", config.get("tile_size", 640))),
+        overlap=overlap,
+        min_side=int(os.getenv("YOLO_TILE_MIN_SIDE", config.get("min_side", 2000))),
+        include_full_image=bool(config.get("include_full_image", True)),
+        match_threshold=float(config.get("match_threshold", 0.5)),
+        batch_size=max(1, int(config.get("batch_size", 16))),
+        max_det=int(config.get("max_detections", 300))
+    )
+
+
+def resolve_tiling(mode: Optional[str] = None) -> TilingConfig:
+    """
+    Configuración cargada, con override opcional del modo
+
+    Raises:
+        ValueError: If the mode is unknown
+    """
+    config = load_tiling_config()
+    if not mode:
+        return config
+    if mode not in TILING_MODES:
+        raise ValueError(f"Modo de teselado desconocido: {mode}. Opciones: {', '.join(TILING_MODES)}")
+    return replace(config, mode=mode)
+
+
+def _starts(length: int, tile: int, stride: int) -> List[int]:
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile, stride))
+    starts.append(length - tile)  # Last tile flush with the border
+    return starts
+
+
+def plan_tiles(height: int, width: int, tile_size: int, overlap: float) -> List[Tuple[int, int, int, int]]:
+    """
+    Overlapping tiles covering the image
+
+    Returns:
+        List of (x0, y0, x1, y1) windows; edge tiles are shifted inwards so
+        every tile has the full size (when the image is large enough)
+    """
+    stride = max(1, int(round(tile_size * (1 - overlap))))
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in _starts(height, tile_size, stride)
+        for x in _starts(width, tile_size, stride)
+    ]
+
+
+def _box(polygon: np.ndarray) -> np.ndarray:
+    return np.concatenate([polygon.min(axis=0), polygon.max(axis=0)])
+
+
+def _group(boxes: np.ndarray, threshold: float) -> List[List[int]]:
+    """Connected groups of boxes whose intersection over the smaller box >= threshold"""
+    x0 = np.maximum(boxes[:, None, 0], boxes[None, :, 0])
+    y0 = np.maximum(boxes[:, None, 1], boxes[None, :, 1])
+    x1 = np.minimum(boxes[:, None, 2], boxes[None, :, 2])
+    y1 = np.minimum(boxes[:, None, 3], boxes[None, :, 3])
+    inter = np.clip(x1 - x0, 0, None) * np.clip(y1 - y0, 0, None)
+    areas = np.maximum((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]), 1e-6)
+    linked = inter / np.minimum(areas[:, None], areas[None, :]) >= threshold
+
+    parent = list(range(len(boxes)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in zip(*np.nonzero(np.triu(linked, k=1))):
+        parent[find(i)] = find(j)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(boxes)):
+        groups.setdefault(find(i), []).append(i)
+    return list(groups.values())
+
+
+def _union(segments: List[Segment], image_shape: Tuple[int, ...]) -> Segment:
+    """One detection from a group: union of the masks, max confidence"""
+    height, width = image_shape[:2]
+    polygons = [np.round(s.polygon).astype(np.int32) for s in segments]
+    x0, y0 = np.maximum(np.min([p.min(axis=0) for p in polygons], axis=0), 0)
+    x1 = min(max(int(p[:, 0].max()) for p in polygons) + 1, width)
+    y1 = min(max(int(p[:, 1].max()) for p in polygons) + 1, height)
+
+    # Rasterize only the group's bounding box, not the full image
+    mask = np.zeros((max(1, y1 - y0), max(1, x1 - x0)), dtype=np.uint8)
+    offset = np.array([x0, y0], dtype=np.int32)
+    for polygon in polygons:
+        cv2.fillPoly(mask, [polygon - offset], 1)  # One call each: overlaps would cancel out
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    contour = max(contours, key=cv2.contourArea).reshape(-1, 2) if contours else polygons[0] - offset
+
+    best = max(segments, key=lambda s: s.confidence)
+    return Segment(
+        best.class_id,
+        best.confidence,
+        (contour + offset).astype(np.float32),
+        float(cv2.countNonZero(mask))
+    )
+
+
+def merge_segments(
+    segments: List[Segment],
+    image_shape: Tuple[int, ...],
+    match_threshold: float = 0.5,
+    max_det: int = 300
+) -> List[Segment]:
+    """
+    Merge detections of overlapping tiles into full-image detections
+
+    Args:
+        segments: Detections with polygons in full-image coordinates
+        image_shape: Shape of the full image
+        match_threshold: Intersection over the smaller box to treat two
+            same-class detections as the same object
+
+    Returns:
+        Merged detections sorted by confidence; mask_area in image pixels
+    """
+    segments = [s for s in segments if len(s.polygon) >= 3]
+    merged = []
+    for class_id in sorted({s.class_id for s in segments}):
+        same_class = [s for s in segments if s.class_id == class_id]
+        boxes = np.stack([_box(s.polygon) for s in same_class]).astype(np.float64)
+        for group in _group(boxes, match_threshold):
+            merged.append(_union([same_class[i] for i in group], image_shape))
+
+    merged.sort(key=lambda s: s.confidence, reverse=True)
+    return merged[:max_det]
+
+
+def predict_tiled(
+    backend: InferenceBackend,
+    image: np.ndarray,
+    conf_threshold: float,
+    config: TilingConfig
+) -> Tuple[List[Segment], int]:
+    """
+    Run the model over overlapping tiles (and the whole image) in batches
+
+    Returns:
+        (merged detections, number of tiles)
+    """
+    windows = plan_tiles(image.shape[0], image.shape[1], config.tile_size, config.overlap)
+    crops = [image[y0:y1, x0:x1] for x0, y0, x1, y1 in windows]
+    if config.include_full_image:
+        crops.append(image)
+
+    results = []
+    for start in range(0, len(crops), config.batch_size):
+        results.extend(backend.predict_batch(crops[start:start + config.batch_size], conf_threshold))
+
+    segments = []
+    for (x0, y0, _, _), tile_segments in zip(windows, results):
+        offset = np.array([x0, y0], dtype=np.float32)
+        for segment in tile_segments:
+            segment.polygon = segment.polygon + offset
+            segments.append(segment)
+    if config.include_full_image:
+        segments.extend(results[-1])
+
+    return merge_segments(segments, image.shape, config.match_threshold, config.max_det), len(windows)
+
+
+def predict_image(
+    backend: InferenceBackend,
+    image: np.ndarray,
+    conf_threshold: float,
+    config: TilingConfig,
+    imgsz: Optional[int] = None
+) -> Tuple[List[Segment], int]:
+    """
+    Tiled or direct inference, depending on the image size
+
+    Args:
+        imgsz: Input size for direct inference (tiles run at tile_size)
+
+    Returns:
+        (detections, number of tiles; 0 when not tiled)
+    """
+    if config.should_tile(image.shape):
+        return predict_tiled(backend, image, conf_threshold, config)
+    return backend.predict(image, conf_threshold, imgsz), 0
@@ -0,0 +1,477 @@
+"""
+Video ingestion: adaptive frame sampling and cross-frame site tracking
+Ingesta de video: muestreo adaptativo de fotogramas y seguimiento de sitios
+
+A walk-through video of a block has thousands of frames, most of them
+near-identical. Running every frame through the model would cost minutes
+and report the same puddle hundreds of times. Instead:
+
+1. Streaming decode: frames are read one at a time with OpenCV
+   (grab() for frames that are never looked at, retrieve() only for
+   candidates), so memory does not depend on the video length.
+2. Adaptive sampling: a candidate every `min_interval_s`; it is sampled only
+   if its difference hash (64-bit dHash) moved more than `hash_distance`
+   bits from the last sampled frame, or `max_interval_s` passed since then.
+   A static scene costs one frame every few seconds, a fast pan is sampled
+   at the candidate rate.
+3. Batched inference: sampled frames are downscaled to the input size and
+   run `batch_size` at a time (the only frames held in memory).
+4. Tracking: detections of consecutive sampled frames are linked by box
+   IoU (same class), after compensating the camera motion estimated by
+   phase correlation. Each track is one site, reported once with its best
+   detection and the time span it was visible.
+5. Location: the recording location from the container metadata (see
+   utils/video_metadata.py), shared by every site of the video.
+
+Configuration: `video` section of configs/yolo-service.yaml.
+Environment overrides: YOLO_VIDEO_MIN_INTERVAL, YOLO_VIDEO_MAX_FRAMES,
+YOLO_MAX_VIDEO_SIZE_MB.
+"""
+
+import math
+import os
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import yaml
+
+from configs.classes import DENGUE_CLASSES, RISK_LEVEL_BY_ID
+
+from ..utils import validate_model_file, validate_file_exists
+from ..utils.paths import get_configs_dir
+from ..utils.video_metadata import extract_video_gps
+from .detector import _create_detection_location
+from .preprocess import load_preprocess_config, scale_segments
+from .runtime import InferenceBackend, Segment, get_backend
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".m4v", ".avi", ".mkv", ".webm")
+
+# Width of the grayscale thumbnail used for hashing and motion estimation
+THUMBNAIL_WIDTH = 160
+# Phase correlation peaks below this are noise: no motion compensation
+MIN_MOTION_RESPONSE = 0.1
+
+
+@dataclass(frozen=True)
+class VideoConfig:
+    """Video ingestion settings (video section of yolo-service.yaml)"""
+    min_interval_s: float = 0.5  # Spacing of candidate frames
+    max_interval_s: float = 5.0  # Sample at least this often, even on a static scene
+    hash_distance: int = 6  # dHash bits (of 64) that must change to sample
+    batch_size: int = 8  # Frames per forward pass (bounds peak memory)
+    track_iou: float = 0.3  # Box IoU to link a detection to a track
+    max_gap_s: float = 3.0  # A track not seen for this long is closed
+    min_hits: int = 1  # Sampled frames a track needs to be reported
+    max_frames: int = 600  # Sampled frames per video (longer videos are truncated)
+    max_size_mb: int = 200  # Upload limit of /detect/video
+
+
+@lru_cache(maxsize=8)
+def load_video_config(config_path: Optional[str] = None) -> VideoConfig:
+    """
+    Carga la configuración de video (cacheada)
+
+    Raises:
+        ValueError: If max_interval_s is shorter than min_interval_s
+    """
+    path = Path(config_path) if config_path else get_configs_dir() / "yolo-service.yaml"
+    config: Dict = {}
+    if path.exists():
+        with open(path, encoding="utf-8") as f:
+            config = (yaml.safe_load(f) or {}).get("video", {}) or {}
+
+    min_interval = float(os.getenv("YOLO_VIDEO_MIN_INTERVAL", config.get("min_interval_s", 0.5)))
+    max_interval = float(config.get("max_interval_s", 5.0))
+    if max_interval < min_interval:
+        raise ValueError(f"video.max_interval_s ({max_interval}) menor que min_interval_s ({min_interval})")
+
+    return VideoConfig(
+        min_interval_s=min_interval,
+        max_interval_s=max_interval,
+        hash_distance=int(config.get("hash_distance", 6)),
+        batch_size=max(1, int(config.get("batch_size", 8))),
+        track_iou=float(config.get("track_iou", 0.3)),
+        max_gap_s=float(config.get("max_gap_s", 3.0)),
+        min_hits=max(1, int(config.get("min_hits", 1))),
+        max_frames=max(1, int(os.getenv("YOLO_VIDEO_MAX_FRAMES", config.get("max_frames", 600)))),
+        max_size_mb=int(os.getenv("YOLO_MAX_VIDEO_SIZE_MB", config.get("max_size_mb", 200)))
+    )
+
+
+# ---------------------------------------------
+# Sampling
+# ---------------------------------------------
+
+def dhash(gray: np.ndarray) -> int:
+    """64-bit difference hash of a grayscale image (sign of horizontal gradients at 9x8)"""
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def probe_video(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Resolución, fps y duración de un video (sin decodificar fotogramas)
+
+    Returns:
+        dict with width, height, fps, frame_count and duration_s, or None
+        if OpenCV cannot open the file
+    """
+    capture = cv2.VideoCapture(str(path))
+    try:
+        if not capture.isOpened():
+            return None
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        fps = fps if fps and math.isfinite(fps) and fps > 0 else 30.0
+        frame_count = max(0, int(capture.get(cv2.CAP_PROP_FRAME_COUNT)))
+        return {
+            "width": int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": fps,
+            "frame_count": frame_count,
+            "duration_s": round(frame_count / fps, 3)
+        }
+    finally:
+        capture.release()
+
+
+def estimate_megapixels(info: Dict[str, Any], config: VideoConfig, input_size: int) -> float:
+    """
+    Upper bound of the megapixels a video sends to the model (for admission)
+
+    Sampled frames are downscaled to the input size before inference, so
+    each one costs at most input_size² pixels, not its full resolution.
+    """
+    frames = min(config.max_frames, math.ceil(info["duration_s"] / config.min_interval_s) + 1)
+    return frames * min(info["width"] * info["height"], input_size * input_size) / 1_000_000
+
+
+@dataclass
+class SampledFrame:
+    """A frame selected for inference"""
+    index: int
+    timestamp: float
+    image: np.ndarray  # BGR, full resolution
+    thumbnail: np.ndarray  # Grayscale, THUMBNAIL_WIDTH wide
+
+
+class FrameSampler:
+    """
+    Streams the frames of a video worth running the model on
+
+    Counters (frames_decoded, frames_sampled, decode_seconds, truncated) are
+    updated while iterating.
+    """
+
+    def __init__(self, path: str, config: VideoConfig):
+        self.path = str(path)
+        self.config = config
+        self.fps = 30.0
+        self.frames_decoded = 0
+        self.frames_sampled = 0
+        self.decode_seconds = 0.0
+        self.truncated = False
+
+    def __iter__(self) -> Iterator[SampledFrame]:
+        capture = cv2.VideoCapture(self.path)
+        if not capture.isOpened():
+            raise ValueError(f"No se puede abrir el video: {self.path}")
+        try:
+            fps = capture.get(cv2.CAP_PROP_FPS)
+            self.fps = fps if fps and math.isfinite(fps) and fps > 0 else 30.0
+            step = max(1, round(self.config.min_interval_s * self.fps))
+            last_hash: Optional[int] = None
+            last_time = -math.inf
+            index = -1
+
+            while True:
+                start = time.perf_counter()
+                if not capture.grab():
+                    break
+                index += 1
+                self.frames_decoded += 1
+                if index % step:
+                    self.decode_seconds += time.perf_counter() - start
+                    continue
+
+                ok, image = capture.retrieve()
+                if not ok:
+                    break
+                timestamp = index / self.fps
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+                height = max(1, round(gray.shape[0] * THUMBNAIL_WIDTH / gray.shape[1]))
+                thumbnail = cv2.resize(gray, (THUMBNAIL_WIDTH, height), interpolation=cv2.INTER_AREA)
+                frame_hash = dhash(thumbnail)
+                self.decode_seconds += time.perf_counter() - start
+
+                changed = last_hash is None or hamming(frame_hash, last_hash) > self.config.hash_distance
+                if not changed and timestamp - last_time < self.config.max_interval_s:
+                    continue
+                if self.frames_sampled >= self.config.max_frames:
+                    self.truncated = True
+                    break
+
+                last_hash, last_time = frame_hash, timestamp
+                self.frames_sampled += 1
+                yield SampledFrame(index, timestamp, image, thumbnail)
+        finally:
+            capture.release()
+
+
+def estimate_shift(previous: np.ndarray, current: np.ndarray) -> Tuple[float, float]:
+    """Global translation (thumbnail pixels) of `current` relative to `previous`"""
+    if previous.shape != current.shape:
+        return 0.0, 0.0
+    (dx, dy), response = cv2.phaseCorrelate(previous.astype(np.float32), current.astype(np.float32))
+    if response < MIN_MOTION_RESPONSE:
+        return 0.0, 0.0
+    return dx, dy
+
+
+# ---------------------------------------------
+# Tracking
+# ---------------------------------------------
+
+@dataclass
+class Track:
+    """One site followed across sampled frames"""
+    track_id: int
+    class_id: int
+    box: np.ndarray  # x0, y0, x1, y1 in the latest frame (motion-compensated)
+    first_seen: float
+    last_seen: float
+    best: Segment
+    best_time: float
+    hits: int = 1
+
+
+def _box(polygon: np.ndarray) -> np.ndarray:
+    return np.concatenate([polygon.min(axis=0), polygon.max(axis=0)]).astype(np.float64)
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(len(a), len(b)) IoU matrix of x0, y0, x1, y1 boxes"""
+    x0 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y0 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x1 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y1 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x1 - x0, 0, None) * np.clip(y1 - y0, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+
+class SiteTracker:
+    """
+    Links detections of consecutive sampled frames into sites
+
+    Greedy matching on box IoU between same-class detections and the open
+    tracks (boxes shifted by the estimated camera motion). Unmatched
+    detections open new tracks; tracks unseen for `max_gap_s` are closed.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_gap_s: float = 3.0):
+        self.iou_threshold = iou_threshold
+        self.max_gap_s = max_gap_s
+        self.tracks: List[Track] = []
+
+    def update(self, timestamp: float, segments: List[Segment], shift: Tuple[float, float] = (0.0, 0.0)) -> None:
+        """Add the detections of one sampled frame (polygons in frame pixels)"""
+        open_tracks = [t for t in self.tracks if timestamp - t.last_seen <= self.max_gap_s]
+        for track in open_tracks:
+            track.box = track.box + (shift[0], shift[1], shift[0], shift[1])
+
+        segments = [s for s in segments if len(s.polygon)]
+        matched_tracks, matched_segments = set(), set()
+        if open_tracks and segments:
+            iou = box_iou(np.stack([t.box for t in open_tracks]), np.stack([_box(s.polygon) for s in segments]))
+            classes = np.array([t.class_id for t in open_tracks])[:, None] != np.array([s.class_id for s in segments])
+            iou[classes] = -1.0
+            for ti, si in zip(*np.unravel_index(np.argsort(-iou, axis=None), iou.shape)):
+                if iou[ti, si] < self.iou_threshold:
+                    break
+                if ti in matched_tracks or si in matched_segments:
+                    continue  # One detection per track per frame
+                self._extend(open_tracks[ti], segments[si], timestamp)
+                matched_tracks.add(ti)
+                matched_segments.add(si)
+
+        for si, segment in enumerate(segments):
+            if si not in matched_segments:
+                self.tracks.append(Track(
+                    track_id=len(self.tracks) + 1,
+                    class_id=segment.class_id,
+                    box=_box(segment.polygon),
+                    first_seen=timestamp,
+                    last_seen=timestamp,
+                    best=segment,
+                    best_time=timestamp
+                ))
+
+    @staticmethod
+    def _extend(track: Track, segment: Segment, timestamp: float) -> None:
+        track.box = _box(segment.polygon)
+        track.last_seen = timestamp
+        track.hits += 1
+        if segment.confidence > track.best.confidence:
+            track.best, track.best_time = segment, timestamp
+
+    def sites(self, min_hits: int = 1) -> List[Track]:
+        """Tracks seen in at least `min_hits` sampled frames"""
+        return [t for t in self.tracks if t.hits >= min_hits]
+
+
+# ---------------------------------------------
+# Analysis
+# ---------------------------------------------
+
+def analyze_video(
+    backend: InferenceBackend,
+    path: str,
+    conf_threshold: float,
+    config: Optional[VideoConfig] = None
+) -> Dict[str, Any]:
+    """
+    Sample, run and track a video
+
+    Returns:
+        dict with sites (List[Track], polygons in original frame pixels),
+        fps, frames_decoded, frames_sampled, truncated, frame size, input
+        size and decode/inference seconds
+    """
+    config = config or load_video_config()
+    sampler = FrameSampler(path, config)
+    tracker = SiteTracker(config.track_iou, config.max_gap_s)
+    preprocess_config = load_preprocess_config()
+
+    batch: List[Tuple[np.ndarray, float, Tuple[float, float]]] = []
+    inference_seconds = 0.0
+    imgsz = None
+    scale = 1.0
+    frame_shape: Tuple[int, ...] = (0, 0)
+    previous_thumbnail = None
+
+    def flush():
+        nonlocal inference_seconds
+        start = time.perf_counter()
+        results = backend.predict_batch([image for image, _, _ in batch], conf_threshold, imgsz)
+        inference_seconds += time.perf_counter() - start
+        for segments, (_, timestamp, shift) in zip(results, batch):
+            tracker.update(timestamp, scale_segments(segments, scale), shift)
+        batch.clear()
+
+    for frame in sampler:
+        if previous_thumbnail is None:
+            # Input size and downscale fixed once per video from the frame size
+            frame_shape = frame.image.shape
+            long_side = max(frame_shape[:2])
+            if backend.dynamic_input:
+                imgsz = preprocess_config.choose_input_size(long_side)
+            scale = max(1.0, long_side / (imgsz or backend.config.imgsz))
+            shift = (0.0, 0.0)
+        else:
+            dx, dy = estimate_shift(previous_thumbnail, frame.thumbnail)
+            ratio = frame_shape[1] / THUMBNAIL_WIDTH
+            shift = (dx * ratio, dy * ratio)
+        previous_thumbnail = frame.thumbnail
+
+        image = frame.image
+        if scale > 1.0:
+            size = (round(image.shape[1] / scale), round(image.shape[0] / scale))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        batch.append((image, frame.timestamp, shift))
+        if len(batch) >= config.batch_size:
+            flush()
+    if batch:
+        flush()
+
+    return {
+        "sites": tracker.sites(config.min_hits),
+        "fps": sampler.fps,
+        "frames_decoded": sampler.frames_decoded,
+        "frames_sampled": sampler.frames_sampled,
+        "truncated": sampler.truncated,
+        "frame_shape": frame_shape,
+        "input_size": imgsz or backend.config.imgsz,
+        "decode_seconds": sampler.decode_seconds,
+        "inference_seconds": inference_seconds
+    }
+
+
+def detect_video(model_path, source, conf_threshold=0.5, include_gps=True, runtime=None):
+    """
+    Detecta sitios de cría en un video (cada sitio se reporta una vez)
+
+    Args:
+        model_path (str): Ruta al modelo YOLO entrenado
+        source (str): Ruta al video
+        conf_threshold (float): Umbral de confianza para detecciones
+        include_gps (bool): Incluir la ubicación de grabación del video
+        runtime (str): Runtime de inferencia (torch, onnx, openvino)
+
+    Returns:
+        dict: Un sitio por track (mejor detección, track_id, first_seen_s,
+            last_seen_s, frames), información del video, ubicación y tiempos
+    """
+    validate_model_file(model_path)
+    validate_file_exists(source, "Video")
+
+    backend = get_backend(model_path, runtime)
+    analysis = analyze_video(backend, source, conf_threshold)
+
+    gps_data = extract_video_gps(source) if include_gps else None
+
+    detections = []
+    for track in analysis["sites"]:
+        segment = track.best
+        detection = {
+            'class': DENGUE_CLASSES.get(segment.class_id, f"Clase_{segment.class_id}"),
+            'class_id': segment.class_id,
+            'confidence': segment.confidence,
+            'polygon': segment.polygon,
+            'mask_area': segment.mask_area,
+            'risk_level': RISK_LEVEL_BY_ID.get(segment.class_id, 'BAJO'),
+            'track_id': track.track_id,
+            'first_seen_s': round(track.first_seen, 3),
+            'last_seen_s': round(track.last_seen, 3),
+            'best_frame_s': round(track.best_time, 3),
+            'frames': track.hits
+        }
+        if include_gps and gps_data and gps_data.get('has_gps'):
+            detection['location'] = _create_detection_location(gps_data, None, detection)
+        elif include_gps:
+            detection['location'] = {
+                'has_location': False,
+                'reason': 'No GPS data available in video metadata'
+            }
+        detections.append(detection)
+
+    fps = analysis["fps"]
+    height, width = analysis["frame_shape"][:2]
+    return {
+        'detections': detections,
+        'source_path': source,
+        'total_detections': len(detections),
+        'video': {
+            'width': width,
+            'height': height,
+            'fps': round(fps, 3),
+            'duration_s': round(analysis["frames_decoded"] / fps, 3),
+            'frames_decoded': analysis["frames_decoded"],
+            'frames_sampled': analysis["frames_sampled"],
+            'truncated': analysis["truncated"]
+        },
+        'location': gps_data,
+        'decode_time_ms': int(analysis["decode_seconds"] * 1000),
+        'inference_time_ms': int(analysis["inference_seconds"] * 1000),
+        'input_size': analysis["input_size"]
+    }
@@ -0,0 +1,279 @@
+"""
+Inference worker pool (threads or processes)
+Pool de workers de inferencia (hilos o procesos)
+
+thread: ThreadPoolExecutor in the server process. Inference itself releases
+    the GIL, but EXIF parsing, contour extraction and OpenCV drawing around
+    it contend on it.
+process: one process per worker. Each worker preloads the model once, pins
+    its intra-op threads, and receives the image bytes through a
+    SharedMemory block (only the block name crosses the process boundary).
+    A crashed worker breaks the executor; the pool is rebuilt and the
+    request retried once.
+
+Selection: YOLO_EXECUTION_MODE (thread, process), YOLO_MAX_WORKERS,
+YOLO_WORKER_THREADS (intra-op threads per worker, 0 = cores / workers),
+YOLO_MAX_TASKS_PER_CHILD (recycle process workers, 0 = never).
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+from sentrix_shared.logging_utils import get_module_logger
+
+from .detector import detect_breeding_sites
+from .video import detect_video
+
+logger = get_module_logger(__name__, 'yolo-service')
+
+EXECUTION_MODES = ("thread", "process")
+
+
+# ---------------------------------------------
+# Worker process side
+# ---------------------------------------------
+
+# Warm-up timings of this worker process (set by _init_worker)
+_warmup_report: Dict[str, Any] = {}
+
+
+def _init_worker(model_path: str, threads: int, deadline: Optional[float] = None):
+    """Process initializer: pin intra-op threads, load and warm the model once"""
+    global _warmup_report
+
+    # Before any numerical library creates its thread pool
+    os.environ["YOLO_INTRA_OP_THREADS"] = str(threads)
+    for name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[name] = str(threads)
+
+    import cv2
+    cv2.setNumThreads(1)
+
+    _warmup_report = _warm(model_path, deadline=deadline)
+    logger.info(f"Inference worker {os.getpid()} ready ({threads} threads, warm-up {_warmup_report})")
+
+
+def _warm(
+    model_path: str,
+    barrier: Optional[threading.Barrier] = None,
+    deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    """Load the backend of this worker and run the warm-up passes"""
+    from .runtime import get_backend
+    from .startup import warm_up
+
+    if barrier is not None:
+        # Hold every thread until all have a task: one load per worker thread
+        try:
+            barrier.wait(timeout=30)
+        except threading.BrokenBarrierError:
+            pass
+    start = time.perf_counter()
+    backend = get_backend(model_path)
+    report = {"load_ms": round((time.perf_counter() - start) * 1000, 1)}
+    report.update(warm_up(backend, deadline))
+    return report
+
+
+def _worker_report(_=None) -> Tuple[int, Dict[str, Any]]:
+    return os.getpid(), _warmup_report
+
+
+def _detect_shared(shm_name: str, size: int, model_path: str, source: str, kwargs: Dict[str, Any]) -> Dict:
+    """Run detection on the encoded image held in shared memory (decoded in place)"""
+    import numpy as np
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    buffer = np.ndarray((size,), dtype=np.uint8, buffer=shm.buf)
+    try:
+        return detect_breeding_sites(model_path, source, image_bytes=buffer, **kwargs)
+    finally:
+        del buffer  # Release the view before closing the block
+        shm.close()
+
+
+def merge_warmup_reports(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-worker warm-up reports (workers warm in parallel: keep the slowest)"""
+    merged: Dict[str, Any] = {"load_ms": 0.0, "sizes_ms": {}, "skipped": []}
+    for report in reports:
+        merged["load_ms"] = max(merged["load_ms"], report.get("load_ms", 0.0))
+        for size, ms in report.get("sizes_ms", {}).items():
+            merged["sizes_ms"][size] = max(merged["sizes_ms"].get(size, 0.0), ms)
+        merged["skipped"] = sorted(set(merged["skipped"]) | set(report.get("skipped", [])))
+    return merged
+
+
+# ---------------------------------------------
+# Server side
+# ---------------------------------------------
+
+class InferencePool:
+    """
+    Runs detect_breeding_sites in worker threads or processes
+
+    Args:
+        max_workers: Concurrent inferences
+        mode: thread or process
+        worker_threads: Intra-op threads per process worker (0 = cores / workers)
+        max_tasks_per_child: Recycle process workers after N tasks (None = never)
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        mode: str = "thread",
+        worker_threads: int = 0,
+        max_tasks_per_child: Optional[int] = None
+    ):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Modo de ejecución desconocido: {mode}. Opciones: {', '.join(EXECUTION_MODES)}")
+        self.max_workers = max(1, max_workers)
+        self.mode = mode
+        self.worker_threads = worker_threads or max(1, (os.cpu_count() or 1) // self.max_workers)
+        self.max_tasks_per_child = max_tasks_per_child or None
+        self.model_path: Optional[str] = None
+        self.restarts = 0
+        self.warmup: Dict[str, Any] = {}
+        self._warmup_deadline: Optional[float] = None
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "InferencePool":
+        return cls(
+            max_workers=int(os.getenv("YOLO_MAX_WORKERS", 4)),
+            mode=os.getenv("YOLO_EXECUTION_MODE", "thread").lower(),
+            worker_threads=int(os.getenv("YOLO_WORKER_THREADS", 0)),
+            max_tasks_per_child=int(os.getenv("YOLO_MAX_TASKS_PER_CHILD", 0))
+        )
+
+    def start(self, model_path: str, preload: bool = True, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Create the executor; with preload, load and warm the model in every worker
+
+        Args:
+            model_path: Checkpoint to serve
+            preload: Load and warm before returning
+            deadline: time.time() after which extra warm-up sizes are skipped
+
+        Returns:
+            Warm-up report (slowest worker per step, see merge_warmup_reports)
+        """
+        self.model_path = model_path
+        self._warmup_deadline = deadline
+        with self._lock:
+            self._executor = self._create_executor()
+        if not preload:
+            return {}
+        if self.mode == "process":
+            reports = dict(self._executor.map(_worker_report, range(self.max_workers * 2), chunksize=1))
+            logger.info(f"Process pool ready: {len(reports)} workers")
+        else:
+            barrier = threading.Barrier(self.max_workers)
+            futures = [self._executor.submit(_warm, model_path, barrier, deadline) for _ in range(self.max_workers)]
+            reports = dict(enumerate(future.result() for future in futures))
+            logger.info(f"Thread pool ready: {self.max_workers} workers")
+        self.warmup = merge_warmup_reports(list(reports.values()))
+        return self.warmup
+
+    def _create_executor(self) -> Executor:
+        if self.mode == "thread":
+            return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="yolo_worker")
+
+        # spawn: fork is unsafe with the server's threads and loaded libraries
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_path, self.worker_threads, self._warmup_deadline),
+            max_tasks_per_child=self.max_tasks_per_child
+        )
+
+    def _restart(self, broken: Executor):
+        """Replace a broken process pool (only once per broken executor)"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self.restarts += 1
+            logger.error(f"Inference worker crashed, restarting process pool (restart #{self.restarts})")
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._create_executor()
+
+    async def detect(self, source: str, content: Optional[bytes] = None, **kwargs) -> Dict:
+        """
+        Run detect_breeding_sites on source
+
+        Args:
+            source: Image path (GPS, processed image output)
+            content: Encoded image bytes of source; in process mode they are
+                passed through shared memory (read from source if omitted)
+            **kwargs: detect_breeding_sites options
+        """
+        if self._executor is None:
+            raise RuntimeError("InferencePool no iniciado: llamar start(model_path)")
+        loop = asyncio.get_running_loop()
+
+        if self.mode == "thread":
+            call = partial(detect_breeding_sites, self.model_path, source, **kwargs)
+            return await loop.run_in_executor(self._executor, call)
+
+        if content is None:
+            with open(source, "rb") as f:
+                content = f.read()
+
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(content)))
+        try:
+            shm.buf[:len(content)] = content
+            return await self._run(_detect_shared, shm.name, len(content), self.model_path, source, kwargs)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    async def detect_video(self, source: str, **kwargs) -> Dict:
+        """
+        Run detect_video on a video file (read by the worker from disk)
+
+        Args:
+            source: Video path
+            **kwargs: detect_video options
+        """
+        if self._executor is None:
+            raise RuntimeError("InferencePool no iniciado: llamar start(model_path)")
+        return await self._run(partial(detect_video, self.model_path, source, **kwargs))
+
+    async def _run(self, fn, *args) -> Dict:
+        """Run fn in the executor; in process mode retry once on a rebuilt pool if a worker crashed"""
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            executor = self._executor
+            try:
+                return await loop.run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                self._restart(executor)
+                if attempt:
+                    raise
+
+    def snapshot(self) -> Dict:
+        """Pool state for /health"""
+        return {
+            "mode": self.mode,
+            "workers": self.max_workers,
+            "worker_threads": self.worker_threads if self.mode == "process" else None,
+            "running": self._executor is not None,
+            "restarts": self.restarts,
+            "warmup": self.warmup
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
@@ -7,6 +7,8 @@ import os
 import json
 from datetime import datetime
 
+import numpy as np
+
 from ..core.evaluator import assess_dengue_risk
 from ..utils.file_ops import ensure_directory
 from ..utils import resolve_path, get_results_dir, extract_image_gps, get_image_camera_info
@@ -102,6 +104,13 @@ def _get_risk_color(risk_level):
     return colors.get(risk_level, '#808080')  # Gris por defecto
 
 
+def _json_default(value):
+    """Arrays NumPy (polígonos de detección) como listas"""
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
 def save_report(report, output_path=None):
     """Guarda reporte en archivo JSON"""
     if output_path is None:
@@ -111,4 +120,4 @@ def save_report(report, output_path=None):
 
     ensure_directory(os.path.dirname(str(output_path)))
     with open(str(output_path), 'w', encoding='utf-8') as f:
-        json.dump(report, f, indent=2, ensure_ascii=False)
\ No newline at end of file
+        json.dump(report, f, indent=2, ensure_ascii=False, default=_json_default)
\ No newline at end of file
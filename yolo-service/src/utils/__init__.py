@@ -28,9 +28,12 @@ from .paths import (
 from .gps_metadata import (
     extract_image_gps,
     get_image_camera_info,
+    extract_image_metadata,
+    parse_metadata_field,
     validate_gps_coordinates,
     format_gps_for_maps
 )
+from .video_metadata import extract_video_gps
 
 __all__ = [
     'detect_device',
@@ -57,6 +60,9 @@ __all__ = [
     'get_default_model_paths',
     'extract_image_gps',
     'get_image_camera_info',
+    'extract_image_metadata',
+    'parse_metadata_field',
     'validate_gps_coordinates',
-    'format_gps_for_maps'
+    'format_gps_for_maps',
+    'extract_video_gps'
 ]
\ No newline at end of file
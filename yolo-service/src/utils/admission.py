@@ -0,0 +1,309 @@
+"""
+Admission control for the inference endpoints
+Control de admisión para los endpoints de inferencia
+
+The inference ThreadPoolExecutor has an unbounded queue: under load, requests
+pile up in memory holding their full image bytes until the caller times out.
+The AdmissionController bounds that backlog before any work is queued:
+
+- At most `max_concurrency` inferences run at once (one per executor worker),
+  so the executor never queues work itself
+- Waiting requests are bounded by count, by bytes held and by the estimated
+  time to drain the backlog
+- The cost of a request is estimated from the image resolution (megapixels)
+  times the observed seconds per megapixel (moving average of successful runs)
+- A worker slot is held until the executor job returns, even if the request
+  waiting on it is cancelled: the job keeps its worker either way
+
+Over capacity, admit() raises Overloaded immediately with a Retry-After hint
+(the estimated drain time) so callers can answer 503 and back off.
+"""
+
+import asyncio
+import io
+import logging
+import math
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Cost assumed when the resolution cannot be read from the header (12MP photo)
+DEFAULT_MEGAPIXELS = 12.0
+
+
+class Overloaded(Exception):
+    """Request rejected because the service is over capacity"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+@dataclass
+class Ticket:
+    """An admitted request: the bytes it holds and its estimated cost"""
+    nbytes: int
+    cost: float
+    megapixels: float
+    admitted_at: float
+    started_at: Optional[float] = None
+    observe: bool = True  # Feed the run time into seconds_per_megapixel
+    running: bool = False
+    released: bool = False
+
+
+def image_megapixels(content: bytes) -> Optional[float]:
+    """
+    Resolución de la imagen en megapíxeles leyendo solo la cabecera
+
+    Args:
+        content: Bytes de la imagen
+
+    Returns:
+        Megapíxeles, o None si el formato no puede leerse (p. ej. HEIC)
+    """
+    try:
+        from PIL import Image
+
+        with Image.open(io.BytesIO(content)) as img:
+            width, height = img.size
+        return width * height / 1_000_000
+    except Exception:
+        return None
+
+
+class AdmissionController:
+    """
+    Bounded, cost-aware admission for inference requests
+
+    Example:
+        ticket = admission.admit(len(content), image_megapixels(content))
+        try:
+            async with admission.slot(ticket) as run:
+                result = await run(loop.run_in_executor, executor, infer, path)
+        finally:
+            admission.release(ticket)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_queued: int = 16,
+        max_queued_bytes: int = 256 * 1024 * 1024,
+        max_wait_seconds: float = 30.0,
+        seconds_per_megapixel: float = 0.25,
+        smoothing: float = 0.2
+    ):
+        """
+        Args:
+            max_concurrency: Inferences running at once (executor workers)
+            max_queued: Requests allowed to wait for a free worker
+            max_queued_bytes: Image bytes held by admitted requests
+            max_wait_seconds: Longest estimated wait accepted for a new request
+            seconds_per_megapixel: Initial cost estimate, refined by real runs
+            smoothing: Weight of each new observation in the moving average
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queued = max_queued
+        self.max_queued_bytes = max_queued_bytes
+        self.max_wait_seconds = max_wait_seconds
+        self.seconds_per_megapixel = seconds_per_megapixel
+        self.smoothing = smoothing
+
+        self._lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._queued = 0
+        self._held_bytes = 0
+        self._backlog_seconds = 0.0
+        self.admitted = 0
+        self.rejected = 0
+
+    def estimate_cost(self, megapixels: Optional[float]) -> float:
+        """Estimated inference seconds for an image of `megapixels`"""
+        if megapixels is None:
+            megapixels = DEFAULT_MEGAPIXELS
+        return max(megapixels, 0.1) * self.seconds_per_megapixel
+
+    def _estimated_wait(self) -> float:
+        """Seconds until a new request would start (caller holds the lock)"""
+        if self._in_flight + self._queued < self.max_concurrency:
+            return 0.0
+        return self._backlog_seconds / self.max_concurrency
+
+    def _reject(self, reason: str) -> Overloaded:
+        self.rejected += 1
+        retry_after = max(self._estimated_wait(), self.seconds_per_megapixel)
+        logger.warning(
+            f"Admission rejected ({reason}): in_flight={self._in_flight} "
+            f"queued={self._queued} held_mb={self._held_bytes / 1048576:.1f} "
+            f"retry_after={retry_after:.1f}s"
+        )
+        return Overloaded(reason, retry_after)
+
+    def check(self, nbytes: int = 0) -> None:
+        """
+        Cheap pre-check before the upload is read (e.g. from Content-Length)
+
+        Raises:
+            Overloaded: If a request of `nbytes` could not be admitted now
+        """
+        with self._lock:
+            self._check_capacity(nbytes)
+
+    def _check_capacity(self, nbytes: int, cost: float = 0.0) -> None:
+        idle = self._in_flight + self._queued == 0
+        if idle:
+            return  # Always accept work on an idle worker, whatever its size
+        if self._in_flight + self._queued >= self.max_concurrency + self.max_queued:
+            raise self._reject("queue full")
+        if self._held_bytes + nbytes > self.max_queued_bytes:
+            raise self._reject("queued bytes")
+        if self._estimated_wait() + cost > self.max_wait_seconds:
+            raise self._reject("estimated wait")
+
+    def admit(self, nbytes: int, megapixels: Optional[float] = None, observe: bool = True) -> Ticket:
+        """
+        Admit a request or reject it immediately
+
+        Args:
+            nbytes: Bytes held by the request (the uploaded image)
+            megapixels: Image resolution (None = DEFAULT_MEGAPIXELS)
+            observe: Learn seconds per megapixel from this run; False for
+                work whose megapixels are not photo megapixels (videos:
+                decoding and tracking dominate, frames are pre-resized)
+
+        Returns:
+            Ticket to pass to slot() and release()
+
+        Raises:
+            Overloaded: If the service is over capacity
+        """
+        cost = self.estimate_cost(megapixels)
+        with self._lock:
+            self._check_capacity(nbytes, cost)
+            self._queued += 1
+            self._held_bytes += nbytes
+            self._backlog_seconds += cost
+            self.admitted += 1
+        return Ticket(
+            nbytes=nbytes,
+            cost=cost,
+            megapixels=megapixels if megapixels is not None else DEFAULT_MEGAPIXELS,
+            admitted_at=time.monotonic(),
+            observe=observe
+        )
+
+    @asynccontextmanager
+    async def slot(self, ticket: Ticket):
+        """
+        Wait for a free worker, then run the block as in-flight work
+
+        Yields run(fn, *args, **kwargs), which awaits fn(*args, **kwargs) as a
+        task. The slot stays taken until that task finishes, even if the
+        caller is cancelled first, and only a successful run refines the cost
+        model. Without a run() the slot is freed when the block exits.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        await self._semaphore.acquire()
+        with self._lock:
+            self._queued -= 1
+            self._in_flight += 1
+            ticket.running = True
+        ticket.started_at = time.monotonic()
+        task: Optional[asyncio.Future] = None
+
+        async def run(fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+            nonlocal task
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            task.add_done_callback(lambda done: self._finish(ticket, done))
+            return await asyncio.shield(task)
+
+        try:
+            yield run
+        finally:
+            if task is None:
+                self._finish(ticket, None)
+
+    def _finish(self, ticket: Ticket, task: Optional[asyncio.Future]) -> None:
+        """Free the slot of a ticket whose work is over"""
+        elapsed = time.monotonic() - ticket.started_at
+        self._semaphore.release()
+        with self._lock:
+            self._in_flight -= 1
+            ticket.running = False
+            self._backlog_seconds = max(0.0, self._backlog_seconds - ticket.cost)
+            ticket.cost = 0.0
+            if ticket.released:
+                self._return_bytes(ticket)
+        succeeded = task is not None and not task.cancelled() and task.exception() is None
+        if ticket.observe and succeeded:
+            self._observe(ticket.megapixels, elapsed)
+
+    def release(self, ticket: Ticket) -> None:
+        """
+        Return the bytes (and the cost, if it never ran) of a ticket
+
+        A ticket still running (its request was cancelled) keeps them until
+        its work finishes.
+        """
+        with self._lock:
+            ticket.released = True
+            if ticket.running:
+                return
+            if ticket.started_at is None:
+                self._queued -= 1
+                ticket.started_at = time.monotonic()
+            self._backlog_seconds = max(0.0, self._backlog_seconds - ticket.cost)
+            ticket.cost = 0.0
+            self._return_bytes(ticket)
+
+    def _return_bytes(self, ticket: Ticket) -> None:
+        """Caller holds the lock"""
+        self._held_bytes -= ticket.nbytes
+        ticket.nbytes = 0
+
+    def _observe(self, megapixels: float, elapsed: float) -> None:
+        """Refine seconds per megapixel with a finished inference"""
+        observed = elapsed / max(megapixels, 0.1)
+        with self._lock:
+            self.seconds_per_megapixel += self.smoothing * (observed - self.seconds_per_megapixel)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current load, for /health
+
+        `saturation` is the fraction of the tightest bound in use (1.0 means
+        new requests are being rejected).
+        """
+        with self._lock:
+            wait = self._estimated_wait()
+            saturation = max(
+                (self._in_flight + self._queued) / (self.max_concurrency + self.max_queued),
+                self._held_bytes / self.max_queued_bytes,
+                wait / self.max_wait_seconds
+            )
+            return {
+                "in_flight": self._in_flight,
+                "queued": self._queued,
+                "max_concurrency": self.max_concurrency,
+                "max_queued": self.max_queued,
+                "held_mb": round(self._held_bytes / 1048576, 2),
+                "max_queued_mb": round(self.max_queued_bytes / 1048576, 2),
+                "estimated_wait_seconds": round(wait, 2),
+                "seconds_per_megapixel": round(self.seconds_per_megapixel, 4),
+                "saturation": round(min(saturation, 1.0), 3),
+                "admitted": self.admitted,
+                "rejected": self.rejected
+            }
@@ -6,6 +6,7 @@ Now uses shared GPS utilities for consistency across services
 Ahora usa utilidades GPS compartidas para consistencia entre servicios
 """
 
+import json
 import os
 import sys
 # Import shared GPS utilities
@@ -13,6 +14,7 @@ from sentrix_shared.gps_utils import (
     extract_gps_from_exif as shared_extract_gps,
     extract_camera_info_from_exif as shared_extract_camera,
     extract_complete_image_metadata as shared_extract_metadata,
+    extract_image_metadata as shared_extract_image_metadata,
     validate_gps_coordinates as shared_validate_gps,
     generate_maps_urls as shared_generate_maps_urls
 )
@@ -48,6 +50,52 @@ def get_image_camera_info(image_path):
     return shared_extract_camera(image_path)
 
 
+def extract_image_metadata(image_data, filename=None):
+    """
+    Extrae GPS e información de cámara de los bytes de la imagen en una sola pasada
+    Uses shared single-pass extraction (no pixel decoding, no HEIF opener)
+
+    Args:
+        image_data (bytes): Imagen codificada
+        filename (str): Nombre del archivo (solo para mensajes de error)
+
+    Returns:
+        dict: {'gps': ..., 'camera': ...} con la forma de extract_image_gps
+            y get_image_camera_info
+    """
+    return shared_extract_image_metadata(image_data, filename)
+
+
+def parse_metadata_field(value):
+    """
+    Valida metadatos ya extraídos por el backend (campo de formulario JSON)
+
+    Args:
+        value (str): JSON con las claves gps y camera
+
+    Returns:
+        dict: Metadatos normalizados, o None si el campo es inválido
+    """
+    try:
+        metadata = json.loads(value)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(metadata, dict):
+        return None
+    gps = metadata.get('gps')
+    camera = metadata.get('camera')
+    if not isinstance(gps, dict) or not isinstance(camera, dict):
+        return None
+    if gps.get('has_gps'):
+        latitude, longitude = gps.get('latitude'), gps.get('longitude')
+        if not isinstance(latitude, (int, float)) or not isinstance(longitude, (int, float)):
+            return None
+        if not shared_validate_gps(latitude, longitude)['is_valid']:
+            return None
+        gps.setdefault('location_source', 'EXIF_GPS')
+    return {'gps': gps, 'camera': camera}
+
+
 def validate_gps_coordinates(latitude, longitude):
     """
     Valida que las coordenadas GPS sean válidas
@@ -0,0 +1,201 @@
+"""
+GPS and capture metadata from video containers (MP4 / QuickTime)
+Metadatos GPS y de captura de contenedores de video (MP4 / QuickTime)
+
+Phones store the recording location as an ISO 6709 string in the container
+metadata, not per frame:
+
+- `moov/udta/©xyz` (Android, older iOS): 2-byte length, 2-byte language,
+  then e.g. "+40.4168-003.7038+650.000/"
+- `moov/meta` keys/ilst (iOS): key
+  "com.apple.quicktime.location.ISO6709" with the same string
+
+Only box headers are read while walking the file (the media data and the
+sample tables are skipped with seeks), so memory use does not depend on
+the video length.
+"""
+
+import re
+import struct
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple, Union
+
+# Metadata boxes larger than this are ignored (they are a few KB in practice)
+MAX_METADATA_BOX_BYTES = 1024 * 1024
+
+LOCATION_KEYS = ("com.apple.quicktime.location.ISO6709",)
+CREATION_KEYS = ("com.apple.quicktime.creationdate",)
+MP4_EPOCH = datetime(1904, 1, 1, tzinfo=timezone.utc)
+
+_ISO6709 = re.compile(r"([+-]\d+(?:\.\d+)?)([+-]\d+(?:\.\d+)?)([+-]\d+(?:\.\d+)?)?")
+
+
+def _boxes(f: BinaryIO, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """(type, payload offset, payload end) of the boxes in [start, end)"""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack(">I4s", header)
+        payload = offset + 8
+        if size == 1:  # 64-bit size
+            size = struct.unpack(">Q", f.read(8))[0]
+            payload += 8
+        elif size == 0:  # Extends to the end of the file / parent
+            size = end - offset
+        if size < payload - offset:
+            return  # Corrupt header
+        yield kind, payload, min(offset + size, end)
+        offset += size
+
+
+def _find(f: BinaryIO, start: int, end: int, kind: bytes) -> Optional[Tuple[int, int]]:
+    return next(((s, e) for k, s, e in _boxes(f, start, end) if k == kind), None)
+
+
+def _read(f: BinaryIO, start: int, end: int) -> bytes:
+    if end - start > MAX_METADATA_BOX_BYTES:
+        return b""
+    f.seek(start)
+    return f.read(end - start)
+
+
+def parse_iso6709(value: str) -> Optional[Dict[str, Optional[float]]]:
+    """
+    Decimal-degree ISO 6709 ("+40.4168-003.7038+650.000/") to lat/lon/alt
+
+    Returns:
+        dict with latitude, longitude and altitude (None if absent), or None
+    """
+    match = _ISO6709.match(value.strip())
+    if not match:
+        return None
+    latitude, longitude = float(match.group(1)), float(match.group(2))
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    altitude = float(match.group(3)) if match.group(3) else None
+    return {"latitude": latitude, "longitude": longitude, "altitude": altitude}
+
+
+def _udta_location(f: BinaryIO, start: int, end: int) -> Optional[str]:
+    box = _find(f, start, end, b"\xa9xyz")
+    if box is None:
+        return None
+    data = _read(f, *box)
+    if len(data) < 4:
+        return None
+    length = struct.unpack(">H", data[:2])[0]
+    return data[4:4 + length].decode("utf-8", errors="ignore")
+
+
+def _keyed_metadata(f: BinaryIO, start: int, end: int) -> Dict[str, str]:
+    """String values of a QuickTime keys/ilst meta box"""
+    keys_box = _find(f, start, end, b"keys")
+    ilst_box = _find(f, start, end, b"ilst")
+    if keys_box is None or ilst_box is None:
+        return {}
+
+    data = _read(f, *keys_box)
+    names = []
+    offset = 8  # version/flags + entry count
+    while offset + 8 <= len(data):
+        size = struct.unpack(">I", data[offset:offset + 4])[0]
+        if size < 8:
+            break
+        names.append(data[offset + 8:offset + size].decode("utf-8", errors="ignore"))
+        offset += size
+
+    values = {}
+    for kind, item_start, item_end in _boxes(f, *ilst_box):
+        index = struct.unpack(">I", kind)[0]
+        data_box = _find(f, item_start, item_end, b"data")
+        if not 1 <= index <= len(names) or data_box is None:
+            continue
+        payload = _read(f, *data_box)
+        if len(payload) > 8 and struct.unpack(">I", payload[:4])[0] == 1:  # UTF-8 value
+            values[names[index - 1]] = payload[8:].decode("utf-8", errors="ignore")
+    return values
+
+
+def _mvhd_creation_time(f: BinaryIO, start: int, end: int) -> Optional[str]:
+    box = _find(f, start, end, b"mvhd")
+    if box is None:
+        return None
+    data = _read(f, *box)
+    if len(data) < 12:
+        return None
+    seconds = struct.unpack(">Q", data[4:12])[0] if data[0] == 1 else struct.unpack(">I", data[4:8])[0]
+    if not seconds:
+        return None
+    return (MP4_EPOCH + timedelta(seconds=seconds)).isoformat()
+
+
+def read_video_metadata(video_path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Location string and creation time from an MP4/QuickTime container
+
+    Returns:
+        dict with iso6709 and creation_time (None when absent or not MP4)
+    """
+    result: Dict[str, Any] = {"iso6709": None, "creation_time": None}
+    with open(video_path, "rb") as f:
+        f.seek(0, 2)
+        size = f.tell()
+        moov = _find(f, 0, size, b"moov")
+        if moov is None:
+            return result
+
+        result["creation_time"] = _mvhd_creation_time(f, *moov)
+        keyed: Dict[str, str] = {}
+        meta = _find(f, *moov, b"meta")
+        if meta is not None:
+            keyed = _keyed_metadata(f, *meta)
+        udta = _find(f, *moov, b"udta")
+
+        result["iso6709"] = next((keyed[k] for k in LOCATION_KEYS if k in keyed), None)
+        if result["iso6709"] is None and udta is not None:
+            result["iso6709"] = _udta_location(f, *udta)
+        result["creation_time"] = next((keyed[k] for k in CREATION_KEYS if k in keyed), result["creation_time"])
+    return result
+
+
+def extract_video_gps(video_path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Extrae la ubicación de grabación de un video (misma forma que extract_image_gps)
+
+    Args:
+        video_path: Ruta al video
+
+    Returns:
+        dict: has_gps, latitude, longitude, altitude, gps_date,
+            location_source ('VIDEO_METADATA') o reason si no hay ubicación
+    """
+    result: Dict[str, Any] = {
+        "has_gps": False,
+        "latitude": None,
+        "longitude": None,
+        "altitude": None,
+        "gps_date": None,
+        "gps_timestamp": None,
+        "location_source": "VIDEO_METADATA"
+    }
+    try:
+        metadata = read_video_metadata(video_path)
+    except (OSError, struct.error) as e:
+        result["reason"] = f"Error reading video metadata: {e}"
+        return result
+
+    if metadata["creation_time"]:
+        result["gps_date"] = metadata["creation_time"][:10]
+    location = parse_iso6709(metadata["iso6709"]) if metadata["iso6709"] else None
+    if location is None:
+        result["reason"] = "No location in video metadata"
+        return result
+
+    result.update(location)
+    result["has_gps"] = True
+    result["coordinates"] = f"{location['latitude']}, {location['longitude']}"
+    return result
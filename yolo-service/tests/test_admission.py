@@ -0,0 +1,163 @@
+"""
+Tests for inference admission control
+Tests para el control de admisión de inferencia
+"""
+
+import asyncio
+import io
+
+import pytest
+from PIL import Image
+
+from src.utils.admission import AdmissionController, Overloaded, image_megapixels
+
+
+class TestAdmissionController:
+    """Test bounded, cost-aware admission"""
+
+    def test_idle_service_admits_any_request(self):
+        admission = AdmissionController(max_concurrency=1, max_queued=0, max_queued_bytes=10)
+
+        ticket = admission.admit(1000, megapixels=50)
+
+        assert admission.snapshot()["queued"] == 1
+        admission.release(ticket)
+        assert admission.snapshot()["held_mb"] == 0
+
+    def test_rejects_when_queue_is_full(self):
+        admission = AdmissionController(max_concurrency=1, max_queued=1)
+        admission.admit(10, megapixels=1)
+        admission.admit(10, megapixels=1)
+
+        with pytest.raises(Overloaded) as exc_info:
+            admission.admit(10, megapixels=1)
+
+        assert exc_info.value.reason == "queue full"
+        assert int(exc_info.value.retry_after_header) >= 1
+        assert admission.snapshot()["saturation"] == 1.0
+        assert admission.rejected == 1
+
+    def test_rejects_on_held_bytes(self):
+        admission = AdmissionController(max_concurrency=2, max_queued=10, max_queued_bytes=100)
+        admission.admit(80, megapixels=1)
+
+        with pytest.raises(Overloaded):
+            admission.check(30)
+        admission.check(20)
+
+    def test_rejects_on_estimated_wait(self):
+        admission = AdmissionController(
+            max_concurrency=1, max_queued=10, max_wait_seconds=5, seconds_per_megapixel=1.0
+        )
+        admission.admit(10, megapixels=4)
+
+        with pytest.raises(Overloaded) as exc_info:
+            admission.admit(10, megapixels=2)
+
+        assert exc_info.value.reason == "estimated wait"
+        assert exc_info.value.retry_after == pytest.approx(4.0)
+
+    def test_slot_bounds_concurrency_and_learns_cost(self):
+        admission = AdmissionController(max_concurrency=1, seconds_per_megapixel=1.0, smoothing=1.0)
+        running = []
+
+        async def job():
+            ticket = admission.admit(10, megapixels=2)
+            try:
+                async with admission.slot(ticket) as run:
+                    running.append(admission.snapshot()["in_flight"])
+                    await run(asyncio.sleep, 0.01)
+            finally:
+                admission.release(ticket)
+
+        async def scenario():
+            await asyncio.gather(job(), job())
+
+        asyncio.run(scenario())
+
+        snapshot = admission.snapshot()
+        assert running == [1, 1]
+        assert snapshot["in_flight"] == snapshot["queued"] == 0
+        assert snapshot["estimated_wait_seconds"] == 0
+        assert admission.seconds_per_megapixel < 0.1
+
+    def test_unobserved_tickets_keep_the_cost_model(self):
+        admission = AdmissionController(seconds_per_megapixel=1.0, smoothing=1.0)
+
+        async def scenario():
+            ticket = admission.admit(0, megapixels=25, observe=False)
+            try:
+                async with admission.slot(ticket) as run:
+                    await run(asyncio.sleep, 0.01)
+            finally:
+                admission.release(ticket)
+
+        asyncio.run(scenario())
+
+        assert admission.seconds_per_megapixel == 1.0
+
+    def test_cancelled_request_keeps_slot_until_work_finishes(self):
+        admission = AdmissionController(max_concurrency=1)
+
+        async def scenario():
+            work = asyncio.Event()
+            ticket = admission.admit(2 * 1048576, megapixels=2)
+
+            async def request():
+                try:
+                    async with admission.slot(ticket) as run:
+                        await run(work.wait)
+                finally:
+                    admission.release(ticket)
+
+            task = asyncio.create_task(request())
+            await asyncio.sleep(0)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            during = admission.snapshot()
+            work.set()
+            await asyncio.sleep(0)
+            return during
+
+        during = asyncio.run(scenario())
+
+        assert (during["in_flight"], during["held_mb"]) == (1, 2.0)
+        snapshot = admission.snapshot()
+        assert snapshot["in_flight"] == snapshot["held_mb"] == 0
+
+    def test_failed_runs_are_not_observed(self):
+        admission = AdmissionController(seconds_per_megapixel=1.0, smoothing=1.0)
+
+        async def fail():
+            raise RuntimeError("inference failed")
+
+        async def scenario():
+            ticket = admission.admit(10, megapixels=2)
+            try:
+                async with admission.slot(ticket) as run:
+                    await run(fail)
+            finally:
+                admission.release(ticket)
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(scenario())
+
+        assert admission.snapshot()["in_flight"] == 0
+        assert admission.seconds_per_megapixel == 1.0
+
+    def test_release_without_running(self):
+        admission = AdmissionController()
+        ticket = admission.admit(10, megapixels=1)
+
+        admission.release(ticket)
+        admission.release(ticket)
+
+        assert admission.snapshot()["queued"] == 0
+
+
+def test_image_megapixels_reads_header():
+    buffer = io.BytesIO()
+    Image.new("RGB", (2000, 1000)).save(buffer, format="PNG")
+
+    assert image_megapixels(buffer.getvalue()) == pytest.approx(2.0)
+    assert image_megapixels(b"not an image") is None
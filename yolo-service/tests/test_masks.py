@@ -0,0 +1,70 @@
+"""
+Tests for vectorized mask post-processing
+Tests para el post-procesamiento vectorizado de máscaras
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from src.core.masks import masks_to_contours, masks_to_polygons, scale_polygons, simplify_polygons
+
+
+def _mask_stack(blobs_per_mask, size=(480, 640), seed=0):
+    rng = np.random.default_rng(seed)
+    masks = np.zeros((len(blobs_per_mask), *size), dtype=np.uint8)
+    for mask, blobs in zip(masks, blobs_per_mask):
+        for _ in range(blobs):
+            center = (int(rng.integers(60, size[1] - 60)), int(rng.integers(60, size[0] - 60)))
+            axes = (int(rng.integers(4, 50)), int(rng.integers(4, 50)))
+            cv2.ellipse(mask, center, axes, float(rng.integers(0, 180)), 0, 360, 1, -1)
+    return masks
+
+
+def _per_mask_contour(mask):
+    contours = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]
+    return contours[0].reshape(-1, 2).astype(np.float32) if contours else np.zeros((0, 2), np.float32)
+
+
+def test_single_findcontours_matches_per_mask():
+    masks = _mask_stack([1] * 50 + [0])
+
+    contours, areas = masks_to_contours(masks.astype(bool))
+
+    assert len(contours) == 51
+    for mask, contour in zip(masks, contours):
+        np.testing.assert_array_equal(contour, _per_mask_contour(mask))
+    np.testing.assert_array_equal(areas, masks.reshape(51, -1).sum(axis=1))
+    assert contours[-1].shape == (0, 2) and areas[-1] == 0
+
+
+def test_multi_blob_masks_match_ultralytics():
+    torch = pytest.importorskip("torch")
+    from ultralytics.utils import ops
+
+    masks = _mask_stack([3, 1, 2, 0], seed=1)
+
+    contours, _ = masks_to_contours(masks.astype(bool))
+
+    for expected, contour in zip(ops.masks2segments(torch.from_numpy(masks)), contours):
+        np.testing.assert_array_equal(contour, expected)
+
+
+def test_scale_polygons_removes_letterbox():
+    # 4000x3000 photo letterboxed into 640x640: gain 0.16, 80 px of vertical padding
+    polygons = [np.array([[0, 80], [640, 560]], np.float32), np.array([[320, 0]], np.float32)]
+
+    scaled = scale_polygons(polygons, (640, 640), (3000, 4000, 3))
+
+    np.testing.assert_allclose(scaled[0], [[0, 0], [4000, 3000]])
+    np.testing.assert_allclose(scaled[1], [[2000, 0]])  # Clipped to the image
+
+
+def test_simplification_is_optional():
+    masks = _mask_stack([1, 1], seed=2).astype(bool)
+
+    exact, _ = masks_to_polygons(masks, (480, 640, 3))
+    simplified, _ = masks_to_polygons(masks, (480, 640, 3), epsilon=2.0)
+
+    assert all(len(s) <= len(e) for s, e in zip(simplified, exact))
+    assert simplify_polygons(exact, 0)[0] is exact[0]
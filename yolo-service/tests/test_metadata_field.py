@@ -0,0 +1,39 @@
+"""
+Tests for metadata handed over by the backend
+Tests para los metadatos enviados por el backend
+"""
+
+import io
+import json
+
+from PIL import Image
+
+from src.utils.gps_metadata import extract_image_metadata, parse_metadata_field
+
+
+def _jpeg_with_gps():
+    exif = Image.Exif()
+    exif[0x0110] = 'Pixel 7'
+    exif[0x8825] = {1: 'S', 2: (26.0, 48.0, 29.88), 3: 'W', 4: (65.0, 13.0, 3.36)}
+    buffer = io.BytesIO()
+    Image.new('RGB', (32, 32)).save(buffer, 'JPEG', exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+def test_backend_metadata_round_trip():
+    extracted = extract_image_metadata(_jpeg_with_gps(), 'photo.jpg')
+
+    metadata = parse_metadata_field(json.dumps(extracted))
+
+    assert metadata['gps'] == extracted['gps']
+    assert metadata['camera']['camera_model'] == 'Pixel 7'
+
+
+def test_invalid_metadata_is_rejected():
+    no_gps = {'gps': {'has_gps': False}, 'camera': {}}
+
+    assert parse_metadata_field(json.dumps(no_gps)) == no_gps
+    assert parse_metadata_field('not json') is None
+    assert parse_metadata_field(json.dumps({'gps': {}})) is None
+    assert parse_metadata_field(json.dumps({'gps': {'has_gps': True, 'latitude': 120.0, 'longitude': 0.5}, 'camera': {}})) is None
+    assert parse_metadata_field(json.dumps({'gps': {'has_gps': True, 'latitude': '1', 'longitude': 2}, 'camera': {}})) is None
@@ -0,0 +1,116 @@
+"""
+Tests for the model registry and hot swap
+Tests para el registro de modelos y el cambio en caliente
+"""
+
+import asyncio
+
+import pytest
+
+from src.core.registry import ModelManager, ModelRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(tmp_path / "registry")
+
+
+def _checkpoint(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+class FakePool:
+    """InferencePool stand-in that records its lifecycle"""
+
+    def __init__(self):
+        self.model_path = None
+        self.stopped = False
+
+    def start(self, model_path, preload=True, deadline=None):
+        self.model_path = model_path
+        return {}
+
+    def shutdown(self):
+        self.stopped = True
+
+
+class TestModelRegistry:
+    """Test content-addressed versions"""
+
+    def test_register_is_idempotent_by_content(self, registry, tmp_path):
+        first = registry.register(_checkpoint(tmp_path, "a.pt", b"weights-1"), {"mask_mAP50": 0.61})
+        again = registry.register(_checkpoint(tmp_path, "copy.pt", b"weights-1"))
+        other = registry.register(_checkpoint(tmp_path, "b.pt", b"weights-2"))
+
+        assert again.version == first.version
+        assert again.metrics == {"mask_mAP50": 0.61}
+        assert other.version != first.version
+        assert {v.version for v in registry.list()} == {first.version, other.version}
+
+    def test_registered_copy_is_immutable(self, registry, tmp_path):
+        source = _checkpoint(tmp_path, "best.pt", b"weights-1")
+        version = registry.register(source)
+
+        (tmp_path / "best.pt").write_bytes(b"retrained")
+
+        assert open(version.path, "rb").read() == b"weights-1"
+
+    def test_active_version(self, registry, tmp_path):
+        version = registry.register(_checkpoint(tmp_path, "a.pt", b"weights-1"))
+        assert registry.active() is None
+
+        registry.set_active(version.version)
+
+        assert ModelRegistry(registry.root).active().version == version.version
+        with pytest.raises(KeyError):
+            registry.set_active("unknown")
+
+    def test_rejects_non_checkpoint(self, registry, tmp_path):
+        with pytest.raises(ValueError):
+            registry.register(_checkpoint(tmp_path, "model.onnx", b"x"))
+        with pytest.raises(FileNotFoundError):
+            registry.register(str(tmp_path / "missing.pt"))
+
+
+def test_swap_drains_in_flight_requests(registry, tmp_path):
+    old = registry.register(_checkpoint(tmp_path, "a.pt", b"weights-1"))
+    new = registry.register(_checkpoint(tmp_path, "b.pt", b"weights-2"))
+    pools = []
+
+    def factory():
+        pools.append(FakePool())
+        return pools[-1]
+
+    manager = ModelManager(registry, pool_factory=factory)
+    manager.start(old)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def slow_request():
+            async with manager.lease() as served:
+                await release.wait()
+                return served.model.version
+
+        request = asyncio.create_task(slow_request())
+        await asyncio.sleep(0)
+        swap = asyncio.create_task(manager.swap(new.version))
+        while manager.swap_state["status"] != "draining":
+            await asyncio.sleep(0.01)
+
+        # New requests already see the new version; the old pool keeps serving
+        async with manager.lease() as served:
+            assert served.model.version == new.version
+        assert not pools[0].stopped
+
+        release.set()
+        await swap
+        return await request
+
+    assert asyncio.run(scenario()) == old.version
+    assert pools[0].stopped and not pools[1].stopped
+    assert pools[1].model_path == new.path
+    assert registry.active().version == new.version
+    assert manager.swap_state == {"status": "idle", "version": new.version}
@@ -0,0 +1,83 @@
+"""
+Tests for draft decode and adaptive input size
+Tests para la decodificación reducida y el tamaño de entrada adaptativo
+"""
+
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+from src.core.preprocess import (
+    PreprocessConfig,
+    decode_image,
+    prepare_image,
+    reduction_factor,
+    scale_segments
+)
+from src.core.runtime import RuntimeConfig, Segment
+from src.core.tiling import TilingConfig
+
+
+@pytest.fixture(scope="module")
+def photo_12mp():
+    image = np.zeros((3000, 4000, 3), dtype=np.uint8)
+    cv2.rectangle(image, (1000, 1000), (2000, 2000), (255, 255, 255), -1)
+    return cv2.imencode(".jpg", image)[1].tobytes()
+
+
+class TestInputSizePolicy:
+    """Test the input size choice"""
+
+    def test_smallest_size_meeting_requirement(self):
+        config = PreprocessConfig(min_detectable_px=12, min_object_fraction={"Basura": 0.02, "Huecos": 0.05})
+
+        assert config.required_size() == 600
+        assert config.choose_input_size(4000) == 640
+
+    def test_smaller_objects_need_larger_input(self):
+        config = PreprocessConfig(min_detectable_px=12, min_object_fraction={"Basura": 0.01})
+
+        assert config.choose_input_size(4000) == 1280
+
+    def test_never_above_native_resolution(self):
+        config = PreprocessConfig(min_detectable_px=12, min_object_fraction={"Basura": 0.01})
+
+        assert config.choose_input_size(400) == 480
+        assert config.choose_input_size(300) == 320
+
+
+def test_reduction_factor():
+    assert reduction_factor(4000, 640) == 4
+    assert reduction_factor(4000, 1280) == 2
+    assert reduction_factor(600, 640) == 1
+
+
+def test_draft_decode_maps_back_to_original(photo_12mp):
+    image, scale = decode_image(photo_12mp, target_long_side=640)
+
+    assert image.shape == (750, 1000, 3)
+    assert scale == 4.0
+
+    full, full_scale = decode_image(photo_12mp)
+    assert full.shape == (3000, 4000, 3) and full_scale == 1.0
+
+
+def test_prepare_image_skips_reduction_when_tiling(photo_12mp):
+    backend = SimpleNamespace(dynamic_input=True, config=RuntimeConfig())
+    config = PreprocessConfig(min_object_fraction={"Basura": 0.02})
+
+    image, scale, imgsz = prepare_image(photo_12mp, backend, TilingConfig(mode="never"), config)
+    assert (image.shape[1], scale, imgsz) == (1000, 4.0, 640)
+
+    image, scale, imgsz = prepare_image(photo_12mp, backend, TilingConfig(mode="always"), config)
+    assert (image.shape[1], scale, imgsz) == (4000, 1.0, None)
+
+
+def test_scale_segments():
+    segment = Segment(0, 0.9, np.array([[10.0, 20.0], [30.0, 40.0], [10.0, 40.0]]), 100.0)
+
+    scale_segments([segment], 4.0)
+
+    assert segment.polygon.tolist() == [[40.0, 80.0], [120.0, 160.0], [40.0, 160.0]]
@@ -0,0 +1,63 @@
+"""
+Parity tests between inference runtimes
+Tests de paridad entre runtimes de inferencia
+
+The exported runtimes (ONNX Runtime, OpenVINO) must return the same
+detections as the PyTorch checkpoint: same classes, close confidences and
+close mask areas.
+"""
+
+import os
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from src.core.runtime import create_backend, load_runtime_config, read_image
+
+MODEL_CANDIDATES = ["models/best.pt", "models/yolo11n-seg.pt", "models/yolo11s-seg.pt"]
+TEST_IMAGES = ["test_images/imagen_test_0.jpg", "test_images/imagen_test_1.jpg"]
+
+
+def _model_path():
+    for path in MODEL_CANDIDATES:
+        if os.path.exists(path):
+            return path
+    pytest.skip("No YOLO model available for testing")
+
+
+def _backend(runtime):
+    config = replace(load_runtime_config(), runtime=runtime)
+    return create_backend(_model_path(), config)
+
+
+@pytest.fixture(scope="module")
+def torch_backend():
+    return _backend("torch")
+
+
+@pytest.mark.parametrize("runtime,module", [("onnx", "onnxruntime"), ("openvino", "openvino")])
+def test_exported_runtime_matches_torch(torch_backend, runtime, module):
+    pytest.importorskip(module)
+    backend = _backend(runtime)
+
+    for image_path in TEST_IMAGES:
+        if not os.path.exists(image_path):
+            continue
+        image = read_image(image_path)
+
+        expected = torch_backend.predict(image, 0.5)
+        actual = backend.predict(image, 0.5)
+
+        # Detections close to the threshold may flip; the rest must match
+        assert abs(len(actual) - len(expected)) <= 1
+        for ref in (s for s in expected if s.confidence >= 0.55):
+            assert any(
+                seg.class_id == ref.class_id
+                and seg.confidence == pytest.approx(ref.confidence, abs=0.05)
+                and seg.mask_area == pytest.approx(ref.mask_area, rel=0.1)
+                for seg in actual
+            ), f"No {runtime} match for class {ref.class_id} ({ref.confidence:.2f})"
+        for seg in actual:
+            assert seg.polygon.ndim == 2 and seg.polygon.shape[1] == 2
+            assert np.all(seg.polygon >= 0)
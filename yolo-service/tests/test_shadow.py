@@ -0,0 +1,86 @@
+"""
+Tests for shadow evaluation of candidate models
+Tests para la evaluación en sombra de modelos candidatos
+"""
+
+import numpy as np
+import pytest
+
+from src.core import shadow
+from src.core.shadow import ShadowStore, compare_detections, polygon_iou
+
+
+def _square(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+def _detection(class_name, confidence, polygon):
+    return {"class": class_name, "confidence": confidence, "polygon": polygon}
+
+
+def test_polygon_iou():
+    assert polygon_iou(np.array(_square(0, 0, 9, 9)), np.array(_square(0, 0, 9, 9))) == 1.0
+    assert polygon_iou(np.array(_square(0, 0, 9, 9)), np.array(_square(0, 0, 9, 4))) == pytest.approx(0.5)
+    assert polygon_iou(np.array(_square(0, 0, 9, 9)), np.array(_square(20, 20, 29, 29))) == 0.0
+
+
+def test_disjoint_boxes_are_not_rasterized(monkeypatch):
+    monkeypatch.setattr(shadow.cv2, "fillPoly", lambda *args: pytest.fail("rasterized a disjoint pair"))
+
+    assert polygon_iou(np.array(_square(0, 0, 9, 9)), np.array(_square(10, 0, 19, 9))) == 0.0
+    comparison = compare_detections(
+        [_detection("Basura", 0.8, _square(0, 0, 99, 99))],
+        [_detection("Basura", 0.8, _square(200, 0, 299, 99)), _detection("Huecos", 0.6, [[0, 0], [5, 5]])]
+    )
+
+    assert (comparison["matched"], comparison["missed"], comparison["extra"]) == (0, 1, 2)
+
+
+class TestCompareDetections:
+    """Test production vs. candidate matching"""
+
+    def test_match_miss_and_extra(self):
+        production = [
+            _detection("Basura", 0.8, _square(0, 0, 99, 99)),
+            _detection("Huecos", 0.7, _square(200, 200, 249, 249))
+        ]
+        candidate = [
+            _detection("Basura", 0.9, _square(2, 0, 99, 99)),
+            _detection("Basura", 0.6, _square(400, 400, 449, 449))
+        ]
+
+        comparison = compare_detections(production, candidate)
+
+        assert (comparison["matched"], comparison["missed"], comparison["extra"]) == (1, 1, 1)
+        assert comparison["mean_confidence_delta"] == pytest.approx(0.1)
+        assert comparison["confusion"] == {"Basura->Basura": 1}
+        assert comparison["per_class"]["Huecos"] == {"production": 1, "matched": 0}
+
+    def test_class_change_counts_as_confusion(self):
+        comparison = compare_detections(
+            [_detection("Charcos/Cumulo de agua", 0.8, _square(0, 0, 99, 99))],
+            [_detection("Huecos", 0.8, _square(0, 0, 99, 99))]
+        )
+
+        assert comparison["matched"] == 1
+        assert comparison["confusion"] == {"Charcos/Cumulo de agua->Huecos": 1}
+        assert comparison["per_class"]["Charcos/Cumulo de agua"]["matched"] == 0
+
+
+def test_store_summary(tmp_path):
+    store = ShadowStore(tmp_path / "shadow.db")
+    comparison = compare_detections(
+        [_detection("Basura", 0.8, _square(0, 0, 99, 99)), _detection("Huecos", 0.7, _square(200, 200, 249, 249))],
+        [_detection("Basura", 0.7, _square(0, 0, 99, 99))]
+    )
+    store.record("prod1", "cand1", comparison, 200.0, 100.0)
+    store.record("prod1", "cand1", comparison, 220.0, 110.0)
+
+    summary = store.summary("cand1")
+
+    assert summary["images"] == 2
+    assert summary["recall_agreement"] == 0.5
+    assert summary["precision_agreement"] == 1.0
+    assert summary["per_class_recall_agreement"] == {"Basura": 1.0, "Huecos": 0.0}
+    assert summary["speedup"] == pytest.approx(2.0, rel=0.05)
+    assert store.summary("other") == {"candidate_version": "other", "images": 0}
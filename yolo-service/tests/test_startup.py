@@ -0,0 +1,75 @@
+"""
+Tests for startup warm-up and readiness tracking
+Tests para el calentamiento de arranque y el estado de disponibilidad
+"""
+
+import time
+
+from src.core.runtime import RuntimeConfig
+from src.core.startup import StartupTracker, warm_up, warmup_sizes
+
+
+class FakeBackend:
+    """Backend stand-in that records the input size of each pass"""
+
+    def __init__(self, dynamic_input=True, imgsz=640):
+        self.dynamic_input = dynamic_input
+        self.config = RuntimeConfig(imgsz=imgsz)
+        self.calls = []
+
+    def predict(self, image, conf_threshold, imgsz=None):
+        self.calls.append((image.shape[0], imgsz))
+        return []
+
+
+def test_warmup_sizes_most_likely_first():
+    sizes = warmup_sizes(FakeBackend())
+
+    assert sizes[0] == 640
+    assert sorted(sizes) == [320, 480, 640, 960, 1280]
+    assert warmup_sizes(FakeBackend(dynamic_input=False, imgsz=480)) == [480]
+
+
+def test_warm_up_runs_every_size():
+    backend = FakeBackend()
+
+    report = warm_up(backend, passes=2)
+
+    assert set(report["sizes_ms"]) == {320, 480, 640, 960, 1280}
+    assert report["skipped"] == []
+    assert len(backend.calls) == 10
+    assert all(shape == size for shape, size in backend.calls)
+
+
+def test_expired_budget_keeps_only_first_size():
+    backend = FakeBackend()
+
+    report = warm_up(backend, deadline=time.time() - 1, passes=1)
+
+    assert list(report["sizes_ms"]) == [640]
+    assert sorted(report["skipped"]) == [320, 480, 960, 1280]
+
+
+class TestStartupTracker:
+    """Test phase timing and readiness"""
+
+    def test_phases_and_ready(self):
+        tracker = StartupTracker(budget_seconds=60)
+        with tracker.phase("resolve"):
+            pass
+
+        assert tracker.status == "starting" and not tracker.ready
+        tracker.finish()
+
+        snapshot = tracker.snapshot()
+        assert tracker.ready
+        assert "resolve" in snapshot["phases_ms"]
+        assert snapshot["over_budget"] is False
+
+    def test_failure_is_reported(self):
+        tracker = StartupTracker(budget_seconds=60)
+
+        tracker.fail(FileNotFoundError("no model"))
+
+        assert tracker.snapshot()["status"] == "failed"
+        assert tracker.snapshot()["error"] == "no model"
@@ -0,0 +1,109 @@
+"""
+Tests for tiled inference
+Tests para la inferencia por teselas
+"""
+
+import numpy as np
+import pytest
+
+from src.core.runtime import Segment
+from src.core.tiling import TilingConfig, merge_segments, plan_tiles, predict_tiled
+
+
+def _square(x0, y0, x1, y1, class_id=0, confidence=0.8):
+    polygon = np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.float32)
+    return Segment(class_id, confidence, polygon, float((x1 - x0) * (y1 - y0)))
+
+
+class TestPlanTiles:
+    """Test tile layout"""
+
+    def test_tiles_cover_image_with_overlap(self):
+        tiles = plan_tiles(3000, 4000, 640, 0.2)
+
+        coverage = np.zeros((3000, 4000), dtype=bool)
+        for x0, y0, x1, y1 in tiles:
+            assert (x1 - x0, y1 - y0) == (640, 640)
+            coverage[y0:y1, x0:x1] = True
+        assert coverage.all()
+        assert tiles[1][0] - tiles[0][0] == 512
+
+    def test_small_image_is_one_tile(self):
+        assert plan_tiles(480, 600, 640, 0.2) == [(0, 0, 600, 480)]
+
+
+class TestShouldTile:
+    """Test automatic tiling decision"""
+
+    def test_auto_uses_size_threshold(self):
+        config = TilingConfig(mode="auto", min_side=2000)
+
+        assert config.should_tile((3000, 4000, 3))
+        assert not config.should_tile((1080, 1920, 3))
+
+    def test_modes(self):
+        assert TilingConfig(mode="always").should_tile((1080, 1920, 3))
+        assert not TilingConfig(mode="always").should_tile((480, 640, 3))
+        assert not TilingConfig(mode="never").should_tile((3000, 4000, 3))
+
+
+class TestMergeSegments:
+    """Test cross-tile merge"""
+
+    def test_duplicate_from_overlapping_tiles_is_merged(self):
+        merged = merge_segments(
+            [_square(500, 500, 600, 600, confidence=0.7), _square(505, 500, 600, 600, confidence=0.9)],
+            (3000, 4000)
+        )
+
+        assert len(merged) == 1
+        assert merged[0].confidence == 0.9
+        assert merged[0].mask_area == pytest.approx(101 * 101, rel=0.05)
+
+    def test_object_split_by_border_joined_through_full_image_detection(self):
+        left = _square(600, 100, 640, 200)
+        right = _square(640, 100, 700, 200)
+        full = _square(598, 98, 702, 202, confidence=0.6)
+
+        merged = merge_segments([left, right, full], (3000, 4000))
+
+        assert len(merged) == 1
+        xs, ys = merged[0].polygon[:, 0], merged[0].polygon[:, 1]
+        assert xs.min() <= 600 and xs.max() >= 700
+        assert ys.min() <= 100 and ys.max() >= 200
+
+    def test_distinct_objects_and_classes_are_kept(self):
+        merged = merge_segments(
+            [_square(0, 0, 50, 50), _square(500, 500, 550, 550), _square(0, 0, 50, 50, class_id=1)],
+            (3000, 4000)
+        )
+
+        assert len(merged) == 3
+
+
+class _CornerBackend:
+    """Detects one object in the top-left corner of every input"""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_batch(self, images, conf_threshold):
+        self.batches.append(len(images))
+        return [[_square(10, 10, 60, 60)] for _ in images]
+
+
+def test_predict_tiled_runs_tiles_in_batches():
+    backend = _CornerBackend()
+    image = np.zeros((3000, 4000, 3), dtype=np.uint8)
+    config = TilingConfig(mode="always", tile_size=640, overlap=0.2, batch_size=16)
+
+    segments, tiles = predict_tiled(backend, image, 0.5, config)
+
+    # One object per tile, in image coordinates; the whole-image one merges with the first tile
+    assert len(segments) == tiles
+    assert {tuple(s.polygon.min(axis=0)) for s in segments} == {
+        (x0 + 10, y0 + 10) for x0, y0, _, _ in plan_tiles(3000, 4000, 640, 0.2)
+    }
+    assert tiles == len(plan_tiles(3000, 4000, 640, 0.2))
+    assert sum(backend.batches) == tiles + 1  # Tiles + whole image
+    assert max(backend.batches) == 16
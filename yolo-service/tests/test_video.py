@@ -0,0 +1,219 @@
+"""
+Tests for video ingestion: sampling, tracking and container metadata
+Tests para la ingesta de video: muestreo, seguimiento y metadatos
+"""
+
+import struct
+
+import cv2
+import numpy as np
+import pytest
+
+from src.core.runtime import RuntimeConfig, Segment
+from src.core.video import (
+    FrameSampler, SiteTracker, VideoConfig, analyze_video, dhash, estimate_megapixels, estimate_shift, hamming,
+    probe_video
+)
+from src.utils.admission import AdmissionController
+from src.utils.video_metadata import extract_video_gps, parse_iso6709
+
+FPS = 10
+SIZE = (320, 240)
+
+
+def _scene(seed=0):
+    """Textured scene larger than the frame (so panning changes the hash)"""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 255, (60, 160, 3), dtype=np.uint8)
+    return cv2.resize(small, (1280, 480), interpolation=cv2.INTER_LINEAR)
+
+
+def _write_video(path, offsets):
+    """One frame per x offset into the scene"""
+    scene = _scene()
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), FPS, SIZE)
+    for x in offsets:
+        writer.write(np.ascontiguousarray(scene[:SIZE[1], x:x + SIZE[0]]))
+    writer.release()
+    return path
+
+
+def _segment(x0, y0, x1, y1, class_id=0, confidence=0.8):
+    polygon = np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.float32)
+    return Segment(class_id=class_id, confidence=confidence, polygon=polygon, mask_area=float((x1 - x0) * (y1 - y0)))
+
+
+class TestSampling:
+    """Test hashing and adaptive frame sampling"""
+
+    def test_dhash_distance(self):
+        scene = cv2.cvtColor(_scene(), cv2.COLOR_BGR2GRAY)
+
+        assert hamming(dhash(scene), dhash(scene.copy())) == 0
+        assert hamming(dhash(scene[:, :320]), dhash(scene[:, 640:960])) > 10
+
+    def test_static_scene_sampled_at_max_interval(self, tmp_path):
+        path = _write_video(tmp_path / "static.mp4", [0] * 100)  # 10 s
+        config = VideoConfig(min_interval_s=0.5, max_interval_s=4.0)
+
+        sampler = FrameSampler(path, config)
+        timestamps = [frame.timestamp for frame in sampler]
+
+        assert timestamps == [0.0, 4.0, 8.0]
+        assert sampler.frames_decoded == 100
+
+    def test_panning_sampled_at_candidate_rate(self, tmp_path):
+        path = _write_video(tmp_path / "pan.mp4", range(0, 900, 20)[:40])  # 4 s, fast pan
+        config = VideoConfig(min_interval_s=0.5, max_interval_s=4.0)
+
+        timestamps = [frame.timestamp for frame in FrameSampler(path, config)]
+
+        assert timestamps == [0.0, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 3.5]
+
+    def test_max_frames_truncates(self, tmp_path):
+        path = _write_video(tmp_path / "pan.mp4", range(0, 900, 20)[:40])
+
+        sampler = FrameSampler(path, VideoConfig(min_interval_s=0.5, max_frames=3))
+        frames = list(sampler)
+
+        assert len(frames) == 3 and sampler.truncated
+
+    def test_probe(self, tmp_path):
+        path = _write_video(tmp_path / "static.mp4", [0] * 20)
+
+        info = probe_video(path)
+
+        assert (info["width"], info["height"], info["fps"]) == (320, 240, 10.0)
+        assert info["duration_s"] == pytest.approx(2.0)
+        assert probe_video(tmp_path / "missing.mp4") is None
+
+    def test_shift_estimate(self):
+        scene = cv2.cvtColor(_scene(), cv2.COLOR_BGR2GRAY)[:90, :400]
+
+        dx, dy = estimate_shift(scene[:, 10:170], scene[:, 2:162])
+
+        assert dx == pytest.approx(8, abs=0.5) and dy == pytest.approx(0, abs=0.5)
+
+
+class TestAdmissionCost:
+    """Test the admission cost of a video"""
+
+    def test_frames_priced_at_input_size(self):
+        info = {"width": 1920, "height": 1080, "duration_s": 30.0}
+
+        assert estimate_megapixels(info, VideoConfig(), 640) == pytest.approx(61 * 640 * 640 / 1e6)
+        assert estimate_megapixels({**info, "width": 320, "height": 240}, VideoConfig(), 640) == (
+            pytest.approx(61 * 320 * 240 / 1e6)
+        )
+
+    def test_video_admitted_next_to_a_queued_photo(self):
+        admission = AdmissionController(max_concurrency=4, max_wait_seconds=20)
+        admission.admit(1000, megapixels=12)
+        info = {"width": 1920, "height": 1080, "duration_s": 30.0}
+
+        ticket = admission.admit(0, estimate_megapixels(info, VideoConfig(), 640), observe=False)
+
+        assert ticket.observe is False
+        assert admission.snapshot()["queued"] == 2
+
+
+class TestSiteTracker:
+    """Test that each site is reported once"""
+
+    def test_same_site_across_frames(self):
+        tracker = SiteTracker(iou_threshold=0.3, max_gap_s=3.0)
+        for t, dx in enumerate([0, 5, 10, 15]):
+            tracker.update(float(t), [_segment(100 + dx, 100, 160 + dx, 150, confidence=0.5 + t / 10)])
+
+        sites = tracker.sites()
+        assert len(sites) == 1
+        assert sites[0].hits == 4 and (sites[0].first_seen, sites[0].last_seen) == (0.0, 3.0)
+        assert sites[0].best.confidence == pytest.approx(0.8) and sites[0].best_time == 3.0
+
+    def test_class_and_gap_split_tracks(self):
+        tracker = SiteTracker(iou_threshold=0.3, max_gap_s=1.0)
+        tracker.update(0.0, [_segment(0, 0, 50, 50, class_id=0), _segment(0, 0, 50, 50, class_id=1)])
+        tracker.update(0.5, [_segment(0, 0, 50, 50, class_id=0)])
+        tracker.update(5.0, [_segment(0, 0, 50, 50, class_id=0)])  # After the gap: new site
+
+        assert [(t.class_id, t.hits) for t in tracker.sites()] == [(0, 2), (1, 1), (0, 1)]
+        assert [t.track_id for t in tracker.sites(min_hits=2)] == [1]
+
+    def test_camera_motion_is_compensated(self):
+        tracker = SiteTracker(iou_threshold=0.3)
+        tracker.update(0.0, [_segment(100, 100, 140, 140)])
+        tracker.update(0.5, [_segment(180, 100, 220, 140)], shift=(80.0, 0.0))
+
+        assert len(tracker.sites()) == 1
+
+
+class FakeBackend:
+    """Returns one fixed detection per frame, records batch sizes"""
+
+    dynamic_input = False
+
+    def __init__(self):
+        self.config = RuntimeConfig(imgsz=320)
+        self.batches = []
+
+    def predict_batch(self, images, conf_threshold, imgsz=None):
+        self.batches.append(len(images))
+        return [[_segment(100, 100, 160, 150)] for _ in images]
+
+
+def test_analyze_video_reports_each_site_once(tmp_path):
+    path = _write_video(tmp_path / "static.mp4", [0] * 100)
+    backend = FakeBackend()
+
+    analysis = analyze_video(backend, str(path), 0.5, VideoConfig(min_interval_s=0.5, max_interval_s=1.0, batch_size=4))
+
+    assert analysis["frames_sampled"] == 10
+    assert backend.batches == [4, 4, 2]
+    assert len(analysis["sites"]) == 1 and analysis["sites"][0].hits == 10
+
+
+def _box(kind, payload):
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+class TestVideoMetadata:
+    """Test recording location from MP4 containers"""
+
+    def test_parse_iso6709(self):
+        assert parse_iso6709("+40.4168-003.7038+650.000/") == {
+            "latitude": 40.4168, "longitude": -3.7038, "altitude": 650.0
+        }
+        assert parse_iso6709("-34.6037-058.3816/")["altitude"] is None
+        assert parse_iso6709("not a location") is None
+
+    def test_udta_location(self, tmp_path):
+        location = b"-34.6037-058.3816/"
+        xyz = _box(b"\xa9xyz", struct.pack(">HH", len(location), 0x15c7) + location)
+        moov = _box(b"moov", _box(b"udta", xyz))
+        path = tmp_path / "android.mp4"
+        path.write_bytes(_box(b"ftyp", b"isom") + _box(b"mdat", b"\0" * 1000) + moov)
+
+        gps = extract_video_gps(path)
+
+        assert gps["has_gps"] and gps["location_source"] == "VIDEO_METADATA"
+        assert (gps["latitude"], gps["longitude"]) == (-34.6037, -58.3816)
+
+    def test_quicktime_keys(self, tmp_path):
+        key = b"com.apple.quicktime.location.ISO6709"
+        keys = _box(b"keys", struct.pack(">II", 0, 1) + struct.pack(">I4s", 8 + len(key), b"mdta") + key)
+        value = b"+40.4168-003.7038+650.000/"
+        ilst = _box(b"ilst", _box(struct.pack(">I", 1), _box(b"data", struct.pack(">II", 1, 0) + value)))
+        meta = _box(b"meta", _box(b"hdlr", b"\0" * 24) + keys + ilst)
+        path = tmp_path / "iphone.mov"
+        path.write_bytes(_box(b"ftyp", b"qt  ") + _box(b"moov", meta))
+
+        gps = extract_video_gps(path)
+
+        assert gps["has_gps"] and gps["altitude"] == 650.0
+
+    def test_no_location(self, tmp_path):
+        path = _write_video(tmp_path / "static.mp4", [0] * 5)
+
+        gps = extract_video_gps(path)
+
+        assert not gps["has_gps"] and gps["reason"]
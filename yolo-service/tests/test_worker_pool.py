@@ -0,0 +1,89 @@
+"""
+Tests for the inference worker pool
+Tests para el pool de workers de inferencia
+"""
+
+import asyncio
+import os
+import signal
+from pathlib import Path
+
+import pytest
+
+from src.core.worker_pool import InferencePool
+
+MODEL_CANDIDATES = ["models/best.pt", "models/yolo11n-seg.pt", "models/yolo11s-seg.pt"]
+TEST_IMAGE = "test_images/imagen_test_0.jpg"
+
+
+def _model_path():
+    for path in MODEL_CANDIDATES:
+        if os.path.exists(path):
+            return path
+    pytest.skip("No YOLO model available for testing")
+
+
+def _image_path():
+    if not os.path.exists(TEST_IMAGE):
+        pytest.skip("No test image available")
+    return TEST_IMAGE
+
+
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        InferencePool(mode="fiber")
+
+
+def test_detect_before_start_fails():
+    with pytest.raises(RuntimeError):
+        asyncio.run(InferencePool().detect("image.jpg"))
+
+
+@pytest.fixture(scope="module")
+def process_pool():
+    pool = InferencePool(max_workers=2, mode="process", worker_threads=1)
+    pool.start(_model_path())
+    yield pool
+    pool.shutdown()
+
+
+def test_process_mode_matches_thread_mode(process_pool, tmp_path):
+    image_path = _image_path()
+    content = Path(image_path).read_bytes()
+    options = dict(conf_threshold=0.5, include_gps=False, save_processed_image=False)
+
+    thread_pool = InferencePool(max_workers=1, mode="thread")
+    thread_pool.start(_model_path())
+    try:
+        expected = asyncio.run(thread_pool.detect(image_path, **options))
+    finally:
+        thread_pool.shutdown()
+    actual = asyncio.run(process_pool.detect(image_path, content=content, **options))
+
+    assert actual["total_detections"] == expected["total_detections"]
+    assert [d["class_id"] for d in actual["detections"]] == [d["class_id"] for d in expected["detections"]]
+
+
+def test_process_pool_recovers_from_worker_crash(process_pool):
+    image_path = _image_path()
+    options = dict(conf_threshold=0.5, include_gps=False, save_processed_image=False)
+
+    for process in list(process_pool._executor._processes.values()):
+        os.kill(process.pid, signal.SIGKILL)
+
+    result = asyncio.run(process_pool.detect(image_path, **options))
+
+    assert "detections" in result
+    assert process_pool.restarts == 1
+    assert process_pool.snapshot()["running"]
+
+
+def test_merge_warmup_reports_keeps_slowest_worker():
+    from src.core.worker_pool import merge_warmup_reports
+
+    merged = merge_warmup_reports([
+        {"load_ms": 900.0, "sizes_ms": {640: 120.0, 320: 40.0}, "skipped": []},
+        {"load_ms": 1100.0, "sizes_ms": {640: 100.0}, "skipped": [320]}
+    ])
+
+    assert merged == {"load_ms": 1100.0, "sizes_ms": {640: 120.0, 320: 40.0}, "skipped": [320]}